@@ -1,10 +1,8 @@
 import json
-from dotenv import load_dotenv
-
-# Load .env file
-load_dotenv()
+from utils.tracing import traced
 
 
+@traced()
 def prompt_expander(user_prompt: str):
     print("\n🟠 [PROMPT EXPANDER] describing prompt...")
 
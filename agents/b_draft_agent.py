@@ -1,10 +1,11 @@
 import re
-from dotenv import load_dotenv
 from agents.llm_client import get_llm_response
+from agents.llm_stop import fence_closed, html_document
+from utils.tracing import traced
+from utils.design_system import build_design_system
+from utils.html_completeness import CONTINUATION_SYSTEM_PROMPT, complete_html, extract_html
 
-# Load API key dari .env
-load_dotenv()
-
+@traced()
 def draft_agent(prompt_expander: dict):
     print("\n\n🟢 [DRAFT UI AGENT] Creating a draft UI...")
 
@@ -69,6 +70,7 @@ Your task is to generate a complete, high-quality HTML file that reflects modern
             user_prompt=user_prompt,
             max_tokens=32000,  # Increased for complete HTML generation
             temperature=0.7,
+            stop_when=html_document(),  # stream ends at the closing fence / </html>
         )
         print("\n✅ Draft created successfully")
 
@@ -79,148 +81,18 @@ Your task is to generate a complete, high-quality HTML file that reflects modern
     # Remove <think> tags (from models like DeepSeek)
     full_response = re.sub(r'<think>.*?</think>', '', full_response, flags=re.DOTALL | re.IGNORECASE)
     
-    # STRICT: Only extract content between ```html and ```
-    # This prevents any thinking/explanation text from being included
-    code_matches = re.findall(
-        r"```html\s*(.*?)```", full_response, re.DOTALL | re.IGNORECASE
-    )
-
-    if code_matches:
-        # Take the first match (should be the only one)
-        get_draft = code_matches[0].strip()
-        print(f"  ✅ Extracted HTML from ```html block (length: {len(get_draft)} chars)")
-        
-        # Debug: show last 100 chars
-        print(f"  📝 Last 100 chars: ...{get_draft[-100:]}")
-        
-        # Check if HTML is complete
-        ends_with_html = get_draft.endswith('</html>')
-        print(f"  🔍 Ends with </html>: {ends_with_html}")
-        
-        if not ends_with_html:
-            print("  ⚠️ Warning: HTML appears incomplete (missing </html>)")
-            print("  🔄 Attempting to continue generation...")
-            
-            # Try to continue the generation
-            continuation_prompt = f"""
-Continue the HTML code from where it was cut off. 
-
-Here's the incomplete HTML:
-```html
-{get_draft[-1000:]}
-```
-
-Continue from the last line and complete the HTML structure. Make sure to:
-1. Close all open tags
-2. End with </body> and </html>
-3. Return ONLY the continuation part in ```html block
-
-Start from where the code was cut off and complete it.
-"""
-            
-            try:
-                continuation_response = get_llm_response(
-                    system_prompt="You are an HTML completion expert. Complete the incomplete HTML structure.",
-                    user_prompt=continuation_prompt,
-                    temperature=0.3,
-                    max_tokens=32000,
-                )
-                
-                # Extract continuation
-                continuation_matches = re.findall(
-                    r"```html\s*(.*?)```", continuation_response, re.DOTALL | re.IGNORECASE
-                )
-                
-                if continuation_matches:
-                    continuation = continuation_matches[0].strip()
-                    # Merge with original
-                    get_draft = get_draft + "\n" + continuation
-                    print(f"  ✅ Continuation added (total length: {len(get_draft)} chars)")
-                    
-                    # Check again
-                    if get_draft.endswith('</html>'):
-                        print("  ✅ HTML structure now complete")
-                    else:
-                        print("  ⚠️ Still incomplete, but proceeding...")
-                else:
-                    print("  ⚠️ Could not extract continuation, proceeding with incomplete HTML")
-                    
-            except Exception as e:
-                print(f"  ⚠️ Continuation failed: {str(e)[:100]}")
-                print("  💡 Proceeding with incomplete HTML")
-        else:
-            print("  ✅ HTML structure complete")
-    else:
-        # Fallback: Try to extract HTML tags directly
-        # This handles cases where LLM doesn't use markdown code blocks
-        tag_match = re.search(
-            r"<html.*?>.*?</html>", full_response, re.DOTALL | re.IGNORECASE
-        )
-        if tag_match:
-            get_draft = tag_match.group(0).strip()
-            print(f"  ✅ Extracted HTML from tags (length: {len(get_draft)} chars)")
-        else:
-            # Last resort: Use raw response but warn
-            print("  ⚠️ No code block or HTML tags found, using raw response")
-            get_draft = full_response.strip()
-            print(f"  📝 Raw response length: {len(get_draft)} chars")
-        
-        # Check if HTML is complete (for fallback path too)
-        print(f"  📝 Last 100 chars: ...{get_draft[-100:]}")
-        ends_with_html = get_draft.endswith('</html>')
-        print(f"  🔍 Ends with </html>: {ends_with_html}")
-        
-        if not ends_with_html:
-            print("  ⚠️ Warning: HTML appears incomplete (missing </html>)")
-            print("  🔄 Attempting to continue generation...")
-            
-            # Try to continue the generation
-            continuation_prompt = f"""
-Continue the HTML code from where it was cut off. 
-
-Here's the incomplete HTML (last 1000 chars):
-```
-{get_draft[-1000:]}
-```
-
-Continue from the last line and complete the HTML structure. Make sure to:
-1. Close all open tags
-2. End with </body> and </html>
-3. Return ONLY the continuation part in ```html block
-
-Start from where the code was cut off and complete it.
-"""
-            
-            try:
-                continuation_response = get_llm_response(
-                    system_prompt="You are an HTML completion expert. Complete the incomplete HTML structure.",
-                    user_prompt=continuation_prompt,
-                    temperature=0.3,
-                    max_tokens=8000,
-                )
-                
-                # Extract continuation
-                continuation_matches = re.findall(
-                    r"```html\s*(.*?)```", continuation_response, re.DOTALL | re.IGNORECASE
-                )
-                
-                if continuation_matches:
-                    continuation = continuation_matches[0].strip()
-                    # Merge with original
-                    get_draft = get_draft + "\n" + continuation
-                    print(f"  ✅ Continuation added (total length: {len(get_draft)} chars)")
-                    
-                    # Check again
-                    if get_draft.endswith('</html>'):
-                        print("  ✅ HTML structure now complete")
-                    else:
-                        print("  ⚠️ Still incomplete, but proceeding...")
-                else:
-                    print("  ⚠️ Could not extract continuation, proceeding with incomplete HTML")
-                    
-            except Exception as e:
-                print(f"  ⚠️ Continuation failed: {str(e)[:100]}")
-                print("  💡 Proceeding with incomplete HTML")
+    # ```html block (cut off when the response hit the token limit), <html> tags, or the raw text
+    get_draft = extract_html(full_response)
+    print(f"  ✅ Extracted HTML (length: {len(get_draft)} chars)")
+
+    # Truncated: continue from the open-tag path + a short tail, stitched without overlap
+    get_draft = complete_html(get_draft, lambda prompt: get_llm_response(
+        system_prompt=CONTINUATION_SYSTEM_PROMPT,
+        user_prompt=prompt,
+        temperature=0.3,
+        max_tokens=8000,
+        stop_when=fence_closed("html"),
+    ))
 
     # Final cleanup: Remove any markdown code block markers that might remain
     get_draft = get_draft.strip()
@@ -233,4 +105,7 @@ Start from where the code was cut off and complete it.
     
     print(f"  🧹 Final cleanup done, draft length: {len(get_draft)} chars")
     
+    # 🎨 Shared design system for the layout/component/fix stages
+    build_design_system(get_draft, "draft")
+    
     return {"prompt": prompt_expander["new_prompt"], "draft": get_draft}
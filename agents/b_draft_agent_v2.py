@@ -1,11 +1,15 @@
 import re
 import os
-from dotenv import load_dotenv
 from agents.llm_client import get_llm_response
+from agents.llm_stop import fence_closed, html_document, json_complete
+from utils.tracing import span, traced
+from utils.design_system import build_design_system, load_design_system, prompt_summary
+from utils.html_completeness import CONTINUATION_SYSTEM_PROMPT, HtmlCompletenessTracker, complete_html, extract_html
 
-load_dotenv()
+DETECTION_SCHEMA = {"multiple_pages?": bool, "pages": list}
 
 
+@traced()
 def draft_agent_multi(prompt_expander: dict, callback=None):
     """
     Enhanced draft agent that can generate multiple HTML drafts
@@ -110,20 +114,19 @@ Respond ONLY with JSON. No explanations.
 """
 
     try:
+        stop = json_complete(DETECTION_SCHEMA)
         detection_response = get_llm_response(
             system_prompt=detection_system,
             user_prompt=detection_prompt,
             max_tokens=1000,
             temperature=0.3,
+            stop_when=stop,
         )
         
-        # Parse detection result
-        import json
-        json_match = re.search(r'\{.*\}', detection_response, re.DOTALL)
-        if json_match:
-            detection = json.loads(json_match.group(0))
-        else:
-            detection = {"multiple_pages": False, "pages": [{"name": "main", "description": "single page"}]}
+        # Parse detection result (already parsed while streaming when complete)
+        detection = stop.parsed(detection_response) or {
+            "multiple_pages": False, "pages": [{"name": "main", "description": "single page"}]
+        }
             
     except Exception as e:
         print(f"⚠️ Detection failed, assuming single page: {e}")
@@ -177,22 +180,26 @@ Respond ONLY with JSON. No explanations.
         # Save individual draft
         os.makedirs("output/drafts", exist_ok=True)
         draft_path = f"output/drafts/{page_name}.html"
-        with open(draft_path, "w", encoding="utf-8") as f:
+        with span("write", kind="file", path=draft_path), open(draft_path, "w", encoding="utf-8") as f:
             f.write(draft_html)
         print(f"  ✅ Saved: {draft_path}")
         
+        # 🎨 First page defines the shared design system for the whole job
+        if idx == 1:
+            build_design_system(draft_html, page_name)
+        
         # Send page draft complete callback
         send_update({"type": "page_draft_complete", "page_name": page_name, "index": idx, "total": len(pages)})
 
     # Create index page with navigation to all drafts
     if len(pages) > 1:
         index_html = create_draft_index(pages, drafts)
-        with open("output/draft.html", "w", encoding="utf-8") as f:
+        with span("write", kind="file", path="output/draft.html"), open("output/draft.html", "w", encoding="utf-8") as f:
             f.write(index_html)
         print(f"\n📁 Main draft index: output/draft.html")
     else:
         # Single page - use it as main draft
-        with open("output/draft.html", "w", encoding="utf-8") as f:
+        with span("write", kind="file", path="output/draft.html"), open("output/draft.html", "w", encoding="utf-8") as f:
             f.write(drafts[pages[0]['name']])
         print(f"\n📁 Draft saved: output/draft.html")
 
@@ -204,44 +211,25 @@ Respond ONLY with JSON. No explanations.
     }
 
 
+@traced()
 def generate_single_draft(full_prompt: str, page_name: str, page_desc: str, current: int, total: int, all_pages: list = None):
     """Generate a single HTML draft for a specific page"""
     
-    # For pages after the first, extract FULL templates from first page
+    # For pages after the first, reuse the design system of the first page
     if total > 1 and current > 1 and all_pages:
-        first_page_name = all_pages[0]['name']
-        first_draft_path = f"output/drafts/{first_page_name}.html"
-        
-        if os.path.exists(first_draft_path):
-            with open(first_draft_path, 'r', encoding='utf-8') as f:
-                first_content = f.read()
-            
-            # Extract navbar (full HTML)
-            nav_match = re.search(r'<(?:nav|header)[^>]*>.*?</(?:nav|header)>', first_content, re.DOTALL)
-            navbar_template = nav_match.group(0) if nav_match else ""
-            
-            # Extract footer (full HTML)
-            footer_match = re.search(r'<footer[^>]*>.*?</footer>', first_content, re.DOTALL)
-            footer_template = footer_match.group(0) if footer_match else ""
-            
-            # Extract CSS (from <style> tag)
-            css_match = re.search(r'<style[^>]*>(.*?)</style>', first_content, re.DOTALL)
-            css_template = css_match.group(1) if css_match else ""
-            
-            # Extract JavaScript (from <script> tags, excluding CDN)
-            js_matches = re.findall(r'<script(?![^>]*src=)[^>]*>(.*?)</script>', first_content, re.DOTALL)
-            js_template = '\n'.join(js_matches) if js_matches else ""
-            
+        design = load_design_system()
+        if design:
             # Use template-based generation for consistency
             return generate_from_template(
-                navbar_template,
-                footer_template,
-                css_template,
-                js_template,
+                design["navbar"],
+                design["footer"],
+                design["css"],
+                design["js"],
                 page_name,
                 page_desc,
                 full_prompt,
-                all_pages
+                all_pages,
+                design
             )
     
     # First page or single page - generate from scratch
@@ -345,6 +333,7 @@ Focus on this specific page content while maintaining STRICT design consistency.
             user_prompt=user_prompt,
             max_tokens=32000,  # Increased for complete HTML generation
             temperature=0.7,
+            stop_when=html_document(),  # stream ends at the closing fence / </html>
         )
 
     except Exception as e:
@@ -354,104 +343,22 @@ Focus on this specific page content while maintaining STRICT design consistency.
     # Remove <think> tags (from models like DeepSeek)
     full_response = re.sub(r'<think>.*?</think>', '', full_response, flags=re.DOTALL | re.IGNORECASE)
     
-    # STRICT: Only extract content between ```html and ```
-    # This prevents any thinking/explanation text from being included
-    code_matches = re.findall(r"```html\s*(.*?)```", full_response, re.DOTALL | re.IGNORECASE)
-    
-    if code_matches:
-        # Take the first match (should be the only one)
-        html_content = code_matches[0].strip()
-        print(f"  ✅ Extracted HTML from ```html block for {page_name} (length: {len(html_content)} chars)")
-        
-        # Check if HTML is complete
-        if not html_content.endswith('</html>'):
-            print(f"  ⚠️ Warning: {page_name} HTML appears incomplete (missing </html>)")
-            print(f"  🔄 Attempting to continue generation for {page_name}...")
-            
-            # Try to continue the generation
-            continuation_prompt = f"""
-Continue the HTML code for page "{page_name}" from where it was cut off. 
-
-Here's the incomplete HTML (last 1000 chars):
-```html
-{html_content[-1000:]}
-```
-
-Continue from the last line and complete the HTML structure. Make sure to:
-1. Close all open tags
-2. End with </body> and </html>
-3. Return ONLY the continuation part in ```html block
-
-Start from where the code was cut off and complete it.
-"""
-            
-            try:
-                continuation_response = get_llm_response(
-                    system_prompt="You are an HTML completion expert. Complete the incomplete HTML structure.",
-                    user_prompt=continuation_prompt,
-                    temperature=0.3,
-                    max_tokens=32000,
-                )
-                
-                # Extract continuation
-                continuation_matches = re.findall(
-                    r"```html\s*(.*?)```", continuation_response, re.DOTALL | re.IGNORECASE
-                )
-                
-                if continuation_matches:
-                    continuation = continuation_matches[0].strip()
-                    # Merge with original
-                    html_content = html_content + "\n" + continuation
-                    print(f"  ✅ Continuation added for {page_name} (total length: {len(html_content)} chars)")
-                    
-                    # Check again
-                    if html_content.endswith('</html>'):
-                        print(f"  ✅ HTML structure now complete for {page_name}")
-                    else:
-                        print(f"  ⚠️ Still incomplete for {page_name}, but proceeding...")
-                else:
-                    print(f"  ⚠️ Could not extract continuation for {page_name}, proceeding with incomplete HTML")
-                    
-            except Exception as e:
-                print(f"  ⚠️ Continuation failed for {page_name}: {str(e)[:100]}")
-                print(f"  💡 Proceeding with incomplete HTML for {page_name}")
-        else:
-            print(f"  ✅ HTML structure complete for {page_name}")
-        
-        # Final cleanup before return
-        html_content = html_content.strip()
-        if html_content.startswith('```html'):
-            html_content = html_content[7:].strip()
-        if html_content.startswith('```'):
-            html_content = html_content[3:].strip()
-        if html_content.endswith('```'):
-            html_content = html_content[:-3].strip()
-        
-        return html_content
-    else:
-        # Fallback: Try to extract HTML tags directly
-        # This handles cases where LLM doesn't use markdown code blocks
-        tag_match = re.search(r"<html.*?>.*?</html>", full_response, re.DOTALL | re.IGNORECASE)
-        if tag_match:
-            result = tag_match.group(0).strip()
-        else:
-            # Last resort: Use raw response but warn
-            print(f"  ⚠️ No code block or HTML tags found for {page_name}, using raw response")
-            result = full_response.strip()
-        
-        # Final cleanup for fallback path too
-        if result.startswith('```html'):
-            result = result[7:].strip()
-        if result.startswith('```'):
-            result = result[3:].strip()
-        if result.endswith('```'):
-            result = result[:-3].strip()
-        
-        print(f"  🧹 Final cleanup done for {page_name}, length: {len(result)} chars")
-        return result
-
-
-def generate_from_template(navbar_html: str, footer_html: str, css: str, js: str, page_name: str, page_desc: str, full_prompt: str, all_pages: list):
+    # ```html block (cut off when the response hit the token limit), <html> tags, or the raw text
+    html_content = extract_html(full_response)
+    print(f"  ✅ Extracted HTML for {page_name} (length: {len(html_content)} chars)")
+
+    # Truncated: continue from the open-tag path + a short tail, stitched without overlap
+    html_content = complete_html(html_content, lambda prompt: get_llm_response(
+        system_prompt=CONTINUATION_SYSTEM_PROMPT,
+        user_prompt=prompt,
+        temperature=0.3,
+        max_tokens=8000,
+        stop_when=fence_closed("html"),
+    ), page_name)
+    return html_content.strip()
+
+
+def generate_from_template(navbar_html: str, footer_html: str, css: str, js: str, page_name: str, page_desc: str, full_prompt: str, all_pages: list, design: dict = None):
     """Generate page using exact templates from first page"""
     
     system_prompt = """
@@ -478,6 +385,7 @@ Return ONLY the main content HTML (no markdown, no explanations).
 """
 
     page_list = '\n'.join([f"  - {p['name']}" for p in all_pages])
+    design_context = f"\nDesign system:\n{prompt_summary(design)}\n" if design else ""
     
     user_prompt = f"""
 Create the MAIN CONTENT section for:
@@ -492,21 +400,25 @@ Available pages for reference:
 
 Generate ONLY the main content area (between navbar and footer).
 Match the design style, colors, and typography of the existing templates.
-"""
+{design_context}"""
 
     try:
+        stop = fence_closed("html")
         content_response = get_llm_response(
             system_prompt=system_prompt,
             user_prompt=user_prompt,
             max_tokens=32000,  # Increased for complete content generation
             temperature=0.7,
+            stop_when=stop,
         )
         
         # Remove <think> tags (from models like DeepSeek)
         content_response = re.sub(r'<think>.*?</think>', '', content_response, flags=re.DOTALL | re.IGNORECASE)
         
         # STRICT: Only extract content between ```html and ``` (if present)
-        code_matches = re.findall(r"```html\s*(.*?)```", content_response, re.DOTALL | re.IGNORECASE)
+        code_matches = [stop.content] if stop.content is not None else re.findall(
+            r"```html\s*(.*?)```", content_response, re.DOTALL | re.IGNORECASE
+        )
         
         if code_matches:
             # Use content from code block
@@ -534,6 +446,13 @@ Match the design style, colors, and typography of the existing templates.
             navbar_updated
         )
         
+        # Head assets (CDNs, fonts, Tailwind config) and body classes from the design system
+        design = design or {}
+        head_assets = "\n    ".join(design.get("head_assets") or ['<script src="https://cdn.tailwindcss.com"></script>'])
+        if design.get("tailwind_config"):
+            head_assets += f"\n    <script>\n{design['tailwind_config']}\n    </script>"
+        body_class = f' class="{design["body_class"]}"' if design.get("body_class") else ""
+        
         # Assemble complete HTML
         complete_html = f"""<!DOCTYPE html>
 <html lang="en">
@@ -541,12 +460,12 @@ Match the design style, colors, and typography of the existing templates.
     <meta charset="UTF-8">
     <meta name="viewport" content="width=device-width, initial-scale=1.0">
     <title>{page_name.replace('-', ' ').title()}</title>
-    <script src="https://cdn.tailwindcss.com"></script>
+    {head_assets}
     <style>
 {css}
     </style>
 </head>
-<body>
+<body{body_class}>
 {navbar_updated}
 
 {content_html}
@@ -566,6 +485,64 @@ Match the design style, colors, and typography of the existing templates.
         raise  # Let the error propagate - LLM client already has fallback
 
 
+SECTION_PATCH_SYSTEM_PROMPT = """
+You are an HTML section editor. You receive ONE section of an existing page and a revision request.
+
+Rules:
+- Apply ONLY the requested change to this section
+- Keep every other element, Tailwind class, text, link and attribute EXACTLY as it is
+- Keep the same outer element (same tag and id) so it can be put back into the page
+- Do NOT add <html>, <head>, <body>, navbar or footer
+
+Return ONLY the updated section in a ```html block.
+"""
+
+
+@traced()
+def patch_draft_section(page_name: str, section_path: str, fragment: str, feedback: str):
+    """
+    Apply a revision to one section of a draft page. Returns the edited
+    fragment, or None when the reply can't be spliced back (wrong root
+    element, unbalanced tags).
+    """
+    user_prompt = f"""
+Page: {page_name}
+Section: {section_path}
+
+Revision request:
+{feedback}
+
+Current section:
+```html
+{fragment}
+```
+"""
+    stop = fence_closed("html")
+    try:
+        response = get_llm_response(
+            system_prompt=SECTION_PATCH_SYSTEM_PROMPT,
+            user_prompt=user_prompt,
+            # Room for the section plus the change, not a whole page
+            max_tokens=min(8000, len(fragment) // 2 + 1000),
+            temperature=0.3,
+            stop_when=stop,
+        )
+    except Exception as e:
+        print(f"  ⚠️ Section patch failed for {page_name}: {str(e)[:100]}")
+        return None
+
+    patched = stop.content if stop.content is not None else extract_html(response)
+    root = re.match(r"\s*<([a-zA-Z][\w-]*)", patched)
+    expected = re.match(r"\s*<([a-zA-Z][\w-]*)", fragment)
+    if not root or not expected or root.group(1).lower() != expected.group(1).lower():
+        print(f"  ⚠️ Patched {section_path} does not start with <{expected.group(1) if expected else '?'}>")
+        return None
+    if not HtmlCompletenessTracker().feed(patched).complete:
+        print(f"  ⚠️ Patched {section_path} has unclosed elements")
+        return None
+    return patched.strip()
+
+
 def create_draft_index(pages: list, drafts: dict):
     """Create an index page with tabs/navigation to view all drafts"""
     
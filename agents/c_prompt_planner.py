@@ -1,11 +1,11 @@
-import re, json
-from dotenv import load_dotenv
 from agents.llm_client import get_llm_response
+from agents.llm_stop import json_complete
+from utils.tracing import traced
 
-# Load .env file
-load_dotenv()
+PLAN_SCHEMA = {"page": str, "components": list}
 
 
+@traced()
 def plan_prompt(user_prompt: str):
     print("\n🔵 [PROMPT PLANNER] Interpreting prompt...")
 
@@ -31,33 +31,25 @@ Respond ONLY with valid JSON, without explanations or formatting. No markdown. N
 """
 
     # Use the new LLM client with Cerebras/Mistral fallback
+    stop = json_complete(PLAN_SCHEMA)
+    full_response = ""
     try:
         full_response = get_llm_response(
             system_prompt=sys_prompt,
             user_prompt=user_prompt,
             max_tokens=32000,
             temperature=0.3,  # Lower temperature for more consistent JSON
+            stop_when=stop,
         )
         print("\n✅ Plan created successfully")
 
     except Exception as e:
         print(f"\n❌ Error creating plan: {e}")
-        # Fallback response
-        full_response = '{"page": "unknown", "components": [], "route": "/unknown"}'
 
-    # Ambil hanya blok JSON
-    try:
-        # Coba parse langsung jika JSON mentah
-        parsed = json.loads(full_response)
-        return parsed
-    except json.JSONDecodeError:
-        # Jika ada kata tambahan, ekstrak blok JSON dengan regex
-        json_block = re.search(r"\{.*\}", full_response, re.DOTALL)
-        if json_block:
-            try:
-                return json.loads(json_block.group(0))
-            except Exception:
-                pass
+    # Ambil hanya blok JSON (diperbaiki jika terpotong / ada koma berlebih)
+    plan = stop.parsed(full_response)
+    if plan is not None:
+        return plan
 
     print("\n[ERROR] Gagal parsing JSON dari model.")
     return {"page": "unknown", "components": [], "route": "/unknown"}
@@ -1,10 +1,11 @@
-import re, json
-from dotenv import load_dotenv
 from agents.llm_client import get_llm_response
+from agents.llm_stop import json_complete
+from utils.tracing import traced
 
-load_dotenv()
+PLAN_SCHEMA = {"pages": list}
 
 
+@traced()
 def plan_prompt_multi(user_prompt: str):
     """
     Enhanced planner that can detect and plan multiple pages
@@ -54,30 +55,24 @@ Examples of multi-page requests:
 Respond ONLY with valid JSON. No markdown. No explanations.
 """
 
+    stop = json_complete(PLAN_SCHEMA)
+    full_response = ""
     try:
         full_response = get_llm_response(
             system_prompt=sys_prompt,
             user_prompt=user_prompt,
             max_tokens=32000,
             temperature=0.3,
+            stop_when=stop,
         )
         print("\n✅ Multi-page plan created successfully")
-
     except Exception as e:
         print(f"\n❌ Error creating plan: {e}")
-        full_response = '{"pages": [{"page": "unknown", "components": [], "route": "/unknown", "description": "Error"}]}'
 
-    # Parse JSON
-    try:
-        parsed = json.loads(full_response)
-        return parsed
-    except json.JSONDecodeError:
-        json_block = re.search(r"\{.*\}", full_response, re.DOTALL)
-        if json_block:
-            try:
-                return json.loads(json_block.group(0))
-            except Exception:
-                pass
+    # Parsed while streaming; a truncated or sloppy reply is repaired
+    plan = stop.parsed(full_response)
+    if plan is not None:
+        return plan
 
     print("\n[ERROR] Failed to parse JSON from model.")
     return {"pages": [{"page": "unknown", "components": [], "route": "/unknown", "description": "Error"}]}
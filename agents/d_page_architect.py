@@ -1,4 +1,8 @@
 import time
+from utils.tracing import traced
+
+
+@traced()
 def design_layout(plan):
     print("\n\n🟡 [PAGE ARCHITECT] Structuring layout...")
 
@@ -1,16 +1,43 @@
-import os, sys
+import os
 import re
-from dotenv import load_dotenv
 from .llm_client import get_llm_response
-
-# Load .env
-load_dotenv()
+from utils.tracing import span, traced
+from utils.design_system import (
+    load_design_system, prompt_summary, inject_layout_assets, CSS_PLACEHOLDER, JS_PLACEHOLDER
+)
 
 
+@traced()
 def generate_layout_app(plan: dict, draft_html: str):
     print("\n\n🟣 [LAYOUT AGENT] Generating app layout Blade file...")
 
-    user_prompt = f"""
+    # 🎨 With a design system the LLM only writes the shell; CSS/JS are injected afterwards
+    design = load_design_system()
+    if design:
+        head_assets = "\n".join(design.get("head_assets", [])) or '<script src="https://cdn.tailwindcss.com"></script>'
+        user_prompt = f"""
+Create a Laravel Blade layout file named `app.blade.php` for the following page plan.
+
+The global CSS and JavaScript come from the project's design system and are
+injected automatically. Do NOT write any CSS or JavaScript yourself - use exactly:
+- `<style>{CSS_PLACEHOLDER}</style>` inside <head>
+- `<script>{JS_PLACEHOLDER}</script>` right before </body>
+
+Respond ONLY with the content of app.blade.php inside a ```blade code block.
+
+📌 Page name: `{plan['page']}`
+📌 Dont create component UI again, because Already Created: `{plan['components']}`
+
+📎 Head assets (CDN / fonts) to include:
+```html
+{head_assets}
+```
+
+📎 Design system:
+{prompt_summary(design)}
+"""
+    else:
+        user_prompt = f"""
 Create a Laravel Blade layout file named `app.blade.php` using the HTML structure below and considering the following page plan.
 
 CRITICAL: Extract and preserve ALL custom CSS and JavaScript from the HTML reference.
@@ -52,8 +79,8 @@ CRITICAL RULES:
 - ONLY include the layout shell structure:
   - <!DOCTYPE html>, <html>, <head>, <body>
   - Meta tags, <title>, CDN links (Tailwind, fonts, etc.)
-  - Global styles in <style> tag - COPY ALL custom CSS from HTML reference
-  - JavaScript in <script> tag - COPY ALL JavaScript from HTML reference
+  - Global styles in <style> tag - COPY ALL custom CSS from HTML reference (or the given placeholder)
+  - JavaScript in <script> tag - COPY ALL JavaScript from HTML reference (or the given placeholder)
   - Background wrappers or body classes
 - Place @yield('content') where the page content will be injected
 - DO NOT include any preview UI, draft navigation, tabs, or buttons
@@ -108,10 +135,14 @@ Respond STRICTLY inside:
     )
 
     match = re.findall(r"```blade\s*(.*?)```", full_response, re.DOTALL | re.IGNORECASE)
+    layout = match[0].strip() if match else full_response.strip()
+    if design:
+        layout = inject_layout_assets(layout, design)
+
     output_path = "output/layouts/app.blade.php"
     os.makedirs(os.path.dirname(output_path), exist_ok=True)
 
-    with open(output_path, "w", encoding="utf-8") as f:
-        f.write(match[0].strip() if match else full_response.strip())
+    with span("write", kind="file", path=output_path), open(output_path, "w", encoding="utf-8") as f:
+        f.write(layout)
 
-    return match[0].strip() if match else full_response.strip()
+    return layout
@@ -1,10 +1,8 @@
-import os, sys
+import os
 import re
-from dotenv import load_dotenv
 from .llm_client import get_llm_response
-
-# Load .env
-load_dotenv()
+from utils.tracing import span, traced
+from utils.generation_state import current_state
 
 
 def detect_nested_components(components: dict):
@@ -23,11 +21,16 @@ def detect_nested_components(components: dict):
     return nested
 
 
+@traced()
 def generate_blade(layout: dict, components: dict, draft_html: str = ""):
     print("\n🟤 [UI GENERATOR AGENT] Generating Blade template using AI...")
     
-    # Load draft HTML if not provided
-    if not draft_html and os.path.exists("output/draft.html"):
+    # Load draft HTML if not provided (shared job state first, then disk)
+    state = current_state()
+    if not draft_html and state is not None and state.main_draft.exists:
+        draft_html = state.main_draft.text
+        print(f"   📄 Using draft HTML ({len(draft_html)} chars) as reference")
+    elif not draft_html and os.path.exists("output/draft.html"):
         with open("output/draft.html", "r", encoding="utf-8") as f:
             draft_html = f.read()
             print(f"   📄 Loaded draft HTML ({len(draft_html)} chars) as reference")
@@ -206,14 +209,6 @@ Respond only inside:
             max_tokens=32000,
         )
 
-        # Display response character by character for visual feedback
-        for i, char in enumerate(full_response):
-            sanitized_char = char.replace("\n", " ").replace("\r", " ")
-            sys.stdout.write(sanitized_char)
-            sys.stdout.flush()
-
-        print()  # New line after streaming display
-
     except Exception as e:
         print(f"\n❌ Failed to generate response: {e}")
         return ""
@@ -225,7 +220,7 @@ Respond only inside:
     # This ensures consistency with route naming
     page_name = layout['page'].lower().replace('-', '').replace('_', '').replace(' ', '')
     
-    with open(f"output/{page_name}.blade.php", "w", encoding="utf-8") as f:
+    with span("write", kind="file", path=f"output/{page_name}.blade.php"), open(f"output/{page_name}.blade.php", "w", encoding="utf-8") as f:
         f.write(match[0].strip() if match else full_response.strip())
     
     print(f"\n✅ Saved: output/{page_name}.blade.php")
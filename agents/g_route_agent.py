@@ -1,12 +1,11 @@
 import os
 import re
-from dotenv import load_dotenv
 from .llm_client import get_llm_response
-
-# Load .env
-load_dotenv()
+from .llm_stop import fence_closed
+from utils.tracing import span, traced
 
 
+@traced()
 def generate_route(plan: dict, draft_html: str):
     print("\n\n⚫ [ROUTE AGENT] Generating Laravel routes...")
     
@@ -52,24 +51,25 @@ Route path: /user-profile, View: userprofile → Route::get('/user-profile', fun
 """
 
     # Use unified LLM client (prioritizes Cerebras, falls back to Mistral)
+    stop = fence_closed("php")
     try:
         full_response = get_llm_response(
             system_prompt=system_prompt,
             user_prompt=user_prompt,
             temperature=0.7,
             max_tokens=32000,
+            stop_when=stop,
         )
 
-        # Display response character by character for visual feedback
-        for char in full_response:
-            print(char, end="", flush=True)
-
     except Exception as e:
         print(f"\n❌ Failed to generate response: {e}")
         return ""
 
-    match = re.findall(r"```php\s*(.*?)```", full_response, re.DOTALL | re.IGNORECASE)
-    with open("output/web.php", "w", encoding="utf-8") as f:
-        f.write(match[0].strip() if match else full_response.strip())
-    return match[0].strip() if match else full_response.strip()
-    return match[0].strip() if match else full_response.strip()
+    if stop.content is not None:
+        route_code = stop.content
+    else:
+        match = re.findall(r"```php\s*(.*?)```", full_response, re.DOTALL | re.IGNORECASE)
+        route_code = match[0].strip() if match else full_response.strip()
+    with span("write", kind="file", path="output/web.php"), open("output/web.php", "w", encoding="utf-8") as f:
+        f.write(route_code)
+    return route_code
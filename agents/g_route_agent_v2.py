@@ -1,17 +1,103 @@
-import os
+"""
+Route Agent (v2)
+Emits routes/web.php for the planned pages.
+
+Route declarations are fully determined by the page list, so by default
+they are rendered locally from a template (no LLM round trip). View names
+follow the blade file naming of f_ui_generator (lowercase, no dashes,
+underscores or spaces) and route names are the kebab-case route path, so
+the output needs no view-name fixing afterwards.
+
+ENV variables (optional):
+- ROUTE_AGENT_USE_LLM=false   Let the LLM write web.php (custom routing)
+"""
+
 import re
-from dotenv import load_dotenv
 from .llm_client import get_llm_response
+from .llm_stop import fence_closed
+from utils.config import settings
+from utils.tracing import span, traced
+
+ROUTE_FILE_HEADER = """<?php
+
+use Illuminate\\Support\\Facades\\Route;
+"""
+
+ROUTE_TEMPLATE = """
+Route::get('{path}', function () {{
+    return view('{view}');
+}})->name('{name}');
+"""
+
+
+def use_llm_routes() -> bool:
+    return settings().route_agent_use_llm
+
+
+def route_view_name(page_name: str) -> str:
+    """View name matching the blade file written by f_ui_generator"""
+    return page_name.lower().replace('-', '').replace('_', '').replace(' ', '')
+
+
+def _route_path(page: dict) -> str:
+    path = (page.get('route') or f"/{page['page']}").strip()
+    path = "/" + re.sub(r"[^A-Za-z0-9/_{}.-]+", "-", path).strip("/-")
+    return path.lower()
+
+
+def _route_name(path: str) -> str:
+    name = path.strip("/").replace("/", ".")
+    name = re.sub(r"[{}]", "", name)
+    return name or "home"
+
+
+def render_routes(pages_plan: list) -> str:
+    """web.php for the pages plan (one Route::get per page, duplicates skipped)"""
+    seen_paths = set()
+    seen_names = set()
+    blocks = [ROUTE_FILE_HEADER]
+    for page in pages_plan:
+        path = _route_path(page)
+        if path in seen_paths:
+            continue
+        seen_paths.add(path)
 
-load_dotenv()
+        name = _route_name(path)
+        base_name, suffix = name, 2
+        while name in seen_names:
+            name = f"{base_name}-{suffix}"
+            suffix += 1
+        seen_names.add(name)
 
+        blocks.append(ROUTE_TEMPLATE.format(path=path, view=route_view_name(page['page']), name=name))
+    return "".join(blocks)
 
-def generate_routes_multi(pages_plan: list):
+
+def _php_block(response: str) -> str:
+    match = re.findall(r"```php\s*(.*?)```", response, re.DOTALL | re.IGNORECASE)
+    return match[0].strip() if match else response.strip()
+
+
+def _write_routes(route_code: str) -> str:
+    with span("write", kind="file", path="output/web.php"), open("output/web.php", "w", encoding="utf-8") as f:
+        f.write(route_code)
+    return route_code
+
+
+@traced()
+def generate_routes_multi(pages_plan: list, use_llm: bool = None):
     """
     Generate multiple Laravel routes for multiple pages
+
+    Rendered from the template unless use_llm (or ROUTE_AGENT_USE_LLM) is set.
     """
     print("\n\n⚫ [MULTI-ROUTE AGENT] Generating Laravel routes for all pages...")
 
+    if not (use_llm if use_llm is not None else use_llm_routes()):
+        route_code = render_routes(pages_plan)
+        print(route_code)
+        return _write_routes(route_code)
+
     # Build routes description
     routes_desc = "\n".join([
         f"- Page: {page['page']}, Route: {page['route']}, Description: {page.get('description', 'N/A')}"
@@ -79,41 +165,39 @@ LANGUAGE RULE:
   - kontak → contact
 """
 
+    stop = fence_closed("php")
     try:
         full_response = get_llm_response(
             system_prompt=system_prompt,
             user_prompt=user_prompt,
             temperature=0.7,
             max_tokens=32000,
+            stop_when=stop,
         )
 
-        for char in full_response:
-            print(char, end="", flush=True)
-
     except Exception as e:
         print(f"\n❌ Failed to generate routes: {e}")
         return ""
 
-    match = re.findall(r"```php\s*(.*?)```", full_response, re.DOTALL | re.IGNORECASE)
-    route_code = match[0].strip() if match else full_response.strip()
-    
-    with open("output/web.php", "w", encoding="utf-8") as f:
-        f.write(route_code)
-    
-    return route_code
+    return _write_routes(stop.content if stop.content is not None else _php_block(full_response))
 
 
-def generate_route(plan: dict, draft_html: str = ""):
+def generate_route(plan: dict, draft_html: str = "", use_llm: bool = None):
     """
     Backward compatible - handles both single and multi-page plans
     """
     # Check if it's multi-page plan
     if "pages" in plan:
-        return generate_routes_multi(plan["pages"])
+        return generate_routes_multi(plan["pages"], use_llm)
     
     # Single page (old format)
     print("\n\n⚫ [ROUTE AGENT] Generating Laravel route...")
 
+    if not (use_llm if use_llm is not None else use_llm_routes()):
+        route_code = render_routes([plan])
+        print(route_code)
+        return _write_routes(route_code)
+
     user_prompt = f"""
 Based on the following page plan, generate Laravel route declaration.
 
@@ -136,25 +220,18 @@ Requirements:
 - Wrap in ```php code block
 """
 
+    stop = fence_closed("php")
     try:
         full_response = get_llm_response(
             system_prompt=system_prompt,
             user_prompt=user_prompt,
             temperature=0.7,
             max_tokens=32000,
+            stop_when=stop,
         )
 
-        for char in full_response:
-            print(char, end="", flush=True)
-
     except Exception as e:
         print(f"\n❌ Failed to generate route: {e}")
         return ""
 
-    match = re.findall(r"```php\s*(.*?)```", full_response, re.DOTALL | re.IGNORECASE)
-    route_code = match[0].strip() if match else full_response.strip()
-    
-    with open("output/web.php", "w", encoding="utf-8") as f:
-        f.write(route_code)
-    
-    return route_code
+    return _write_routes(stop.content if stop.content is not None else _php_block(full_response))
@@ -0,0 +1,844 @@
+"""
+GenLaravel Generation Engine
+The generation flow (cleanup → draft → revisions → build → auto-fix) for
+single- and multi-page apps, implemented once and driven by both front-ends:
+main_single_page.py / main_multi_page.py and the WebSocket backend.
+
+    engine = GenerationEngine("multi", on_event=handle)
+    engine.start(prompt)            # clean, expand, draft → "draft_ready"
+    engine.revise(feedback)         # any number of times
+    result = engine.confirm()       # build the Laravel app → summary dict
+    engine.cancel()                 # any thread; stops at the next checkpoint
+
+With speculative builds on, a multi-page engine starts the build DAG
+(planner, components, blades, layout, routes, validation) as soon as a
+draft is shown. confirm() adopts that run, so only moving files into the
+project and the auto-fixers remain; revise() discards it, unless it only
+patched sections that map to already built components.
+
+A revision that targets a few sections of a page (located by
+utils/revision_scope.py) is applied to those sections only: the LLM sees
+the section, not the page, and the edited fragment is spliced back.
+
+Events are dicts in the WebSocket protocol ("output", "agent_start",
+"agent_complete", "pages_detected", "page_draft_complete", "draft_ready"),
+passed to on_event from the thread running the step. The CLI prints them,
+the backend forwards them to the client.
+
+ENV variables (optional):
+- AI_VALIDATION=true        Run the LLM structure/styling validator (k_validator)
+                            after the multi-page fixers
+- SPECULATIVE_BUILD=false   Build multi-page drafts while they await confirmation
+                            (spends the build's LLM calls again on every revision)
+- SECTION_PATCH=true        Revise only the targeted sections of a draft when a
+                            request is local ("button Get Started terlalu besar")
+- SECTION_PATCH_MAX_SECTIONS=3  More matching sections than this → regenerate pages
+- REVISION_SCOPE_CONFIDENCE=0.7  Minimum local confidence to skip the LLM scope call
+
+These are read from utils/config.py settings(): each job keeps the snapshot
+it started with (bound around start/revise/confirm, so the agents' LLM calls
+see it too), so a settings reload applies from the next job on.
+"""
+
+import functools
+import os
+import re
+import shutil
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+from utils.generation_state import GenerationState, use_state, MAIN_DRAFT_PATH, DRAFTS_DIR
+from utils.pipeline_dag import PipelineError
+from utils.revision_scope import (
+    PAGE_ALIASES, RevisionIndex, SectionIndex, matching_source, splice,
+)
+from utils.config import settings, use_settings
+from utils.design_system import build_design_system, load_design_system
+from utils.tracing import span
+from .a_prompt_expander import prompt_expander
+from .d_page_architect import design_layout
+from .e_generate_layout_app import generate_layout_app
+from .f_ui_generator import generate_blade
+from .h_component_agent import list_components, register_components, save_component
+from .j_move_to_project import move_to_laravel_project
+from .multi_page_pipeline import SpeculativeBuild, run_multi_page_pipeline, validate_component, validate_components
+
+# Above this share of the page a patch saves little over a redraft
+SECTION_PATCH_MAX_RATIO = 0.5
+
+DRAFTS_BACKUP_DIR = "output/drafts_backup"
+# Reply shape of the revision scope detector ("reason" is informational)
+SCOPE_SCHEMA = {"scope": str, "pages_to_regenerate": list, "reason?": str}
+
+# Agents of the multi-page DAG, by stage group (ids are the frontend's agent cards)
+PIPELINE_AGENTS = {
+    "prompt-planner": ("Prompt Planner", "Planning components for each page..."),
+    "page-architect": ("Page Architect", "Designing layouts for all pages..."),
+    "blade-generator": ("Blade Generator", "Generating shared layout..."),
+    "route-generator": ("Route Generator", "Generating routes for all pages..."),
+    "validator-fixer": ("Validator & Auto-Fixer", "Validating, fixing, and optimizing..."),
+}
+
+
+class GenerationCancelled(Exception):
+    """Raised at the next checkpoint after GenerationEngine.cancel()"""
+
+
+def clean_laravel_views(log: Callable[[str], None] = print):
+    """Clean previous generated views from Laravel project"""
+    laravel_views = "my-laravel/resources/views"
+
+    # Clean components and layouts
+    for path in (os.path.join(laravel_views, "components"), os.path.join(laravel_views, "layouts")):
+        if os.path.exists(path):
+            shutil.rmtree(path)
+            log(f"🧹 Cleaned: {path}")
+
+    # Clean blade files in views root (except welcome.blade.php)
+    if os.path.exists(laravel_views):
+        for file in os.listdir(laravel_views):
+            if file.endswith('.blade.php') and file != 'welcome.blade.php':
+                os.remove(os.path.join(laravel_views, file))
+                log(f"🧹 Removed: {file}")
+
+    # Reset routes to welcome
+    default_routes = """<?php
+
+use Illuminate\\Support\\Facades\\Route;
+
+Route::get('/', function () {
+    return view('welcome');
+});
+"""
+    with open("my-laravel/routes/web.php", "w", encoding="utf-8") as f:
+        f.write(default_routes)
+    log("🧹 Reset routes to welcome")
+
+
+def print_event(event: dict):
+    """Console rendering of engine events (CLI front-ends)"""
+    if event.get("type") == "output":
+        print(event["message"])
+    elif event.get("type") == "draft_ready":
+        print(f"\n📁 {event['message']} ({os.path.abspath(MAIN_DRAFT_PATH)})")
+
+
+def job_settings(method):
+    """Run an engine phase with the job's settings snapshot bound (LLM calls included)"""
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with use_settings(self.settings):
+            return method(self, *args, **kwargs)
+    return wrapper
+
+
+class GenerationEngine:
+    """One generation job: draft, revise, confirm, cancel"""
+
+    def __init__(self, mode: str = "multi", on_event: Optional[Callable[[dict], None]] = None,
+                 ai_validation: Optional[bool] = None, speculative: Optional[bool] = None):
+        if mode not in ("single", "multi"):
+            raise ValueError(f"Invalid mode: {mode}. Use 'single' or 'multi'")
+        self.mode = mode
+        self.on_event = on_event or print_event
+        self.settings = settings()
+        self.ai_validation = self.settings.ai_validation if ai_validation is None else ai_validation
+        self.speculative = self.settings.speculative_build if speculative is None else speculative
+        self.prompt = ""
+        self.draft_result = None
+        self.revisions = 0
+        self._cancelled = threading.Event()
+        self._speculation: Optional[SpeculativeBuild] = None
+        self._retired: Optional[SpeculativeBuild] = None  # discarded, may still be cleaning up
+
+    # ========== EVENTS ==========
+
+    def emit(self, event: dict):
+        self.on_event(event)
+
+    def log(self, text: str):
+        self.emit({"type": "output", "message": text})
+
+    @contextmanager
+    def agent(self, agent_id: str, agent_name: str, description: str):
+        """One UI agent card: agent_start, a stage span, agent_complete"""
+        self.checkpoint()
+        self.emit({"type": "agent_start", "agent_id": agent_id, "agent_name": agent_name, "description": description})
+        with span(agent_id, kind="stage") as s:
+            yield s
+        self.emit({"type": "agent_complete", "agent_id": agent_id, "agent_name": agent_name, "duration": round(s.duration, 2)})
+
+    def fixer(self, name: str, func, *args):
+        """Run one auto-fix utility in a fixer span"""
+        self.checkpoint()
+        with span(name, kind="fixer"):
+            return func(*args)
+
+    # ========== CANCELLATION ==========
+
+    def cancel(self):
+        self._cancelled.set()
+        if self._speculation is not None:
+            self._speculation.cancel_event.set()
+
+    @property
+    def cancelled(self) -> bool:
+        return self._cancelled.is_set()
+
+    def checkpoint(self):
+        if self._cancelled.is_set():
+            raise GenerationCancelled("Generation cancelled by user.")
+
+    # ========== DRAFT PHASE ==========
+
+    @job_settings
+    def start(self, prompt: str) -> dict:
+        """Clean previous output, then draft from `prompt`"""
+        self.prompt = prompt
+        self.log("Cleaning output folder...")
+        if os.path.exists("output"):
+            shutil.rmtree("output")
+        self.log("Cleaning Laravel views...")
+        clean_laravel_views(self.log)
+        self.log("✅ Cleaned successfully")
+        return self._draft(prompt)
+
+    @job_settings
+    def revise(self, feedback: str) -> dict:
+        """Patch or redraft with `feedback`, keeping the design (and, for multi-page, unaffected pages)"""
+        if self.draft_result is None:
+            raise RuntimeError("revise() called before start()")
+        self.revisions += 1
+        if self.settings.section_patch:
+            patched = self._patch_revision(feedback)
+            if patched is not None:
+                return patched
+        self._discard_speculation()
+        self.log("Regenerating draft with your revisions...")
+
+        if self.mode == "single":
+            revised_prompt = f"""
+IMPORTANT: Keep the existing UI design, layout, colors, and styling from the previous draft.
+Only modify based on this new request: {feedback}
+
+Previous Draft (KEEP THE DESIGN):
+{self.draft_result["draft"]}
+            """
+            return self._draft(revised_prompt, revision=True)
+
+        context = self._multi_revision_context()
+        self._preserve_unaffected_pages(feedback)
+        revised_prompt = f"""
+{context}
+
+USER REVISION REQUEST:
+{feedback}
+
+IMPORTANT:
+- Keep the existing UI design, layout, colors, and styling
+- Only modify based on the user's revision request above
+- Maintain the SAME number of pages as specified
+"""
+        return self._draft(revised_prompt, revision=True)
+
+    def _draft(self, prompt: str, revision: bool = False) -> dict:
+        with self.agent("prompt-expander", "Prompt Expander",
+                        "Expanding revised prompt..." if revision else "Expanding user prompt..."):
+            preprompt = prompt_expander(prompt)
+
+        if self.mode == "single":
+            with self.agent("draft-agent", "Draft Agent", "Creating revised draft..." if revision else "Generating HTML draft..."):
+                from .b_draft_agent import draft_agent
+                result = draft_agent(preprompt)
+                os.makedirs("output", exist_ok=True)
+                with span("write", kind="file", path=MAIN_DRAFT_PATH), open(MAIN_DRAFT_PATH, "w", encoding="utf-8") as f:
+                    f.write(result["draft"])
+                self.log(f"📁 Draft saved: {os.path.abspath(MAIN_DRAFT_PATH)}")
+            message = "Revised draft generated. Please review." if revision else "Draft generated. Please review."
+        else:
+            with self.agent("draft-agent", "Draft Agent",
+                            "Creating revised multi-page draft..." if revision else "Generating HTML drafts for all pages..."):
+                self.log("Analyzing prompt for multiple pages...")
+                from .b_draft_agent_v2 import draft_agent_multi
+                result = draft_agent_multi(preprompt, callback=self._draft_event)
+                self._restore_preserved_pages(result)
+                self.log("✅ Draft generation completed")
+            pages_count = len(result.get("pages", []))
+            message = (f"Revised draft with {pages_count} pages. Please review." if revision
+                       else f"Generated {pages_count} pages. Please review.")
+
+        self.draft_result = result
+        self.emit({"type": "draft_ready", "draft_path": "/output/draft.html", "message": message})
+        if self.speculative and self.mode == "multi":
+            self._speculate()
+        return result
+
+    def _draft_event(self, data: dict):
+        """draft_agent_multi progress → protocol events"""
+        if data["type"] == "pages_detected":
+            self.log(f"Detected {data['count']} page(s) to generate")
+            self.emit(data)
+        elif data["type"] == "page_draft_start":
+            self.log(f"Generating draft {data['index']}/{data['total']}: {data['page_name']}...")
+        elif data["type"] == "page_draft_complete":
+            self.log(f"✅ {data['page_name']} draft completed ({data['index']}/{data['total']})")
+            self.emit({"type": "page_draft_complete", "page_name": data["page_name"]})
+
+    # ========== SPECULATIVE BUILD ==========
+
+    def _speculate(self):
+        """Start building the shown draft in the background (adopted by confirm())"""
+        # Copy: the state takes the drafts out of the result, revise() still needs them
+        state = GenerationState.from_draft_result(dict(self.draft_result), mode=self.mode, prompt=self.prompt)
+        # Starts once a discarded build has finished cleaning output/ (in the background)
+        self._speculation = SpeculativeBuild(state, after=self._retired).start()
+        self._retired = None
+        self.log("⚡ Speculative build started while the draft is reviewed")
+
+    def _discard_speculation(self):
+        """Cancel the speculative build without waiting for its in-flight stages"""
+        speculation, self._speculation = self._speculation, None
+        if speculation is not None:
+            speculation.discard()
+            self._retired = speculation
+            self.log("⚡ Speculative build discarded")
+
+    # ========== SECTION PATCHES ==========
+
+    def _patch_revision(self, feedback: str) -> Optional[dict]:
+        """Edit only the sections the feedback targets; None → regenerate the pages instead"""
+        if self.mode == "single":
+            drafts = {"main": self.draft_result["draft"]}
+            pages = ["main"]
+        else:
+            drafts = self.draft_result.get("drafts") or {}
+            if not drafts:
+                return None
+            local = RevisionIndex(drafts).analyze(feedback)
+            if local.confidence < self.settings.revision_scope_confidence or (local.scope == "global" and len(drafts) > 1):
+                return None
+            pages = local.pages
+
+        # Page names locate the page, not a section in it
+        ignore = set(drafts) | set(PAGE_ALIASES)
+        targets = {}
+        for page in pages:
+            sections = SectionIndex(drafts[page]).locate(feedback, ignore=ignore)
+            if not sections or sum(s.end - s.start for s in sections) > len(drafts[page]) * SECTION_PATCH_MAX_RATIO:
+                return None
+            targets[page] = sections
+        count = sum(len(sections) for sections in targets.values())
+        if count > self.settings.section_patch_max_sections:
+            return None
+
+        replaced = []  # (page, old fragment, new fragment)
+        with self.agent("draft-agent", "Draft Agent", f"Patching {count} section(s)..."):
+            from .b_draft_agent_v2 import patch_draft_section
+            patched = {}
+            for page, sections in targets.items():
+                html = drafts[page]
+                # Back to front: earlier offsets stay valid
+                for section in sorted(sections, key=lambda s: s.start, reverse=True):
+                    old = html[section.start:section.end]
+                    self.log(f"✂️ Patching {page}: {section.path} ({len(old)} chars)")
+                    fragment = patch_draft_section(page, section.path, old, feedback)
+                    if fragment is None:
+                        self.log("   ⚠️ Patch could not be applied, regenerating instead")
+                        return None
+                    html = splice(html, section, fragment)
+                    replaced.append((page, old, fragment))
+                patched[page] = html
+            self._save_patched_drafts(patched)
+
+        speculation = self._speculation
+        if speculation is not None and not self._propagate_patch(speculation, replaced):
+            self._discard_speculation()
+        where = f" on {', '.join(patched)}" if self.mode == "multi" else ""
+        self.emit({"type": "draft_ready", "draft_path": "/output/draft.html",
+                   "message": f"Revised {count} section(s){where}. Please review."})
+        if self.speculative and self.mode == "multi" and self._speculation is None:
+            self._speculate()
+        return self.draft_result
+
+    def _save_patched_drafts(self, patched: dict):
+        design = load_design_system()
+        for page, html in patched.items():
+            # The navbar/footer components and the layout CSS/JS are built from the design system
+            if self.mode == "single" or (design and design.get("source_page") == page):
+                build_design_system(html, "draft" if self.mode == "single" else page)
+            if self.mode == "multi":
+                self.draft_result["drafts"][page] = html
+                path = os.path.join(DRAFTS_DIR, f"{page}.html")
+                with span("write", kind="file", path=path), open(path, "w", encoding="utf-8") as f:
+                    f.write(html)
+                self.log(f"📁 Draft saved: {os.path.abspath(path)}")
+            if self.mode == "single" or len(self.draft_result["drafts"]) == 1:
+                self.draft_result["draft"] = html
+                with span("write", kind="file", path=MAIN_DRAFT_PATH), open(MAIN_DRAFT_PATH, "w", encoding="utf-8") as f:
+                    f.write(html)
+                self.log(f"📁 Draft saved: {os.path.abspath(MAIN_DRAFT_PATH)}")
+
+    def _propagate_patch(self, speculation: SpeculativeBuild, replaced: list) -> bool:
+        """Regenerate (and validate) the speculative build's components made from the patched sections"""
+        if not speculation.succeeded:
+            return False
+        state = speculation.state
+        for page, old, new in replaced:
+            name = matching_source(old, state.components)
+            if name is None:
+                self.log(f"   ⚡ No built component matches the patched {page} section, rebuilding")
+                return False
+            plan = {"components": [name], "pages": self.draft_result.get("pages", [])}
+            with use_state(state):
+                code = validate_component(name, list_components(plan, new)[name], self.log)
+            if code is None:
+                self.log(f"   ⚡ Updated {name} component failed validation, rebuilding")
+                return False
+            state.set_component(name, code)
+            save_component(name, code)
+            self.log(f"   🧩 {name} component updated from the patched section")
+        return True
+
+    # ========== MULTI-PAGE REVISIONS ==========
+
+    def _multi_revision_context(self) -> str:
+        """Previous pages + reference HTML, so the redraft keeps the same structure"""
+        pages = self.draft_result.get("pages", [])
+        drafts = self.draft_result.get("drafts", {})
+
+        # Strip the GenLaravel Draft Preview navbar from the index
+        draft_html_clean = re.sub(
+            r'<div class="bg-gradient-to-r from-slate-700[^>]*>.*?GenLaravel Draft Preview.*?</div>\s*</div>\s*</div>',
+            '', self.draft_result["draft"], flags=re.DOTALL
+        ).replace('<div class="preview-container bg-gray-100">', '<div>')
+
+        # Use individual drafts instead of index for better context
+        if drafts:
+            draft_html_clean = next(iter(drafts.values()))
+
+        pages_list = ", ".join(p["name"] for p in pages)
+        pages_detail = "\n".join(f"  - {p['name']}: {p.get('description', 'page')}" for p in pages)
+        return f"""
+CRITICAL: This is a MULTI-PAGE project with {len(pages)} pages.
+
+EXISTING PAGES (DO NOT CHANGE):
+{pages_detail}
+
+You MUST generate these EXACT {len(pages)} pages:
+{pages_list}
+
+PREVIOUS DRAFT HTML (for reference):
+{draft_html_clean}
+
+IMPORTANT:
+- Keep the SAME {len(pages)} pages structure
+- Do NOT merge into single page
+- Do NOT add or remove pages
+- Only improve the design and content based on user feedback
+"""
+
+    def _revision_scope(self, feedback: str, existing_pages: list) -> tuple:
+        """Which pages the feedback touches → (scope, pages); the LLM only decides ambiguous requests"""
+        drafts = (self.draft_result or {}).get("drafts") or {}
+        pages_html = {}
+        for page in existing_pages:
+            if page in drafts:
+                pages_html[page] = drafts[page]
+            else:
+                with open(os.path.join(DRAFTS_DIR, f"{page}.html"), 'r', encoding='utf-8') as f:
+                    pages_html[page] = f.read()
+
+        started = time.perf_counter()
+        index = RevisionIndex(pages_html)
+        local = index.analyze(feedback)
+        self.log(f"   ⚡ Local analysis ({(time.perf_counter() - started) * 1000:.1f}ms): "
+                 f"{local.scope} {', '.join(local.pages)} - {local.reason} (confidence {local.confidence:.2f})")
+        if local.confidence >= self.settings.revision_scope_confidence:
+            icon = "🌐 Scope: GLOBAL" if local.scope == "global" else "🎯 Scope: SPECIFIC"
+            self.log(f"   {icon} - Regenerating: {', '.join(local.pages)}")
+            return local.scope, local.pages
+
+        self.log("   🤔 Low confidence, asking the LLM...")
+        return self._llm_revision_scope(feedback, existing_pages, index)
+
+    def _llm_revision_scope(self, feedback: str, existing_pages: list, index: RevisionIndex) -> tuple:
+        from .llm_client import get_llm_response
+        from .llm_stop import json_complete
+
+        pages_info = "\n\n".join(
+            f"Page: {page}\nContent preview: {index.preview(page, 200)}..."
+            for page in existing_pages
+        )
+
+        detection_prompt = f"""
+User wants to revise: "{feedback}"
+
+Existing pages with content preview:
+{pages_info}
+
+YOUR TASK:
+Analyze the user's revision request and determine which pages need to be regenerated.
+
+CRITICAL ANALYSIS RULES:
+1. If user mentions SPECIFIC element (button, form, table, section):
+   - Check which pages contain that element
+   - ONLY regenerate those pages
+   - Example: "button Get Started terlalu besar" → only pages with "Get Started" button
+
+2. If user mentions SPECIFIC page name:
+   - Only regenerate that page
+   - Example: "perbaiki halaman home" → only home
+
+3. If user mentions SHARED component (navbar, footer, header):
+   - Regenerate ALL pages (shared across pages)
+   - Example: "ganti navbar" → all pages
+
+4. If user mentions GLOBAL styling (color, font, spacing):
+   - Regenerate ALL pages
+   - Example: "ubah warna biru" → all pages
+
+5. If UNCLEAR:
+   - Default to pages_with_element if available
+   - Otherwise, regenerate all (safe fallback)
+
+Respond with JSON only:
+{{
+  "scope": "specific" or "global",
+  "pages_to_regenerate": ["page1", "page2"] or ["all"],
+  "reason": "brief explanation with evidence"
+}}
+"""
+
+        detection_system = """
+You are a smart revision analyzer. Read the page content previews and determine which pages need regeneration.
+
+ANALYSIS APPROACH:
+
+1. READ the user's revision request carefully
+2. CHECK the content preview of each page
+3. DETERMINE which pages are affected
+
+DECISION RULES:
+
+A. EXPLICIT PAGE MENTION:
+   - "di page X", "halaman X", "on X page" → ONLY that page
+   - Example: "di page pricing icon terlalu besar" → ["pricing"] ONLY
+   - This OVERRIDES everything else
+
+B. SPECIFIC ELEMENT/COMPONENT:
+   - Check which pages contain that element in their content
+   - Example: "button Get Started terlalu besar"
+     * Check content: Does home have "Get Started"? Yes → include home
+     * Check content: Does pricing have "Get Started"? No → exclude pricing
+   - Only regenerate pages that have that element
+
+C. MULTI-PART REQUESTS:
+   - "X terlalu besar DAN di page Y ada Z"
+     * Part 1: Check which pages have X
+     * Part 2: Only page Y (explicit mention)
+     * Result: Union of both parts
+
+D. SHARED COMPONENTS:
+   - navbar, footer, header, menu → ALL pages (shared across pages)
+
+E. GLOBAL STYLING:
+   - "ubah warna", "ganti font", "spacing" → ALL pages
+
+IMPORTANT:
+- Be SMART: Read the content previews
+- Be PRECISE: Only regenerate what's needed
+- Be LOGICAL: If user says "di page X", ONLY regenerate X
+
+Respond with JSON:
+{
+  "scope": "specific" or "global",
+  "pages_to_regenerate": ["page1", "page2"] or ["all"],
+  "reason": "detailed explanation with evidence from content"
+}
+"""
+
+        try:
+            stop = json_complete(SCOPE_SCHEMA)
+            response = get_llm_response(
+                system_prompt=detection_system,
+                user_prompt=detection_prompt,
+                temperature=0.3,
+                max_tokens=500,
+                stop_when=stop,
+            )
+        except Exception as e:
+            self.log(f"   ⚠️ Detection failed: {e}")
+            self.log("   🔄 Will regenerate all pages (safe fallback)")
+            return "global", existing_pages
+
+        result = stop.parsed(response)
+        if result is None:
+            # Fallback: simple keyword detection
+            self.log("   ⚠️ JSON parsing failed, using keyword detection...")
+            detected = [page for page in existing_pages if page.lower() in feedback.lower()]
+            if detected:
+                self.log(f"   🎯 Detected pages: {', '.join(detected)}")
+                return "specific", detected
+            self.log("   🌐 No specific page detected, regenerating all")
+            return "global", existing_pages
+
+        scope = result["scope"]
+        # A repaired (truncated) reply may end in a partial page name
+        pages = [page for page in result["pages_to_regenerate"] if page in existing_pages or page == "all"]
+        if "all" in pages or scope == "global" or not pages:
+            self.log(f"   🌐 Scope: GLOBAL - Regenerating all {len(existing_pages)} pages")
+            scope, pages = "global", existing_pages
+        else:
+            self.log(f"   🎯 Scope: SPECIFIC - Regenerating: {', '.join(pages)}")
+        self.log(f"   💡 Reason: {result.get('reason', 'N/A')}")
+        return scope, pages
+
+    def _preserve_unaffected_pages(self, feedback: str):
+        """Back up drafts of pages the feedback doesn't touch (restored after the redraft)"""
+        if not os.path.exists(DRAFTS_DIR):
+            return
+        self.log("🔍 Analyzing revision request...")
+        existing_pages = [f[:-len('.html')] for f in os.listdir(DRAFTS_DIR) if f.endswith('.html')]
+        scope, pages_to_regenerate = self._revision_scope(feedback, existing_pages)
+
+        if scope == "specific" and pages_to_regenerate:
+            os.makedirs(DRAFTS_BACKUP_DIR, exist_ok=True)
+            preserved = 0
+            for page in existing_pages:
+                if page not in pages_to_regenerate:
+                    shutil.copy2(os.path.join(DRAFTS_DIR, f"{page}.html"), os.path.join(DRAFTS_BACKUP_DIR, f"{page}.html"))
+                    preserved += 1
+            if preserved:
+                self.log(f"   💾 Preserved: {preserved} page(s)")
+
+        shutil.rmtree(DRAFTS_DIR)
+        self.log("🧹 Cleaned drafts for revision")
+
+    def _restore_preserved_pages(self, result: dict):
+        if not os.path.exists(DRAFTS_BACKUP_DIR):
+            return
+        backup_files = [f for f in os.listdir(DRAFTS_BACKUP_DIR) if f.endswith('.html')]
+        if backup_files:
+            self.log(f"📦 Restoring {len(backup_files)} preserved page(s)...")
+            os.makedirs(DRAFTS_DIR, exist_ok=True)
+            for backup_file in backup_files:
+                dst = os.path.join(DRAFTS_DIR, backup_file)
+                shutil.copy2(os.path.join(DRAFTS_BACKUP_DIR, backup_file), dst)
+                with open(dst, 'r', encoding='utf-8') as f:
+                    result["drafts"][backup_file[:-len('.html')]] = f.read()
+                self.log(f"   ✅ {backup_file[:-len('.html')]}")
+            self.log("   💡 These pages were NOT regenerated (preserved from previous version)")
+        shutil.rmtree(DRAFTS_BACKUP_DIR)
+
+    # ========== BUILD PHASE ==========
+
+    @job_settings
+    def confirm(self) -> dict:
+        """Build the approved draft into the Laravel project; returns a summary"""
+        if self.draft_result is None:
+            raise RuntimeError("confirm() called before start()")
+        self.checkpoint()
+        self.log("Cleaning Laravel views before build...")
+        clean_laravel_views(self.log)
+        self.log("✅ Laravel views cleaned")
+
+        speculation, self._speculation = self._speculation, None
+        if speculation is not None:
+            # The speculative run already owns the approved drafts
+            with use_state(speculation.state):
+                return self._build_multi(speculation.state, speculation)
+
+        if self._retired is not None:
+            # A discarded speculative build must not clean output/ under this build
+            self._retired.wait()
+            self._retired = None
+
+        # Approved drafts move into the shared job state (agents read them from there)
+        state = GenerationState.from_draft_result(self.draft_result, mode=self.mode, prompt=self.prompt)
+        with use_state(state):
+            return self._build_single(state) if self.mode == "single" else self._build_multi(state)
+
+    def _build_single(self, state: GenerationState) -> dict:
+        draft = state.main_draft.text
+
+        with self.agent("prompt-planner", "Prompt Planner", "Planning components..."):
+            from .c_prompt_planner import plan_prompt
+            plan = plan_prompt(f"For UI design and materials, follow this draft reference: {draft}")
+        with self.agent("page-architect", "Page Architect", "Designing layout..."):
+            layout = design_layout(plan)
+        with self.agent("component-agent", "Component Agent", "Listing components..."):
+            state.add_components(list_components(plan, draft))
+        with self.agent("ui-generator", "UI Generator", "Generating Blade views..."):
+            generate_blade(layout, dict(state.components), draft)
+        with self.agent("layout-generator", "Layout Generator", "Creating app layout..."):
+            generate_layout_app(plan, draft)
+        with self.agent("route-agent", "Route Agent", "Generating route..."):
+            from .g_route_agent import generate_route
+            generate_route(plan, draft)
+        with self.agent("validator-agent", "Validator Agent", "Validating components..."):
+            all_valid = validate_components(state, self.log)
+        with self.agent("project-mover", "Project Mover", "Moving to Laravel project..."):
+            move_to_laravel_project(layout)
+        register_components(state)
+
+        self._fix_single()
+        return {
+            "mode": "single",
+            "pages": [{"page": plan["page"], "route": plan["route"]}],
+            "route": plan["route"],
+            "components": state.component_names(),
+            "all_valid": all_valid,
+        }
+
+    def _build_multi(self, state: GenerationState, speculation: Optional[SpeculativeBuild] = None) -> dict:
+        self.log(f"📋 Generating {len(state.pages)} page(s): {', '.join(state.page_names())}")
+        fixer_started = [time.perf_counter()]
+
+        def pipeline_event(event: dict):
+            group = event.get("group")
+            if event["type"] == "group_start":
+                if group == "validator-fixer":
+                    fixer_started[0] = time.perf_counter()
+                agent_name, description = PIPELINE_AGENTS[group]
+                self.emit({"type": "agent_start", "agent_id": group, "agent_name": agent_name, "description": description})
+            elif event["type"] == "group_complete" and group != "validator-fixer":
+                # validator-fixer completes after the fixers below
+                self.emit({"type": "agent_complete", "agent_id": group, "agent_name": PIPELINE_AGENTS[group][0],
+                           "duration": round(event["duration"], 2)})
+            elif event["type"] == "stage_failed" and event["stage"] == "routes":
+                self.log(f"⚠️ Route generation warning: {event['error']}")
+
+        try:
+            if speculation is not None:
+                self.log("⚡ Using the build started while the draft was reviewed")
+                generation = speculation.commit(log=self.log, on_event=pipeline_event)
+            else:
+                generation = run_multi_page_pipeline(state, log=self.log, on_event=pipeline_event, cancel=self._cancelled)
+        except PipelineError:
+            self.checkpoint()
+            raise
+
+        with span("validator-fixer", kind="stage"):
+            for layout in generation["layouts"]:
+                move_to_laravel_project(layout)
+            register_components(state)
+            self._fix_multi()
+
+        self.emit({"type": "agent_complete", "agent_id": "validator-fixer", "agent_name": PIPELINE_AGENTS["validator-fixer"][0],
+                   "duration": round(time.perf_counter() - fixer_started[0], 2)})
+
+        pages = [{"page": page["page"], "route": page["route"]} for page in generation["pages"]]
+        return {
+            "mode": "multi",
+            "pages": pages,
+            "route": pages[0]["route"] if pages else "/",
+            "components": state.component_names(),
+            "all_valid": generation["all_valid"],
+        }
+
+    # ========== AUTO-FIX ==========
+
+    def _fix_single(self):
+        """Route removal and component-name fixes (styling fixes stay off to preserve draft accuracy)"""
+        self.log("Auto-fixing routes and component names (single-page mode)...")
+        sys.path.insert(0, 'utils')
+        try:
+            from fix_single_page import fix_component_routes_single_page
+            from fix_component_names import fix_component_includes
+            from bundle_assets import bundle_assets, bundler_enabled
+
+            self.log("  Removing route() calls (single-page)...")
+            self.fixer("fix_component_routes_single_page", fix_component_routes_single_page)
+            self.log("  ✅ Single-page route fixes applied")
+
+            self.log("  Fixing component names...")
+            self.fixer("fix_component_includes", fix_component_includes)
+            self.log("  ✅ Component names fixed")
+
+            self._bundle(bundle_assets, bundler_enabled)
+        except GenerationCancelled:
+            raise
+        except Exception as e:
+            self.log(f"  ⚠️ Auto-fix warning: {e}")
+        self.log("  ℹ️ Styling fixes disabled to preserve draft accuracy")
+
+    def _fix_multi(self):
+        self.log("Running multi-page validation...")
+        try:
+            from utils.multi_page_validator import validate_multi_page_app
+            if self.fixer("validate_multi_page_app", validate_multi_page_app, "my-laravel"):
+                self.log("✅ Multi-page validation passed")
+            else:
+                self.log("⚠️ Validation found issues. Attempting auto-fix...")
+        except GenerationCancelled:
+            raise
+        except Exception as e:
+            self.log(f"⚠️ Validation warning: {e}")
+
+        self.log("\n[AUTO-FIX] Applying optimizations...")
+        self.log("Auto-fixing CSS, routes, and styling (multi-page mode)...")
+        sys.path.insert(0, 'utils')
+        try:
+            from fix_nested_ui import fix_nested_ui
+            from fix_layout_css import extract_custom_css_from_draft, update_layout_css
+            from fix_layout_js import extract_javascript_from_drafts, update_layout_js
+            from smart_route_sync import sync_navbar_routes
+            from fix_component_styling import fix_hero_section, fix_all_components
+            from fix_component_names import fix_component_includes
+            from bundle_assets import bundle_assets, bundler_enabled
+
+            # Fix nested UI first (critical)
+            self.fixer("fix_nested_ui", fix_nested_ui)
+            self.log("  ✅ Nested UI fixed")
+
+            custom_css = self.fixer("extract_custom_css_from_draft", extract_custom_css_from_draft)
+            if custom_css:
+                self.fixer("update_layout_css", update_layout_css, custom_css)
+                self.log("  ✅ Custom CSS applied to layout")
+
+            self.log("  Merging JavaScript from all pages...")
+            custom_js = self.fixer("extract_javascript_from_drafts", extract_javascript_from_drafts)
+            if custom_js:
+                self.fixer("update_layout_js", update_layout_js, custom_js)
+                self.log("  ✅ JavaScript merged to layout")
+
+            # Smart route sync (preserves valid routes)
+            self.log("  Syncing routes with web.php...")
+            self.fixer("sync_navbar_routes", sync_navbar_routes)
+            self.log("  ✅ Routes synced")
+
+            self.log("  Fixing component styling...")
+            self.fixer("fix_hero_section", fix_hero_section)
+            self.fixer("fix_all_components", fix_all_components)
+            self.log("  ✅ Styling fixes applied")
+
+            self.log("  Fixing component names...")
+            self.fixer("fix_component_includes", fix_component_includes)
+            self.log("  ✅ Component names fixed")
+
+            if self.ai_validation:
+                self.log("  AI validating structure and styling...")
+                from .k_validator_agent_v2 import validate_all_with_llm
+                self.checkpoint()
+                # The validator prints its own progress; only relay it to non-console front-ends
+                callback = None if self.on_event is print_event else self.log
+                if validate_all_with_llm(callback=callback):
+                    self.log("  ✅ AI validation passed")
+                else:
+                    self.log("  ✅ AI validation completed with auto-fixes")
+
+            # Bundle last: fixers and the AI validator read/rewrite inline <style>/<script>
+            self._bundle(bundle_assets, bundler_enabled)
+        except GenerationCancelled:
+            raise
+        except Exception as e:
+            self.log(f"  ⚠️ Auto-fix warning: {e}")
+
+    def _bundle(self, bundle_assets, bundler_enabled):
+        if bundler_enabled():
+            bundle_report = self.fixer("bundle_assets", bundle_assets)
+            if bundle_report:
+                self.log(f"  📦 Assets bundled: {', '.join(bundle_report['assets'])}")
@@ -1,25 +1,61 @@
-import os, sys
+import os
 import re
-from dotenv import load_dotenv
 from .llm_client import get_llm_response
-
-# Load API key
-load_dotenv()
+from .llm_stop import fence_closed, json_complete
+from utils.tracing import span, traced
+from utils.design_system import load_design_system, strip_shared_assets, component_reference
+from utils.component_registry import balanced, component_fragment, component_key, registry
+from utils.config import settings
+from utils.generation_state import current_state
 
 
+@traced()
 def list_components(plan: dict, draft_html: str):
     print("\n\n⚪ [COMPONENT AGENT] Generating components...")
 
     components = plan.get("components", [])
     result = {}
 
+    # 🎨 Shared CSS/JS live in the design system (layout) - components only need body markup
+    design = load_design_system()
+    body_html = strip_shared_assets(draft_html)
+    registry_ = registry()
+    state = current_state()
+
+    # Get available pages from plan for route context
+    available_pages = []
+    if isinstance(plan, dict):
+        # Try to get page info
+        if 'page' in plan:
+            available_pages.append(plan['page'])
+        if 'pages' in plan:
+            available_pages = [p.get('page', p.get('name', '')) for p in plan['pages']]
+
     for comp in components:
+        reference_html = component_reference(design, comp, body_html)
+
+        # ♻️ Same role + same reference fragment (e.g. the shared navbar) → reuse, no LLM call
+        key = component_key(comp, reference_html, available_pages)
+        cached = registry_.get(key) if registry_ is not None else None
+        if cached is not None:
+            print(f"  ♻️ {comp} reused from the component registry")
+            result[comp] = cached
+            save_component(comp, cached)
+            continue
+
+        # 🧬 Same kind built from a similar section in an earlier job → small adaptation instead
+        fragment = component_fragment(comp, reference_html)
+        near = registry_.similar(comp, fragment) if registry_ is not None and settings().component_similarity else None
+        adapted = adapt_component(comp, near, fragment, available_pages) if near else None
+        if adapted is not None:
+            print(f"  🧬 {comp} adapted from {near['name']} (distance {near['distance']})")
+
         user_prompt = f"""
 Create a Laravel Blade component for: `{comp}`
 
 **REFERENCE HTML (Source of Truth):**
 ```html
-{draft_html}
+{reference_html}
 ```
 
 **YOUR TASK:**
@@ -42,15 +78,6 @@ Create a Laravel Blade component for: `{comp}`
 
 Return ONLY the Blade code, no explanations.
 """
-        # Get available pages from plan for route context
-        available_pages = []
-        if isinstance(plan, dict):
-            # Try to get page info
-            if 'page' in plan:
-                available_pages.append(plan['page'])
-            if 'pages' in plan:
-                available_pages = [p.get('page', p.get('name', '')) for p in plan['pages']]
-        
         pages_context = f"\nAvailable pages/routes: {', '.join(available_pages)}" if available_pages else ""
         
         system_prompt = f"""
@@ -88,37 +115,36 @@ Example conversions:
 <a href="https://external.com"> → <a href="https://external.com"> (external)
 """
 
-        # Use unified LLM client (prioritizes Cerebras, falls back to Mistral)
-        try:
-            full_response = get_llm_response(
-                system_prompt=system_prompt,
-                user_prompt=user_prompt,
-                temperature=0.7,
-                max_tokens=32000,
-            )
-
-            # Display response character by character for visual feedback
-            prev_len = 0
-            for i, char in enumerate(full_response):
-                # Untuk tampil sementara: hanya karakter terbaru, bersihkan newline
-                sanitized = char.replace("\n", " ").replace("\r", " ")
-                pad = max(prev_len - len(sanitized), 0)
-                sys.stdout.write("\r" + sanitized + " " * pad)
-                sys.stdout.flush()
-                prev_len = len(sanitized)
-
-        except Exception as e:
-            print(f"\n❌ Failed to generate component {comp}: {e}")
-            full_response = ""
-
-        # Remove <think> tags (from models like DeepSeek) - must be done FIRST
-        full_response = re.sub(r'<think>.*?</think>', '', full_response, flags=re.DOTALL | re.IGNORECASE)
-        full_response = full_response.strip()
+        if adapted is not None:
+            blade_code = adapted
+        else:
+            # Use unified LLM client (prioritizes Cerebras, falls back to Mistral)
+            # Stream ends at the closing ``` of the blade block
+            stop = fence_closed("blade")
+            try:
+                full_response = get_llm_response(
+                    system_prompt=system_prompt,
+                    user_prompt=user_prompt,
+                    temperature=0.7,
+                    max_tokens=32000,
+                    stop_when=stop,
+                )
+
+            except Exception as e:
+                print(f"\n❌ Failed to generate component {comp}: {e}")
+                full_response = ""
+
+            # Remove <think> tags (from models like DeepSeek) - must be done FIRST
+            full_response = re.sub(r'<think>.*?</think>', '', full_response, flags=re.DOTALL | re.IGNORECASE)
+            full_response = full_response.strip()
         
-        match = re.findall(
-            r"```blade\s*(.*?)```", full_response, re.DOTALL | re.IGNORECASE
-        )
-        blade_code = match[0].strip() if match else full_response.strip()
+            if stop.content is not None:
+                blade_code = stop.content
+            else:
+                match = re.findall(
+                    r"```blade\s*(.*?)```", full_response, re.DOTALL | re.IGNORECASE
+                )
+                blade_code = match[0].strip() if match else full_response.strip()
         
         # Final cleanup: remove markdown markers
         if blade_code.startswith('```blade'):
@@ -142,13 +168,92 @@ Example conversions:
         if len(blade_code) < 50 or 'not contain' in blade_code.lower() or 'not found' in blade_code.lower():
             print(f"\n  ⚠️ {comp} appears empty or not found in draft, creating minimal component")
             blade_code = f"<!-- {comp} component -->\n<div class=\"{comp.lower()}\">\n    <!-- Add {comp} content here -->\n</div>"
+        elif registry_ is not None and state is not None:
+            # Registered by register_components() once validated and the build is committed
+            state.registry_candidates[comp] = (key, fragment)
 
         result[comp] = blade_code
-
-        # ⬇️ Simpan tiap komponen ke file:
-        filename = f"output/components/{comp.lower()}.blade.php"
-        os.makedirs(os.path.dirname(filename), exist_ok=True)
-        with open(filename, "w", encoding="utf-8") as f:
-            f.write(blade_code)
+        save_component(comp, blade_code)
 
     return result
+
+
+ADAPT_SCHEMA = {"replacements": list}
+
+ADAPT_SYSTEM_PROMPT = """
+You are a Blade component adapter.
+You receive an existing Laravel Blade component and a new HTML section with the same structure.
+Return ONLY a JSON object listing the text edits that make the component match the new section:
+{"replacements": [{"find": "exact text from the existing component", "replace": "new text"}]}
+
+RULES:
+- "find" must be copied EXACTLY from the existing component and occur in it once
+- Change only what differs: texts, links, image URLs, color classes
+- Links to pages that exist use {{ route('name') }}, other internal links use "#"
+- Return {"replacements": []} when nothing differs
+"""
+
+
+def adapt_component(comp: str, near: dict, fragment: str, available_pages: list):
+    """Blade code for `comp` from a near-match of an earlier job (None → generate from scratch)"""
+    pages_context = f"\nAvailable pages/routes: {', '.join(available_pages)}" if available_pages else ""
+    user_prompt = f"""
+Adapt the existing `{near['name']}` component into `{comp}`.
+
+**EXISTING COMPONENT:**
+```blade
+{near['code']}
+```
+
+**NEW SECTION (Source of Truth):**
+```html
+{fragment}
+```
+{pages_context}
+"""
+    stop = json_complete(ADAPT_SCHEMA)
+    try:
+        response = get_llm_response(
+            system_prompt=ADAPT_SYSTEM_PROMPT,
+            user_prompt=user_prompt,
+            temperature=0.2,
+            max_tokens=4000,
+            stop_when=stop,
+        )
+    except Exception as e:
+        print(f"  ⚠️ Adapting {comp} failed: {e}")
+        return None
+
+    edits = stop.parsed(response)
+    if edits is None:
+        return None
+    code = near["code"]
+    for edit in edits["replacements"]:
+        if not isinstance(edit, dict) or not isinstance(edit.get("find"), str) or not edit["find"]:
+            return None
+        if code.count(edit["find"]) != 1:
+            print(f"  ⚠️ {comp}: adaptation edit does not match the stored component, generating instead")
+            return None
+        code = code.replace(edit["find"], str(edit.get("replace", "")))
+    return code if balanced(code) else None
+
+
+def save_component(comp: str, blade_code: str):
+    """Simpan komponen ke output/components/<name>.blade.php"""
+    filename = f"output/components/{comp.lower()}.blade.php"
+    os.makedirs(os.path.dirname(filename), exist_ok=True)
+    with span("write", kind="file", path=filename), open(filename, "w", encoding="utf-8") as f:
+        f.write(blade_code)
+
+
+def register_components(state):
+    """Store the job's validated components in the registry - call once the build is committed"""
+    registry_ = registry()
+    if registry_ is None:
+        return
+    for name, (key, fragment) in state.registry_candidates.items():
+        code = state.components.get(name)
+        if code is not None:
+            registry_.put(key, name, code, fragment)
+    state.registry_candidates.clear()
+    registry_.save()
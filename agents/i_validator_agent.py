@@ -1,12 +1,15 @@
 from .llm_client import get_llm_response
+from .llm_stop import json_complete
 import os
 import re
-import json
-from dotenv import load_dotenv
+from utils.tracing import traced
+from utils.generation_state import current_state
 
-load_dotenv()
+# Shape every validation reply must have; anything else counts as "no issues"
+VALIDATION_SCHEMA = {"is_valid": bool, "issues": list}
 
 
+@traced()
 def validate(blade: str):
     """Basic structure validation (legacy function)"""
     system_prompt = """
@@ -33,10 +36,6 @@ Only output this result. No code block.
             max_tokens=32000,
         )
 
-        # Display response character by character for visual feedback
-        for char in result:
-            print(char, end="", flush=True)
-
     except Exception as e:
         print(f"❌ Failed to validate: {e}")
         result = "INVALID - Validation service unavailable"
@@ -44,6 +43,7 @@ Only output this result. No code block.
     return result.strip().upper().startswith("VALID")
 
 
+@traced()
 def auto_fix(blade: str, error_reason: str, draft_reference=None):
     """Auto-fix invalid Blade component (structure, styling, scripts)"""
     
@@ -241,9 +241,9 @@ Respond with JSON:
     user_prompt = f"Component: {component_name}\n\n```blade\n{component_code[:2000]}\n```\n\nCheck structure only."
     
     try:
-        response = get_llm_response(system_prompt, user_prompt, temperature=0.2, max_tokens=500)
-        json_match = re.search(r'\{.*\}', response, re.DOTALL)
-        return json.loads(json_match.group(0)) if json_match else {"is_valid": True, "issues": []}
+        stop = json_complete(VALIDATION_SCHEMA)
+        response = get_llm_response(system_prompt, user_prompt, temperature=0.2, max_tokens=500, stop_when=stop)
+        return stop.parsed(response) or {"is_valid": True, "issues": []}
     except:
         return {"is_valid": True, "issues": []}
 
@@ -271,9 +271,9 @@ Respond with JSON:
     user_prompt = f"Component: {component_name}\n\nDraft:\n{draft_reference}\n\nComponent:\n{component_code}\n\nCompare styling."
     
     try:
-        response = get_llm_response(system_prompt, user_prompt, temperature=0.2, max_tokens=500)
-        json_match = re.search(r'\{.*\}', response, re.DOTALL)
-        return json.loads(json_match.group(0)) if json_match else {"is_valid": True, "issues": []}
+        stop = json_complete(VALIDATION_SCHEMA)
+        response = get_llm_response(system_prompt, user_prompt, temperature=0.2, max_tokens=500, stop_when=stop)
+        return stop.parsed(response) or {"is_valid": True, "issues": []}
     except:
         return {"is_valid": True, "issues": []}
 
@@ -300,9 +300,9 @@ Respond with JSON:
     user_prompt = f"Component: {component_name}\n\nDraft:\n{draft_reference}\n\nComponent:\n{component_code}\n\nCompare scripts and interactivity."
     
     try:
-        response = get_llm_response(system_prompt, user_prompt, temperature=0.2, max_tokens=500)
-        json_match = re.search(r'\{.*\}', response, re.DOTALL)
-        return json.loads(json_match.group(0)) if json_match else {"is_valid": True, "issues": []}
+        stop = json_complete(VALIDATION_SCHEMA)
+        response = get_llm_response(system_prompt, user_prompt, temperature=0.2, max_tokens=500, stop_when=stop)
+        return stop.parsed(response) or {"is_valid": True, "issues": []}
     except:
         return {"is_valid": True, "issues": []}
 
@@ -330,13 +330,14 @@ Respond with JSON:
     user_prompt = f"Component: {component_name}\n\nDraft:\n{draft_reference}\n\nComponent:\n{component_code}\n\nCheck spacing between header and main content."
     
     try:
-        response = get_llm_response(system_prompt, user_prompt, temperature=0.2, max_tokens=500)
-        json_match = re.search(r'\{.*\}', response, re.DOTALL)
-        return json.loads(json_match.group(0)) if json_match else {"is_valid": True, "issues": []}
+        stop = json_complete(VALIDATION_SCHEMA)
+        response = get_llm_response(system_prompt, user_prompt, temperature=0.2, max_tokens=500, stop_when=stop)
+        return stop.parsed(response) or {"is_valid": True, "issues": []}
     except:
         return {"is_valid": True, "issues": []}
 
 
+@traced()
 def validate_with_reason(blade: str, draft_reference=None):
     """Validate structure, styling, and scripts - return reason if invalid"""
     
@@ -446,6 +447,10 @@ If scripts differ: INVALID: [what's missing or different]"""
 
 def load_draft_reference(page_name=None):
     """Load draft HTML for styling and script comparison"""
+    state = current_state()
+    if state is not None and (state.drafts or state.main_draft.exists):
+        return state.draft(page_name) if page_name in state.drafts else state.first_draft()
+    
     if page_name:
         draft_path = f"output/drafts/{page_name}.html"
         if os.path.exists(draft_path):
@@ -2,7 +2,9 @@
 
 import os
 import shutil
+from utils.tracing import span, traced
 
+@traced()
 def move_to_laravel_project(layout):
     print("\n🟦 [MOVE TO PROJECT] Moving to Laravel Project...")
     
@@ -61,12 +63,12 @@ def move_to_laravel_project(layout):
                 print(f"⚠️ Routes already exist in {route_dest}, skipping...")
             else:
                 # Replace entire file with new routes
-                with open(route_dest, "w", encoding="utf-8") as f:
+                with span("write", kind="file", path=route_dest), open(route_dest, "w", encoding="utf-8") as f:
                     f.write(new_routes)
                 print(f"✅ Routes replaced in {route_dest}")
         else:
             # Create new file
-            with open(route_dest, "w", encoding="utf-8") as f:
+            with span("write", kind="file", path=route_dest), open(route_dest, "w", encoding="utf-8") as f:
                 f.write(new_routes)
             print(f"✅ Routes created in {route_dest}")
     else:
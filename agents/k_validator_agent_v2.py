@@ -6,6 +6,12 @@ Uses AI to understand component structure and detect issues
 import os
 import re
 from .llm_client import get_llm_response
+from .llm_stop import json_complete
+from utils.tracing import span, traced
+from utils.generation_state import current_state
+
+# Shape every validation reply must have; anything else counts as "no issues"
+VALIDATION_SCHEMA = {"is_valid": bool, "issues": list}
 
 
 def validate_component_structure(component_name, component_code):
@@ -26,10 +32,9 @@ Respond with JSON:
     user_prompt = f"Component: {component_name}\n\n```blade\n{component_code[:2000]}\n```\n\nCheck structure only."
     
     try:
-        response = get_llm_response(system_prompt, user_prompt, temperature=0.2, max_tokens=500)
-        import json
-        json_match = re.search(r'\{.*\}', response, re.DOTALL)
-        return json.loads(json_match.group(0)) if json_match else {"is_valid": True, "issues": []}
+        stop = json_complete(VALIDATION_SCHEMA)
+        response = get_llm_response(system_prompt, user_prompt, temperature=0.2, max_tokens=500, stop_when=stop)
+        return stop.parsed(response) or {"is_valid": True, "issues": []}
     except:
         return {"is_valid": True, "issues": []}
 
@@ -55,10 +60,9 @@ Respond with JSON:
     user_prompt = f"Component: {component_name}\n\nDraft:\n{draft_reference}\n\nComponent:\n{component_code}\n\nCompare colors only."
     
     try:
-        response = get_llm_response(system_prompt, user_prompt, temperature=0.2, max_tokens=500)
-        import json
-        json_match = re.search(r'\{.*\}', response, re.DOTALL)
-        return json.loads(json_match.group(0)) if json_match else {"is_valid": True, "issues": []}
+        stop = json_complete(VALIDATION_SCHEMA)
+        response = get_llm_response(system_prompt, user_prompt, temperature=0.2, max_tokens=500, stop_when=stop)
+        return stop.parsed(response) or {"is_valid": True, "issues": []}
     except:
         return {"is_valid": True, "issues": []}
 
@@ -86,10 +90,9 @@ Respond with JSON:
     user_prompt = f"Component: {component_name}\n\nDraft:\n{draft_reference}\n\nComponent:\n{component_code}\n\nCheck spacing between header and main content."
     
     try:
-        response = get_llm_response(system_prompt, user_prompt, temperature=0.2, max_tokens=500)
-        import json
-        json_match = re.search(r'\{.*\}', response, re.DOTALL)
-        return json.loads(json_match.group(0)) if json_match else {"is_valid": True, "issues": []}
+        stop = json_complete(VALIDATION_SCHEMA)
+        response = get_llm_response(system_prompt, user_prompt, temperature=0.2, max_tokens=500, stop_when=stop)
+        return stop.parsed(response) or {"is_valid": True, "issues": []}
     except:
         return {"is_valid": True, "issues": []}
 
@@ -150,16 +153,9 @@ Validate this component thoroughly:
 Report all structural AND styling issues."""
 
     try:
-        response = get_llm_response(system_prompt, user_prompt, temperature=0.3, max_tokens=1000)
-        
-        # Extract JSON from response
-        import json
-        json_match = re.search(r'\{.*\}', response, re.DOTALL)
-        if json_match:
-            result = json.loads(json_match.group(0))
-            return result
-        else:
-            return {"is_valid": True, "issues": [], "suggestions": []}
+        stop = json_complete(VALIDATION_SCHEMA)
+        response = get_llm_response(system_prompt, user_prompt, temperature=0.3, max_tokens=1000, stop_when=stop)
+        return stop.parsed(response) or {"is_valid": True, "issues": [], "suggestions": []}
             
     except Exception as e:
         print(f"  ⚠️ LLM validation error for {component_name}: {e}")
@@ -191,15 +187,9 @@ Code:
 Validate this page structure."""
 
     try:
-        response = get_llm_response(system_prompt, user_prompt, temperature=0.3, max_tokens=800)
-        
-        import json
-        json_match = re.search(r'\{.*\}', response, re.DOTALL)
-        if json_match:
-            result = json.loads(json_match.group(0))
-            return result
-        else:
-            return {"is_valid": True, "issues": []}
+        stop = json_complete(VALIDATION_SCHEMA)
+        response = get_llm_response(system_prompt, user_prompt, temperature=0.3, max_tokens=800, stop_when=stop)
+        return stop.parsed(response) or {"is_valid": True, "issues": []}
             
     except Exception as e:
         print(f"  ⚠️ LLM validation error for {page_name}: {e}")
@@ -269,6 +259,9 @@ Apply ALL fixes (structure + styling) and return the corrected code:"""
 
 def load_draft_reference(page_name):
     """Load draft HTML for styling comparison"""
+    state = current_state()
+    if state is not None and page_name in state.drafts:
+        return state.draft(page_name)
     draft_path = f"output/drafts/{page_name}.html"
     if os.path.exists(draft_path):
         with open(draft_path, 'r', encoding='utf-8') as f:
@@ -292,6 +285,7 @@ def get_available_routes():
     return available_routes
 
 
+@traced()
 def validate_all_with_llm(callback=None):
     """Validate all components and pages using LLM with draft styling comparison
     
@@ -320,15 +314,17 @@ def validate_all_with_llm(callback=None):
     available_routes = get_available_routes()
     log(f"[INFO] Available routes: {', '.join(available_routes)}")
     
-    # Load draft references for styling comparison
+    # Load the draft reference for styling comparison (first non-empty draft;
+    # the others are never compared, so they are not read)
     drafts_dir = "output/drafts"
-    draft_files = {}
+    draft_reference = None
     if os.path.exists(drafts_dir):
-        for draft_file in os.listdir(drafts_dir):
-            if draft_file.endswith('.html'):
-                page_name = draft_file.replace('.html', '')
-                draft_files[page_name] = load_draft_reference(page_name)
-        log(f"[INFO] Loaded {len(draft_files)} draft(s) for styling comparison")
+        draft_pages = [f.replace('.html', '') for f in os.listdir(drafts_dir) if f.endswith('.html')]
+        for page_name in draft_pages:
+            draft_reference = load_draft_reference(page_name)
+            if draft_reference:
+                break
+        log(f"[INFO] Found {len(draft_pages)} draft(s) for styling comparison")
     
     # Validate components with draft styling comparison
     if os.path.exists(components_dir):
@@ -351,7 +347,7 @@ def validate_all_with_llm(callback=None):
             if re.search(malformed_pattern, code):
                 log(f"      Auto-fixing malformed route syntax...")
                 code = re.sub(malformed_pattern, r"route('\1') }}", code)
-                with open(filepath, 'w', encoding='utf-8') as f:
+                with span("write", kind="file", path=filepath), open(filepath, 'w', encoding='utf-8') as f:
                     f.write(code)
             
             # Quick fix: Check for undefined routes
@@ -377,16 +373,9 @@ def validate_all_with_llm(callback=None):
                             code
                         )
                 
-                with open(filepath, 'w', encoding='utf-8') as f:
+                with span("write", kind="file", path=filepath), open(filepath, 'w', encoding='utf-8') as f:
                     f.write(code)
             
-            # Try to find matching draft for styling comparison
-            draft_reference = None
-            for page_name, draft_content in draft_files.items():
-                if draft_content:
-                    draft_reference = draft_content
-                    break
-            
             result = validate_component_with_llm(component_name, code, draft_reference)
             
             if not result.get('is_valid', True):
@@ -479,7 +468,7 @@ def validate_all_with_llm(callback=None):
                 fixed = True
             
             if fixed:
-                with open(filepath, 'w', encoding='utf-8') as f:
+                with span("write", kind="file", path=filepath), open(filepath, 'w', encoding='utf-8') as f:
                     f.write(code)
             
             result = validate_page_with_llm(page_name, code, available_components)
@@ -519,7 +508,7 @@ def validate_all_with_llm(callback=None):
             fixed_code = auto_fix_component(component_name, info['code'], info['issues'])
             
             # Save fixed code
-            with open(info['path'], 'w', encoding='utf-8') as f:
+            with span("write", kind="file", path=info['path']), open(info['path'], 'w', encoding='utf-8') as f:
                 f.write(fixed_code)
             
             log(f"  ✅ {component_name} fixed and saved")
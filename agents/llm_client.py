@@ -13,20 +13,41 @@ Required ENV variables:
 - OPENROUTER_API_KEY, OPENROUTER_MODEL
 - MISTRAL_API_KEY, MISTRAL_MODEL
 
+They are read through utils/config.py settings(): parsed and validated once,
+swapped by reload_settings() (changed API keys re-create the clients).
+
+Offline mode (benchmarks / load tests):
+- LLM_STUB=1 or LLM_STUB_RESPONSES=path swaps all providers for the
+  deterministic StubProvider (see agents/llm_stub.py)
+
+Recorder mode (load tests):
+- LLM_RECORD_PATH=path appends every request/response with timing to a
+  compact JSON-lines log (see agents/llm_recorder.py)
+
+Early stop:
+- stop_when=<predicate> closes the stream once the requested artifact
+  (fenced code, </html>, balanced JSON) is complete (see agents/llm_stop.py)
+
+Lazy start:
+- Importing this module loads no provider SDK and creates no client: the
+  shared LLMClient (get_llm_client()) is built on the first LLM call, and
+  each SDK is imported only when its client is created
+
 See .env.example for full configuration options.
 """
 
+import importlib.util
 import os
+import sys
+import threading
 import time
 from typing import Dict, Any, Optional
-from dotenv import load_dotenv
 
 # Import monitoring functions
 try:
     from backend.monitoring_data import log_vendor_call, log_issue
 except ImportError:
     try:
-        import sys
         from pathlib import Path
         sys.path.insert(0, str(Path(__file__).parent.parent))
         from backend.monitoring_data import log_vendor_call, log_issue
@@ -35,31 +56,69 @@ except ImportError:
         def log_vendor_call(*args, **kwargs): pass
         def log_issue(*args, **kwargs): pass
 
-# Load environment variables
-load_dotenv()
+from utils.config import Settings, on_reload, settings
+from utils.tracing import record_span
+from utils import progress
+from agents.llm_usage import usage_tracker, estimate_call_tokens
 
-try:
-    from cerebras.cloud.sdk import Cerebras
+def _installed(module: str) -> bool:
+    """SDK availability without importing it (imports happen when a client is created)"""
+    try:
+        return importlib.util.find_spec(module) is not None
+    except (ImportError, ValueError):
+        return False
 
-    CEREBRAS_AVAILABLE = True
-except ImportError:
-    CEREBRAS_AVAILABLE = False
-    print("⚠️ Cerebras SDK not installed. Will use Mistral only.")
 
-try:
-    from mistralai import Mistral
+CEREBRAS_AVAILABLE = _installed("cerebras.cloud.sdk")
+MISTRAL_AVAILABLE = _installed("mistralai")
+REQUESTS_AVAILABLE = _installed("requests")
 
-    MISTRAL_AVAILABLE = True
-except ImportError:
-    MISTRAL_AVAILABLE = False
-    print("⚠️ Mistral SDK not installed.")
+PROVIDER_KEY_SETTINGS = ("cerebras_api_key", "openrouter_api_key", "mistral_api_key")
 
-try:
-    import requests
-    REQUESTS_AVAILABLE = True
-except ImportError:
-    REQUESTS_AVAILABLE = False
-    print("⚠️ Requests library not installed.")
+
+def stub_enabled() -> bool:
+    """True when ENV asks for the offline stub provider"""
+    return (
+        os.environ.get("LLM_STUB", "").lower() in ("1", "true", "yes")
+        or bool(os.environ.get("LLM_STUB_RESPONSES"))
+    )
+
+
+def calling_agent() -> str:
+    """
+    Name of the agent function that issued the current LLM call
+
+    Walks out of this module, then keeps walking while frames belong to the
+    same module as the first caller, so helper functions (e.g.
+    generate_single_draft) are attributed to their entry point
+    (draft_agent_multi). Tracing decorator and HTML continuation helper
+    (utils.html_completeness) frames are skipped.
+    """
+    transparent = (__name__, "utils.tracing", "contextlib", "utils.html_completeness")
+    frame = sys._getframe(1)
+    while frame is not None and frame.f_globals.get("__name__") in transparent:
+        frame = frame.f_back
+    if frame is None:
+        return "unknown"
+
+    module = frame.f_globals.get("__name__")
+    name = frame.f_code.co_name
+    while frame is not None and frame.f_globals.get("__name__") in (module,) + transparent:
+        if frame.f_globals.get("__name__") == module and not frame.f_code.co_name.startswith("<"):
+            name = frame.f_code.co_name
+        frame = frame.f_back
+    return name
+
+
+class ProviderClients:
+    """Provider clients built from one set of API keys; replaced as a whole on reload"""
+
+    __slots__ = ("cerebras", "openrouter_api_key", "mistral")
+
+    def __init__(self, cerebras=None, openrouter_api_key: Optional[str] = None, mistral=None):
+        self.cerebras = cerebras
+        self.openrouter_api_key = openrouter_api_key
+        self.mistral = mistral
 
 
 class LLMClient:
@@ -69,42 +128,162 @@ class LLMClient:
     """
 
     def __init__(self):
-        self.cerebras_client = None
-        self.mistral_client = None
-        self.openrouter_api_key = None
+        self.providers = ProviderClients()
+        self.stub_provider = None
+        self.recorder = None
+        # Per-thread streaming metrics of the last provider call (TTFT, tokens)
+        self._call_metrics = threading.local()
+
+        from agents.llm_recorder import LLMRecorder
+        recorder = LLMRecorder.from_env()
+        if recorder is not None:
+            self.use_recorder(recorder)
+
+        # Offline mode: no real provider is initialized
+        if stub_enabled():
+            from agents.llm_stub import StubProvider
+            self.use_stub(StubProvider.from_env())
+            return
+
+        self._init_providers(settings())
+        # Retuned API keys take effect without a restart
+        on_reload(self._on_settings_reload)
+
+    def _init_providers(self, cfg: Settings):
+        """
+        Create the provider clients from the API keys in `cfg`. They are
+        built aside and swapped in with one assignment, so calls running
+        during a reload see either the old or the new clients, never None.
+        """
+        cerebras_client = mistral_client = openrouter_api_key = None
 
         # Initialize Cerebras client
         if CEREBRAS_AVAILABLE:
-            cerebras_api_key = os.environ.get("CEREBRAS_API_KEY")
+            cerebras_api_key = cfg.cerebras_api_key
             if cerebras_api_key and cerebras_api_key != "your_cerebras_api_key_here":
                 try:
-                    self.cerebras_client = Cerebras(api_key=cerebras_api_key)
+                    from cerebras.cloud.sdk import Cerebras
+                    cerebras_client = Cerebras(api_key=cerebras_api_key)
                     print("✅ Cerebras Qwen Code client initialized")
                 except Exception as e:
                     print(f"❌ Failed to initialize Cerebras: {e}")
             else:
                 print("⚠️ Cerebras API key not found or not set")
+        else:
+            print("⚠️ Cerebras SDK not installed. Will use Mistral only.")
 
         # Initialize OpenRouter API key (fallback 2)
         if REQUESTS_AVAILABLE:
-            openrouter_key = os.environ.get("OPENROUTER_API_KEY")
+            openrouter_key = cfg.openrouter_api_key
             if openrouter_key:
-                self.openrouter_api_key = openrouter_key
+                openrouter_api_key = openrouter_key
                 print("✅ OpenRouter API key loaded (fallback 2)")
             else:
                 print("⚠️ OpenRouter API key not found")
+        else:
+            print("⚠️ Requests library not installed.")
 
         # Initialize Mistral client (fallback 3)
         if MISTRAL_AVAILABLE:
-            mistral_api_key = os.environ.get("MISTRAL_API_KEY")
+            mistral_api_key = cfg.mistral_api_key
             if mistral_api_key:
                 try:
-                    self.mistral_client = Mistral(api_key=mistral_api_key)
+                    from mistralai import Mistral
+                    mistral_client = Mistral(api_key=mistral_api_key)
                     print("✅ Mistral client initialized (fallback 3)")
                 except Exception as e:
                     print(f"❌ Failed to initialize Mistral: {e}")
             else:
                 print("⚠️ Mistral API key not found")
+        else:
+            print("⚠️ Mistral SDK not installed.")
+
+        self.providers = ProviderClients(cerebras_client, openrouter_api_key, mistral_client)
+
+    def _on_settings_reload(self, old: Settings, new: Settings):
+        if self.stub_provider is not None:
+            return
+        if any(getattr(old, key) != getattr(new, key) for key in PROVIDER_KEY_SETTINGS):
+            print("🔑 Provider API keys changed, re-initializing LLM clients")
+            self._init_providers(new)
+
+    def use_stub(self, provider):
+        """Route every call to a stub provider (None restores real providers)"""
+        self.stub_provider = provider
+        if provider is not None:
+            print("🧪 Stub LLM provider enabled (offline mode)")
+
+    def use_recorder(self, recorder):
+        """Append every LLM call to a recorder (None disables recording)"""
+        self.recorder = recorder
+        if recorder is not None:
+            print(f"📼 Recording LLM traffic to {recorder.path}")
+
+    def mark_job(self, prompt: str, mode: str):
+        """Tell the recorder a user generation started (no-op when not recording)"""
+        if self.recorder is not None:
+            self.recorder.mark_job(prompt, mode)
+
+    def _reset_call_metrics(self):
+        self._call_metrics.ttft_ms = None
+        self._call_metrics.prompt_tokens = None
+        self._call_metrics.output_tokens = None
+        self._call_metrics.stopped_early = False
+
+    def _stop_stream(self, stream, stop) -> bool:
+        """True (and the stream closed) once the stop predicate saw a complete artifact"""
+        if not stop.fired:
+            return False
+        self._call_metrics.stopped_early = True
+        close = getattr(stream, "close", None)
+        if close is not None:
+            try:
+                close()
+            except Exception:
+                pass
+        return True
+
+    def _account_call(self, provider: str, agent: str, system_prompt: str, user_prompt: str, result: str) -> Dict[str, Any]:
+        """
+        Token usage, cost and TTFT of the call that just finished (tokens estimated if not reported)
+
+        Never raises: the response is already paid for, so an accounting
+        problem must not turn it into a provider failure.
+        """
+        ttft_ms = getattr(self._call_metrics, "ttft_ms", None)
+        try:
+            prompt_tokens = getattr(self._call_metrics, "prompt_tokens", None)
+            completion_tokens = getattr(self._call_metrics, "output_tokens", None)
+            estimated = not (prompt_tokens and completion_tokens)
+            if estimated:
+                estimated_prompt, estimated_completion = estimate_call_tokens(system_prompt, user_prompt, result)
+                prompt_tokens = prompt_tokens or estimated_prompt
+                completion_tokens = completion_tokens or estimated_completion
+            usage = usage_tracker.record(provider, agent, prompt_tokens, completion_tokens, estimated)
+        except Exception as e:
+            print(f"⚠️ Usage accounting failed for {provider}: {e}")
+            usage = {"provider": provider, "agent": agent}
+        usage["ttft_ms"] = ttft_ms
+        return usage
+
+    def _record(self, provider: str, system_prompt: str, user_prompt: str,
+                duration_ms: float, result: Optional[str] = None, error: str = "",
+                agent: str = None, usage: Optional[Dict[str, Any]] = None):
+        """Trace one provider attempt and append it to the recorder"""
+        usage = usage or {}
+        progress.llm_end(agent, provider, result, error)
+        record_span(
+            f"llm:{provider}", "llm", duration_ms / 1000.0, error=error,
+            provider=provider, prompt_chars=len(system_prompt or "") + len(user_prompt or ""),
+            response_chars=len(result or ""),
+            prompt_tokens=usage.get("prompt_tokens"), completion_tokens=usage.get("completion_tokens"),
+            cost_usd=usage.get("cost_usd"), stopped_early=getattr(self._call_metrics, "stopped_early", False),
+        )
+        if self.recorder is not None:
+            self.recorder.record_call(
+                system_prompt, user_prompt, provider, agent or calling_agent(),
+                duration_ms, response=result, error=error
+            )
 
     def generate_response(self, system_prompt: str, user_prompt: str, **kwargs) -> str:
         """
@@ -113,53 +292,89 @@ class LLMClient:
         Args:
             system_prompt: System message content
             user_prompt: User message content
-            **kwargs: Additional parameters (temperature, max_tokens, etc.)
+            **kwargs: Additional parameters (temperature, max_tokens, etc.);
+                stop_when: agents.llm_stop predicate - the stream is closed
+                once the requested artifact is complete
 
         Returns:
             Generated response string
         """
 
+        agent = calling_agent()
+        progress.llm_start(agent)
+        stop = kwargs.pop("stop_when", None)
+        if not settings().llm_stream_stop:
+            stop = None
+
+        # Offline stub replaces all providers (no fallback chain, no vendor logging)
+        if self.stub_provider is not None:
+            start_time = time.time()
+            result = self.stub_provider.generate(
+                system_prompt, user_prompt, agent=agent, stop_when=stop, **kwargs
+            ).strip()
+            self._reset_call_metrics()
+            self._call_metrics.stopped_early = bool(stop is not None and stop.fired)
+            usage = self._account_call("Stub", agent, system_prompt, user_prompt, result)
+            self._record("Stub", system_prompt, user_prompt, (time.time() - start_time) * 1000, result,
+                         agent=agent, usage=usage)
+            return result
+
+        providers = self.providers  # one snapshot for the whole fallback chain
+
         # Try Cerebras first
-        if self.cerebras_client:
+        if providers.cerebras:
             start_time = time.time()
+            self._reset_call_metrics()
             try:
-                result = self._generate_cerebras(system_prompt, user_prompt, **kwargs)
+                result = self._generate_cerebras(providers.cerebras, system_prompt, user_prompt, stop=stop, **kwargs)
                 duration_ms = (time.time() - start_time) * 1000
-                log_vendor_call("Cerebras", "LLM API", duration_ms, True)
+                usage = self._account_call("Cerebras", agent, system_prompt, user_prompt, result)
+                log_vendor_call("Cerebras", "LLM API", duration_ms, True, agent=agent, usage=usage)
+                self._record("Cerebras", system_prompt, user_prompt, duration_ms, result, agent=agent, usage=usage)
                 return result
             except Exception as e:
                 duration_ms = (time.time() - start_time) * 1000
-                log_vendor_call("Cerebras", "LLM API", duration_ms, False, str(e))
+                log_vendor_call("Cerebras", "LLM API", duration_ms, False, str(e), agent=agent)
+                self._record("Cerebras", system_prompt, user_prompt, duration_ms, error=str(e), agent=agent)
                 log_issue(f"Cerebras API error: {str(e)[:100]}", "Medium", "LLM Client")
                 print(f"❌ Cerebras failed: {e}")
                 print("🔄 Falling back to OpenRouter...")
 
         # Fallback to OpenRouter
-        if self.openrouter_api_key:
+        if providers.openrouter_api_key:
             start_time = time.time()
+            self._reset_call_metrics()
             try:
-                result = self._generate_openrouter(system_prompt, user_prompt, **kwargs)
+                result = self._generate_openrouter(providers.openrouter_api_key, system_prompt, user_prompt,
+                                                   stop=stop, **kwargs)
                 duration_ms = (time.time() - start_time) * 1000
-                log_vendor_call("OpenRouter", "LLM API", duration_ms, True)
+                usage = self._account_call("OpenRouter", agent, system_prompt, user_prompt, result)
+                log_vendor_call("OpenRouter", "LLM API", duration_ms, True, agent=agent, usage=usage)
+                self._record("OpenRouter", system_prompt, user_prompt, duration_ms, result, agent=agent, usage=usage)
                 return result
             except Exception as e:
                 duration_ms = (time.time() - start_time) * 1000
-                log_vendor_call("OpenRouter", "LLM API", duration_ms, False, str(e))
+                log_vendor_call("OpenRouter", "LLM API", duration_ms, False, str(e), agent=agent)
+                self._record("OpenRouter", system_prompt, user_prompt, duration_ms, error=str(e), agent=agent)
                 log_issue(f"OpenRouter API error: {str(e)[:100]}", "Medium", "LLM Client")
                 print(f"❌ OpenRouter failed: {e}")
                 print("🔄 Falling back to Mistral...")
 
         # Fallback to Mistral
-        if self.mistral_client:
+        if providers.mistral:
             start_time = time.time()
+            self._reset_call_metrics()
             try:
-                result = self._generate_mistral(system_prompt, user_prompt, **kwargs)
+                result = self._generate_mistral(providers.mistral, system_prompt, user_prompt, stop=stop, **kwargs)
                 duration_ms = (time.time() - start_time) * 1000
-                log_vendor_call("Mistral", "LLM API", duration_ms, True)
+                usage = self._account_call("Mistral", agent, system_prompt, user_prompt, result)
+                log_vendor_call("Mistral", "LLM API", duration_ms, True, agent=agent, usage=usage)
+                self._record("Mistral", system_prompt, user_prompt, duration_ms, result, agent=agent, usage=usage)
                 return result
             except Exception as e:
                 duration_ms = (time.time() - start_time) * 1000
-                log_vendor_call("Mistral", "LLM API", duration_ms, False, str(e))
+                log_vendor_call("Mistral", "LLM API", duration_ms, False, str(e), agent=agent)
+                self._record("Mistral", system_prompt, user_prompt, duration_ms, error=str(e), agent=agent)
                 log_issue(f"All LLM providers failed. Last error: {str(e)[:100]}", "High", "LLM Client")
                 print(f"❌ Mistral failed: {e}")
                 raise Exception("All LLM providers (Cerebras, OpenRouter, Mistral) failed")
@@ -167,7 +382,7 @@ class LLMClient:
         log_issue("No LLM clients available", "High", "LLM Client")
         raise Exception("No LLM clients available")
 
-    def _generate_cerebras(self, system_prompt: str, user_prompt: str, **kwargs) -> str:
+    def _generate_cerebras(self, client, system_prompt: str, user_prompt: str, stop=None, **kwargs) -> str:
         """Generate response using Cerebras - ALL CONFIG FROM ENV"""
         messages = []
 
@@ -177,32 +392,45 @@ class LLMClient:
         messages.append({"role": "user", "content": user_prompt})
 
         # Get model from ENV or kwargs (NO hardcoded defaults)
-        model = kwargs.get("model") or os.environ.get("CEREBRAS_MODEL")
+        cfg = settings()
+        model = kwargs.get("model") or cfg.cerebras_model
         if not model:
             raise Exception("CEREBRAS_MODEL not set in ENV and not provided in kwargs")
 
-        # Cerebras configuration - all from ENV
+        # Cerebras configuration - all from ENV (parsed once, utils/config.py)
         config = {
             "messages": messages,
             "model": model,
             "stream": True,
-            "max_completion_tokens": kwargs.get("max_tokens", int(os.environ.get("CEREBRAS_MAX_TOKENS", "40000"))),
-            "temperature": kwargs.get("temperature", float(os.environ.get("CEREBRAS_TEMPERATURE", "0.7"))),
-            "top_p": kwargs.get("top_p", float(os.environ.get("CEREBRAS_TOP_P", "0.8"))),
+            "max_completion_tokens": kwargs.get("max_tokens", cfg.cerebras_max_tokens),
+            "temperature": kwargs.get("temperature", cfg.cerebras_temperature),
+            "top_p": kwargs.get("top_p", cfg.cerebras_top_p),
         }
 
-        stream = self.cerebras_client.chat.completions.create(**config)
+        start_time = time.time()
+        stream = client.chat.completions.create(**config)
+        if stop is not None:
+            stop.reset()
 
         # Collect streamed response
         response_content = ""
         for chunk in stream:
-            if chunk.choices[0].delta.content:
+            usage = getattr(chunk, "usage", None)
+            if usage is not None and getattr(usage, "completion_tokens", None):
+                self._call_metrics.prompt_tokens = getattr(usage, "prompt_tokens", None)
+                self._call_metrics.output_tokens = usage.completion_tokens
+            if chunk.choices and chunk.choices[0].delta.content:
+                if not response_content:
+                    self._call_metrics.ttft_ms = (time.time() - start_time) * 1000
                 response_content += chunk.choices[0].delta.content
+                progress.llm_chunk(chunk.choices[0].delta.content)
+                if stop is not None and stop.feed(chunk.choices[0].delta.content) and self._stop_stream(stream, stop):
+                    return response_content[:stop.end].strip()
 
         return response_content.strip()
 
-    def _generate_openrouter(self, system_prompt: str, user_prompt: str, **kwargs) -> str:
-        """Generate response using OpenRouter API - ALL CONFIG FROM ENV"""
+    def _generate_openrouter(self, api_key: str, system_prompt: str, user_prompt: str, stop=None, **kwargs) -> str:
+        """Generate response using OpenRouter API - ALL CONFIG FROM ENV (not streamed: stop trims the text)"""
         import json
         
         messages = []
@@ -211,21 +439,19 @@ class LLMClient:
         messages.append({"role": "user", "content": user_prompt})
         
         # Get model from ENV or kwargs (NO hardcoded defaults)
-        model = kwargs.get("model") or os.environ.get("OPENROUTER_MODEL")
+        cfg = settings()
+        model = kwargs.get("model") or cfg.openrouter_model
         if not model:
             raise Exception("OPENROUTER_MODEL not set in ENV and not provided in kwargs")
         
-        # Get provider preference from ENV (optional)
-        provider_order = os.environ.get("OPENROUTER_PROVIDER_ORDER", "cerebras").split(",")
-        allow_fallbacks = os.environ.get("OPENROUTER_ALLOW_FALLBACKS", "false").lower() == "true"
-        
         try:
+            import requests
             response = requests.post(
                 url="https://openrouter.ai/api/v1/chat/completions",
                 headers={
-                    "Authorization": f"Bearer {self.openrouter_api_key}",
-                    "HTTP-Referer": os.environ.get("OPENROUTER_REFERER", "https://github.com/genlaravel"),
-                    "X-Title": os.environ.get("OPENROUTER_TITLE", "GenLaravel"),
+                    "Authorization": f"Bearer {api_key}",
+                    "HTTP-Referer": cfg.openrouter_referer,
+                    "X-Title": cfg.openrouter_title,
                     "Content-Type": "application/json"
                 },
                 data=json.dumps({
@@ -234,18 +460,25 @@ class LLMClient:
                     "temperature": kwargs.get("temperature", 0.7),
                     "max_tokens": kwargs.get("max_tokens", 40000),
                     "provider": {
-                        "order": provider_order,
-                        "allow_fallbacks": allow_fallbacks
+                        "order": list(cfg.openrouter_provider_order),
+                        "allow_fallbacks": cfg.openrouter_allow_fallbacks
                     }
                 }),
-                timeout=int(os.environ.get("OPENROUTER_TIMEOUT", "120"))
+                timeout=cfg.openrouter_timeout
             )
             
             if response.status_code != 200:
                 raise Exception(f"HTTP {response.status_code}: {response.text[:300]}")
             
             result = response.json()
-            return result["choices"][0]["message"]["content"].strip()
+            usage = result.get("usage") or {}
+            self._call_metrics.prompt_tokens = usage.get("prompt_tokens")
+            self._call_metrics.output_tokens = usage.get("completion_tokens")
+            content = result["choices"][0]["message"]["content"]
+            if stop is not None:
+                content = stop.trim(content)
+                self._call_metrics.stopped_early = stop.fired
+            return content.strip()
             
         except json.JSONDecodeError as e:
             print(f"❌ OpenRouter JSON error: {response.text[:500]}")
@@ -253,7 +486,7 @@ class LLMClient:
         except Exception as e:
             raise Exception(f"OpenRouter error: {str(e)}")
 
-    def _generate_mistral(self, system_prompt: str, user_prompt: str, **kwargs) -> str:
+    def _generate_mistral(self, client, system_prompt: str, user_prompt: str, stop=None, **kwargs) -> str:
         """Generate response using Mistral with streaming - ALL CONFIG FROM ENV"""
         messages = []
 
@@ -263,26 +496,56 @@ class LLMClient:
         messages.append({"role": "user", "content": user_prompt})
 
         # Get model from ENV or kwargs (NO hardcoded defaults)
-        model = kwargs.get("model") or os.environ.get("MISTRAL_MODEL")
+        model = kwargs.get("model") or settings().mistral_model
         if not model:
             raise Exception("MISTRAL_MODEL not set in ENV and not provided in kwargs")
 
         # Use streaming approach
-        stream_response = self.mistral_client.chat.stream(
+        start_time = time.time()
+        stream_response = client.chat.stream(
             model=model, messages=messages
         )
+        if stop is not None:
+            stop.reset()
 
         full_response = ""
         for chunk in stream_response:
+            usage = getattr(chunk.data, "usage", None)
+            if usage is not None and getattr(usage, "completion_tokens", None):
+                self._call_metrics.prompt_tokens = getattr(usage, "prompt_tokens", None)
+                self._call_metrics.output_tokens = usage.completion_tokens
             content = chunk.data.choices[0].delta.content
             if content:
+                if not full_response:
+                    self._call_metrics.ttft_ms = (time.time() - start_time) * 1000
                 full_response += content
+                progress.llm_chunk(content)
+                if stop is not None and stop.feed(content) and self._stop_stream(stream_response, stop):
+                    return full_response[:stop.end].strip()
 
         return full_response.strip()
 
 
-# Global LLM client instance
-llm_client = LLMClient()
+# Global LLM client instance, built on first use
+_llm_client: Optional[LLMClient] = None
+_llm_client_lock = threading.Lock()
+
+
+def get_llm_client() -> LLMClient:
+    """The shared LLMClient (created on the first call)"""
+    global _llm_client
+    if _llm_client is None:
+        with _llm_client_lock:
+            if _llm_client is None:
+                _llm_client = LLMClient()
+    return _llm_client
+
+
+def __getattr__(name: str):
+    # `from agents.llm_client import llm_client` keeps working (builds the client then)
+    if name == "llm_client":
+        return get_llm_client()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
 
 
 def get_llm_response(system_prompt: str, user_prompt: str, **kwargs) -> str:
@@ -297,4 +560,4 @@ def get_llm_response(system_prompt: str, user_prompt: str, **kwargs) -> str:
     Returns:
         Generated response string
     """
-    return llm_client.generate_response(system_prompt, user_prompt, **kwargs)
+    return get_llm_client().generate_response(system_prompt, user_prompt, **kwargs)
@@ -0,0 +1,169 @@
+"""
+Tolerant JSON for LLM Structured Outputs
+One pass over the reply finds the first top-level JSON value (after any
+<think> block, prose or ``` fence) and repairs what models commonly get
+wrong instead of failing the parse:
+
+- trailing commas              {"a": 1,}            → {"a": 1}
+- Python literals              True / False / None  → true / false / null
+- truncation (max_tokens)      {"pages": [{"name": "ho   → closed string/brackets,
+                               dangling keys, colons and commas dropped
+- prose after the value        {...} Hope this helps {x} → first value only
+
+A light schema then checks the shape the agent relies on:
+
+    PLAN_SCHEMA = {"pages": list, "reason?": str}   # "?" = optional key
+    plan = parse_json(response, PLAN_SCHEMA)        # None if invalid
+
+Types may be a tuple, e.g. {"is_valid": (bool, str)}. Used by the
+streaming stop predicate (agents/llm_stop.py JsonComplete) and by every
+agent that asks the LLM for JSON.
+"""
+
+import json
+import re
+from typing import Any, List, Optional
+
+PY_LITERALS = {"True": "true", "False": "false", "None": "null", "true": "true", "false": "false", "null": "null"}
+START_RE = re.compile(r"[{\[]")
+
+
+def _skip_think(text: str) -> int:
+    think = re.match(r"\s*<think>", text, re.IGNORECASE)
+    if think is None:
+        return 0
+    close = text.lower().find("</think>", think.end())
+    return len(text) if close < 0 else close + len("</think>")
+
+
+def repair_json(text: str) -> Optional[str]:
+    """JSON text of the first top-level object/array in `text` (repaired), or None"""
+    found = START_RE.search(text, _skip_think(text))
+    if found is None:
+        return None
+
+    out: List[str] = []
+    # Open containers: [kind, expecting_key, cut point before the current key]
+    stack: List[list] = []
+    in_string = False
+    escape = False
+    key_end = -1  # len(out) right after the last complete object key
+    i = found.start()
+    n = len(text)
+
+    def drop_trailing_comma():
+        while out and out[-1].isspace():
+            out.pop()
+        if out and out[-1] == ",":
+            out.pop()
+
+    while i < n:
+        char = text[i]
+        if in_string:
+            out.append(char)
+            if escape:
+                escape = False
+            elif char == "\\":
+                escape = True
+            elif char == '"':
+                in_string = False
+                if stack and stack[-1][0] == "{" and stack[-1][1]:
+                    key_end = len(out)
+            i += 1
+            continue
+
+        if char == '"':
+            if stack and stack[-1][0] == "{" and stack[-1][1]:
+                cut = len(out)
+                while cut and out[cut - 1].isspace():
+                    cut -= 1
+                if cut and out[cut - 1] == ",":
+                    cut -= 1
+                stack[-1][2] = cut
+            in_string = True
+            out.append(char)
+        elif char in "{[":
+            stack.append([char, char == "{", None])
+            out.append(char)
+        elif char in "}]":
+            drop_trailing_comma()
+            if stack:
+                kind = stack.pop()[0]
+                out.append("}" if kind == "{" else "]")
+            if not stack:
+                return "".join(out)
+        elif char == ":":
+            if stack and stack[-1][0] == "{":
+                stack[-1][1] = False
+            out.append(char)
+        elif char == ",":
+            if stack and stack[-1][0] == "{":
+                stack[-1][1] = True
+            out.append(char)
+        elif char.isalpha():
+            word = re.match(r"[A-Za-z_]+", text[i:]).group(0)
+            if word in PY_LITERALS:
+                out.append(PY_LITERALS[word])
+            elif i + len(word) < n:
+                out.append(word)  # not repairable, json.loads will say so
+            i += len(word)
+            continue
+        else:
+            out.append(char)
+        i += 1
+
+    # Truncated: close what is open, dropping a dangling key / colon / comma
+    if in_string:
+        if stack and stack[-1][0] == "{" and stack[-1][1] and stack[-1][2] is not None:
+            del out[stack[-1][2]:]
+        else:
+            if escape:
+                out.pop()
+            out.append('"')
+    text_out = "".join(out).rstrip()
+    text_out = re.sub(r"[-+.eE]+$", "", text_out) if re.search(r"\d[-+.eE]+$", text_out) else text_out
+    if stack and stack[-1][0] == "{" and stack[-1][2] is not None and (
+            text_out.endswith(":") or (stack[-1][1] and len(text_out) == key_end)):
+        text_out = "".join(out)[:stack[-1][2]]
+    text_out = text_out.rstrip().rstrip(",")
+    return text_out + "".join("}" if kind == "{" else "]" for kind, _, _ in reversed(stack))
+
+
+def schema_errors(value: Any, schema: Optional[dict]) -> List[str]:
+    """Mismatches between a parsed object and a {key: type} schema ("key?" = optional)"""
+    if not schema:
+        return []
+    if not isinstance(value, dict):
+        return [f"expected an object, got {type(value).__name__}"]
+    errors = []
+    for key, expected in schema.items():
+        optional = key.endswith("?")
+        key = key.rstrip("?")
+        if key not in value:
+            if not optional:
+                errors.append(f"missing '{key}'")
+            continue
+        if not isinstance(value[key], expected):
+            errors.append(f"'{key}' is {type(value[key]).__name__}")
+    return errors
+
+
+def parse_json(text: str, schema: Optional[dict] = None, default: Any = None) -> Any:
+    """First JSON value in an LLM reply (repaired if needed) matching `schema`, else `default`"""
+    if not text:
+        return default
+    try:
+        value = json.loads(text)
+    except (json.JSONDecodeError, TypeError):
+        repaired = repair_json(text)
+        if repaired is None:
+            return default
+        try:
+            value = json.loads(repaired)
+        except json.JSONDecodeError:
+            return default
+    errors = schema_errors(value, schema)
+    if errors:
+        print(f"  ⚠️ LLM JSON does not match the expected shape: {', '.join(errors)}")
+        return default
+    return value
@@ -0,0 +1,117 @@
+"""
+LLM Traffic Recorder
+Append-only log of every LLM request/response with timing, used to build
+reproducible load tests (see loadtest_replay.py) and stub recordings for
+benchmark_pipeline.py.
+
+One compact JSON object per line:
+    {"ts": 1718000000.12, "key": "<prompt hash>", "agent": "list_components",
+     "provider": "Cerebras", "ok": true, "duration_ms": 5321.4,
+     "prompt_bytes": 18234, "response": "..."}
+
+Job markers are written when a generation starts so replays can reproduce
+user arrivals:
+    {"ts": 1718000000.01, "event": "job", "mode": "multi", "prompt": "..."}
+
+A path ending in .gz is written as a multi-member gzip stream (still
+append-only, readable with gzip.open).
+
+ENV variables (optional):
+- LLM_RECORD_PATH=recordings/llm.jsonl   Enable recording to this file
+- LLM_RECORD_PROMPTS=false               Also store full system/user prompts
+"""
+
+import gzip
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Iterator, Optional
+
+from agents.llm_stub import prompt_key
+
+
+def open_log(path, mode: str = "rt"):
+    """Open a plain or gzip'd JSON-lines log"""
+    path = str(path)
+    if path.endswith(".gz"):
+        return gzip.open(path, mode, encoding="utf-8")
+    return open(path, mode.replace("t", ""), encoding="utf-8")
+
+
+def read_log(path) -> Iterator[dict]:
+    """Iterate records of a recording, skipping damaged lines"""
+    with open_log(path, "rt") as f:
+        for line in f:
+            line = line.strip()
+            if not line:
+                continue
+            try:
+                yield json.loads(line)
+            except json.JSONDecodeError:
+                continue
+
+
+class LLMRecorder:
+    """Thread-safe append-only writer for LLM traffic"""
+
+    def __init__(self, path, store_prompts: bool = False):
+        self.path = Path(path)
+        self.store_prompts = store_prompts
+        self._lock = threading.Lock()
+        if self.path.parent and not self.path.parent.exists():
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+
+    @classmethod
+    def from_env(cls) -> Optional["LLMRecorder"]:
+        path = os.environ.get("LLM_RECORD_PATH")
+        if not path:
+            return None
+        store_prompts = os.environ.get("LLM_RECORD_PROMPTS", "false").lower() == "true"
+        return cls(path, store_prompts=store_prompts)
+
+    def _append(self, record: dict):
+        line = json.dumps(record, ensure_ascii=False, separators=(",", ":")) + "\n"
+        with self._lock:
+            with open_log(self.path, "at") as f:
+                f.write(line)
+
+    def record_call(
+        self,
+        system_prompt: str,
+        user_prompt: str,
+        provider: str,
+        agent: str,
+        duration_ms: float,
+        response: Optional[str] = None,
+        error: str = "",
+    ):
+        """Log one provider attempt (successful or failed)"""
+        record = {
+            "ts": round(time.time(), 3),
+            "key": prompt_key(system_prompt, user_prompt),
+            "agent": agent,
+            "provider": provider,
+            "ok": response is not None,
+            "duration_ms": round(duration_ms, 1),
+            "prompt_bytes": len((system_prompt or "").encode("utf-8")) + len((user_prompt or "").encode("utf-8")),
+        }
+        if response is not None:
+            record["response"] = response
+        if error:
+            record["error"] = error[:300]
+        if self.store_prompts:
+            record["system"] = system_prompt
+            record["user"] = user_prompt
+        try:
+            self._append(record)
+        except Exception as e:
+            print(f"⚠️ LLM recorder write failed: {e}")
+
+    def mark_job(self, prompt: str, mode: str):
+        """Log the start of a user generation request"""
+        try:
+            self._append({"ts": round(time.time(), 3), "event": "job", "mode": mode, "prompt": prompt})
+        except Exception as e:
+            print(f"⚠️ LLM recorder write failed: {e}")
@@ -0,0 +1,245 @@
+"""
+LLM Stream Stop Predicates
+End a streamed response as soon as the artifact an agent asked for is
+complete, instead of waiting for (and paying for) the explanation models
+tend to add after the closing fence.
+
+A predicate is fed every streamed chunk and returns True once the response
+may end; LLMClient then closes the stream and returns the text up to the
+stop point:
+
+    stop = fence_closed("blade")
+    response = get_llm_response(system, user, stop_when=stop)
+    blade_code = stop.content          # parsed while streaming (None if never closed)
+
+    stop = json_complete({"pages": list})
+    response = get_llm_response(system, user, stop_when=stop)
+    plan = stop.parsed(response)       # repaired + schema-checked (agents/llm_json.py), or None
+
+Predicates are reset before every provider attempt (fallbacks reuse them).
+Non-streaming providers and the stub trim the finished text the same way.
+
+ENV variables (optional):
+- LLM_STREAM_STOP=true   Set false to always consume the whole stream
+                         (utils/config.py setting, checked per call by agents/llm_client.py)
+"""
+
+import re
+from typing import Optional
+
+from utils.html_completeness import HtmlCompletenessTracker
+
+try:
+    from agents.llm_json import parse_json, schema_errors
+except ImportError:
+    from llm_json import parse_json, schema_errors
+
+THINK_OPEN_RE = re.compile(r"\s*<think>", re.IGNORECASE)
+JSON_OPEN_RE = re.compile(r"[{\[]")
+JSON_LINE_PREFIX_RE = re.compile(r"[ \t]*(?:```[ \t]*json[ \t]*)?", re.IGNORECASE)
+
+
+class StopPredicate:
+    """Base: accumulates the streamed text; subclasses implement _check()"""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.text = ""
+        self.fired = False
+        self.end: Optional[int] = None   # chars of the response to keep
+        self._visible: Optional[int] = None
+
+    def feed(self, chunk: str) -> bool:
+        if self.fired:
+            return True
+        self.text += chunk
+        start = self._visible_start()
+        if start is not None and self._check(start):
+            self.fired = True
+        return self.fired
+
+    def _visible_start(self) -> Optional[int]:
+        """Index after a leading <think>...</think> block (None while still inside it)"""
+        if self._visible is None:
+            think = THINK_OPEN_RE.match(self.text)
+            if think is None:
+                if "<think>".startswith(self.text.lstrip().lower()):
+                    return None  # could still become <think>
+                self._visible = 0
+            else:
+                close = self.text.lower().find("</think>", think.end())
+                if close < 0:
+                    return None
+                self._visible = close + len("</think>")
+        return self._visible
+
+    def _check(self, start: int) -> bool:
+        raise NotImplementedError
+
+    def trim(self, text: str) -> str:
+        """Apply to a finished (non-streamed) response"""
+        self.reset()
+        return text[:self.end] if self.feed(text) else text
+
+
+class FenceClosed(StopPredicate):
+    """Stop after the closing ``` of the first ```<lang> block"""
+
+    def __init__(self, lang: str = ""):
+        self.open_re = re.compile(rf"```[ \t]*{re.escape(lang)}[^\n`]*\n" if lang else r"```[^\n`]*\n",
+                                  re.IGNORECASE)
+        super().__init__()
+
+    def reset(self):
+        super().reset()
+        self.content: Optional[str] = None
+        self._body: Optional[int] = None
+
+    def _check(self, start: int) -> bool:
+        if self._body is None:
+            opening = self.open_re.search(self.text, start)
+            if opening is None:
+                return False
+            self._body = opening.end()
+        close = self.text.find("```", self._body)
+        if close < 0:
+            return False
+        self.content = self.text[self._body:close].strip()
+        self.end = close + 3
+        return True
+
+
+class HtmlClosed(StopPredicate):
+    """Stop at </html> of an unfenced document (fenced ones stop at their fence)"""
+
+    def reset(self):
+        super().reset()
+        self.tracker = HtmlCompletenessTracker()
+        self._fed = None
+
+    def _check(self, start: int) -> bool:
+        if self._fed is None:
+            self._fed = start
+        self.tracker.feed(self.text[self._fed:])
+        self._fed = len(self.text)
+        if self.tracker.saw_html and self.tracker.complete:
+            self.end = len(self.text)
+            return True
+        return False
+
+
+class HtmlDocument(StopPredicate):
+    """```html fence closed, or </html> when the model skipped the fence"""
+
+    def reset(self):
+        super().reset()
+        self.fence = FenceClosed("html")
+        self.document = HtmlClosed()
+
+    def feed(self, chunk: str) -> bool:
+        if self.fired:
+            return True
+        self.text += chunk
+        if self.fence.feed(chunk):
+            self.fired, self.end = True, self.fence.end
+        elif self.fence._body is None and self.document.feed(chunk):
+            self.fired, self.end = True, self.document.end
+        return self.fired
+
+    @property
+    def content(self) -> Optional[str]:
+        if self.fence.content is not None:
+            return self.fence.content
+        return self.text[:self.end].strip() if self.fired else None
+
+
+class JsonComplete(StopPredicate):
+    """Stop once the first JSON object (or array) opening a line is balanced and parses
+
+    Only a `{`/`[` at the start of a line (or right after a ```json fence) can
+    open the value, so bracketed prose like "[note]" is skipped; a balanced
+    value that fails to parse or to match the schema is skipped as well and the
+    stream keeps going.
+    """
+
+    def __init__(self, schema: Optional[dict] = None):
+        self.schema = schema
+        super().__init__()
+
+    def reset(self):
+        super().reset()
+        self.value = None
+        self._start: Optional[int] = None
+        self._pos = 0
+        self._depth = 0
+        self._in_string = False
+        self._escape = False
+
+    def _opening(self, start: int) -> Optional[int]:
+        """Index of the next `{`/`[` that opens a line, from `self._pos`"""
+        text = self.text
+        for found in JSON_OPEN_RE.finditer(text, max(start, self._pos)):
+            line = text[max(start, text.rfind("\n", 0, found.start()) + 1):found.start()]
+            if JSON_LINE_PREFIX_RE.fullmatch(line):
+                return found.start()
+        return None
+
+    def _check(self, start: int) -> bool:
+        text = self.text
+        while True:
+            if self._start is None:
+                self._start = self._opening(start)
+                if self._start is None:
+                    # keep the unfinished last line: its prefix decides the next candidate
+                    self._pos = max(self._pos, text.rfind("\n") + 1)
+                    return False
+                self._pos = self._start
+
+            for i in range(self._pos, len(text)):
+                char = text[i]
+                if self._in_string:
+                    if self._escape:
+                        self._escape = False
+                    elif char == "\\":
+                        self._escape = True
+                    elif char == '"':
+                        self._in_string = False
+                elif char == '"':
+                    self._in_string = True
+                elif char in "{[":
+                    self._depth += 1
+                elif char in "}]":
+                    self._depth -= 1
+                    if self._depth == 0:
+                        break
+            else:
+                self._pos = len(text)
+                return False
+
+            value = parse_json(text[self._start:i + 1])
+            if value is not None and not schema_errors(value, self.schema):
+                self.end, self.value = i + 1, value
+                return True
+            # not the answer yet: look for the next candidate after it
+            self._start, self._pos = None, i + 1
+            self._depth, self._in_string, self._escape = 0, False, False
+
+    def parsed(self, response: str):
+        """The value parsed while streaming, else the (repaired) finished response"""
+        if self.fired:
+            return self.value
+        return parse_json(response, self.schema)
+
+
+def fence_closed(lang: str = "") -> FenceClosed:
+    return FenceClosed(lang)
+
+
+def html_document() -> HtmlDocument:
+    return HtmlDocument()
+
+
+def json_complete(schema: Optional[dict] = None) -> JsonComplete:
+    return JsonComplete(schema)
@@ -0,0 +1,280 @@
+"""
+Stub LLM Provider
+Deterministic stand-in for Cerebras/OpenRouter/Mistral used by benchmarks
+and load tests - NO NETWORK CALLS.
+
+Responses are replayed from a recording keyed by prompt hash. Prompts that
+were never recorded get a synthetic response shaped like what each agent
+expects (JSON plan, ```html draft, ```blade component, ```php routes), so a
+full pipeline run is possible without any recording at all.
+
+Recording format (JSON lines, one call per line):
+    {"key": "<prompt hash>", "response": "...", "duration_ms": 1234.5}
+
+Lines may carry "system"/"user" instead of "key"; the key is then computed.
+Logs written by LLMClient's recorder mode (agents/llm_recorder.py, plain or
+.gz) load directly; failed attempts and job markers are skipped.
+
+ENV variables (all optional):
+- LLM_STUB=1                   Enable the stub provider in LLMClient
+- LLM_STUB_RESPONSES=path      Recording to replay (implies LLM_STUB=1)
+- LLM_STUB_LATENCY_MS=0        Simulated latency before first token
+- LLM_STUB_TOKENS_PER_SEC=0    Simulated generation speed (0 = instant)
+- LLM_STUB_STRICT=false        Raise on prompts missing from the recording
+- LLM_STUB_REPLAY_TIMING=false Sleep for the recorded duration of each call
+- LLM_STUB_SPEED=1             Replay speed-up factor (2 = twice as fast)
+- LLM_STUB_PAGES=2             Pages in synthetic page detection / plans
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional
+
+
+def prompt_key(system_prompt: str, user_prompt: str) -> str:
+    """Stable hash of a (system, user) prompt pair"""
+    digest = hashlib.sha256()
+    digest.update((system_prompt or "").encode("utf-8"))
+    digest.update(b"\x00")
+    digest.update((user_prompt or "").encode("utf-8"))
+    return digest.hexdigest()[:32]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count (~4 chars per token) used when no usage info exists"""
+    return max(1, len(text) // 4) if text else 0
+
+
+STUB_HTML = """<!DOCTYPE html>
+<html lang="en">
+<head>
+    <meta charset="UTF-8">
+    <title>{title}</title>
+    <script src="https://cdn.tailwindcss.com"></script>
+    <style>
+        :root {{ --primary: #2563eb; }}
+        .btn-primary {{ background-color: var(--primary); color: #fff; padding: 0.75rem 1.5rem; }}
+    </style>
+</head>
+<body>
+<nav class="bg-white shadow"><a href="#home" class="text-blue-600">Home</a> <a href="#about">About</a></nav>
+<main class="container mx-auto py-16">
+    <section class="hero"><h1 class="text-4xl font-bold">{title}</h1><a class="btn-primary" href="#">Get Started</a></section>
+</main>
+<footer class="bg-gray-900 text-white py-8"><p>&copy; Stub</p></footer>
+<script>
+    document.addEventListener('DOMContentLoaded', function () {{ console.log('ready'); }});
+</script>
+</body>
+</html>"""
+
+
+STUB_PAGES = [
+    ("home", "landing page", "Hero"),
+    ("about", "company profile", "AboutSection"),
+    ("services", "what we offer", "ServicesSection"),
+    ("pricing", "plans and prices", "PricingSection"),
+    ("blog", "latest articles", "BlogSection"),
+    ("contact", "contact form", "ContactSection"),
+]
+
+
+def stub_pages() -> list:
+    """(name, description, page component) of the synthetic site"""
+    count = max(1, int(os.environ.get("LLM_STUB_PAGES", "2")))
+    extra = [(f"page{i}", f"page {i}", f"Page{i}Section") for i in range(len(STUB_PAGES) + 1, count + 1)]
+    return (STUB_PAGES + extra)[:count]
+
+
+def synthesize_response(system_prompt: str, user_prompt: str) -> str:
+    """Build a deterministic response in the shape the calling agent expects"""
+    system = system_prompt or ""
+    user = user_prompt or ""
+
+    if "multiple_pages" in user:
+        return json.dumps({
+            "multiple_pages": True,
+            "pages": [{"name": name, "description": desc} for name, desc, _ in stub_pages()],
+        })
+    if "application architect" in system:
+        return json.dumps({
+            "pages": [
+                {"page": name, "components": ["Navbar", section, "Footer"], "route": f"/{name}", "description": desc}
+                for name, desc, section in stub_pages()
+            ]
+        })
+    if "UI analyst" in system:
+        return json.dumps({"page": "home", "components": ["Navbar", "Hero", "Footer"], "route": "/home"})
+    if "pages_to_regenerate" in user:
+        return json.dumps({"scope": "global", "pages_to_regenerate": ["all"], "reason": "stub"})
+    if "is_valid" in system:
+        return json.dumps({"is_valid": True, "issues": [], "suggestions": []})
+    if "```php" in system:
+        return "```php\n<?php\n\nuse Illuminate\\Support\\Facades\\Route;\n\nRoute::get('/home', function () {\n    return view('home');\n})->name('home');\n```"
+    if "ONLY the main content" in system:
+        return '<main class="container mx-auto py-16"><section class="hero"><h2 class="text-3xl font-bold">Stub content</h2></section></main>'
+    if "Blade component adapter" in system:
+        return json.dumps({"replacements": []})
+    if "HTML section editor" in system:
+        # Echo the section back unchanged
+        section = user.split("```html", 1)[-1].rsplit("```", 1)[0].strip()
+        return "```html\n" + section + "\n```"
+    if "```html" in system or "HTML completion" in system:
+        return "```html\n" + STUB_HTML.format(title="Stub Page") + "\n```"
+    if "```blade" in system or "Blade" in system:
+        if "VALID" in system and "INVALID" in system:
+            return "VALID"
+        return (
+            "```blade\n<section class=\"py-16 bg-white\">\n    <div class=\"container mx-auto\">\n"
+            "        <h2 class=\"text-3xl font-bold text-gray-800\">Stub component</h2>\n"
+            "        <a href=\"{{ route('home') }}\" class=\"btn-primary\">Home</a>\n"
+            "    </div>\n</section>\n```"
+        )
+    return "Stub response for: " + user.strip()[:200]
+
+
+class StubProvider:
+    """
+    Deterministic LLM provider that replays recorded responses
+
+    Thread-safe: agents may call it from worker threads (draft thread,
+    validator thread) exactly like the real providers.
+    """
+
+    name = "Stub"
+
+    def __init__(
+        self,
+        responses: Optional[Dict[str, object]] = None,
+        latency_ms: float = 0.0,
+        tokens_per_second: float = 0.0,
+        strict: bool = False,
+        replay_timing: bool = False,
+        speed: float = 1.0,
+    ):
+        # key -> {"response": str, "duration_ms": float | None}
+        self.responses: Dict[str, dict] = {}
+        for key, value in (responses or {}).items():
+            if isinstance(value, dict):
+                self.responses[key] = value
+            else:
+                self.responses[key] = {"response": value, "duration_ms": None}
+        self.latency_ms = latency_ms
+        self.tokens_per_second = tokens_per_second
+        self.strict = strict
+        self.replay_timing = replay_timing
+        self.speed = speed if speed > 0 else 1.0
+        self.calls = []
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_file(cls, path, **kwargs) -> "StubProvider":
+        """Load a JSON-lines recording (see module docstring for the format)"""
+        from agents.llm_recorder import read_log
+
+        responses = {}
+        for record in read_log(path):
+            if "response" not in record or record.get("ok") is False:
+                continue
+            key = record.get("key") or prompt_key(record.get("system", ""), record.get("user", ""))
+            # First recording wins so replays stay deterministic
+            responses.setdefault(key, {
+                "response": record["response"],
+                "duration_ms": record.get("duration_ms"),
+            })
+        return cls(responses=responses, **kwargs)
+
+    @classmethod
+    def from_env(cls) -> "StubProvider":
+        """Build the stub from LLM_STUB_* ENV variables"""
+        kwargs = {
+            "latency_ms": float(os.environ.get("LLM_STUB_LATENCY_MS", "0")),
+            "tokens_per_second": float(os.environ.get("LLM_STUB_TOKENS_PER_SEC", "0")),
+            "strict": os.environ.get("LLM_STUB_STRICT", "false").lower() == "true",
+            "replay_timing": os.environ.get("LLM_STUB_REPLAY_TIMING", "false").lower() == "true",
+            "speed": float(os.environ.get("LLM_STUB_SPEED", "1")),
+        }
+        path = os.environ.get("LLM_STUB_RESPONSES")
+        if path and Path(path).exists():
+            return cls.from_file(path, **kwargs)
+        return cls(**kwargs)
+
+    def add(self, system_prompt: str, user_prompt: str, response: str):
+        """Register a response for a prompt pair"""
+        self.responses[prompt_key(system_prompt, user_prompt)] = {"response": response, "duration_ms": None}
+
+    def _simulated_delay(self, response: str, recorded_ms: Optional[float]) -> float:
+        """Seconds to sleep for one call"""
+        if self.replay_timing and recorded_ms:
+            return recorded_ms / 1000.0 / self.speed
+        delay = self.latency_ms / 1000.0
+        if self.tokens_per_second > 0:
+            delay += estimate_tokens(response) / self.tokens_per_second
+        return delay / self.speed
+
+    def generate(self, system_prompt: str, user_prompt: str, agent: str = "unknown", stop_when=None, **kwargs) -> str:
+        """Return the recorded (or synthesized) response for this prompt pair (cut at `stop_when`)"""
+        start = time.perf_counter()
+        key = prompt_key(system_prompt, user_prompt)
+        recorded = self.responses.get(key)
+
+        if recorded is None:
+            if self.strict:
+                raise Exception(f"Stub: no recorded response for prompt {key} (agent: {agent})")
+            response = synthesize_response(system_prompt, user_prompt)
+            recorded_ms = None
+        else:
+            response = recorded["response"]
+            recorded_ms = recorded.get("duration_ms")
+        if stop_when is not None:
+            # A real stream would have been closed here: shorter response, less simulated time
+            full_length = len(response)
+            response = stop_when.trim(response)
+            if recorded_ms and len(response) < full_length:
+                recorded_ms *= len(response) / full_length
+
+        delay = self._simulated_delay(response, recorded_ms)
+        if delay > 0:
+            time.sleep(delay)
+
+        with self._lock:
+            self.calls.append({
+                "agent": agent,
+                "key": key,
+                "hit": recorded is not None,
+                "prompt_bytes": len((system_prompt or "").encode("utf-8")) + len((user_prompt or "").encode("utf-8")),
+                "response_bytes": len(response.encode("utf-8")),
+                "duration_ms": (time.perf_counter() - start) * 1000,
+            })
+        return response
+
+    def reset_stats(self):
+        with self._lock:
+            self.calls = []
+
+    def stats(self) -> dict:
+        """Aggregate call stats per calling agent"""
+        with self._lock:
+            calls = list(self.calls)
+
+        per_agent = {}
+        for call in calls:
+            entry = per_agent.setdefault(call["agent"], {
+                "calls": 0, "hits": 0, "prompt_bytes": 0, "response_bytes": 0, "duration_ms": 0.0
+            })
+            entry["calls"] += 1
+            entry["hits"] += 1 if call["hit"] else 0
+            entry["prompt_bytes"] += call["prompt_bytes"]
+            entry["response_bytes"] += call["response_bytes"]
+            entry["duration_ms"] += call["duration_ms"]
+
+        return {
+            "total_calls": len(calls),
+            "prompt_bytes": sum(c["prompt_bytes"] for c in calls),
+            "response_bytes": sum(c["response_bytes"] for c in calls),
+            "per_agent": per_agent,
+        }
@@ -0,0 +1,126 @@
+"""
+LLM Token & Cost Accounting
+Aggregates prompt/completion tokens and cost per LLM call, per calling agent,
+per provider and per generation job (jobs are keyed by the active trace, see
+utils/tracing.py).
+
+Token counts come from the provider's usage info when it is returned and
+are estimated (~4 chars per token) otherwise; estimated calls are counted
+separately so the numbers can be judged.
+
+Prices are configured per provider in USD per 1M tokens (ENV only):
+- CEREBRAS_PRICE_INPUT_PER_1M, CEREBRAS_PRICE_OUTPUT_PER_1M
+- OPENROUTER_PRICE_INPUT_PER_1M, OPENROUTER_PRICE_OUTPUT_PER_1M
+- MISTRAL_PRICE_INPUT_PER_1M, MISTRAL_PRICE_OUTPUT_PER_1M
+Unset prices count as 0. They are parsed and validated once with the other
+settings (utils/config.py) and change on a settings reload.
+"""
+
+import threading
+from typing import Dict, Optional
+
+from utils.config import settings
+from utils.tracing import current_trace
+
+PROVIDER_ENV_PREFIX = {
+    "Cerebras": "CEREBRAS",
+    "OpenRouter": "OPENROUTER",
+    "Mistral": "MISTRAL",
+    "Stub": "LLM_STUB",
+}
+
+# Finished jobs are popped by the caller; cap in case a job never finishes
+MAX_OPEN_JOBS = 50
+
+
+def price_table() -> Dict[str, Dict[str, float]]:
+    """Current USD per 1M token prices (from the validated settings)"""
+    cfg = settings()
+    table = {}
+    for provider, prefix in PROVIDER_ENV_PREFIX.items():
+        table[provider] = {
+            "input_per_1m": getattr(cfg, f"{prefix.lower()}_price_input_per_1m"),
+            "output_per_1m": getattr(cfg, f"{prefix.lower()}_price_output_per_1m"),
+        }
+    return table
+
+
+def call_cost(provider: str, prompt_tokens: int, completion_tokens: int) -> float:
+    prices = price_table().get(provider, {"input_per_1m": 0.0, "output_per_1m": 0.0})
+    return (prompt_tokens * prices["input_per_1m"] + completion_tokens * prices["output_per_1m"]) / 1_000_000
+
+
+def _empty_totals() -> dict:
+    return {"calls": 0, "estimated_calls": 0, "prompt_tokens": 0, "completion_tokens": 0, "cost_usd": 0.0}
+
+
+def _add(totals: dict, usage: dict):
+    totals["calls"] += 1
+    totals["estimated_calls"] += 1 if usage["estimated"] else 0
+    totals["prompt_tokens"] += usage["prompt_tokens"]
+    totals["completion_tokens"] += usage["completion_tokens"]
+    totals["cost_usd"] = round(totals["cost_usd"] + usage["cost_usd"], 6)
+
+
+class UsageTracker:
+    """Thread-safe in-process usage aggregation"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.reset()
+
+    def reset(self):
+        with self._lock:
+            self.totals = _empty_totals()
+            self.per_agent: Dict[str, dict] = {}
+            self.per_provider: Dict[str, dict] = {}
+            self.jobs: Dict[str, dict] = {}
+
+    def record(self, provider: str, agent: str, prompt_tokens: int, completion_tokens: int,
+               estimated: bool = False) -> dict:
+        """Account one successful call; returns its usage (tokens + cost)"""
+        usage = {
+            "provider": provider,
+            "agent": agent,
+            "prompt_tokens": int(prompt_tokens),
+            "completion_tokens": int(completion_tokens),
+            "estimated": estimated,
+            "cost_usd": round(call_cost(provider, prompt_tokens, completion_tokens), 6),
+        }
+        trace = current_trace()
+        with self._lock:
+            _add(self.totals, usage)
+            _add(self.per_agent.setdefault(agent, _empty_totals()), usage)
+            _add(self.per_provider.setdefault(provider, _empty_totals()), usage)
+            if trace is not None:
+                job = self.jobs.get(trace.trace_id)
+                if job is None:
+                    if len(self.jobs) >= MAX_OPEN_JOBS:
+                        self.jobs.pop(next(iter(self.jobs)))
+                    job = self.jobs[trace.trace_id] = {"totals": _empty_totals(), "per_agent": {}}
+                _add(job["totals"], usage)
+                _add(job["per_agent"].setdefault(agent, _empty_totals()), usage)
+        return usage
+
+    def job(self, trace_id: str, pop: bool = True) -> dict:
+        """Usage of one job: {"totals": {...}, "per_agent": {agent: {...}}}"""
+        with self._lock:
+            job = self.jobs.pop(trace_id, None) if pop else self.jobs.get(trace_id)
+        return job or {"totals": _empty_totals(), "per_agent": {}}
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "totals": dict(self.totals),
+                "per_agent": {k: dict(v) for k, v in self.per_agent.items()},
+                "per_provider": {k: dict(v) for k, v in self.per_provider.items()},
+            }
+
+
+usage_tracker = UsageTracker()
+
+
+def estimate_call_tokens(system_prompt: str, user_prompt: str, response: Optional[str]) -> tuple:
+    """(prompt_tokens, completion_tokens) estimate when the provider reports no usage"""
+    from agents.llm_stub import estimate_tokens
+    return estimate_tokens((system_prompt or "") + (user_prompt or "")), estimate_tokens(response or "")
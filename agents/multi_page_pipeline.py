@@ -0,0 +1,347 @@
+"""
+Multi-Page Generation Pipeline
+Planning, per-page generation, shared resources and component validation
+of a multi-page job as one DAG (utils.pipeline_dag), shared by
+main_multi_page.py and the WebSocket backend.
+
+    draft ─► plan ─┬─► layout:<page> ──────────────┐
+                   ├─► component:<name> (per unique) ─┴─► blade:<page>
+                   ├─► layout_app
+                   └─► (all component:*) ─► validate
+    routes (needs only the page list, starts immediately)
+
+Component stages are added once the plan is known (Stage expand): every
+component is generated once, even when several pages list it (Navbar,
+Footer) or list the same shared chrome under another name (Header), and
+each page blade waits only for its own layout and components. Components
+seen in earlier jobs come from the component registry without an LLM call. Pages don't depend on each other, and neither routes nor the
+app layout depend on per-page blades, so with PIPELINE_WORKERS at least
+the number of pages the build takes as long as the slowest page. Reads
+the approved drafts from the attached GenerationState.
+
+Stage groups match the backend's UI agents (prompt-planner, page-architect,
+blade-generator, route-generator, validator-fixer).
+
+Every stage writes only under output/ (never the Laravel project), so the
+whole graph can also run speculatively while the draft awaits confirmation
+(SpeculativeBuild).
+"""
+
+import os
+import shutil
+import threading
+from typing import Optional
+from utils import progress
+from utils.component_registry import component_key
+from utils.design_system import component_reference, load_design_system, strip_shared_assets
+from utils.generation_state import use_state
+from utils.pipeline_dag import Pipeline, Stage
+from utils.tracing import bind, span
+from .c_prompt_planner_v2 import plan_prompt_multi
+from .d_page_architect import design_layout
+from .e_generate_layout_app import generate_layout_app
+from .f_ui_generator import generate_blade
+from .g_route_agent_v2 import generate_routes_multi
+from .h_component_agent import list_components, save_component
+from .i_validator_agent import validate_with_reason, auto_fix
+
+
+def plan_pages(state, draft: str) -> list:
+    """Draft pages are the source of truth; the planner only suggests components"""
+    multi_plan = plan_prompt_multi(f"For UI design and materials, follow this draft reference: {draft}")
+    pages_from_planner = multi_plan.get("pages", [])
+
+    pages = []
+    for i, page in enumerate(state.pages):
+        pages.append({
+            "page": page.name,
+            "route": page.route,
+            "description": page.description,
+            "draft_name": page.name,
+            "components": pages_from_planner[i].get("components", []) if i < len(pages_from_planner) else [],
+        })
+    return pages
+
+
+def validate_component(name: str, blade_code: str, log=print):
+    """Code of one component once valid (auto-fixed if needed), None when the fix fails too"""
+    is_valid, reason = validate_with_reason(blade_code)
+    if is_valid:
+        log(f"✅ {name}")
+        return blade_code
+
+    log(f"❌ {name} - Error: {reason}")
+    log(f"🔧 Auto-fixing {name}...")
+    fixed_code = auto_fix(blade_code, reason)
+
+    is_fixed, _ = validate_with_reason(fixed_code)
+    if not is_fixed:
+        return None
+    log(f"✅ {name} fixed!")
+    return fixed_code
+
+
+def validate_components(state, log=print) -> bool:
+    """Validate every generated component, auto-fixing invalid ones in place (invalid ones are never registered)"""
+    all_valid = True
+    log("\n🟩 [VALIDATOR AGENT] Validating all components...")
+
+    for name, blade_code in list(state.components.items()):
+        try:
+            fixed_code = validate_component(name, blade_code, log)
+            if fixed_code is None:
+                log(f"❌ {name} fix failed, using original")
+                state.registry_candidates.pop(name, None)
+                all_valid = False
+            elif fixed_code is not blade_code:
+                state.set_component(name, fixed_code)
+                output_path = f"output/components/{name}.blade.php"
+                if os.path.exists(output_path):
+                    with span("write", kind="file", path=output_path), open(output_path, "w", encoding="utf-8") as f:
+                        f.write(fixed_code)
+        except Exception as e:
+            log(f"⚠️ Error validating {name}: {e}")
+            state.registry_candidates.pop(name, None)
+            all_valid = False
+
+    log("✅ All Components Valid" if all_valid else "⚠️ Some components may have issues")
+    return all_valid
+
+
+def component_groups(state, plan: list) -> tuple:
+    """
+    Components of all pages grouped so each is generated once:
+    - same name (case-insensitive): the first page listing it owns it
+    - same role and reference fragment (component_registry.component_key),
+      e.g. "Navbar" on one page and "Header" on another both built from the
+      shared navbar: one generation, the other name is an alias
+
+    Returns (groups {key: {"name", "idx", "aliases"}}, {lowercased name: key}).
+    """
+    design = load_design_system()
+    page_names = [page["page"] for page in plan]
+    bodies = {}
+    groups, by_name = {}, {}
+    for idx, page in enumerate(plan):
+        for comp in page.get("components", []):
+            if comp.lower() in by_name:
+                continue
+            if idx not in bodies:
+                bodies[idx] = strip_shared_assets(state.draft(page["draft_name"]))
+            key = component_key(comp, component_reference(design, comp, bodies[idx]), page_names)
+            if key in groups:
+                groups[key]["aliases"].append(comp)
+            else:
+                groups[key] = {"name": comp, "idx": idx, "aliases": []}
+            by_name[comp.lower()] = key
+    return groups, by_name
+
+
+def build_multi_page_pipeline(state, log=print) -> Pipeline:
+    """Stage graph for the pages of `state` (needs initial value "draft")"""
+    dag = Pipeline("multi-page")
+    page_names = state.page_names()
+    total = len(page_names)
+
+    def page_plan(plan: list, idx: int) -> dict:
+        page = plan[idx]
+        return {"page": page["page"], "components": page["components"], "route": page["route"]}
+
+    def expand_components(plan: list):
+        """Once the plan is known: one stage per unique component, then the page blades"""
+        groups, by_name = component_groups(state, plan)
+        references = sum(len(page.get("components", [])) for page in plan)
+        if references > len(groups):
+            log(f"🧩 {len(groups)} unique components for {references} page references (shared ones generated once)")
+
+        def stage_of(comp: str) -> str:
+            return f"component:{groups[by_name[comp.lower()]]['name']}"
+
+        stages = []
+        for group in groups.values():
+            def component_stage(plan, group=group):
+                comp, idx = group["name"], group["idx"]
+                code = list_components({**page_plan(plan, idx), "components": [comp], "pages": plan},
+                                       state.draft(plan[idx]["draft_name"]))[comp]
+                for alias in group["aliases"]:
+                    save_component(alias, code)
+                return code
+            stages.append(Stage(f"component:{group['name']}", component_stage, inputs=["plan"], retries=1,
+                                group="page-architect"))
+
+        for idx, name in enumerate(page_names):
+            page_components = list(dict.fromkeys(plan[idx].get("components", [])))
+
+            def blade_stage(inputs, name=name, page_components=page_components):
+                components = {comp: inputs[stage_of(comp)] for comp in page_components}
+                generate_blade(inputs[f"layout:{name}"], components)
+                log(f"  ✅ {name} completed")
+                return name
+            stages.append(Stage(f"blade:{name}", blade_stage,
+                                inputs=[f"layout:{name}"] + list(dict.fromkeys(stage_of(c) for c in page_components)),
+                                retries=1, group="page-architect"))
+
+        def validate_stage(inputs):
+            for group in groups.values():
+                code = inputs[f"component:{group['name']}"]
+                state.add_components({comp: code for comp in [group["name"], *group["aliases"]]})
+            return validate_components(state, log)
+        stages.append(Stage("validate", validate_stage, inputs=[f"component:{g['name']}" for g in groups.values()],
+                            group="validator-fixer"))
+        return stages
+
+    dag.add(Stage("plan", lambda draft: plan_pages(state, draft), inputs=["draft"],
+                  retries=1, cache=True, group="prompt-planner", expand=expand_components))
+
+    for idx, name in enumerate(page_names):
+        def layout_stage(plan, idx=idx, name=name):
+            log(f"🔨 Generating page {idx + 1}/{total}: {name}")
+            return design_layout(page_plan(plan, idx))
+
+        dag.add(Stage(f"layout:{name}", layout_stage, inputs=["plan"], retries=1, cache=True, group="page-architect"))
+
+    def layout_app_stage(plan, draft):
+        component_names = sorted({comp for page in plan for comp in page.get("components", [])})
+        generate_layout_app({"page": plan[0]["page"], "components": component_names}, draft)
+        return True
+
+    def routes_stage():
+        generate_routes_multi([{"page": page.name, "route": page.route} for page in state.pages])
+        log("✅ Routes generated")
+        return True
+
+    dag.add(Stage("layout_app", layout_app_stage, inputs=["plan", "draft"], retries=1, group="blade-generator"))
+    dag.add(Stage("routes", routes_stage, optional=True, group="route-generator"))
+    return dag
+
+
+def run_multi_page_pipeline(state, log=print, on_event=None, cancel=None) -> dict:
+    """
+    Run planning → pages → layout/routes → validation for `state`
+    (`cancel`: threading.Event that stops scheduling new stages).
+    Returns {"pages": page plans, "layouts": per-page layouts, "all_valid": bool, "result": PipelineResult}
+    """
+    dag = build_multi_page_pipeline(state, log)
+    result = dag.run({"draft": state.main_draft.text}, on_event=on_event, cancel=cancel)
+    # Page drafts are reloaded lazily by the fixers that need them
+    state.release_drafts()
+
+    outputs = result.outputs
+    log(f"\n🕸️  Pipeline: {result.summary()}")
+    return {
+        "pages": outputs["plan"],
+        "layouts": [outputs[f"layout:{name}"] for name in state.page_names()],
+        "all_valid": outputs["validate"],
+        "result": result,
+    }
+
+
+class SpeculativeBuild:
+    """
+    run_multi_page_pipeline() started before the user confirms the draft.
+
+    Log lines and events are buffered (the user is still reviewing the
+    draft) and LLM progress is muted. commit() adopts the run: it replays
+    the buffer, forwards the rest live and returns the pipeline result.
+    discard() cancels the run without waiting for it; the run removes what
+    it wrote to output/ once its in-flight stages are done.
+    """
+
+    def __init__(self, state, after: Optional["SpeculativeBuild"] = None):
+        self.state = state
+        self.cancel_event = threading.Event()
+        self._after = after
+        self._lock = threading.Lock()
+        self._buffer = []
+        self._sinks = None
+        self._result = None
+        self._error = None
+        self._thread = None
+        self._finished = False
+        self._discarded = False
+
+    def start(self) -> "SpeculativeBuild":
+        self._thread = threading.Thread(target=bind(self._run), name="speculative-build", daemon=True)
+        self._thread.start()
+        return self
+
+    def _run(self):
+        try:
+            if self._after is not None:
+                # A discarded predecessor may still be finishing a stage and cleaning output/
+                self._after.wait()
+                self._after = None
+            with use_state(self.state), progress.use_sink(progress.NullSink()), \
+                    span("speculative-build", kind="stage"):
+                self._result = run_multi_page_pipeline(self.state, log=self._log, on_event=self._event,
+                                                       cancel=self.cancel_event)
+        except Exception as e:
+            self._error = e
+        finally:
+            with self._lock:
+                self._finished = True
+                discarded = self._discarded
+            if discarded:
+                self._remove_output()
+
+    def _forward(self, kind: str, payload):
+        with self._lock:
+            if self._sinks is None:
+                self._buffer.append((kind, payload))
+                return
+            log, on_event = self._sinks
+        (log if kind == "log" else on_event)(payload)
+
+    def _log(self, text: str):
+        self._forward("log", text)
+
+    def _event(self, event: dict):
+        self._forward("event", event)
+
+    @property
+    def done(self) -> bool:
+        return self._thread is not None and not self._thread.is_alive()
+
+    @property
+    def succeeded(self) -> bool:
+        return self.done and self._error is None and self._result is not None
+
+    def commit(self, log=print, on_event=None) -> dict:
+        """Adopt the speculative run (waits for it to finish); raises its error if it failed"""
+        on_event = on_event or (lambda event: None)
+        with self._lock:
+            for kind, payload in self._buffer:
+                (log if kind == "log" else on_event)(payload)
+            self._buffer = []
+            self._sinks = (log, on_event)
+        self._thread.join()
+        if self._error is not None:
+            raise self._error
+        return self._result
+
+    def discard(self):
+        """
+        Cancel the run and remove what it wrote to output/, without waiting:
+        a stage still in flight finishes in the background and the run
+        cleans up after itself (a SpeculativeBuild started `after` this one,
+        or wait(), waits for that)
+        """
+        self.cancel_event.set()
+        with self._lock:
+            self._discarded = True
+            finished = self._finished or self._thread is None
+        if finished:
+            self._remove_output()
+
+    def wait(self):
+        """Block until the run (and a discarded run's cleanup) is over"""
+        if self._thread is not None:
+            self._thread.join()
+
+    def _remove_output(self):
+        for path in ("output/components", "output/layouts"):
+            shutil.rmtree(path, ignore_errors=True)
+        for path in ["output/web.php"] + [f"output/{name}.blade.php" for name in self.state.page_names()]:
+            if os.path.exists(path):
+                os.remove(path)
+        self.state.release_drafts()
\ No newline at end of file
@@ -0,0 +1,158 @@
+"""
+GenLaravel Latency Sketches
+Streaming percentile sketches for vendor monitoring.
+
+LatencySketch is a log-bucketed histogram (same idea as HDR histograms /
+DDSketch): every value lands in bucket floor(log(v) / log(1 + accuracy)),
+so any percentile is answered within ±accuracy relative error using a few
+dozen integer counters, and sketches merge by adding counts. That makes
+them cheap to keep per provider, per agent and per time slot inside
+monitoring_data.json.
+
+Time windows are built from fixed 5-minute slots (kept for 24h) merged on
+read; "all" is a lifetime sketch.
+"""
+
+import math
+import time
+from typing import Dict, Optional
+
+DEFAULT_ACCURACY = 0.02          # ±2% relative error
+SLOT_SECONDS = 300               # 5-minute slots
+SLOT_RETENTION_SECONDS = 24 * 3600
+WINDOWS = {"5m": 300, "1h": 3600, "24h": 24 * 3600}
+METRICS = ("latency_ms", "ttft_ms", "tokens_per_sec")
+
+
+class LatencySketch:
+    """Mergeable log-bucketed histogram with bounded relative error"""
+
+    def __init__(self, accuracy: float = DEFAULT_ACCURACY):
+        self.accuracy = accuracy
+        self._gamma_log = math.log1p(accuracy)
+        self.buckets: Dict[int, int] = {}
+        self.count = 0
+        self.total = 0.0
+        self.min = None
+        self.max = None
+
+    def add(self, value: float, count: int = 1):
+        value = max(float(value), 0.001)
+        index = int(math.floor(math.log(value) / self._gamma_log))
+        self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += count
+        self.total += value * count
+        self.min = value if self.min is None else min(self.min, value)
+        self.max = value if self.max is None else max(self.max, value)
+
+    def merge(self, other: "LatencySketch") -> "LatencySketch":
+        for index, count in other.buckets.items():
+            self.buckets[index] = self.buckets.get(index, 0) + count
+        self.count += other.count
+        self.total += other.total
+        if other.min is not None:
+            self.min = other.min if self.min is None else min(self.min, other.min)
+            self.max = other.max if self.max is None else max(self.max, other.max)
+        return self
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Value at the given percentile (0-100), None when empty"""
+        if self.count == 0:
+            return None
+        rank = pct / 100.0 * (self.count - 1)
+        seen = 0
+        for index in sorted(self.buckets):
+            seen += self.buckets[index]
+            if seen > rank:
+                # Bucket midpoint, clamped to the observed range
+                value = 2 * math.exp((index + 1) * self._gamma_log) / (2 + self.accuracy)
+                return min(max(value, self.min), self.max)
+        return self.max
+
+    def mean(self) -> Optional[float]:
+        return self.total / self.count if self.count else None
+
+    def to_dict(self) -> dict:
+        return {
+            "a": self.accuracy,
+            "n": self.count,
+            "sum": round(self.total, 3),
+            "min": self.min,
+            "max": self.max,
+            "b": {str(k): v for k, v in self.buckets.items()},
+        }
+
+    @classmethod
+    def from_dict(cls, data: Optional[dict]) -> "LatencySketch":
+        sketch = cls((data or {}).get("a", DEFAULT_ACCURACY))
+        if not data:
+            return sketch
+        sketch.buckets = {int(k): v for k, v in data.get("b", {}).items()}
+        sketch.count = data.get("n", 0)
+        sketch.total = data.get("sum", 0.0)
+        sketch.min = data.get("min")
+        sketch.max = data.get("max")
+        return sketch
+
+    def summary(self) -> dict:
+        def fmt(value):
+            return round(value, 1) if value is not None else None
+        return {
+            "count": self.count,
+            "mean": fmt(self.mean()),
+            "p50": fmt(self.percentile(50)),
+            "p90": fmt(self.percentile(90)),
+            "p99": fmt(self.percentile(99)),
+            "max": fmt(self.max),
+        }
+
+
+# ============================================
+# 🗂️ SERIES (one per provider / agent)
+# ============================================
+
+def record_sample(series: dict, now: Optional[float] = None, **values):
+    """
+    Add one call to a stored series:
+        {"all": {metric: sketch}, "slots": {slot_start: {metric: sketch}}}
+    Metrics with a None value are skipped.
+    """
+    now = now or time.time()
+    slot = str(int(now // SLOT_SECONDS * SLOT_SECONDS))
+    lifetime = series.setdefault("all", {})
+    slot_metrics = series.setdefault("slots", {}).setdefault(slot, {})
+
+    for metric, value in values.items():
+        if value is None:
+            continue
+        for store in (lifetime, slot_metrics):
+            sketch = LatencySketch.from_dict(store.get(metric))
+            sketch.add(value)
+            store[metric] = sketch.to_dict()
+
+    # Drop expired slots
+    cutoff = now - SLOT_RETENTION_SECONDS
+    for key in [k for k in series["slots"] if int(k) < cutoff]:
+        del series["slots"][key]
+
+
+def window_sketch(series: dict, metric: str, window: str, now: Optional[float] = None) -> LatencySketch:
+    """Merged sketch for one metric over a window ("5m", "1h", "24h", "all")"""
+    if window == "all":
+        return LatencySketch.from_dict(series.get("all", {}).get(metric))
+    now = now or time.time()
+    cutoff = now - WINDOWS[window]
+    merged = LatencySketch()
+    for slot, metrics in series.get("slots", {}).items():
+        # Include slots that overlap the window
+        if int(slot) + SLOT_SECONDS > cutoff and metric in metrics:
+            merged.merge(LatencySketch.from_dict(metrics[metric]))
+    return merged
+
+
+def summarize_series(series: dict, windows=("5m", "1h", "24h", "all"), now: Optional[float] = None) -> dict:
+    """Percentile summaries of every metric for each window"""
+    return {
+        window: {metric: window_sketch(series, metric, window, now).summary() for metric in METRICS}
+        for window in windows
+    }
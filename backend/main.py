@@ -3,7 +3,7 @@ GenLaravel FastAPI Backend
 Real-time WebSocket server for AI Laravel generation
 """
 
-from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException
+from fastapi import FastAPI, WebSocket, WebSocketDisconnect, HTTPException, Header
 from fastapi.middleware.cors import CORSMiddleware
 from fastapi.staticfiles import StaticFiles
 from fastapi.responses import FileResponse, StreamingResponse
@@ -14,13 +14,20 @@ import sys
 import shutil
 import zipfile
 import io
+import queue
+import threading
 from pathlib import Path
-from typing import Dict, List
+from typing import Dict, List, Optional
 import datetime
-from dotenv import load_dotenv
 
-# Load environment variables
-load_dotenv()
+# Add parent directory to path for imports
+sys.path.insert(0, str(Path(__file__).parent.parent))
+
+# Load environment variables (once per process)
+from utils.config import ConfigError, install_reload_signal, load_env, reload_settings, settings
+
+load_env()
+settings()  # invalid tunables (utils/config.py) fail at startup, not mid-job
 
 # Configuration from environment
 BACKEND_HOST = os.getenv("BACKEND_HOST", "0.0.0.0")
@@ -28,71 +35,27 @@ BACKEND_PORT = int(os.getenv("BACKEND_PORT", "8080"))
 LARAVEL_URL = os.getenv("LARAVEL_URL", "http://localhost:8000")
 FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:8080")
 
-# Add parent directory to path for imports
-sys.path.insert(0, str(Path(__file__).parent.parent))
-
-from agents.a_prompt_expander import prompt_expander
-from agents.b_draft_agent_v2 import draft_agent_multi
-from agents.c_prompt_planner_v2 import plan_prompt_multi
-from agents.d_page_architect import design_layout
-from agents.e_generate_layout_app import generate_layout_app
-from agents.f_ui_generator import generate_blade
-from agents.g_route_agent_v2 import generate_routes_multi
-from agents.h_component_agent import list_components
-from agents.i_validator_agent import validate_with_reason, auto_fix
-from agents.j_move_to_project import move_to_laravel_project
+from agents.generation_engine import GenerationEngine
+from agents.llm_client import get_llm_client
+from agents.llm_usage import usage_tracker, price_table
+from utils.tracing import start_trace, finish_trace, bind, list_traces, load_trace
+from utils import progress
 
 # Import monitoring functions
 try:
     from backend.monitoring_data import (
-        log_issue, log_change, update_task_status, log_vendor_call,
-        record_generation, get_all_data, load_data, save_data, get_summary
+        log_issue, log_change, log_vendor_call,
+        record_generation, get_all_data, load_data, save_data, get_summary, get_latency_summary,
+        record_job_usage, get_token_usage
     )
 except ImportError:
     from monitoring_data import (
-        log_issue, log_change, update_task_status, log_vendor_call,
-        record_generation, get_all_data, load_data, save_data, get_summary
+        log_issue, log_change, log_vendor_call,
+        record_generation, get_all_data, load_data, save_data, get_summary, get_latency_summary,
+        record_job_usage, get_token_usage
     )
 
 
-def clean_laravel_views():
-    """Clean previous generated views from Laravel project"""
-    laravel_views = "my-laravel/resources/views"
-    
-    # Paths to clean
-    paths_to_clean = [
-        os.path.join(laravel_views, "components"),
-        os.path.join(laravel_views, "layouts"),
-    ]
-    
-    # Clean components and layouts
-    for path in paths_to_clean:
-        if os.path.exists(path):
-            shutil.rmtree(path)
-            print(f"Cleaned: {path}")
-    
-    # Clean blade files in views root (except welcome.blade.php)
-    if os.path.exists(laravel_views):
-        for file in os.listdir(laravel_views):
-            if file.endswith('.blade.php') and file != 'welcome.blade.php':
-                file_path = os.path.join(laravel_views, file)
-                os.remove(file_path)
-                print(f"Removed: {file}")
-    
-    # Reset routes to welcome
-    route_file = "my-laravel/routes/web.php"
-    default_routes = """<?php
-
-use Illuminate\\Support\\Facades\\Route;
-
-Route::get('/', function () {
-    return view('welcome');
-});
-"""
-    with open(route_file, "w", encoding="utf-8") as f:
-        f.write(default_routes)
-    print(f"Reset routes to welcome")
-
 app = FastAPI(title="GenLaravel API", version="1.0.0")
 
 # CORS middleware
@@ -131,6 +94,9 @@ class QueueStatusFilter(logging.Filter):
 # Apply filter to uvicorn access logger
 logging.getLogger("uvicorn.access").addFilter(QueueStatusFilter())
 
+# 🔄 `kill -HUP <pid>` reloads settings without restarting the worker
+install_reload_signal()
+
 # Mount static files with HTML support (auto-serve index.html)
 # Only mount if frontend directory exists (not in Docker/Railway deployment)
 frontend_path = Path(__file__).parent.parent / "frontend"
@@ -311,6 +277,34 @@ async def health_check():
     return {"status": "healthy", "timestamp": datetime.datetime.now().isoformat()}
 
 
+@app.get("/api/config")
+async def get_config():
+    """Current tunable settings (API keys redacted)"""
+    current = settings()
+    return {"version": current.version, "settings": current.as_dict()}
+
+
+@app.post("/api/config/reload")
+async def reload_config(x_admin_token: Optional[str] = Header(default=None)):
+    """
+    Re-read .env and swap the settings atomically (same as SIGHUP)
+
+    Running jobs finish with the settings they started with (models, limits,
+    pipeline switches); the next job uses the new ones. Changed API keys
+    re-create the provider clients immediately. Invalid values are rejected
+    and nothing changes.
+    """
+    token = os.getenv("CONFIG_RELOAD_TOKEN")
+    if token and x_admin_token != token:
+        raise HTTPException(status_code=403, detail="Invalid admin token")
+    try:
+        new, changed = reload_settings()
+    except ConfigError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    print(f"🔄 Settings reloaded (v{new.version}): {', '.join(changed) or 'no changes'}")
+    return {"success": True, "version": new.version, "changed": changed}
+
+
 @app.get("/api/stats")
 async def get_stats():
     """Get generation statistics"""
@@ -329,8 +323,6 @@ async def get_stats():
 @app.post("/api/clear-output")
 async def clear_output():
     """Clear output directory"""
-    import shutil
-    
     try:
         if os.path.exists("output"):
             shutil.rmtree("output")
@@ -515,11 +507,7 @@ async def websocket_generate_unified(websocket: WebSocket):
             "mode": mode
         }, websocket)
         
-        # Route to appropriate generator based on mode
-        if mode == "single":
-            await generate_single_page(websocket, prompt)
-        else:
-            await generate_multi_page(websocket, prompt)
+        await generate_page(websocket, prompt, mode)
         
     except WebSocketDisconnect:
         manager.disconnect(websocket)
@@ -567,7 +555,7 @@ async def websocket_generate_single(websocket: WebSocket):
             "mode": "single"
         }, websocket)
         
-        await generate_single_page(websocket, prompt)
+        await generate_page(websocket, prompt, "single")
         
     except WebSocketDisconnect:
         manager.disconnect(websocket)
@@ -611,7 +599,7 @@ async def websocket_generate_multi(websocket: WebSocket):
             "mode": "multi"
         }, websocket)
         
-        await generate_multi_page(websocket, prompt)
+        await generate_page(websocket, prompt, "multi")
         
     except WebSocketDisconnect:
         manager.disconnect(websocket)
@@ -625,863 +613,190 @@ async def websocket_generate_multi(websocket: WebSocket):
         manager.disconnect(websocket)
 
 
-async def generate_single_page(websocket: WebSocket, prompt: str):
-    """
-    Generate SINGLE PAGE application
-    Follows EXACT flow from main_single_page.py
-    """
+async def run_engine_step(websocket: WebSocket, events: queue.Queue, step, *args):
+    """Run a blocking GenerationEngine step in a worker thread, streaming its events to the client"""
+    outcome = [None, None]  # result, error
     
-    try:
-        # STEP 1: CLEAN OUTPUT AND LARAVEL VIEWS (first_run behavior)
-        await manager.send_message({"type": "output", "message": "Cleaning output folder..."}, websocket)
-        if os.path.exists("output"):
-            shutil.rmtree("output")
-        
-        await manager.send_message({"type": "output", "message": "Cleaning Laravel views..."}, websocket)
-        clean_laravel_views()
-        await manager.send_message({"type": "output", "message": "✅ Cleaned successfully"}, websocket)
-        
-        # STEP 2: PROMPT EXPANDER
-        await manager.send_message({"type": "agent_start", "agent_id": "prompt-expander", "agent_name": "Prompt Expander", "description": "Expanding user prompt..."}, websocket)
-        from agents.a_prompt_expander import prompt_expander
-        preprompt = prompt_expander(prompt)
-        await manager.send_message({"type": "agent_complete", "agent_id": "prompt-expander", "agent_name": "Prompt Expander", "duration": 1.0}, websocket)
-        
-        # STEP 3: DRAFT AGENT (SINGLE PAGE - uses b_draft_agent NOT b_draft_agent_v2)
-        await manager.send_message({"type": "agent_start", "agent_id": "draft-agent", "agent_name": "Draft Agent", "description": "Generating HTML draft..."}, websocket)
-        from agents.b_draft_agent import draft_agent
-        draft_result = draft_agent(preprompt)
-        
-        # STEP 4: SAVE DRAFT HTML (like CLI does)
-        os.makedirs("output", exist_ok=True)
-        draft_path = os.path.abspath("output/draft.html")
-        with open(draft_path, "w", encoding="utf-8") as f:
-            f.write(draft_result["draft"])
-        await manager.send_message({"type": "output", "message": f"📁 Draft saved: {draft_path}"}, websocket)
-        
-        await manager.send_message({"type": "agent_complete", "agent_id": "draft-agent", "agent_name": "Draft Agent", "duration": 2.5}, websocket)
-        
-        # Send draft for confirmation
-        await manager.send_message({
-            "type": "draft_ready",
-            "draft_path": "/output/draft.html",
-            "message": "Draft generated. Please review."
-        }, websocket)
-        
-        print("⏳ Waiting for user confirmation...")
-        
-        # REVISION LOOP - Allow unlimited revisions
-        approved = False
-        current_prompt = prompt
-        
-        while not approved:
-            try:
-                confirmation = await asyncio.wait_for(
-                    websocket.receive_json(),
-                    timeout=300.0
-                )
-                print(f"✅ Received confirmation: {confirmation}")
-                
-                action = confirmation.get("action")
-                
-                if action == "approve":
-                    print("✅ User approved, continuing generation...")
-                    approved = True
-                    break
-                    
-                elif action == "revise":
-                    print("User requested revision, waiting for new prompt...")
-                    revised_prompt = confirmation.get("revised_prompt", "")
-                    
-                    if not revised_prompt:
-                        await manager.send_message({
-                            "type": "error",
-                            "message": "No revised prompt provided."
-                        }, websocket)
-                        continue  # Ask for confirmation again
-                    
-                    try:
-                        # Update current prompt
-                        current_prompt = revised_prompt
-                        
-                        # Regenerate draft with revised prompt
-                        print(f"Regenerating with revised prompt: {revised_prompt}")
-                        await manager.send_message({
-                            "type": "output",
-                            "message": "Regenerating draft with your revisions..."
-                        }, websocket)
-                        
-                        # Re-expand prompt first
-                        await manager.send_message({"type": "agent_start", "agent_id": "prompt-expander", "agent_name": "Prompt Expander", "description": "Expanding revised prompt..."}, websocket)
-                        from agents.a_prompt_expander import prompt_expander
-                        preprompt = prompt_expander(revised_prompt)
-                        await manager.send_message({"type": "agent_complete", "agent_id": "prompt-expander", "agent_name": "Prompt Expander", "duration": 1.0}, websocket)
-                        
-                        # Re-run draft agent with expanded prompt
-                        await manager.send_message({"type": "agent_start", "agent_id": "draft-agent", "agent_name": "Draft Agent", "description": "Creating revised draft..."}, websocket)
-                        from agents.b_draft_agent import draft_agent
-                        draft_result = draft_agent(preprompt)
-                        await manager.send_message({"type": "agent_complete", "agent_id": "draft-agent", "agent_name": "Draft Agent", "duration": 3.0}, websocket)
-                        
-                        # Save revised draft
-                        with open("output/draft.html", "w", encoding="utf-8") as f:
-                            f.write(draft_result['draft'])
-                        
-                        # Send new draft for approval (loop continues)
-                        await manager.send_message({
-                            "type": "draft_ready",
-                            "draft_path": "/output/draft.html",
-                            "message": "Revised draft generated. Please review."
-                        }, websocket)
-                        
-                        print("⏳ Waiting for confirmation on revised draft...")
-                        # Loop continues to wait for next confirmation
-                        
-                    except Exception as e:
-                        print(f"❌ Error during revision: {e}")
-                        await manager.send_message({
-                            "type": "error",
-                            "message": f"Failed to regenerate draft: {str(e)}"
-                        }, websocket)
-                        # Continue loop to ask for confirmation again
-                        continue
-                    
-                else:
-                    # Cancel or unknown action
-                    print("❌ User cancelled generation")
-                    await manager.send_message({
-                        "type": "cancelled",
-                        "message": "Generation cancelled by user."
-                    }, websocket)
-                    manager.disconnect(websocket)
-                    await websocket.close()
-                    return
-                    
-            except asyncio.TimeoutError:
-                print("⏰ Confirmation timeout")
-                await manager.send_message({
-                    "type": "error",
-                    "message": "Confirmation timeout. Please try again."
-                }, websocket)
-                # 🔓 UNLOCK before return (SINGLE PAGE)
-                manager.disconnect(websocket)
-                await websocket.close()
-                return
-        
-        # STEP 5: CLEAN LARAVEL VIEWS BEFORE BUILD (after confirmation)
-        await manager.send_message({"type": "output", "message": "Cleaning Laravel views before build..."}, websocket)
-        clean_laravel_views()
-        await manager.send_message({"type": "output", "message": "✅ Laravel views cleaned"}, websocket)
-        
-        # STEP 6: PROMPT PLANNER (SINGLE - uses c_prompt_planner NOT v2)
-        await manager.send_message({"type": "agent_start", "agent_id": "prompt-planner", "agent_name": "Prompt Planner", "description": "Planning components..."}, websocket)
-        from agents.c_prompt_planner import plan_prompt
-        final_prompt = f"For UI design and materials, follow this draft reference: {draft_result['draft']}"
-        plan = plan_prompt(final_prompt)
-        await manager.send_message({"type": "agent_complete", "agent_id": "prompt-planner", "agent_name": "Prompt Planner", "duration": 1.5}, websocket)
-        
-        # STEP 7: PAGE ARCHITECT
-        await manager.send_message({"type": "agent_start", "agent_id": "page-architect", "agent_name": "Page Architect", "description": "Designing layout..."}, websocket)
-        layout = design_layout(plan)
-        await manager.send_message({"type": "agent_complete", "agent_id": "page-architect", "agent_name": "Page Architect", "duration": 2.0}, websocket)
-        
-        # STEP 8: COMPONENT AGENT
-        await manager.send_message({"type": "agent_start", "agent_id": "component-agent", "agent_name": "Component Agent", "description": "Listing components..."}, websocket)
-        components = list_components(plan, draft_result['draft'])
-        await manager.send_message({"type": "agent_complete", "agent_id": "component-agent", "agent_name": "Component Agent", "duration": 1.5}, websocket)
-        
-        # STEP 9: UI GENERATOR
-        await manager.send_message({"type": "agent_start", "agent_id": "ui-generator", "agent_name": "UI Generator", "description": "Generating Blade views..."}, websocket)
-        generate_blade(layout, components)
-        await manager.send_message({"type": "agent_complete", "agent_id": "ui-generator", "agent_name": "UI Generator", "duration": 2.5}, websocket)
-        
-        # STEP 10: LAYOUT GENERATOR
-        await manager.send_message({"type": "agent_start", "agent_id": "layout-generator", "agent_name": "Layout Generator", "description": "Creating app layout..."}, websocket)
-        generate_layout_app(plan, draft_result['draft'])
-        await manager.send_message({"type": "agent_complete", "agent_id": "layout-generator", "agent_name": "Layout Generator", "duration": 1.5}, websocket)
-        
-        # STEP 11: ROUTE AGENT (SINGLE - uses g_route_agent NOT v2)
-        await manager.send_message({"type": "agent_start", "agent_id": "route-agent", "agent_name": "Route Agent", "description": "Generating route..."}, websocket)
-        from agents.g_route_agent import generate_route
-        generate_route(plan, draft_result['draft'])
-        await manager.send_message({"type": "agent_complete", "agent_id": "route-agent", "agent_name": "Route Agent", "duration": 1.0}, websocket)
-        
-        # STEP 12: VALIDATOR AGENT (EXACT from main_single_page.py)
-        await manager.send_message({"type": "agent_start", "agent_id": "validator-agent", "agent_name": "Validator Agent", "description": "Validating components..."}, websocket)
-        from agents.i_validator_agent import validate_with_reason, auto_fix
-        fixed_components = {}
-        all_valid = True
-        
-        for name, blade_code in components.items():
-            is_valid, reason = validate_with_reason(blade_code)
-            if is_valid:
-                await manager.send_message({"type": "output", "message": f"✅ {name} valid"}, websocket)
-                fixed_components[name] = blade_code
-            else:
-                await manager.send_message({"type": "output", "message": f"❌ {name} - Error: {reason}"}, websocket)
-                await manager.send_message({"type": "output", "message": f"Auto-fixing {name}..."}, websocket)
-                
-                fixed_code = auto_fix(blade_code, reason)
-                
-                # Validate fixed code
-                is_fixed, _ = validate_with_reason(fixed_code)
-                if is_fixed:
-                    await manager.send_message({"type": "output", "message": f"✅ {name} fixed!"}, websocket)
-                    fixed_components[name] = fixed_code
-                    
-                    # Update output file (EXACT from main_single_page.py)
-                    output_path = f"output/components/{name}.blade.php"
-                    if os.path.exists(output_path):
-                        with open(output_path, "w", encoding="utf-8") as f:
-                            f.write(fixed_code)
-                else:
-                    await manager.send_message({"type": "output", "message": f"❌ {name} fix failed, using original"}, websocket)
-                    fixed_components[name] = blade_code
-                    all_valid = False
-        
-        components = fixed_components
-        await manager.send_message({"type": "output", "message": "✅ All Components Valid" if all_valid else "⚠️ Some components may have issues"}, websocket)
-        await manager.send_message({"type": "agent_complete", "agent_id": "validator-agent", "agent_name": "Validator Agent", "duration": 1.0}, websocket)
-        
-        # STEP 13: PROJECT MOVER
-        await manager.send_message({"type": "agent_start", "agent_id": "project-mover", "agent_name": "Project Mover", "description": "Moving to Laravel project..."}, websocket)
-        move_to_laravel_project(layout)
-        await manager.send_message({"type": "agent_complete", "agent_id": "project-mover", "agent_name": "Project Mover", "duration": 1.0}, websocket)
-        
-        # STEP 14: AUTO-FIX UTILITIES (single-page specific - EXACT from main_single_page.py)
-        await manager.send_message({"type": "output", "message": "Auto-fixing CSS, routes, and styling (single-page mode)..."}, websocket)
-        import sys
-        sys.path.insert(0, 'utils')
+    def run():
         try:
-            from fix_layout_css import extract_custom_css_from_draft, update_layout_css
-            from fix_single_page import fix_component_routes_single_page
-            from fix_component_styling import fix_hero_section, fix_all_components
-            
-            # Fix CSS
-            custom_css = extract_custom_css_from_draft()
-            if custom_css:
-                update_layout_css(custom_css)
-                await manager.send_message({"type": "output", "message": "  ✅ Custom CSS applied"}, websocket)
-            
-            # Fix routes - remove all route() calls for single-page
-            await manager.send_message({"type": "output", "message": "  Removing route() calls (single-page)..."}, websocket)
-            fix_component_routes_single_page()
-            await manager.send_message({"type": "output", "message": "  ✅ Single-page fixes applied"}, websocket)
-            
-            # Fix component styling
-            await manager.send_message({"type": "output", "message": "  Fixing component styling..."}, websocket)
-            fix_hero_section()
-            fix_all_components()
-            await manager.send_message({"type": "output", "message": "  ✅ Styling fixes applied"}, websocket)
-            
-            # Fix component name mismatches (CRITICAL for single page!)
-            await manager.send_message({"type": "output", "message": "  Fixing component names..."}, websocket)
-            from fix_component_names import fix_component_includes
-            fix_component_includes()
-            await manager.send_message({"type": "output", "message": "  ✅ Component names fixed"}, websocket)
-            
+            outcome[0] = step(*args)
         except Exception as e:
-            await manager.send_message({"type": "output", "message": f"  ⚠️ Auto-fix warning: {e}"}, websocket)
-        
-        # Send completion with Laravel URL and generation info (for localStorage)
-        import datetime
-        laravel_url = f"{LARAVEL_URL}{plan['route']}"
-        await manager.send_message({"type": "output", "message": ""}, websocket)
-        await manager.send_message({"type": "output", "message": "========================================"}, websocket)
-        await manager.send_message({"type": "output", "message": f"🌐 Open Link: {laravel_url}"}, websocket)
-        await manager.send_message({"type": "output", "message": "========================================"}, websocket)
-        await manager.send_message({
-            "type": "complete",
-            "message": "Generation completed successfully!",
-            "output_path": "/output/",
-            "laravel_url": laravel_url,
-            "route": plan['route'],
-            "generation_info": {
-                "timestamp": datetime.datetime.now().isoformat(),
-                "mode": "single",
-                "page": plan['page'],
-                "route": plan['route'],
-                "laravel_url": laravel_url,
-                "components": list(components.keys()),
-                "components_count": len(components)
-            }
-        }, websocket)
-        
-        # 📊 Record generation stats
-        try:
-            duration = (datetime.datetime.now() - start_time).total_seconds() if 'start_time' in dir() else 0
-            record_generation("single", True, duration)
-        except:
-            pass
-        
-        # 🔒 CLOSE CONNECTION after completion
-        print("✅ Single page generation completed. Closing connection.")
-        manager.disconnect(websocket)
-        await websocket.close()
-        
-    except Exception as e:
-        print(f"❌ Error in single page generation: {e}")
-        # 📊 Record failed generation
+            outcome[1] = e
+        events.put(None)  # Signal completion
+    
+    thread = threading.Thread(target=bind(run))
+    thread.start()
+    
+    # Process events from the engine in real-time
+    while True:
         try:
-            record_generation("single", False, 0)
-        except:
-            pass
-        await manager.send_message({
-            "type": "error",
-            "message": f"Generation failed: {str(e)}"
-        }, websocket)
-        manager.disconnect(websocket)
-        await websocket.close()
+            event = events.get_nowait()
+        except queue.Empty:
+            await asyncio.sleep(0.05)
+            continue
+        if event is None:
+            break
+        await manager.send_message(event, websocket)
+    
+    thread.join()
+    if outcome[1] is not None:
+        raise outcome[1]
+    return outcome[0]
 
 
-async def generate_multi_page(websocket: WebSocket, prompt: str):
+async def generate_page(websocket: WebSocket, prompt: str, mode: str):
     """
-    Generate MULTI PAGE application
-    Follows exact flow from main_multi_page.py
+    Generate a SINGLE or MULTI page application.
+    Drives the same GenerationEngine as main_single_page.py / main_multi_page.py;
+    this function only handles the WebSocket protocol (confirmation, revisions,
+    completion message, monitoring).
     """
     
+    # 📼 Job marker for recorded load tests (no-op unless LLM_RECORD_PATH is set)
+    get_llm_client().mark_job(prompt, mode)
+    # 🧭 Per-job timeline (exported to backend/data/traces)
+    trace = start_trace(mode, prompt=prompt[:200])
+    # 📣 LLM progress goes to this client (rate-limited), not the server console
+    progress_token = progress.attach_sink(
+        progress.WebSocketSink(lambda message: manager.send_message(message, websocket), asyncio.get_running_loop())
+    )
+    events = queue.Queue()
+    engine = GenerationEngine(mode, on_event=events.put)
+    
     try:
-        # STEP 1: CLEAN OUTPUT AND LARAVEL VIEWS
-        await manager.send_message({"type": "output", "message": "Cleaning output folder..."}, websocket)
-        if os.path.exists("output"):
-            shutil.rmtree("output")
-        
-        await manager.send_message({"type": "output", "message": "Cleaning Laravel views..."}, websocket)
-        clean_laravel_views()
-        await manager.send_message({"type": "output", "message": "✅ Cleaned successfully"}, websocket)
+        # STEP 1-3: CLEAN, PROMPT EXPANDER, DRAFT AGENT (ends with draft_ready)
+        await run_engine_step(websocket, events, engine.start, prompt)
         
-        # STEP 2: PROMPT EXPANDER
-        await manager.send_message({"type": "agent_start", "agent_id": "prompt-expander", "agent_name": "Prompt Expander", "description": "Expanding user prompt..."}, websocket)
-        from agents.a_prompt_expander import prompt_expander
-        preprompt = prompt_expander(prompt)
-        await manager.send_message({"type": "agent_complete", "agent_id": "prompt-expander", "agent_name": "Prompt Expander", "duration": 1.0}, websocket)
-        
-        # STEP 3: DRAFT AGENT (MULTI - uses b_draft_agent_v2)
-        await manager.send_message({"type": "agent_start", "agent_id": "draft-agent", "agent_name": "Draft Agent", "description": "Generating HTML drafts for all pages..."}, websocket)
-        await manager.send_message({"type": "output", "message": "Analyzing prompt for multiple pages..."}, websocket)
-        
-        # Use queue for real-time communication between sync agent and async websocket
-        import queue
-        import threading
-        message_queue = queue.Queue()
-        
-        def draft_callback(data):
-            """Sync callback that puts messages in queue"""
-            message_queue.put(data)
-        
-        # Run draft agent in separate thread
-        from agents.b_draft_agent_v2 import draft_agent_multi
-        draft_result = [None]  # Use list to store result from thread
-        
-        def run_draft():
-            draft_result[0] = draft_agent_multi(preprompt, callback=draft_callback)
-            message_queue.put({"type": "done"})  # Signal completion
-        
-        thread = threading.Thread(target=run_draft)
-        thread.start()
-        
-        # Process messages from queue in real-time
-        while True:
-            try:
-                data = message_queue.get(timeout=0.1)
-                
-                if data["type"] == "done":
-                    break
-                elif data["type"] == "pages_detected":
-                    await manager.send_message({"type": "output", "message": f"Detected {data['count']} page(s) to generate"}, websocket)
-                    await manager.send_message(data, websocket)
-                elif data["type"] == "page_draft_start":
-                    await manager.send_message({"type": "output", "message": f"Generating draft {data['index']}/{data['total']}: {data['page_name']}..."}, websocket)
-                elif data["type"] == "page_draft_complete":
-                    await manager.send_message({"type": "output", "message": f"✅ {data['page_name']} draft completed ({data['index']}/{data['total']})"}, websocket)
-                    await manager.send_message({"type": "page_draft_complete", "page_name": data['page_name']}, websocket)
-            except queue.Empty:
-                await asyncio.sleep(0.1)  # Wait a bit and check again
-        
-        thread.join()  # Wait for thread to complete
-        draft_result = draft_result[0]  # Get result from thread
-        
-        pages_count = len(draft_result.get("pages", []))
-        
-        await manager.send_message({"type": "output", "message": "✅ Draft generation completed"}, websocket)
-        
-        # Draft styling and consistency now handled by LLM in draft agent v2
-        # Template-based generation ensures navbar/footer consistency from the start
-        await manager.send_message({"type": "output", "message": "✅ Draft generation completed"}, websocket)
-        
-        # Page completion messages already sent via callback during generation
-        
-        await manager.send_message({"type": "agent_complete", "agent_id": "draft-agent", "agent_name": "Draft Agent", "duration": 2.5}, websocket)
-        
-        # Send draft for confirmation
-        await manager.send_message({
-            "type": "draft_ready",
-            "draft_path": "/output/draft.html",
-            "message": f"Generated {pages_count} pages. Please review."
-        }, websocket)
-        
-        print("⏳ Waiting for user confirmation (multi-page)...")
+        print(f"⏳ Waiting for user confirmation ({mode}-page)...")
         
         # REVISION LOOP - Allow unlimited revisions
-        approved = False
-        current_prompt = prompt
-        
-        while not approved:
+        while True:
             try:
                 confirmation = await asyncio.wait_for(
                     websocket.receive_json(),
                     timeout=300.0
                 )
-                print(f"✅ Received confirmation: {confirmation}")
-                
-                action = confirmation.get("action")
-                
-                if action == "approve":
-                    print("✅ User approved, continuing multi-page generation...")
-                    approved = True
-                    break
-                    
-                elif action == "revise":
-                    print("User requested revision, waiting for new prompt...")
-                    revised_prompt = confirmation.get("revised_prompt", "")
-                    
-                    if not revised_prompt:
-                        await manager.send_message({
-                            "type": "error",
-                            "message": "No revised prompt provided."
-                        }, websocket)
-                        continue  # Ask for confirmation again
-                    
-                    try:
-                        # Build context from previous draft (like CLI does)
-                        prev_draft_info = {
-                            "draft_html": draft_result["draft"],
-                            "pages": draft_result.get("pages", []),
-                            "drafts": draft_result.get("drafts", {})
-                        }
-                        
-                        pages_list = ", ".join([p["name"] for p in prev_draft_info["pages"]])
-                        pages_detail = "\n".join([
-                            f"  - {p['name']}: {p.get('description', 'page')}"
-                            for p in prev_draft_info["pages"]
-                        ])
-                        
-                        # Build revision prompt with context
-                        revision_context = f"""
-CRITICAL: This is a MULTI-PAGE project with {len(prev_draft_info["pages"])} pages.
-
-EXISTING PAGES (DO NOT CHANGE):
-{pages_detail}
-
-You MUST generate these EXACT {len(prev_draft_info["pages"])} pages:
-{pages_list}
-
-PREVIOUS DRAFT (for reference):
-{prev_draft_info["draft_html"][:2000]}...
-
-USER REVISION REQUEST:
-{revised_prompt}
-
-IMPORTANT:
-- Keep the SAME {len(prev_draft_info["pages"])} pages structure
-- Do NOT merge into single page
-- Do NOT add or remove pages
-- Only improve based on user feedback
-"""
-                        
-                        current_prompt = revision_context
-                        
-                        print(f"Regenerating with context: {len(prev_draft_info['pages'])} pages")
-                        await manager.send_message({
-                            "type": "output",
-                            "message": f"Regenerating {len(prev_draft_info['pages'])} pages with your revisions..."
-                        }, websocket)
-                        
-                        # Re-expand prompt with context
-                        await manager.send_message({"type": "agent_start", "agent_id": "prompt-expander", "agent_name": "Prompt Expander", "description": "Expanding revised prompt..."}, websocket)
-                        from agents.a_prompt_expander import prompt_expander
-                        preprompt = prompt_expander(revision_context)
-                        await manager.send_message({"type": "agent_complete", "agent_id": "prompt-expander", "agent_name": "Prompt Expander", "duration": 1.0}, websocket)
-                        
-                        # Re-run draft agent with expanded prompt (with real-time updates)
-                        await manager.send_message({"type": "agent_start", "agent_id": "draft-agent", "agent_name": "Draft Agent", "description": "Creating revised multi-page draft..."}, websocket)
-                        
-                        # Use queue for real-time communication
-                        import queue
-                        import threading
-                        message_queue = queue.Queue()
-                        
-                        def draft_callback(data):
-                            message_queue.put(data)
-                        
-                        from agents.b_draft_agent_v2 import draft_agent_multi
-                        draft_result_container = [None]
-                        
-                        def run_draft():
-                            draft_result_container[0] = draft_agent_multi(preprompt, callback=draft_callback)
-                            message_queue.put({"type": "done"})
-                        
-                        thread = threading.Thread(target=run_draft)
-                        thread.start()
-                        
-                        # Process messages from queue in real-time
-                        while True:
-                            try:
-                                data = message_queue.get(timeout=0.1)
-                                
-                                if data["type"] == "done":
-                                    break
-                                elif data["type"] == "pages_detected":
-                                    await manager.send_message({"type": "output", "message": f"Detected {data['count']} page(s) to generate"}, websocket)
-                                    await manager.send_message(data, websocket)
-                                elif data["type"] == "page_draft_start":
-                                    await manager.send_message({"type": "output", "message": f"Generating draft {data['index']}/{data['total']}: {data['page_name']}..."}, websocket)
-                                elif data["type"] == "page_draft_complete":
-                                    await manager.send_message({"type": "output", "message": f"✅ {data['page_name']} draft completed ({data['index']}/{data['total']})"}, websocket)
-                                    await manager.send_message({"type": "page_draft_complete", "page_name": data['page_name']}, websocket)
-                            except queue.Empty:
-                                await asyncio.sleep(0.1)
-                        
-                        thread.join()
-                        draft_result = draft_result_container[0]
-                        pages_count = len(draft_result.get("pages", []))
-                        await manager.send_message({"type": "agent_complete", "agent_id": "draft-agent", "agent_name": "Draft Agent", "duration": 3.0}, websocket)
-                        
-                        # Save revised draft
-                        with open("output/draft.html", "w", encoding="utf-8") as f:
-                            f.write(draft_result['draft'])
-                        
-                        # Send new draft for approval (loop continues)
-                        await manager.send_message({
-                            "type": "draft_ready",
-                            "draft_path": "/output/draft.html",
-                            "message": f"Revised draft with {pages_count} pages. Please review."
-                        }, websocket)
-                        
-                        print("⏳ Waiting for confirmation on revised draft...")
-                        # Loop continues to wait for next confirmation
-                        
-                    except Exception as e:
-                        print(f"❌ Error during revision: {e}")
-                        await manager.send_message({
-                            "type": "error",
-                            "message": f"Failed to regenerate draft: {str(e)}"
-                        }, websocket)
-                        # Continue loop to ask for confirmation again
-                        continue
-                    
-                else:
-                    # Cancel or unknown action
-                    print("❌ User cancelled generation")
-                    await manager.send_message({
-                        "type": "cancelled",
-                        "message": "Generation cancelled by user."
-                    }, websocket)
-                    manager.disconnect(websocket)
-                    await websocket.close()
-                    return
-                    
             except asyncio.TimeoutError:
                 print("⏰ Confirmation timeout")
                 await manager.send_message({
                     "type": "error",
                     "message": "Confirmation timeout. Please try again."
                 }, websocket)
-                # 🔓 UNLOCK before return (MULTI PAGE)
+                # 🔓 UNLOCK before return
                 manager.disconnect(websocket)
                 await websocket.close()
                 return
-        
-        # STEP 4: PROMPT PLANNER (MULTI - uses c_prompt_planner_v2)
-        await manager.send_message({"type": "agent_start", "agent_id": "prompt-planner", "agent_name": "Prompt Planner", "description": "Planning components for each page..."}, websocket)
-        from agents.c_prompt_planner_v2 import plan_prompt_multi
-        multi_plan = plan_prompt_multi(f"For UI design: {draft_result['draft']}")
-        pages_from_planner = multi_plan.get("pages", [])
-        await manager.send_message({"type": "agent_complete", "agent_id": "prompt-planner", "agent_name": "Prompt Planner", "duration": 1.5}, websocket)
-        
-        # STEP 5: PAGE ARCHITECT - Loop each page
-        await manager.send_message({"type": "agent_start", "agent_id": "page-architect", "agent_name": "Page Architect", "description": "Designing layouts for all pages..."}, websocket)
-        all_layouts = []
-        all_components = {}
-        
-        pages_from_draft = draft_result.get("pages", [])
-        total_pages = len(pages_from_draft)
-        
-        for idx, draft_page in enumerate(pages_from_draft):
-            page_name = draft_page["name"]
-            await manager.send_message({"type": "output", "message": f"🔨 Generating page {idx+1}/{total_pages}: {page_name}"}, websocket)
-            
-            page_plan = {
-                "page": page_name,
-                "route": f"/{page_name}",
-                "components": pages_from_planner[idx].get("components", []) if idx < len(pages_from_planner) else []
-            }
-            
-            # Design layout for this page
-            layout = design_layout(page_plan)
-            all_layouts.append(layout)
             
-            # Get draft for this page
-            page_draft_html = draft_result.get("drafts", {}).get(page_name, draft_result["draft"])
+            print(f"✅ Received confirmation: {confirmation}")
+            action = confirmation.get("action")
             
-            # Generate components
-            components = list_components(page_plan, page_draft_html)
-            all_components.update(components)
+            if action == "approve":
+                print(f"✅ User approved, continuing {mode}-page generation...")
+                break
             
-            # Generate blade
-            generate_blade(layout, components)
-            
-            await manager.send_message({"type": "output", "message": f"  ✅ {page_name} completed"}, websocket)
-        
-        await manager.send_message({"type": "agent_complete", "agent_id": "page-architect", "agent_name": "Page Architect", "duration": 2.0}, websocket)
-        
-        # STEP 6: BLADE GENERATION (already done in loop above)
-        await manager.send_message({"type": "agent_start", "agent_id": "blade-generator", "agent_name": "Blade Generator", "description": "Generating shared layout..."}, websocket)
-        # Generate shared layout
-        generate_layout_app({"page": pages_from_draft[0]["name"], "components": list(all_components.keys())}, draft_result['draft'])
-        await manager.send_message({"type": "agent_complete", "agent_id": "blade-generator", "agent_name": "Blade Generator", "duration": 1.0}, websocket)
-        
-        # STEP 7: ROUTE GENERATION (MULTI - uses g_route_agent_v2)
-        await manager.send_message({"type": "agent_start", "agent_id": "route-generator", "agent_name": "Route Generator", "description": "Generating routes for all pages..."}, websocket)
-        await manager.send_message({"type": "output", "message": f"Generating routes for {len(pages_from_draft)} pages..."}, websocket)
-        
-        try:
-            from agents.g_route_agent_v2 import generate_routes_multi
-            pages_for_routes = [{"page": p["name"], "route": f"/{p['name']}"} for p in pages_from_draft]
-            generate_routes_multi(pages_for_routes)
-            await manager.send_message({"type": "output", "message": "✅ Routes generated"}, websocket)
-        except Exception as e:
-            await manager.send_message({"type": "output", "message": f"⚠️ Route generation warning: {e}"}, websocket)
-        
-        await manager.send_message({"type": "agent_complete", "agent_id": "route-generator", "agent_name": "Route Generator", "duration": 1.0}, websocket)
-        
-        # Small delay to ensure frontend renders progress
-        await asyncio.sleep(0.1)
-        
-        # STEP 8: VALIDATION & AUTO-FIX (Combined into one agent)
-        await manager.send_message({
-            "type": "agent_start",
-            "agent_id": "validator-fixer",
-            "agent_name": "Validator & Auto-Fixer",
-            "description": "Validating, fixing, and optimizing..."
-        }, websocket)
-        from agents.i_validator_agent import validate_with_reason, auto_fix
-        
-        all_valid = True
-        fixed_components = {}
-        
-        await manager.send_message({"type": "output", "message": "[VALIDATOR AGENT] Validating all components..."}, websocket)
-        
-        try:
-            for name, blade_code in all_components.items():
+            elif action == "revise":
+                print("User requested revision, waiting for new prompt...")
+                revised_prompt = confirmation.get("revised_prompt", "")
+                
+                if not revised_prompt:
+                    await manager.send_message({
+                        "type": "error",
+                        "message": "No revised prompt provided."
+                    }, websocket)
+                    continue  # Ask for confirmation again
+                
                 try:
-                    is_valid, reason = validate_with_reason(blade_code)
-                    
-                    if is_valid:
-                        await manager.send_message({"type": "output", "message": f"✅ {name}"}, websocket)
-                        fixed_components[name] = blade_code
-                    else:
-                        await manager.send_message({"type": "output", "message": f"❌ {name} - Error: {reason}"}, websocket)
-                        await manager.send_message({"type": "output", "message": f"Auto-fixing {name}..."}, websocket)
-                        
-                        fixed_code = auto_fix(blade_code, reason)
-                        
-                        # Validate fixed code
-                        is_fixed, _ = validate_with_reason(fixed_code)
-                        if is_fixed:
-                            await manager.send_message({"type": "output", "message": f"✅ {name} fixed!"}, websocket)
-                            fixed_components[name] = fixed_code
-                            
-                            # Update output file
-                            output_path = f"output/components/{name}.blade.php"
-                            if os.path.exists(output_path):
-                                with open(output_path, "w", encoding="utf-8") as f:
-                                    f.write(fixed_code)
-                        else:
-                            await manager.send_message({"type": "output", "message": f"❌ {name} fix failed, using original"}, websocket)
-                            fixed_components[name] = blade_code
-                            all_valid = False
+                    # Sends a new draft_ready (loop continues)
+                    await run_engine_step(websocket, events, engine.revise, revised_prompt)
+                    print("⏳ Waiting for confirmation on revised draft...")
                 except Exception as e:
-                    await manager.send_message({"type": "output", "message": f"⚠️ Error validating {name}: {e}"}, websocket)
-                    fixed_components[name] = blade_code
-                    all_valid = False
-            
-            all_components = fixed_components
-            await manager.send_message({"type": "output", "message": "✅ All Components Valid" if all_valid else "⚠️ Some components may have issues"}, websocket)
-        except Exception as e:
-            await manager.send_message({"type": "output", "message": f"⚠️ Validation error: {e}"}, websocket)
-        
-        # Move all layouts to project
-        for layout in all_layouts:
-            move_to_laravel_project(layout)
-        
-        # Multi-Page Validation (CRITICAL from main_multi_page.py)
-        await manager.send_message({"type": "output", "message": "Running multi-page validation..."}, websocket)
-        try:
-            from utils.multi_page_validator import validate_multi_page_app
-            is_valid = validate_multi_page_app("my-laravel")
-            if not is_valid:
-                await manager.send_message({"type": "output", "message": "⚠️ Validation found issues. Attempting auto-fix..."}, websocket)
-            else:
-                await manager.send_message({"type": "output", "message": "✅ Multi-page validation passed"}, websocket)
-        except Exception as e:
-            await manager.send_message({"type": "output", "message": f"⚠️ Validation warning: {e}"}, websocket)
-        
-        # Continue with auto-fix utilities (same agent)
-        await manager.send_message({"type": "output", "message": "\n[AUTO-FIX] Applying optimizations..."}, websocket)
-        await manager.send_message({"type": "output", "message": "Auto-fixing CSS, routes, and styling (multi-page mode)..."}, websocket)
-        import sys
-        sys.path.insert(0, 'utils')
-        
-        try:
-            # Fix nested UI first (critical)
-            from fix_nested_ui import fix_nested_ui
-            fix_nested_ui()
-            await manager.send_message({"type": "output", "message": "  ✅ Nested UI fixed"}, websocket)
-            
-            from fix_layout_css import extract_custom_css_from_draft, update_layout_css
-            from fix_layout_js import extract_javascript_from_drafts, update_layout_js
-            from fix_existing_views import fix_component_routes
-            from fix_component_styling import fix_hero_section, fix_all_components
-            
-            # Fix CSS
-            custom_css = extract_custom_css_from_draft()
-            if custom_css:
-                update_layout_css(custom_css)
-                await manager.send_message({"type": "output", "message": "  ✅ Custom CSS applied to layout"}, websocket)
-            
-            # Fix JavaScript
-            await manager.send_message({"type": "output", "message": "  Merging JavaScript from all pages..."}, websocket)
-            custom_js = extract_javascript_from_drafts()
-            if custom_js:
-                update_layout_js(custom_js)
-                await manager.send_message({"type": "output", "message": "  ✅ JavaScript merged to layout"}, websocket)
-            
-            # Smart route sync (preserves valid routes)
-            await manager.send_message({"type": "output", "message": "  Syncing routes with web.php..."}, websocket)
-            from smart_route_sync import sync_navbar_routes
-            sync_navbar_routes()
-            await manager.send_message({"type": "output", "message": "  ✅ Routes synced"}, websocket)
-            
-            # Fix component styling
-            await manager.send_message({"type": "output", "message": "  Fixing component styling..."}, websocket)
-            fix_hero_section()
-            fix_all_components()
-            await manager.send_message({"type": "output", "message": "  ✅ Styling fixes applied"}, websocket)
-            
-            # Fix component name mismatches
-            await manager.send_message({"type": "output", "message": "  Fixing component names..."}, websocket)
-            from fix_component_names import fix_component_includes
-            fix_component_includes()
-            await manager.send_message({"type": "output", "message": "  ✅ Component names fixed"}, websocket)
-            
-            # Final structure validation with LLM (part of auto-fixer agent)
-            await manager.send_message({"type": "output", "message": "  AI validating structure and styling..."}, websocket)
-            
-            from agents.k_validator_agent_v2 import validate_all_with_llm
-            
-            # Run validator in thread with callback
-            import queue
-            import threading
-            validator_queue = queue.Queue()
-            
-            def validator_sync_callback(message):
-                validator_queue.put(message)
-            
-            validator_result = [None]
-            
-            def run_validator():
-                validator_result[0] = validate_all_with_llm(callback=validator_sync_callback)
-                validator_queue.put({"type": "done"})
-            
-            validator_thread = threading.Thread(target=run_validator)
-            validator_thread.start()
-            
-            # Process validator messages in real-time
-            while True:
-                try:
-                    data = validator_queue.get(timeout=0.1)
-                    
-                    if isinstance(data, dict) and data.get("type") == "done":
-                        break
-                    else:
-                        # It's a log message
-                        await manager.send_message({"type": "output", "message": data}, websocket)
-                except queue.Empty:
-                    await asyncio.sleep(0.1)
-            
-            validator_thread.join()
-            is_valid = validator_result[0]
+                    print(f"❌ Error during revision: {e}")
+                    await manager.send_message({
+                        "type": "error",
+                        "message": f"Failed to regenerate draft: {str(e)}"
+                    }, websocket)
             
-            if is_valid:
-                await manager.send_message({"type": "output", "message": "  ✅ AI validation passed"}, websocket)
             else:
-                await manager.send_message({"type": "output", "message": "  ✅ AI validation completed with auto-fixes"}, websocket)
-            
-        except Exception as e:
-            await manager.send_message({"type": "output", "message": f"  ⚠️ Auto-fix warning: {e}"}, websocket)
+                # Cancel or unknown action
+                engine.cancel()
+                print("❌ User cancelled generation")
+                await manager.send_message({
+                    "type": "cancelled",
+                    "message": "Generation cancelled by user."
+                }, websocket)
+                manager.disconnect(websocket)
+                await websocket.close()
+                return
         
-        # Send agent_complete AFTER ALL validation and fixes done
-        await manager.send_message({
-            "type": "agent_complete",
-            "agent_id": "validator-fixer",
-            "agent_name": "Validator & Auto-Fixer",
-            "duration": 5.0
-        }, websocket)
+        # STEP 4+: BUILD, VALIDATE, MOVE, AUTO-FIX
+        result = await run_engine_step(websocket, events, engine.confirm)
         
-        # Prepare generation metadata for frontend (saved in localStorage)
-        pages_list = [{"page": p["name"], "route": f"/{p['name']}"} for p in pages_from_draft]
-        first_route = pages_list[0]['route'] if pages_list else '/'
-        laravel_url = f"{LARAVEL_URL}{first_route}"
+        # Send completion with Laravel URL and generation info (for localStorage)
+        pages_list = result["pages"]
+        laravel_url = f"{LARAVEL_URL}{result['route']}"
+        usage = usage_tracker.job(trace.trace_id)
+        generation_info = {
+            "timestamp": datetime.datetime.now().isoformat(),
+            "mode": mode,
+            "trace_id": trace.trace_id,
+            "laravel_url": laravel_url,
+            "components": result["components"],
+            "components_count": len(result["components"]),
+            "cost_usd": usage["totals"]["cost_usd"]
+        }
         
-        # Send completion with Laravel URL (EXACT from main_multi_page.py)
-        await manager.send_message({"type": "output", "message": ""}, websocket)
-        await manager.send_message({"type": "output", "message": "========================================"}, websocket)
-        await manager.send_message({"type": "output", "message": "✅ Multi-page Laravel application generated!"}, websocket)
-        await manager.send_message({"type": "output", "message": "========================================"}, websocket)
-        await manager.send_message({"type": "output", "message": ""}, websocket)
-        await manager.send_message({"type": "output", "message": "📄 Generated Pages:"}, websocket)
-        for page in pages_list:
-            await manager.send_message({"type": "output", "message": f"  • {page['route']} → {page['page']}.blade.php"}, websocket)
-        await manager.send_message({"type": "output", "message": ""}, websocket)
-        await manager.send_message({"type": "output", "message": f"🌐 Opening: {laravel_url}"}, websocket)
+        if mode == "single":
+            summary_lines = ["", "========================================", f"🌐 Open Link: {laravel_url}", "========================================"]
+            generation_info.update({"page": pages_list[0]["page"], "route": result["route"]})
+            complete = {
+                "message": "Generation completed successfully!",
+                "route": result["route"],
+            }
+        else:
+            summary_lines = [
+                "", "========================================", "✅ Multi-page Laravel application generated!",
+                "========================================", "", "📄 Generated Pages:",
+                *[f"  • {page['route']} → {page['page']}.blade.php" for page in pages_list],
+                "", f"🌐 Opening: {laravel_url}",
+            ]
+            generation_info.update({"pages_count": len(pages_list), "pages": pages_list})
+            complete = {
+                "message": f"Multi-page application with {len(pages_list)} pages completed!",
+                "pages_count": len(pages_list),
+                "pages": pages_list,
+            }
         
-        import datetime
+        for line in summary_lines:
+            await manager.send_message({"type": "output", "message": line}, websocket)
         await manager.send_message({
             "type": "complete",
-            "message": f"Multi-page application with {pages_count} pages completed!",
             "output_path": "/output/",
-            "pages_count": pages_count,
             "laravel_url": laravel_url,
-            "pages": pages_list,
-            "generation_info": {
-                "timestamp": datetime.datetime.now().isoformat(),
-                "mode": "multi",
-                "pages_count": pages_count,
-                "pages": pages_list,
-                "laravel_url": laravel_url,
-                "components": list(all_components.keys()),
-                "components_count": len(all_components)
-            }
+            "usage": usage,
+            "generation_info": generation_info,
+            **complete
         }, websocket)
         
         # 📊 Record generation stats
+        finish_trace(trace)
         try:
-            duration = (datetime.datetime.now() - start_time).total_seconds() if 'start_time' in dir() else 0
-            record_generation("multi", True, duration)
+            record_generation(mode, True, trace.root.duration)
+            record_job_usage(mode, trace.trace_id, usage)
         except:
             pass
         
         # 🔒 CLOSE CONNECTION after completion
-        print("✅ Multi-page generation completed. Closing connection.")
+        print(f"✅ {mode.capitalize()}-page generation completed. Closing connection.")
         manager.disconnect(websocket)
         await websocket.close()
         
     except Exception as e:
-        print(f"❌ Error in multi-page generation: {e}")
+        print(f"❌ Error in {mode}-page generation: {e}")
         # 📊 Record failed generation
+        finish_trace(trace, e)
         try:
-            record_generation("multi", False, 0)
+            record_generation(mode, False, trace.root.duration)
+            record_job_usage(mode, trace.trace_id, usage_tracker.job(trace.trace_id))
         except:
             pass
         await manager.send_message({
@@ -1490,61 +805,13 @@ IMPORTANT:
         }, websocket)
         manager.disconnect(websocket)
         await websocket.close()
-
-
-async def send_agent_start(websocket: WebSocket, agent_info: tuple):
-    """Send agent start message and auto-log to task monitoring"""
-    agent_id, agent_name, description = agent_info
-    
-    # Auto-log task status
-    update_task_status(agent_name, "In Progress", 50, "Agent Pipeline")
-    
-    await manager.send_message({
-        "type": "agent_start",
-        "agent_id": agent_id,
-        "agent_name": agent_name,
-        "description": description
-    }, websocket)
-
-
-async def send_agent_complete(websocket: WebSocket, agent_info: tuple, duration: float = 0):
-    """Send agent complete message and auto-log to task monitoring"""
-    agent_id, agent_name, _ = agent_info
-    
-    # Auto-log task completion
-    update_task_status(agent_name, "Completed", 100, "Agent Pipeline")
-    
-    await manager.send_message({
-        "type": "agent_complete",
-        "agent_id": agent_id,
-        "agent_name": agent_name,
-        "duration": duration
-    }, websocket)
-
-
-async def send_phase_start(websocket: WebSocket, phase_info: tuple, current: int, total: int):
-    """Send phase start message"""
-    phase_id, phase_name, description = phase_info
-    await manager.send_message({
-        "type": "phase_start",
-        "phase_id": phase_id,
-        "phase_name": phase_name,
-        "description": description,
-        "current": current + 1,
-        "total": total
-    }, websocket)
-
-
-async def send_phase_complete(websocket: WebSocket, phase_info: tuple, current: int, total: int):
-    """Send phase complete message"""
-    phase_id, phase_name, _ = phase_info
-    await manager.send_message({
-        "type": "phase_complete",
-        "phase_id": phase_id,
-        "phase_name": phase_name,
-        "current": current + 1,
-        "total": total
-    }, websocket)
+    finally:
+        # A step still running in a worker (client gone) stops at its next checkpoint
+        engine.cancel()
+        progress.detach_sink(progress_token)
+        # 🧭 Cancelled / timed-out jobs still export their timeline
+        if trace.root.end is None:
+            finish_trace(trace, RuntimeError("generation not completed"))
 
 
 # ============================================
@@ -1575,10 +842,28 @@ async def get_tasks():
     return {"tasks": data["task_monitoring"]}
 
 @app.get("/api/monitoring/vendors")
-async def get_vendors():
-    """Get vendor monitoring (auto-recorded from API calls)"""
+async def get_vendors(window: str = None):
+    """
+    Get vendor monitoring (auto-recorded from API calls)
+    
+    "latency" holds p50/p90/p99 of latency, time-to-first-token and
+    tokens/sec per provider and per agent for the 5m/1h/24h/all windows
+    (or only ?window=...).
+    """
+    if window and window not in ("5m", "1h", "24h", "all"):
+        raise HTTPException(status_code=400, detail="window must be one of 5m, 1h, 24h, all")
     data = load_data()
-    return {"vendors": data["vendor_monitoring"]}
+    return {"vendors": data["vendor_monitoring"], "latency": get_latency_summary(window)}
+
+@app.get("/api/monitoring/usage")
+async def get_usage():
+    """
+    Get LLM token usage and cost (auto-recorded from API calls)
+    
+    Totals per agent and per vendor, the last generation jobs, and the
+    USD per 1M token price table in use (see agents/llm_usage.py).
+    """
+    return {**get_token_usage(), "prices": price_table()}
 
 @app.get("/api/monitoring/stats")
 async def get_stats():
@@ -1591,6 +876,19 @@ async def get_monitoring_summary():
     """Get summary of all monitoring data"""
     return get_summary()
 
+@app.get("/api/monitoring/traces")
+async def get_traces():
+    """List exported per-generation traces (newest first)"""
+    return {"traces": list_traces()}
+
+@app.get("/api/monitoring/traces/{trace_id}")
+async def get_trace(trace_id: str):
+    """Get one generation timeline (spans with start offset, duration, depth)"""
+    trace = load_trace(trace_id)
+    if trace is None:
+        raise HTTPException(status_code=404, detail="Trace not found")
+    return trace
+
 @app.get("/api/monitoring/export")
 async def export_monitoring_data():
     """Export all monitoring data as JSON file"""
@@ -2,27 +2,44 @@
 GenLaravel Project Monitoring Data
 Auto-records Issue Log, Change Log, Task Monitoring, and Vendor Monitoring
 from REAL system activity - NO SIMULATION DATA
+
+Nothing touches disk at import: the data file (and backend/data/) is
+created by the first save.
+
+Writers run concurrently (pipeline worker threads log every LLM call), so
+each load-modify-save holds a module lock and saves replace the file
+atomically - a reader never sees a half-written file.
 """
 
+import copy
+import functools
 import json
 import os
+import threading
 from datetime import datetime
 from pathlib import Path
 import time
 
+try:
+    from backend.latency_sketch import record_sample, summarize_series
+except ImportError:
+    from latency_sketch import record_sample, summarize_series
+
+_lock = threading.RLock()
+
 # Data file path
 DATA_DIR = Path(__file__).parent / "data"
 DATA_FILE = DATA_DIR / "monitoring_data.json"
 
-# Ensure data directory exists
-DATA_DIR.mkdir(exist_ok=True)
-
 # Empty default data structure - NO SIMULATION
 DEFAULT_DATA = {
     "issue_log": [],
     "change_log": [],
     "task_monitoring": [],
     "vendor_monitoring": [],
+    "latency_sketches": {"provider": {}, "agent": {}},
+    "token_usage": {"agent": {}},
+    "job_usage": [],
     "generation_stats": {
         "total_generations": 0,
         "successful": 0,
@@ -42,14 +59,26 @@ def load_data():
             with open(DATA_FILE, 'r', encoding='utf-8') as f:
                 return json.load(f)
         except:
-            return DEFAULT_DATA.copy()
-    return DEFAULT_DATA.copy()
+            return copy.deepcopy(DEFAULT_DATA)
+    return copy.deepcopy(DEFAULT_DATA)
 
 
 def save_data(data):
-    """Save monitoring data to file"""
-    with open(DATA_FILE, 'w', encoding='utf-8') as f:
+    """Save monitoring data to file (temp file + rename)"""
+    DATA_FILE.parent.mkdir(parents=True, exist_ok=True)
+    tmp = DATA_FILE.with_name(f"{DATA_FILE.name}.{os.getpid()}.{threading.get_ident()}.tmp")
+    with open(tmp, 'w', encoding='utf-8') as f:
         json.dump(data, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, DATA_FILE)
+
+
+def _locked(func):
+    """Run a load → modify → save_data() under the module lock"""
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        with _lock:
+            return func(*args, **kwargs)
+    return wrapper
 
 
 def get_all_data():
@@ -61,6 +90,7 @@ def get_all_data():
 # 🐛 ISSUE LOG - Auto-recorded from errors
 # ============================================
 
+@_locked
 def log_issue(issue: str, severity: str = "Medium", source: str = "System", resolution: str = ""):
     """Auto-log issue when error occurs in system"""
     data = load_data()
@@ -80,6 +110,7 @@ def log_issue(issue: str, severity: str = "Medium", source: str = "System", reso
     return new_issue
 
 
+@_locked
 def resolve_issue(issue_id: int, resolution: str):
     """Mark issue as resolved"""
     data = load_data()
@@ -97,6 +128,7 @@ def resolve_issue(issue_id: int, resolution: str):
 # 📝 CHANGE LOG - Auto-recorded from system changes
 # ============================================
 
+@_locked
 def log_change(change_type: str, description: str, reason: str, impact: str = "Medium", source: str = "System"):
     """Auto-log change when system configuration changes"""
     data = load_data()
@@ -120,6 +152,7 @@ def log_change(change_type: str, description: str, reason: str, impact: str = "M
 # 📊 TASK MONITORING - Auto-updated from agent pipeline
 # ============================================
 
+@_locked
 def update_task_status(task_name: str, status: str, progress: int, pic: str = "System"):
     """Auto-update task status from agent pipeline"""
     data = load_data()
@@ -150,6 +183,7 @@ def update_task_status(task_name: str, status: str, progress: int, pic: str = "S
     return data['task_monitoring']
 
 
+@_locked
 def reset_all_tasks():
     """Reset all tasks to pending (called at start of generation)"""
     data = load_data()
@@ -163,9 +197,44 @@ def reset_all_tasks():
 # 🏢 VENDOR MONITORING - Auto-recorded from API calls
 # ============================================
 
-def log_vendor_call(vendor: str, service: str, response_time_ms: float, success: bool, error_msg: str = ""):
-    """Auto-log vendor API call performance"""
+def _add_token_usage(totals: dict, usage: dict):
+    totals['calls'] = totals.get('calls', 0) + 1
+    totals['prompt_tokens'] = totals.get('prompt_tokens', 0) + usage.get('prompt_tokens', 0)
+    totals['completion_tokens'] = totals.get('completion_tokens', 0) + usage.get('completion_tokens', 0)
+    totals['cost_usd'] = round(totals.get('cost_usd', 0.0) + usage.get('cost_usd', 0.0), 6)
+
+
+@_locked
+def log_vendor_call(vendor: str, service: str, response_time_ms: float, success: bool, error_msg: str = "",
+                    agent: str = None, usage: dict = None):
+    """
+    Auto-log vendor API call performance
+
+    Besides the running totals, successful calls feed streaming percentile
+    sketches (latency, time-to-first-token, tokens/sec) per provider and per
+    calling agent - see backend/latency_sketch.py. `usage` is the call's
+    accounting from agents/llm_usage.py (tokens, cost_usd, ttft_ms).
+    """
     data = load_data()
+    usage = usage or {}
+    ttft_ms = usage.get('ttft_ms')
+    output_tokens = usage.get('completion_tokens')
+    
+    # 📈 Percentile sketches (successful calls only - failures skew latency)
+    if success:
+        tokens_per_sec = None
+        if output_tokens:
+            generation_ms = response_time_ms - (ttft_ms or 0)
+            if generation_ms > 0:
+                tokens_per_sec = output_tokens / (generation_ms / 1000.0)
+        sketches = data.setdefault('latency_sketches', {"provider": {}, "agent": {}})
+        sample = {"latency_ms": response_time_ms, "ttft_ms": ttft_ms, "tokens_per_sec": tokens_per_sec}
+        record_sample(sketches.setdefault('provider', {}).setdefault(vendor, {}), **sample)
+        if agent:
+            record_sample(sketches.setdefault('agent', {}).setdefault(agent, {}), **sample)
+            if usage:
+                token_usage = data.setdefault('token_usage', {"agent": {}})
+                _add_token_usage(token_usage['agent'].setdefault(agent, {}), usage)
     
     # Find existing vendor or create new
     vendor_found = False
@@ -188,15 +257,13 @@ def log_vendor_call(vendor: str, service: str, response_time_ms: float, success:
             if not success:
                 v['last_error'] = error_msg
             
-            # Calculate SLA met (assuming SLA is < 5000ms)
-            v['sla_met'] = v['avg_response_ms'] < 5000
             v['quality_score'] = int((v['successful_calls'] / v['total_calls']) * 100) if v['total_calls'] > 0 else 0
             
             vendor_found = True
             break
     
     if not vendor_found:
-        new_vendor = {
+        v = {
             "id": len(data['vendor_monitoring']) + 1,
             "vendor": vendor,
             "service": service,
@@ -208,21 +275,80 @@ def log_vendor_call(vendor: str, service: str, response_time_ms: float, success:
             "last_response_ms": response_time_ms,
             "last_success": success,
             "sla_target_ms": 5000,
-            "sla_met": response_time_ms < 5000,
             "quality_score": 100 if success else 0
         }
         if not success:
-            new_vendor['last_error'] = error_msg
-        data['vendor_monitoring'].append(new_vendor)
+            v['last_error'] = error_msg
+        data['vendor_monitoring'].append(v)
+    
+    if usage:
+        v['total_prompt_tokens'] = v.get('total_prompt_tokens', 0) + usage.get('prompt_tokens', 0)
+        v['total_completion_tokens'] = v.get('total_completion_tokens', 0) + usage.get('completion_tokens', 0)
+        v['total_cost_usd'] = round(v.get('total_cost_usd', 0.0) + usage.get('cost_usd', 0.0), 6)
+    
+    # SLA is judged on tail latency (p90 over the last hour), not the mean
+    latency = summarize_series(
+        data.get('latency_sketches', {}).get('provider', {}).get(vendor, {}), windows=("1h",)
+    )["1h"]["latency_ms"]
+    v['p50_ms'] = latency['p50']
+    v['p90_ms'] = latency['p90']
+    v['p99_ms'] = latency['p99']
+    tail_ms = latency['p90'] if latency['p90'] is not None else v['avg_response_ms']
+    v['sla_met'] = tail_ms < v.get('sla_target_ms', 5000)
     
     save_data(data)
     return data['vendor_monitoring']
 
 
+def get_latency_summary(window: str = None):
+    """Percentile summaries per provider and per agent (all windows, or one)"""
+    data = load_data()
+    sketches = data.get('latency_sketches', {})
+    windows = (window,) if window else ("5m", "1h", "24h", "all")
+    return {
+        group: {name: summarize_series(series, windows=windows) for name, series in sketches.get(group, {}).items()}
+        for group in ("provider", "agent")
+    }
+
+
+@_locked
+def record_job_usage(mode: str, trace_id: str, usage: dict, keep: int = 100):
+    """Store token usage / cost of one generation job (last `keep` jobs)"""
+    data = load_data()
+    jobs = data.setdefault('job_usage', [])
+    jobs.append({
+        "trace_id": trace_id,
+        "mode": mode,
+        "date": datetime.now().strftime('%Y-%m-%d %H:%M:%S'),
+        **usage,
+    })
+    data['job_usage'] = jobs[-keep:]
+    save_data(data)
+    return data['job_usage']
+
+
+def get_token_usage():
+    """Token usage and cost per agent, per vendor and per recent job"""
+    data = load_data()
+    return {
+        "agent": data.get('token_usage', {}).get('agent', {}),
+        "vendor": {
+            v['vendor']: {
+                "prompt_tokens": v.get('total_prompt_tokens', 0),
+                "completion_tokens": v.get('total_completion_tokens', 0),
+                "cost_usd": v.get('total_cost_usd', 0.0),
+            }
+            for v in data['vendor_monitoring']
+        },
+        "jobs": data.get('job_usage', []),
+    }
+
+
 # ============================================
 # 📈 GENERATION STATS - Auto-recorded
 # ============================================
 
+@_locked
 def record_generation(mode: str, success: bool, duration: float):
     """Record generation statistics"""
     data = load_data()
@@ -255,9 +381,10 @@ def record_generation(mode: str, success: bool, duration: float):
 # 🔧 UTILITY FUNCTIONS
 # ============================================
 
+@_locked
 def clear_all_data():
     """Clear all monitoring data (for testing)"""
-    save_data(DEFAULT_DATA.copy())
+    save_data(copy.deepcopy(DEFAULT_DATA))
     print("🗑️ All monitoring data cleared")
 
 
@@ -274,7 +401,3 @@ def get_summary():
         "generation_stats": data['generation_stats']
     }
 
-
-# Initialize empty data file if not exists
-if not DATA_FILE.exists():
-    save_data(DEFAULT_DATA)
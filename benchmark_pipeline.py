@@ -0,0 +1,387 @@
+"""
+GenLaravel Offline Benchmark
+Runs the multi-page pipeline against the deterministic stub LLM provider
+(agents/llm_stub.py) and reports per-agent wall time, CPU time, LLM call
+counts and prompt/response bytes. No API keys or network needed.
+
+Usage:
+    python benchmark_pipeline.py                         # CLI flow (main_multi_page)
+    python benchmark_pipeline.py --websocket             # /ws/generate/multi end-to-end
+    python benchmark_pipeline.py --responses rec.jsonl --latency-ms 200 --tokens-per-sec 800
+    python benchmark_pipeline.py --json current.json --baseline baseline.json --threshold 1.2
+    python benchmark_pipeline.py --memory                # + peak Python memory (tracemalloc)
+    python benchmark_pipeline.py --speculative --review-s 3   # build while the draft is reviewed
+
+The run happens in a scratch copy of my-laravel/ so the real project,
+output/ and monitoring data are left untouched.
+"""
+
+import argparse
+import builtins
+import json
+import os
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent
+
+# (module, function) pairs timed as "agents"
+AGENT_TARGETS = [
+    ("agents.a_prompt_expander", "prompt_expander"),
+    ("agents.b_draft_agent_v2", "draft_agent_multi"),
+    ("agents.c_prompt_planner_v2", "plan_prompt_multi"),
+    ("agents.d_page_architect", "design_layout"),
+    ("agents.h_component_agent", "list_components"),
+    ("agents.f_ui_generator", "generate_blade"),
+    ("agents.e_generate_layout_app", "generate_layout_app"),
+    ("agents.g_route_agent_v2", "generate_routes_multi"),
+    ("agents.i_validator_agent", "validate_with_reason"),
+    ("agents.i_validator_agent", "auto_fix"),
+    ("agents.j_move_to_project", "move_to_laravel_project"),
+    ("agents.k_validator_agent_v2", "validate_all_with_llm"),
+]
+
+DEFAULT_PROMPT = "Company profile website with 2 pages: home and about"
+
+
+class AgentTimer:
+    """Collects wall/CPU time per agent function (thread-safe)"""
+
+    def __init__(self):
+        self.results = {}
+        self._lock = threading.Lock()
+
+    def wrap(self, name, func):
+        def timed(*args, **kwargs):
+            wall_start = time.perf_counter()
+            cpu_start = time.thread_time()
+            try:
+                return func(*args, **kwargs)
+            finally:
+                wall = time.perf_counter() - wall_start
+                cpu = time.thread_time() - cpu_start
+                with self._lock:
+                    entry = self.results.setdefault(name, {"runs": 0, "wall_s": 0.0, "cpu_s": 0.0})
+                    entry["runs"] += 1
+                    entry["wall_s"] += wall
+                    entry["cpu_s"] += cpu
+        timed.__wrapped__ = func
+        return timed
+
+
+def prepare_workspace() -> Path:
+    """Create a scratch directory with the parts of my-laravel the pipeline writes to"""
+    workspace = Path(tempfile.mkdtemp(prefix="genlaravel-bench-"))
+    for sub in ("routes", "resources"):
+        src = REPO_ROOT / "my-laravel" / sub
+        if src.exists():
+            shutil.copytree(src, workspace / "my-laravel" / sub)
+    return workspace
+
+
+def install_stub(args):
+    """Configure ENV so LLMClient starts in offline mode, then return the stub"""
+    os.environ["LLM_STUB"] = "1"
+    if args.responses:
+        os.environ["LLM_STUB_RESPONSES"] = args.responses
+    os.environ["LLM_STUB_LATENCY_MS"] = str(args.latency_ms)
+    os.environ["LLM_STUB_TOKENS_PER_SEC"] = str(args.tokens_per_sec)
+
+    from agents.llm_client import get_llm_client
+    from agents.llm_stub import StubProvider
+
+    llm_client = get_llm_client()
+    if llm_client.stub_provider is None:
+        llm_client.use_stub(StubProvider.from_env())
+    return llm_client.stub_provider
+
+
+def isolate_monitoring(workspace: Path):
+    """Point monitoring writes at the scratch workspace"""
+    try:
+        import backend.monitoring_data as monitoring
+    except ImportError:
+        return
+    monitoring.DATA_DIR = workspace / "monitoring"
+    monitoring.DATA_DIR.mkdir(exist_ok=True)
+    monitoring.DATA_FILE = monitoring.DATA_DIR / "monitoring_data.json"
+
+    import utils.tracing as tracing
+    tracing.TRACE_DIR = workspace / "monitoring" / "traces"
+
+
+def patch_agents(timer: AgentTimer, consumers):
+    """Wrap every agent entry point, both in its module and where it was imported"""
+    import importlib
+
+    for module_name, func_name in AGENT_TARGETS:
+        module = importlib.import_module(module_name)
+        original = getattr(module, func_name)
+        wrapped = timer.wrap(func_name, original)
+        setattr(module, func_name, wrapped)
+        for consumer in consumers:
+            if getattr(consumer, func_name, None) is original:
+                setattr(consumer, func_name, wrapped)
+
+
+def run_cli(prompt: str, timer: AgentTimer, review_s: float = 0.0):
+    """Drive main_multi_page.main() with scripted input (confirming after `review_s`)"""
+    import webbrowser
+    import main_multi_page
+    import agents.multi_page_pipeline as multi_page_pipeline
+    import agents.generation_engine as generation_engine
+
+    patch_agents(timer, [main_multi_page, generation_engine, multi_page_pipeline])
+
+    answers = iter([prompt, "y"])
+    confirmed_at = [0.0]
+
+    def scripted_input(*_):
+        answer = next(answers)
+        if answer == "y":
+            time.sleep(review_s)
+            confirmed_at[0] = time.perf_counter()
+        return answer
+
+    original_input = builtins.input
+    original_open = webbrowser.open
+    builtins.input = scripted_input
+    webbrowser.open = lambda *_args, **_kwargs: True
+    try:
+        main_multi_page.main()
+    finally:
+        builtins.input = original_input
+        webbrowser.open = original_open
+    return {"confirm_wall_s": round(time.perf_counter() - confirmed_at[0], 4)}
+
+
+def run_websocket(prompt: str, timer: AgentTimer, review_s: float = 0.0):
+    """Drive /ws/generate/multi end-to-end through FastAPI's test client (approving after `review_s`)"""
+    from fastapi.testclient import TestClient
+    from starlette.websockets import WebSocketDisconnect
+    import backend.main as backend
+    import agents.multi_page_pipeline as multi_page_pipeline
+    import agents.generation_engine as generation_engine
+
+    patch_agents(timer, [backend, generation_engine, multi_page_pipeline])
+
+    messages = {}
+    phase_started = {}
+    phase_times = {}
+    usage = {}
+    approved_at = 0.0
+    confirm_wall_s = 0.0
+    with TestClient(backend.app) as client:
+        with client.websocket_connect("/ws/generate/multi") as ws:
+            ws.send_json({"prompt": prompt})
+            while True:
+                try:
+                    message = ws.receive_json()
+                except WebSocketDisconnect:
+                    break
+                msg_type = message.get("type")
+                messages[msg_type] = messages.get(msg_type, 0) + 1
+                if msg_type == "agent_start":
+                    phase_started[message["agent_id"]] = time.perf_counter()
+                elif msg_type == "agent_complete" and message["agent_id"] in phase_started:
+                    elapsed = time.perf_counter() - phase_started.pop(message["agent_id"])
+                    phase_times[message["agent_id"]] = phase_times.get(message["agent_id"], 0.0) + elapsed
+                elif msg_type == "draft_ready":
+                    time.sleep(review_s)
+                    approved_at = time.perf_counter()
+                    ws.send_json({"action": "approve"})
+                elif msg_type in ("complete", "error", "cancelled"):
+                    usage = message.get("usage", {})
+                    confirm_wall_s = time.perf_counter() - approved_at
+                    break
+    return {"messages": messages, "websocket_phase_wall_s": phase_times, "job_usage": usage,
+            "confirm_wall_s": round(confirm_wall_s, 4)}
+
+
+class ReadCounter:
+    """Counts files re-read from output/ (drafts, generated views) during the run"""
+
+    def __init__(self):
+        self.reads = 0
+        self.bytes = 0
+        self._open = builtins.open
+
+    def install(self):
+        counter = self
+
+        def counting_open(file, mode="r", *args, **kwargs):
+            handle = counter._open(file, mode, *args, **kwargs)
+            if "r" in mode and "+" not in mode and "output" in Path(str(file)).parts:
+                counter.reads += 1
+                try:
+                    counter.bytes += os.fstat(handle.fileno()).st_size
+                except (OSError, ValueError):
+                    pass
+            return handle
+
+        builtins.open = counting_open
+
+    def uninstall(self):
+        builtins.open = self._open
+
+
+def build_report(timer: AgentTimer, stub, wall_s: float, cpu_s: float, extra: dict) -> dict:
+    stub_stats = stub.stats()
+    agents = {}
+    for name in set(timer.results) | set(stub_stats["per_agent"]):
+        timing = timer.results.get(name, {"runs": 0, "wall_s": 0.0, "cpu_s": 0.0})
+        llm = stub_stats["per_agent"].get(name, {"calls": 0, "prompt_bytes": 0, "response_bytes": 0})
+        agents[name] = {
+            "runs": timing["runs"],
+            "wall_s": round(timing["wall_s"], 4),
+            "cpu_s": round(timing["cpu_s"], 4),
+            "llm_calls": llm["calls"],
+            "prompt_bytes": llm["prompt_bytes"],
+            "response_bytes": llm["response_bytes"],
+        }
+    report = {
+        "total": {
+            "wall_s": round(wall_s, 4),
+            "cpu_s": round(cpu_s, 4),
+            "llm_calls": stub_stats["total_calls"],
+            "prompt_bytes": stub_stats["prompt_bytes"],
+            "response_bytes": stub_stats["response_bytes"],
+        },
+        "agents": agents,
+    }
+    report.update(extra)
+    return report
+
+
+def print_report(report: dict):
+    print("\n" + "=" * 86)
+    print(f"{'AGENT':<26}{'RUNS':>6}{'WALL s':>10}{'CPU s':>10}{'LLM':>6}{'PROMPT B':>14}{'RESP B':>14}")
+    print("-" * 86)
+    for name, row in sorted(report["agents"].items(), key=lambda item: -item[1]["wall_s"]):
+        print(f"{name:<26}{row['runs']:>6}{row['wall_s']:>10.3f}{row['cpu_s']:>10.3f}"
+              f"{row['llm_calls']:>6}{row['prompt_bytes']:>14,}{row['response_bytes']:>14,}")
+    total = report["total"]
+    print("-" * 86)
+    print(f"{'TOTAL':<26}{'':>6}{total['wall_s']:>10.3f}{total['cpu_s']:>10.3f}"
+          f"{total['llm_calls']:>6}{total['prompt_bytes']:>14,}{total['response_bytes']:>14,}")
+    if "output_reads" in report:
+        peak = f", peak Python memory {report['peak_memory_kb']:,} KB" if report.get("peak_memory_kb") else ""
+        print(f"📂 output/ re-reads: {report['output_reads']} files ({report['output_read_bytes']:,} B){peak}")
+    if "confirm_wall_s" in report:
+        print(f"⏱️  Confirm → done: {report['confirm_wall_s']:.3f}s"
+              f"{' (speculative build)' if report.get('speculative') else ''}")
+    usage = report.get("job_usage", {}).get("totals")
+    if usage:
+        print(f"💰 Job usage: {usage['prompt_tokens']:,} prompt + {usage['completion_tokens']:,} completion tokens"
+              f" = ${usage['cost_usd']:.4f} ({usage['estimated_calls']}/{usage['calls']} calls estimated)")
+    print("=" * 86)
+
+
+def compare_baseline(report: dict, baseline: dict, threshold: float, floor_s: float = 0.05) -> list:
+    """Return human-readable regressions (wall time above baseline * threshold)"""
+    regressions = []
+    pairs = [("TOTAL", report["total"], baseline.get("total", {}))]
+    pairs += [(name, row, baseline.get("agents", {}).get(name, {})) for name, row in report["agents"].items()]
+    for name, current, base in pairs:
+        for metric in ("wall_s", "cpu_s", "llm_calls", "prompt_bytes"):
+            if metric not in base:
+                continue
+            limit = base[metric] * threshold
+            if metric.endswith("_s"):
+                limit += floor_s
+            if current[metric] > limit:
+                regressions.append(f"{name}.{metric}: {current[metric]} > {base[metric]} (x{threshold})")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Offline GenLaravel pipeline benchmark (stub LLM)")
+    parser.add_argument("--prompt", help=f"Default: {DEFAULT_PROMPT!r} (or --pages N)")
+    parser.add_argument("--pages", type=int, default=2, help="Pages the stub drafts and plans")
+    parser.add_argument("--websocket", action="store_true", help="Benchmark /ws/generate/multi instead of the CLI flow")
+    parser.add_argument("--responses", help="JSON-lines recording to replay")
+    parser.add_argument("--latency-ms", type=float, default=0.0, help="Simulated latency per LLM call")
+    parser.add_argument("--tokens-per-sec", type=float, default=0.0, help="Simulated generation speed")
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--baseline", help="Compare against a previous --json report")
+    parser.add_argument("--threshold", type=float, default=1.2, help="Allowed slowdown factor vs baseline")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch workspace")
+    parser.add_argument("--memory", action="store_true", help="Track peak Python memory (tracemalloc, slower)")
+    parser.add_argument("--speculative", action="store_true", help="Build while the draft awaits confirmation")
+    parser.add_argument("--review-s", type=float, default=0.0, help="Simulated draft review time before confirming")
+    args = parser.parse_args()
+    if not args.prompt:
+        args.prompt = DEFAULT_PROMPT if args.pages == 2 else f"Company profile website with {args.pages} pages"
+    os.environ["LLM_STUB_PAGES"] = str(args.pages)
+    if args.responses:
+        args.responses = str(Path(args.responses).resolve())
+    original_cwd = os.getcwd()
+
+    sys.path.insert(0, str(REPO_ROOT))
+    sys.path.insert(0, str(REPO_ROOT / "utils"))
+
+    workspace = prepare_workspace()
+    os.chdir(workspace)
+    print(f"🧪 Benchmark workspace: {workspace}")
+
+    stub = install_stub(args)
+    os.environ["SPECULATIVE_BUILD"] = "true" if args.speculative else "false"
+    isolate_monitoring(workspace)
+    from utils import progress
+    progress.set_sink(progress.NullSink())
+    timer = AgentTimer()
+
+    reads = ReadCounter()
+    reads.install()
+    if args.memory:
+        import tracemalloc
+        tracemalloc.start()
+
+    wall_start = time.perf_counter()
+    cpu_start = time.process_time()
+    try:
+        run = run_websocket if args.websocket else run_cli
+        extra = run(args.prompt, timer, args.review_s)
+    finally:
+        wall_s = time.perf_counter() - wall_start
+        cpu_s = time.process_time() - cpu_start
+        reads.uninstall()
+        peak_memory_kb = tracemalloc.get_traced_memory()[1] // 1024 if args.memory else 0
+        if args.memory:
+            tracemalloc.stop()
+        os.chdir(original_cwd)
+        if not args.keep:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+    extra.update({"output_reads": reads.reads, "output_read_bytes": reads.bytes})
+    if peak_memory_kb:
+        extra["peak_memory_kb"] = peak_memory_kb
+    report = build_report(timer, stub, wall_s, cpu_s, extra)
+    report["mode"] = "websocket" if args.websocket else "cli"
+    report["speculative"] = args.speculative
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"📁 Report saved: {args.json}")
+
+    if args.baseline:
+        with open(args.baseline, "r", encoding="utf-8") as f:
+            baseline = json.load(f)
+        regressions = compare_baseline(report, baseline, args.threshold)
+        if regressions:
+            print("\n❌ Performance regressions detected:")
+            for line in regressions:
+                print(f"   • {line}")
+            return 1
+        print("\n✅ No regressions against baseline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
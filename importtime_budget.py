@@ -0,0 +1,106 @@
+"""
+GenLaravel Import-Time Budget
+Measures the cold import of every entry point with `python -X importtime`
+(one fresh interpreter per module) and fails when one exceeds the budget
+or pulls in a provider SDK at import (SDKs load with the first LLM call,
+see agents/llm_client.py).
+
+Usage:
+    python importtime_budget.py                          # all entry points, 1000 ms budget
+    python importtime_budget.py --budget-ms 500 --runs 5
+    python importtime_budget.py --module backend.main --top 10
+
+Exit code 1 when a module is over budget or imports a provider SDK.
+"""
+
+import argparse
+import json
+import os
+import re
+import subprocess
+import sys
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent
+
+ENTRY_POINTS = [
+    "backend.main",          # uvicorn workers
+    "main_multi_page",       # CLI
+    "main_single_page",      # CLI
+    "agents.generation_engine",
+]
+
+# Must not be imported before the first LLM call
+LAZY_MODULES = ["cerebras.cloud.sdk", "mistralai", "requests"]
+
+LINE_RE = re.compile(r"^import time:\s*(\d+)\s*\|\s*(\d+)\s*\|( *)(\S+)\s*$")
+
+
+def measure(module: str) -> dict:
+    """One cold import: {"total_ms", "modules": {name: (self_us, cumulative_us, depth)}}"""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        cwd=REPO_ROOT, capture_output=True, text=True,
+        env={**os.environ, "PYTHONDONTWRITEBYTECODE": "1"},
+    )
+    if result.returncode != 0:
+        raise RuntimeError(f"import {module} failed:\n{result.stderr[-1500:]}")
+
+    modules = {}
+    for line in result.stderr.splitlines():
+        match = LINE_RE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            modules[name] = (int(self_us), int(cumulative_us), len(indent) // 2)
+    if module not in modules:
+        raise RuntimeError(f"no importtime line for {module}")
+    return {"total_ms": modules[module][1] / 1000, "modules": modules}
+
+
+def heaviest(modules: dict, module: str, top: int) -> list:
+    """Biggest direct and indirect imports of `module` (by cumulative time)"""
+    others = [(name, cumulative) for name, (_, cumulative, depth) in modules.items()
+              if name != module and depth >= 1]
+    return sorted(others, key=lambda item: -item[1])[:top]
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Cold import-time budget for GenLaravel entry points")
+    parser.add_argument("--module", action="append", help="Module to measure (repeatable, default: all entry points)")
+    parser.add_argument("--budget-ms", type=float, default=1000.0, help="Max cold import time per module")
+    parser.add_argument("--runs", type=int, default=3, help="Imports per module (the fastest counts)")
+    parser.add_argument("--top", type=int, default=5, help="Heaviest imports shown per module")
+    parser.add_argument("--json", help="Write the results to this file")
+    args = parser.parse_args()
+
+    failed = False
+    report = {}
+    print(f"{'MODULE':<28}{'IMPORT ms':>12}{'BUDGET ms':>12}  HEAVIEST")
+    print("-" * 86)
+    for module in args.module or ENTRY_POINTS:
+        runs = [measure(module) for _ in range(max(1, args.runs))]
+        best = min(runs, key=lambda run: run["total_ms"])
+        lazy = [name for name in LAZY_MODULES if name in best["modules"]]
+        over = best["total_ms"] > args.budget_ms
+        failed = failed or over or bool(lazy)
+
+        top = heaviest(best["modules"], module, args.top)
+        status = "❌" if over or lazy else "✅"
+        print(f"{status} {module:<26}{best['total_ms']:>12.1f}{args.budget_ms:>12.0f}  "
+              + ", ".join(f"{name} {cumulative / 1000:.0f}" for name, cumulative in top[:3]))
+        if lazy:
+            print(f"   ⚠️ imported at startup (should load on first LLM call): {', '.join(lazy)}")
+        report[module] = {"import_ms": round(best["total_ms"], 1), "eager_sdks": lazy,
+                          "heaviest": [{"module": name, "ms": round(c / 1000, 1)} for name, c in top]}
+    print("-" * 86)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump({"budget_ms": args.budget_ms, "modules": report}, f, indent=2)
+        print(f"📄 Results written to {args.json}")
+    print("❌ Import-time budget exceeded" if failed else "✅ All entry points within budget")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
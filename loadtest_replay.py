@@ -0,0 +1,265 @@
+"""
+GenLaravel Load Test Replayer
+Replays a recorded LLM traffic log (LLM_RECORD_PATH, see agents/llm_recorder.py)
+against the backend: M simulated users each replay the recorded job arrivals
+at N× speed over /ws/generate, auto-approving drafts, while the LLM is served
+by the stub provider from the same recording (recorded latencies / N).
+
+Usage:
+    # 1. Record real traffic
+    LLM_RECORD_PATH=recordings/llm.jsonl python backend/main.py
+
+    # 2. Replay 4 users at 10x speed against an in-process backend (offline)
+    python loadtest_replay.py recordings/llm.jsonl --users 4 --speed 10
+
+    # Or drive an already running backend (start it with LLM_STUB_RESPONSES,
+    # LLM_STUB_REPLAY_TIMING=true and LLM_STUB_SPEED to keep it offline)
+    python loadtest_replay.py recordings/llm.jsonl --url ws://localhost:8080 --users 4
+
+The in-process backend runs in a scratch copy of my-laravel/ so the real
+project, output/ and monitoring data are left untouched.
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parent
+sys.path.insert(0, str(REPO_ROOT))
+
+from agents.llm_recorder import read_log
+
+BUSY_MESSAGE = "already in progress"
+
+
+def load_jobs(path: str, mode_override: str = None, limit: int = 0) -> list:
+    """Job arrivals from a recording as [{"offset_s", "prompt", "mode"}]"""
+    markers = [r for r in read_log(path) if r.get("event") == "job" and r.get("prompt")]
+    if limit:
+        markers = markers[:limit]
+    if not markers:
+        return []
+    first_ts = markers[0]["ts"]
+    return [{
+        "offset_s": marker["ts"] - first_ts,
+        "prompt": marker["prompt"],
+        "mode": mode_override or marker.get("mode", "multi"),
+    } for marker in markers]
+
+
+def percentile(values: list, pct: float) -> float:
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    index = min(len(ordered) - 1, max(0, int(round(pct / 100.0 * (len(ordered) - 1)))))
+    return ordered[index]
+
+
+def start_backend(args) -> tuple:
+    """Run backend.main:app with the stub provider in a background thread"""
+    from benchmark_pipeline import prepare_workspace, isolate_monitoring
+
+    os.environ["LLM_STUB_RESPONSES"] = args.recording
+    os.environ["LLM_STUB_REPLAY_TIMING"] = "true"
+    os.environ["LLM_STUB_SPEED"] = str(args.speed)
+    os.environ.pop("LLM_RECORD_PATH", None)
+
+    workspace = prepare_workspace()
+    os.chdir(workspace)
+    isolate_monitoring(workspace)
+
+    import uvicorn
+    import backend.main as backend
+
+    config = uvicorn.Config(backend.app, host="127.0.0.1", port=args.port, log_level="warning")
+    server = uvicorn.Server(config)
+    thread = threading.Thread(target=server.run, daemon=True)
+    thread.start()
+
+    deadline = time.time() + 30
+    while not server.started and time.time() < deadline:
+        time.sleep(0.05)
+    if not server.started:
+        raise RuntimeError("Backend did not start within 30s")
+    print(f"🧪 In-process backend on port {args.port} (workspace: {workspace})")
+    return server, thread, workspace
+
+
+async def run_job(url: str, job: dict, args) -> dict:
+    """One generation as a user would do it; retries while the backend is busy"""
+    import websockets
+
+    result = {"mode": job["mode"], "ok": False, "rejections": 0, "error": ""}
+    submitted = time.perf_counter()
+    deadline = submitted + args.timeout
+
+    while time.perf_counter() < deadline:
+        try:
+            async with websockets.connect(f"{url}/ws/generate", max_size=None, open_timeout=10) as ws:
+                await ws.send(json.dumps({"prompt": job["prompt"], "mode": job["mode"]}))
+                accepted_at = None
+                while True:
+                    remaining = deadline - time.perf_counter()
+                    if remaining <= 0:
+                        result["error"] = "timeout"
+                        return result
+                    message = json.loads(await asyncio.wait_for(ws.recv(), timeout=remaining))
+                    msg_type = message.get("type")
+
+                    if msg_type == "error" and accepted_at is None and BUSY_MESSAGE in message.get("message", ""):
+                        result["rejections"] += 1
+                        break
+                    if msg_type == "start":
+                        accepted_at = time.perf_counter()
+                        result["wait_s"] = accepted_at - submitted
+                    elif msg_type == "draft_ready":
+                        result["draft_s"] = time.perf_counter() - submitted
+                        await ws.send(json.dumps({"action": "approve"}))
+                    elif msg_type == "complete":
+                        result["ok"] = True
+                        result["total_s"] = time.perf_counter() - submitted
+                        return result
+                    elif msg_type in ("error", "cancelled"):
+                        result["error"] = message.get("message", msg_type)[:200]
+                        return result
+        except asyncio.TimeoutError:
+            result["error"] = "timeout"
+            return result
+        except (OSError, websockets.exceptions.WebSocketException) as e:
+            result["error"] = f"connection: {e}"[:200]
+            return result
+
+        await asyncio.sleep(args.retry_interval)
+
+    result["error"] = "timeout"
+    return result
+
+
+async def simulated_user(user_id: int, url: str, jobs: list, args, started: float, results: list):
+    """Replay the recorded arrivals; a user never has two jobs in flight"""
+    stagger = user_id * args.stagger
+    for job in jobs:
+        due = started + stagger + job["offset_s"] / args.speed
+        delay = due - time.perf_counter()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        result = await run_job(url, job, args)
+        result["user"] = user_id
+        results.append(result)
+        status = "✅" if result["ok"] else "❌"
+        print(f"{status} user {user_id} {job['mode']:<6} total={result.get('total_s', 0):.2f}s "
+              f"rejections={result['rejections']} {result['error']}")
+
+
+async def replay(url: str, jobs: list, args) -> tuple:
+    results = []
+    started = time.perf_counter()
+    await asyncio.gather(*[
+        simulated_user(user_id, url, jobs, args, started, results)
+        for user_id in range(args.users)
+    ])
+    return results, time.perf_counter() - started
+
+
+def build_report(results: list, wall_s: float, args, stub=None) -> dict:
+    ok = [r for r in results if r["ok"]]
+    totals = [r["total_s"] for r in ok]
+    waits = [r["wait_s"] for r in results if "wait_s" in r]
+    report = {
+        "users": args.users,
+        "speed": args.speed,
+        "jobs": len(results),
+        "completed": len(ok),
+        "failed": len(results) - len(ok),
+        "rejections": sum(r["rejections"] for r in results),
+        "wall_s": round(wall_s, 3),
+        "throughput_jobs_per_min": round(len(ok) / wall_s * 60, 2) if wall_s else 0.0,
+        "total_s": {p: round(percentile(totals, v), 3) for p, v in (("p50", 50), ("p90", 90), ("p99", 99), ("max", 100))},
+        "wait_s": {p: round(percentile(waits, v), 3) for p, v in (("p50", 50), ("p90", 90), ("p99", 99), ("max", 100))},
+        "errors": sorted({r["error"] for r in results if r["error"]}),
+    }
+    if stub is not None:
+        stats = stub.stats()
+        report["llm_calls"] = stats["total_calls"]
+        report["llm_replayed"] = sum(a["hits"] for a in stats["per_agent"].values())
+    return report
+
+
+def print_report(report: dict):
+    print("\n" + "=" * 60)
+    print(f"👥 Users: {report['users']}   ⏩ Speed: {report['speed']}x   ⏱️ Wall: {report['wall_s']:.1f}s")
+    print(f"✅ Completed: {report['completed']}/{report['jobs']}   ❌ Failed: {report['failed']}"
+          f"   🚫 Busy rejections: {report['rejections']}")
+    print(f"📈 Throughput: {report['throughput_jobs_per_min']} jobs/min")
+    for label in ("total_s", "wait_s"):
+        row = report[label]
+        print(f"   {label:<8} p50={row['p50']:.2f}  p90={row['p90']:.2f}  p99={row['p99']:.2f}  max={row['max']:.2f}")
+    if "llm_calls" in report:
+        print(f"🧪 LLM calls: {report['llm_calls']} ({report['llm_replayed']} replayed from recording)")
+    for error in report["errors"]:
+        print(f"   • {error}")
+    print("=" * 60)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replay recorded GenLaravel traffic as a load test")
+    parser.add_argument("recording", help="Log written with LLM_RECORD_PATH (.jsonl or .jsonl.gz)")
+    parser.add_argument("--users", type=int, default=1, help="Concurrent simulated users (M)")
+    parser.add_argument("--speed", type=float, default=1.0, help="Replay speed-up factor (N)")
+    parser.add_argument("--url", help="Running backend (ws://host:port); default starts one in-process")
+    parser.add_argument("--port", type=int, default=8765, help="Port for the in-process backend")
+    parser.add_argument("--mode", choices=["single", "multi"], help="Override the recorded mode")
+    parser.add_argument("--limit", type=int, default=0, help="Only replay the first N recorded jobs")
+    parser.add_argument("--stagger", type=float, default=0.0, help="Seconds between user start times")
+    parser.add_argument("--retry-interval", type=float, default=1.0, help="Seconds between retries when busy")
+    parser.add_argument("--timeout", type=float, default=900.0, help="Give up on a job after this many seconds")
+    parser.add_argument("--json", help="Write the report to this file")
+    parser.add_argument("--keep", action="store_true", help="Keep the scratch workspace")
+    args = parser.parse_args()
+    args.recording = str(Path(args.recording).resolve())
+    if args.speed <= 0:
+        parser.error("--speed must be > 0")
+
+    jobs = load_jobs(args.recording, args.mode, args.limit)
+    if not jobs:
+        print("❌ No job markers in recording (record with the backend running and LLM_RECORD_PATH set)")
+        return 1
+    print(f"📼 {len(jobs)} recorded jobs × {args.users} users at {args.speed}x")
+
+    original_cwd = os.getcwd()
+    server = workspace = stub = None
+    url = args.url
+    if not url:
+        server, thread, workspace = start_backend(args)
+        from agents.llm_client import get_llm_client
+        stub = get_llm_client().stub_provider
+        url = f"ws://127.0.0.1:{args.port}"
+
+    try:
+        results, wall_s = asyncio.run(replay(url.rstrip("/"), jobs, args))
+    finally:
+        if server is not None:
+            server.should_exit = True
+            thread.join(timeout=10)
+        os.chdir(original_cwd)
+        if workspace and not args.keep:
+            shutil.rmtree(workspace, ignore_errors=True)
+
+    report = build_report(results, wall_s, args, stub)
+    print_report(report)
+
+    if args.json:
+        with open(args.json, "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+        print(f"📁 Report saved: {args.json}")
+    return 0 if report["failed"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
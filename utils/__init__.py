@@ -2,6 +2,11 @@
 GenLaravel Utility Functions
 """
 
+# .env first: utils modules (and agents importing them) read ENV defaults at import
+from .config import load_env
+
+load_env()
+
 from .utils_clean import (
     clean_laravel_generated_files,
     reset_routes,
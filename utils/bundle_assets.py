@@ -0,0 +1,505 @@
+"""
+Bundle Layout CSS/JS into Hashed Public Assets
+Final build step for generated Laravel views:
+
+1. Collect inline <style>/<script> blocks from the layout, pages and components
+2. Dedupe them by a normalized hash (comments/whitespace/formatting ignored;
+   blocks contained in another block are dropped too)
+3. Tree-shake CSS rules whose classes are never used in the Blade views or JS
+4. Minify and write public/assets/app.<hash>.css (all views) and one
+   <view>.<hash>.js per view with scripts (app.<hash>.js for the layout)
+5. Replace the inline blocks with <link>/<script src defer> tags: the CSS
+   and the layout script in the layout, a view's script where its first
+   inline block was
+
+Scripts stay per view so they keep their inline semantics: a page or
+component script only runs where that view is rendered, and a script that
+fails (a redeclared `const`, an exception) only takes itself down, not the
+scripts of every other view. Deferred scripts run in document order, so
+page/component scripts still run before the layout's end-of-body script.
+
+@apply rules are compiled to pure CSS (utils/convert_apply_to_css.py), so
+<style type="text/tailwindcss"> blocks are bundled too unless they need the
+CDN's runtime compiler (theme(), @layer, unknown classes). Other blocks that
+must stay inline are left alone: Blade expressions ({{ }}, @json), non-JS
+<script type=...> and the Tailwind CDN config (it has to run before the CDN
+script scans the page).
+
+ENV variables (optional):
+- ASSET_BUNDLER=true   Set false to keep inline CSS/JS in the layout
+
+Usage:
+    python utils/bundle_assets.py [laravel_path]
+"""
+
+import hashlib
+import json
+import re
+from pathlib import Path
+from typing import Optional
+
+try:
+    from utils.class_usage import ClassIndex, selector_classes
+    from utils.config import settings
+    from utils.convert_apply_to_css import compile_stylesheet, compile_tailwind_css
+except ImportError:
+    from class_usage import ClassIndex, selector_classes
+    from config import settings
+    from convert_apply_to_css import compile_stylesheet, compile_tailwind_css
+
+ASSET_DIR = "assets"
+BUNDLE_NAME = "app"
+JS_TYPES = ("", "text/javascript", "application/javascript", "module")
+
+STYLE_RE = re.compile(r"[ \t]*<style([^>]*)>(.*?)</style>[ \t]*\n?", re.DOTALL | re.IGNORECASE)
+SCRIPT_RE = re.compile(r"[ \t]*<script([^>]*)>(.*?)</script>[ \t]*\n?", re.DOTALL | re.IGNORECASE)
+BUNDLE_TAG_RE = re.compile(
+    rf"[ \t]*<(?:link[^>]*href|script[^>]*src)=\"{{{{\s*asset\('{ASSET_DIR}/[\w-]+\.[0-9a-f]+\.(?:css|js)'\)\s*}}}}\"[^>]*>(?:</script>)?[ \t]*\n?",
+    re.IGNORECASE,
+)
+SCRIPT_MARKER = "<!--bundle-script-->"
+
+
+def bundler_enabled() -> bool:
+    return settings().asset_bundler
+
+
+def _attr(attrs: str, name: str) -> str:
+    match = re.search(rf"\b{name}\s*=\s*[\"']([^\"']*)[\"']", attrs, re.IGNORECASE)
+    return match.group(1).strip().lower() if match else ""
+
+
+def _has_blade(code: str) -> bool:
+    return "{{" in code or "{!!" in code or "@json" in code or "@php" in code
+
+
+def _bundleable_style(attrs: str, css: str) -> Optional[str]:
+    """Pure CSS of a <style> block, None if it has to stay inline"""
+    if _has_blade(css):
+        return None
+    kind = _attr(attrs, "type")
+    if kind == "text/tailwindcss":
+        # Precompiled @apply rules; anything needing the CDN compiler stays inline
+        return compile_tailwind_css(css)
+    if kind not in ("", "text/css"):
+        return None
+    return compile_stylesheet(css)[0] if "@apply" in css else css
+
+
+def _bundleable_script(attrs: str, js: str) -> bool:
+    return (
+        not re.search(r"\bsrc\s*=", attrs, re.IGNORECASE)
+        and _attr(attrs, "type") in JS_TYPES
+        and "tailwind.config" not in js
+        and not _has_blade(js)
+        and bool(js.strip())
+    )
+
+
+# ============================================
+# 🗜️ JAVASCRIPT
+# ============================================
+
+_REGEX_PREFIX = set("(,=:[!&|?{};+-*%<>~^")
+_REGEX_KEYWORDS = ("return", "typeof", "case", "do", "else", "in", "of", "new", "delete", "void", "throw", "yield", "await")
+
+
+def _regex_allowed(out: list) -> bool:
+    text = "".join(out[-12:]).rstrip()
+    if not text:
+        return True
+    if text[-1] in _REGEX_PREFIX:
+        return True
+    return any(re.search(rf"(?:^|[^\w$]){kw}$", text) for kw in _REGEX_KEYWORDS)
+
+
+def minify_js(code: str) -> str:
+    """
+    Conservative minifier: drops comments, indentation and blank lines and
+    collapses spaces. Strings, template literals and regex literals are
+    copied verbatim; line breaks are kept so ASI behaves the same.
+    """
+    out = []
+    i, n = 0, len(code)
+    while i < n:
+        ch = code[i]
+        nxt = code[i + 1] if i + 1 < n else ""
+        if ch in "'\"`":
+            j = i + 1
+            while j < n and code[j] != ch:
+                j += 2 if code[j] == "\\" else 1
+            out.append(code[i:j + 1])
+            i = j + 1
+        elif ch == "/" and nxt == "/":
+            while i < n and code[i] != "\n":
+                i += 1
+        elif ch == "/" and nxt == "*":
+            end = code.find("*/", i + 2)
+            end = n if end == -1 else end + 2
+            out.append("\n" if "\n" in code[i:end] else " ")
+            i = end
+        elif ch == "/" and _regex_allowed(out):
+            j, in_class = i + 1, False
+            while j < n and code[j] != "\n":
+                if code[j] == "\\":
+                    j += 2
+                    continue
+                if code[j] == "[":
+                    in_class = True
+                elif code[j] == "]":
+                    in_class = False
+                elif code[j] == "/" and not in_class:
+                    break
+                j += 1
+            j += 1
+            while j < n and (code[j].isalnum()):
+                j += 1
+            out.append(code[i:j])
+            i = j
+        elif ch.isspace():
+            j = i
+            while j < n and code[j].isspace():
+                j += 1
+            out.append("\n" if "\n" in code[i:j] else " ")
+            i = j
+        else:
+            out.append(ch)
+            i += 1
+
+    # Drop spaces next to punctuation (never between "+ +" / "- -")
+    text = "".join(out)
+    lines = []
+    for line in text.split("\n"):
+        line = re.sub(r" ?([{}()\[\];,:=<>!&|?*%^~]) ?", r"\1", line) if not re.search(r"['\"`/]", line) else line.strip()
+        line = line.strip()
+        if line:
+            lines.append(line)
+    return "\n".join(lines)
+
+
+# ============================================
+# 🎨 CSS
+# ============================================
+
+def _strip_css_comments(css: str) -> str:
+    return re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+
+
+def _split_top(text: str, sep: str) -> list:
+    """Split on `sep` outside parentheses, brackets and strings"""
+    parts, depth, quote, start = [], 0, "", 0
+    for i, ch in enumerate(text):
+        if quote:
+            if ch == quote and text[i - 1] != "\\":
+                quote = ""
+        elif ch in "'\"":
+            quote = ch
+        elif ch in "([":
+            depth += 1
+        elif ch in ")]":
+            depth -= 1
+        elif ch == sep and depth == 0:
+            parts.append(text[start:i])
+            start = i + 1
+    parts.append(text[start:])
+    return parts
+
+
+def parse_css(css: str) -> list:
+    """
+    Minimal CSS parser:
+        ("rule", [selectors], [declarations])
+        ("block", "@media ...", children)      @media/@supports/@keyframes/...
+        ("decls", "@font-face", [declarations])
+        ("stmt", "@import ...")
+    """
+    css = _strip_css_comments(css)
+    nodes, i, n = [], 0, len(css)
+    while i < n:
+        brace = css.find("{", i)
+        semi = css.find(";", i)
+        if brace == -1 and semi == -1:
+            break
+        if semi != -1 and (brace == -1 or semi < brace) and css[i:semi].strip().startswith("@"):
+            nodes.append(("stmt", " ".join(css[i:semi].split())))
+            i = semi + 1
+            continue
+        if brace == -1:
+            break
+        prelude = " ".join(css[i:brace].split())
+        depth, j, quote = 1, brace + 1, ""
+        while j < n and depth:
+            ch = css[j]
+            if quote:
+                if ch == quote and css[j - 1] != "\\":
+                    quote = ""
+            elif ch in "'\"":
+                quote = ch
+            elif ch == "{":
+                depth += 1
+            elif ch == "}":
+                depth -= 1
+            j += 1
+        body = css[brace + 1:j - 1]
+        i = j
+        if not prelude:
+            continue
+        if prelude.startswith("@"):
+            if "{" in body:
+                nodes.append(("block", prelude, parse_css(body)))
+            else:
+                nodes.append(("decls", prelude, _declarations(body)))
+        else:
+            selectors = [" ".join(s.split()) for s in _split_top(prelude, ",") if s.strip()]
+            nodes.append(("rule", selectors, _declarations(body)))
+    return nodes
+
+
+def _declarations(body: str) -> list:
+    decls = []
+    for decl in _split_top(body, ";"):
+        if ":" not in decl:
+            continue
+        prop, value = decl.split(":", 1)
+        value = " ".join(value.split()).replace(" !important", "!important")
+        if prop.strip() and value:
+            decls.append(f"{prop.strip().lower()}:{value}")
+    return decls
+
+
+def _min_selector(selector: str) -> str:
+    return re.sub(r"\s*([>+~,])\s*", r"\1", selector)
+
+
+def render_css(nodes: list) -> str:
+    out = []
+    for node in nodes:
+        kind = node[0]
+        if kind == "stmt":
+            out.append(node[1] + ";")
+        elif kind == "rule":
+            out.append(",".join(_min_selector(s) for s in node[1]) + "{" + ";".join(node[2]) + "}")
+        elif kind == "decls":
+            out.append(node[1] + "{" + ";".join(node[2]) + "}")
+        else:
+            out.append(node[1] + "{" + render_css(node[2]) + "}")
+    return "".join(out)
+
+
+def _dedupe_css(nodes: list) -> list:
+    """Drop repeated rules (same selector + declarations), keeping the last one"""
+    seen, kept = set(), []
+    for node in reversed(nodes):
+        if node[0] == "block":
+            node = ("block", node[1], _dedupe_css(node[2]))
+        key = render_css([node])
+        if key in seen:
+            continue
+        seen.add(key)
+        kept.append(node)
+    return list(reversed(kept))
+
+
+def _keyframe_names(nodes: list) -> set:
+    names = set()
+    for node in nodes:
+        if node[0] in ("rule", "decls"):
+            for decl in node[2]:
+                prop, value = decl.split(":", 1)
+                if prop in ("animation", "animation-name"):
+                    names.update(re.findall(r"[\w-]+", value))
+        elif node[0] == "block" and not node[1].lower().startswith(("@keyframes", "@-webkit-keyframes")):
+            names |= _keyframe_names(node[2])
+    return names
+
+
+def tree_shake_css(nodes: list, used: set) -> list:
+    """Remove selectors whose classes never appear in views/JS"""
+    def shake(items):
+        kept = []
+        for node in items:
+            if node[0] == "rule":
+                selectors = [s for s in node[1] if set(selector_classes(s, required=True)) <= used]
+                if selectors:
+                    kept.append(("rule", selectors, node[2]))
+            elif node[0] == "block" and not node[1].lower().startswith(("@keyframes", "@-webkit-keyframes")):
+                children = shake(node[2])
+                if children:
+                    kept.append(("block", node[1], children))
+            else:
+                kept.append(node)
+        return kept
+
+    kept = shake(nodes)
+    animations = _keyframe_names(kept)
+    return [
+        node for node in kept
+        if not (node[0] == "block" and node[1].lower().startswith(("@keyframes", "@-webkit-keyframes"))
+                and node[1].split()[-1] not in animations)
+    ]
+
+
+# ============================================
+# 📦 BUNDLE
+# ============================================
+
+def _content_hash(text: str) -> str:
+    return hashlib.sha256(text.encode("utf-8")).hexdigest()[:10]
+
+
+def _view_files(views_dir: Path) -> list:
+    layout = views_dir / "layouts" / "app.blade.php"
+    others = sorted(p for p in views_dir.rglob("*.blade.php") if p != layout and p.name != "welcome.blade.php")
+    return [layout] + others
+
+
+def _bundle_name(path: Path, views_dir: Path, layout_path: Path) -> str:
+    """JS bundle of a view: app for the layout, e.g. components-navbar for components/navbar.blade.php"""
+    if path == layout_path:
+        return BUNDLE_NAME
+    return re.sub(r"[^\w-]", "-", str(path.relative_to(views_dir)).replace(".blade.php", "")).replace("/", "-")
+
+
+def _existing_bundles(content: str, public_dir: Path, ext: str) -> list:
+    """Contents of `ext` bundles already referenced by a view (re-runs merge into them)"""
+    blocks = []
+    for name in re.findall(rf"asset\('({ASSET_DIR}/[\w-]+\.[0-9a-f]+\.{ext})'\)", content):
+        path = public_dir / name
+        if path.exists():
+            blocks.append(path.read_text(encoding="utf-8"))
+    return blocks
+
+
+def _unique_js(blocks: list, exclude: list = ()) -> list:
+    """Minified blocks without repeats, blocks contained in another one or in `exclude`"""
+    minified = list(dict.fromkeys(minify_js(block) for block in blocks if block.strip()))
+    return [b for b in minified if b
+            and not any(b != other and b in other for other in minified)
+            and not any(b in other for other in exclude)]
+
+
+def bundle_assets(laravel_path: str = "my-laravel") -> dict:
+    """Bundle inline CSS/JS of the generated views; returns a size report"""
+    root = Path(laravel_path)
+    views_dir = root / "resources" / "views"
+    public_dir = root / "public"
+    layout_path = views_dir / "layouts" / "app.blade.php"
+    if not layout_path.exists():
+        print("❌ app.blade.php not found")
+        return {}
+
+    files = {path: path.read_text(encoding="utf-8") for path in _view_files(views_dir) if path.exists()}
+    css_blocks = _existing_bundles(files[layout_path], public_dir, "css")
+    js_blocks = {path: [] for path in files}
+    inline_bytes = 0
+
+    def take_style(match):
+        nonlocal inline_bytes
+        css = _bundleable_style(match.group(1), match.group(2))
+        if css is None:
+            return match.group(0)
+        css_blocks.append(css)
+        inline_bytes += len(match.group(2))
+        return ""
+
+    updated = {}
+    for path, content in files.items():
+        def take_script(match, path=path):
+            nonlocal inline_bytes
+            if not _bundleable_script(match.group(1), match.group(2)):
+                return match.group(0)
+            first = not js_blocks[path]
+            js_blocks[path].append(match.group(2))
+            inline_bytes += len(match.group(2))
+            # The view's bundle tag goes where its first script was
+            return SCRIPT_MARKER if first and path != layout_path else ""
+        updated[path] = SCRIPT_RE.sub(take_script, STYLE_RE.sub(take_style, content))
+
+    if not css_blocks and not any(js_blocks.values()):
+        print("ℹ️ No inline CSS/JS to bundle")
+        return {}
+
+    # JS: one bundle per view, deduped; view blocks already in the layout bundle are dropped
+    js_bundles = {}
+    layout_js = _unique_js(_existing_bundles(files[layout_path], public_dir, "js") + js_blocks[layout_path])
+    if layout_js:
+        js_bundles[layout_path] = "\n;\n".join(layout_js)
+    for path, blocks in js_blocks.items():
+        if path != layout_path and blocks:
+            unique = _unique_js(_existing_bundles(files[path], public_dir, "js") + blocks, layout_js)
+            if unique:
+                js_bundles[path] = "\n;\n".join(unique)
+
+    # CSS: parse, dedupe rules, tree-shake against class usage in views + JS
+    nodes = _dedupe_css([node for block in css_blocks for node in parse_css(block)])
+    index = ClassIndex.from_sources({str(path): content for path, content in files.items()})
+    for path, bundle in js_bundles.items():
+        index.add_script(f"bundle:{path.name}", bundle)
+    used = index.used_classes()
+    css_bundle = render_css(tree_shake_css(nodes, used))
+
+    asset_dir = public_dir / ASSET_DIR
+    asset_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+
+    def write(name: str, ext: str, bundle: str) -> str:
+        filename = f"{name}.{_content_hash(bundle)}.{ext}"
+        (asset_dir / filename).write_text(bundle, encoding="utf-8")
+        written.append(filename)
+        return filename
+
+    for path in updated:
+        bundle = js_bundles.get(path)
+        content = updated[path]
+        if bundle is None:
+            updated[path] = content.replace(SCRIPT_MARKER, "")
+            continue
+        content = BUNDLE_TAG_RE.sub(lambda m: m.group(0) if ".css'" in m.group(0) else "", content)
+        tag = f"<script src=\"{{{{ asset('{ASSET_DIR}/{write(_bundle_name(path, views_dir, layout_path), 'js', bundle)}') }}}}\" defer></script>"
+        if path == layout_path:
+            content = content.replace("</body>", f"    {tag}\n</body>", 1)
+        elif SCRIPT_MARKER in content:
+            content = content.replace(SCRIPT_MARKER, tag + "\n", 1).replace(SCRIPT_MARKER, "")
+        else:
+            content = content.rstrip("\n") + f"\n{tag}\n"
+        updated[path] = content
+
+    layout = updated[layout_path]
+    if css_bundle:
+        layout = BUNDLE_TAG_RE.sub(lambda m: "" if ".css'" in m.group(0) else m.group(0), layout)
+        css_tag = f"    <link rel=\"stylesheet\" href=\"{{{{ asset('{ASSET_DIR}/{write(BUNDLE_NAME, 'css', css_bundle)}') }}}}\">\n"
+        layout = layout.replace("</head>", f"{css_tag}</head>", 1)
+    updated[layout_path] = layout
+
+    # Remove bundles no view references any more
+    referenced = set(written)
+    for content in updated.values():
+        referenced.update(re.findall(rf"asset\('{ASSET_DIR}/([\w-]+\.[0-9a-f]+\.(?:css|js))'\)", content))
+    for old in asset_dir.glob("*.*"):
+        if old.name not in referenced and old.suffix in (".css", ".js"):
+            old.unlink()
+
+    for path, content in updated.items():
+        if content != files[path]:
+            path.write_text(content, encoding="utf-8")
+
+    js_bytes = sum(len(bundle) for bundle in js_bundles.values())
+    report = {
+        "inline_bytes": inline_bytes,
+        "css_bytes": len(css_bundle),
+        "js_bytes": js_bytes,
+        "js_bundles": len(js_bundles),
+        "css_rules_removed": len(nodes) - len(parse_css(css_bundle)),
+        "assets": written,
+    }
+    with open(asset_dir / "manifest.json", "w", encoding="utf-8") as f:
+        json.dump(report, f, indent=2)
+
+    print(f"📦 Bundled {inline_bytes:,} bytes of inline CSS/JS → "
+          f"{report['css_bytes']:,} B css + {js_bytes:,} B js in {len(js_bundles)} view script(s) ({', '.join(written)})")
+    return report
+
+
+if __name__ == "__main__":
+    import sys
+    bundle_assets(sys.argv[1] if len(sys.argv) > 1 else "my-laravel")
@@ -0,0 +1,295 @@
+"""
+Class Usage Analyzer
+One pass over the Blade views builds an inverted index of CSS classes:
+
+- used      class -> [(file, line)]    class="..." / :class / @class([...]) /
+                                       classList.*('...') / querySelector('.x')
+- defined   class -> [(source, selector)]  layout/view <style> blocks and the
+                                       bundled public/assets CSS
+- tailwind  classes resolved by the utility table (utils/convert_apply_to_css.py),
+            including variants, arbitrary values and tailwind.config colors
+
+and reports, in one go:
+- undefined classes  used, not Tailwind, not defined in any CSS
+- dead classes       defined in CSS, never used by a view or script
+
+Used by the CSS fixers (sync_css_classes, validate_components,
+fix_component_styling) and the asset bundler's tree-shaking.
+
+Usage:
+    python utils/class_usage.py [laravel_path]
+"""
+
+import bisect
+import re
+import time
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+try:
+    from utils.convert_apply_to_css import resolve_class
+except ImportError:
+    from convert_apply_to_css import resolve_class
+
+# Classes that are meaningful without CSS of their own
+MARKER_CLASSES = {"group", "peer", "dark", "container", "prose", "active", "show", "open", "hidden"}
+
+CLASS_ATTR_RE = re.compile(r"""(?<![\w-])(?::class|x-bind:class|class)\s*=\s*(["'])(.*?)\1""", re.DOTALL)
+CLASS_DIRECTIVE_RE = re.compile(r"@class\s*\(\s*\[(.*?)\]\s*\)", re.DOTALL)
+STYLE_BLOCK_RE = re.compile(r"<style[^>]*>(.*?)</style>", re.DOTALL | re.IGNORECASE)
+SCRIPT_BLOCK_RE = re.compile(r"<script(?![^>]*\bsrc=)[^>]*>(.*?)</script>", re.DOTALL | re.IGNORECASE)
+JS_CLASS_CALL_RE = re.compile(r"classList\.(?:add|remove|toggle|contains|replace)\(([^)]*)\)|className\s*[+]?=\s*([^;\n]+)")
+JS_SELECTOR_RE = re.compile(r"""(?:querySelector(?:All)?|closest|matches)\(\s*(["'`])(.*?)\1""")
+STRING_RE = re.compile(r"""(["'`])((?:\\.|(?!\1).)*)\1""")
+TOKEN_RE = re.compile(r"!?-?[A-Za-z_][\w\-:/.\[\]#%(),!]*")
+SELECTOR_CLASS_RE = re.compile(r"\.((?:\\.|[\w-])+)")
+# [href$=".pdf"] and quoted strings hold no classes (escaped \[ \] belong to class names)
+ATTR_SELECTOR_RE = re.compile(r"""(?<!\\)\[(?:[^\]"'\\]|\\.|"[^"]*"|'[^']*')*\]""")
+SELECTOR_STRING_RE = re.compile(r"""(?<!\\)(["'])(?:\\.|(?!\1).)*\1""")
+NEGATED_SELECTOR_RE = re.compile(r":(?:not|where)\([^)]*\)")
+BLADE_ECHO_RE = re.compile(r"\{\{.*?\}\}|\{!!.*?!!\}", re.DOTALL)
+BLADE_DIRECTIVE_RE = re.compile(r"@\w+\s*\(.*")
+
+
+def _tokens(text: str) -> List[str]:
+    return [token.rstrip(".,") for token in TOKEN_RE.findall(text)]
+
+
+def selector_classes(selector: str, required: bool = False) -> List[str]:
+    """
+    Class names in a CSS selector (attribute selectors and strings skipped).
+    required=True also skips :not(...) / :where(...) - classes an element
+    doesn't need to match (what tree-shaking checks).
+    """
+    selector = SELECTOR_STRING_RE.sub("", ATTR_SELECTOR_RE.sub("", selector))
+    if required:
+        selector = NEGATED_SELECTOR_RE.sub("", selector)
+    return [name.replace("\\", "") for name in SELECTOR_CLASS_RE.findall(selector)]
+
+
+def _strip_css_comments(css: str) -> str:
+    return re.sub(r"/\*.*?\*/", "", css, flags=re.DOTALL)
+
+
+def tailwind_config_colors(source: str) -> set:
+    """Custom color names from an inline `tailwind.config = {...}` (e.g. primary, brand)"""
+    match = re.search(r"colors\s*:\s*\{", source)
+    if not match:
+        return set()
+    depth, i = 1, match.end()
+    while i < len(source) and depth:
+        depth += {"{": 1, "}": -1}.get(source[i], 0)
+        i += 1
+    body = source[match.end():i - 1]
+    names = set()
+    # Top-level keys and "name-shade" for nested objects
+    depth, key = 0, ""
+    for token in re.finditer(r"""(['"]?)([\w-]+)\1\s*:|\{|\}""", body):
+        text = token.group(0)
+        if text == "{":
+            depth += 1
+        elif text == "}":
+            depth -= 1
+        elif depth == 0:
+            key = token.group(2)
+            names.add(key)
+        elif depth == 1 and key:
+            names.add(f"{key}-{token.group(2)}" if token.group(2) != "DEFAULT" else key)
+    return names
+
+
+class ClassIndex:
+    """Inverted index of class usage/definitions across views"""
+
+    def __init__(self):
+        self.used: Dict[str, List[Tuple[str, int]]] = {}
+        self.defined: Dict[str, List[Tuple[str, str]]] = {}
+        self.js_tokens: set = set()
+        self.dynamic_tokens: set = set()
+        self.custom_colors: set = set()
+        self._tailwind_cache: Dict[str, bool] = {}
+
+    # ---------- building ----------
+
+    def _use(self, cls: str, source: str, line: int):
+        if cls:
+            self.used.setdefault(cls, []).append((source, line))
+
+    def add_view(self, name: str, content: str):
+        """Index one Blade file (class attributes, @class, <style> and <script> blocks)"""
+        newlines = [m.start() for m in re.finditer("\n", content)]
+
+        def line_of(pos: int) -> int:
+            return bisect.bisect_right(newlines, pos) + 1
+
+        for match in CLASS_ATTR_RE.finditer(content):
+            value, line = match.group(2), line_of(match.start(2))
+            if match.group(0).startswith(("class", "CLASS")):
+                # Static classes plus any quoted strings inside Blade echoes
+                tokens = _tokens(BLADE_ECHO_RE.sub(" ", value) if "{" in value else value)
+                for echo in BLADE_ECHO_RE.findall(value):
+                    tokens += [token for string in STRING_RE.findall(echo) for token in _tokens(string[1])]
+            else:
+                # :class="{ 'active': open }" / "open ? 'a' : 'b'"
+                tokens = [token for string in STRING_RE.findall(value) for token in _tokens(string[1])]
+                tokens += re.findall(r"([\w-]+)\s*:", value)
+            for token in tokens:
+                self._use(token, name, line)
+
+        for match in CLASS_DIRECTIVE_RE.finditer(content):
+            for string in STRING_RE.findall(match.group(1)):
+                for token in _tokens(string[1]):
+                    self._use(token, name, line_of(match.start()))
+
+        # Strings handed around by Blade ({{ $a ? 'x' : 'y' }}, @include('c', ['class' => 'x']))
+        for snippet in BLADE_ECHO_RE.findall(content) + BLADE_DIRECTIVE_RE.findall(content):
+            for string in STRING_RE.findall(snippet):
+                self.dynamic_tokens.update(_tokens(string[1]))
+
+        for match in STYLE_BLOCK_RE.finditer(content):
+            self.add_css(name, match.group(1))
+
+        for match in SCRIPT_BLOCK_RE.finditer(content):
+            if "tailwind.config" in match.group(1):
+                self.custom_colors |= tailwind_config_colors(match.group(1))
+                continue
+            self.add_script(name, match.group(1), line_of(match.start(1)) - 1)
+
+    def add_script(self, name: str, js: str, line_offset: int = 0):
+        """Classes a script adds/queries (used), plus every string token (js_tokens)"""
+        newlines = [m.start() for m in re.finditer("\n", js)]
+        for match in JS_CLASS_CALL_RE.finditer(js):
+            line = line_offset + bisect.bisect_right(newlines, match.start()) + 1
+            for string in STRING_RE.findall(match.group(1) or match.group(2)):
+                for token in _tokens(string[1]):
+                    self._use(token, name, line)
+        for match in JS_SELECTOR_RE.finditer(js):
+            line = line_offset + bisect.bisect_right(newlines, match.start()) + 1
+            for cls in selector_classes(match.group(2)):
+                self._use(cls, name, line)
+        for string in STRING_RE.findall(js):
+            self.js_tokens.update(_tokens(string[1]))
+
+    def add_css(self, source: str, css: str):
+        """Record classes defined by a stylesheet (@media etc. included, keyframe stops skipped)"""
+        for match in re.finditer(r"([^{};]+)\{", _strip_css_comments(css)):
+            prelude = " ".join(match.group(1).split())
+            if not prelude or prelude.startswith("@"):
+                continue
+            for selector in prelude.split(","):
+                for cls in selector_classes(selector):
+                    self.defined.setdefault(cls, []).append((source, selector.strip()))
+
+    @classmethod
+    def from_sources(cls, views: Dict[str, str], stylesheets: Optional[Dict[str, str]] = None) -> "ClassIndex":
+        index = cls()
+        for name, content in views.items():
+            index.add_view(name, content)
+        for name, css in (stylesheets or {}).items():
+            index.add_css(name, css)
+        return index
+
+    @classmethod
+    def from_project(cls, laravel_path: str = "my-laravel") -> "ClassIndex":
+        """Index every Blade view plus the bundled CSS/JS under public/assets"""
+        views_dir = Path(laravel_path) / "resources" / "views"
+        views = {}
+        if views_dir.exists():
+            for path in sorted(views_dir.rglob("*.blade.php")):
+                if path.name != "welcome.blade.php":
+                    views[path.relative_to(views_dir).as_posix()] = path.read_text(encoding="utf-8")
+        index = cls.from_sources(views)
+        assets_dir = Path(laravel_path) / "public" / "assets"
+        if assets_dir.exists():
+            for path in sorted(assets_dir.glob("app.*.css")):
+                index.add_css(f"assets/{path.name}", path.read_text(encoding="utf-8"))
+            for path in sorted(assets_dir.glob("app.*.js")):
+                index.add_script(f"assets/{path.name}", path.read_text(encoding="utf-8"))
+        return index
+
+    # ---------- queries ----------
+
+    def is_tailwind(self, cls: str) -> bool:
+        known = self._tailwind_cache.get(cls)
+        if known is None:
+            known = resolve_class(cls) is not None or self._is_custom_color(cls)
+            self._tailwind_cache[cls] = known
+        return known
+
+    def _is_custom_color(self, cls: str) -> bool:
+        utility = cls.split(":")[-1].lstrip("!")
+        utility = utility.split("/")[0]
+        for prefix in ("bg-", "text-", "border-", "from-", "via-", "to-", "ring-", "fill-", "stroke-",
+                       "placeholder-", "divide-", "outline-", "decoration-", "accent-", "caret-"):
+            if utility.startswith(prefix) and utility[len(prefix):] in self.custom_colors:
+                return True
+        return False
+
+    def used_classes(self) -> set:
+        """Everything a view or script may put on an element (safe set for tree-shaking)"""
+        return set(self.used) | self.js_tokens | self.dynamic_tokens
+
+    def defined_classes(self) -> set:
+        return set(self.defined)
+
+    def undefined(self, prefix: str = "") -> Dict[str, List[Tuple[str, int]]]:
+        """Used classes that are neither Tailwind utilities nor defined in CSS (optionally only files under `prefix`)"""
+        report = {}
+        for cls, places in self.used.items():
+            if cls in self.defined or cls in MARKER_CLASSES or self.is_tailwind(cls):
+                continue
+            base = cls.split(":")[-1].lstrip("!")
+            if base in self.defined or base in MARKER_CLASSES:
+                continue
+            places = [place for place in places if place[0].startswith(prefix)]
+            if places:
+                report[cls] = places
+        return report
+
+    def dead(self) -> Dict[str, List[Tuple[str, str]]]:
+        """CSS classes no view or script uses"""
+        used = self.used_classes()
+        return {cls: places for cls, places in self.defined.items() if cls not in used}
+
+    def undefined_by_file(self, prefix: str = "") -> Dict[str, List[str]]:
+        by_file: Dict[str, List[str]] = {}
+        for cls, places in self.undefined(prefix).items():
+            for source, _ in places:
+                if cls not in by_file.setdefault(source, []):
+                    by_file[source].append(cls)
+        return by_file
+
+    def report(self) -> dict:
+        undefined, dead = self.undefined(), self.dead()
+        return {
+            "used": len(self.used),
+            "defined": len(self.defined),
+            "tailwind": sum(1 for cls in self.used if self.is_tailwind(cls)),
+            "undefined": undefined,
+            "dead": dead,
+        }
+
+
+def analyze(laravel_path: str = "my-laravel", verbose: bool = True) -> dict:
+    """Build the index for a project and print undefined/dead classes"""
+    started = time.perf_counter()
+    index = ClassIndex.from_project(laravel_path)
+    report = index.report()
+    elapsed_ms = (time.perf_counter() - started) * 1000
+
+    if verbose:
+        print(f"🔍 Class usage: {report['used']} used, {report['defined']} defined in CSS, "
+              f"{report['tailwind']} Tailwind ({elapsed_ms:.1f} ms)")
+        for cls, places in sorted(report["undefined"].items()):
+            where = ", ".join(f"{source}:{line}" for source, line in places[:3])
+            print(f"   ❌ .{cls} - undefined ({where}{', ...' if len(places) > 3 else ''})")
+        for cls, places in sorted(report["dead"].items()):
+            print(f"   🗑️ .{cls} - never used ({places[0][0]}: {places[0][1]})")
+        if not report["undefined"] and not report["dead"]:
+            print("✅ No undefined or dead classes")
+    return report
+
+
+if __name__ == "__main__":
+    import sys
+    analyze(sys.argv[1] if len(sys.argv) > 1 else "my-laravel")
@@ -0,0 +1,274 @@
+"""
+GenLaravel Component Registry
+Generated Blade components keyed by what they are generated FROM, so the
+same component is never paid for twice - across pages of a job and across
+jobs (identical navbars/footers from the shared design template).
+
+Key = role + normalized reference fragment + available pages:
+
+- role       shared chrome is recognized by its whole name: Navbar / NavBar /
+             Header / SiteHeader / TopBar → "navbar", Footer / SiteFooter →
+             "footer"; any other component (AboutHeader, HeaderHero, ...) is
+             its own role (its lowercased name)
+- fragment   the draft HTML the component agent is shown (the design
+             system's navbar/footer for chrome, the page body otherwise)
+- pages      route() links in the component depend on which pages exist
+
+Entries also carry a SimHash fingerprint of the section they were built
+from (tag + class shingles, text ignored), so a component of the same kind
+built from a structurally similar section - another job's hero or pricing
+table - can be found and adapted with a small edit instead of generated
+from scratch. Only validated components of committed builds are stored
+(never those of a discarded speculative build), and lookups only update
+hit stats in memory: the file is rewritten once per job by save().
+
+Usage:
+    key = component_key("Navbar", reference_html, ["home", "about"])
+    code = registry().get(key)
+    if code is None:
+        near = registry().similar("Navbar", fragment)   # {"name", "code", "distance"} or None
+        code = adapt(near) if near else generate(...)
+    # after validation, once the build is committed:
+    registry().put(key, "Navbar", validated_code, fragment)
+    registry().save()                                   # hit stats + new entries, one write per job
+
+ENV variables (optional):
+- COMPONENT_REGISTRY=true                                  Reuse components across jobs
+- COMPONENT_REGISTRY_PATH=backend/data/component_registry.json
+- COMPONENT_REGISTRY_SIZE=200                              Entries kept (least recently used dropped)
+- COMPONENT_REGISTRY_MAX_KB=2048                           On-disk size bound (same eviction)
+- COMPONENT_SIMILARITY=true                                Adapt near-matches from earlier jobs
+- COMPONENT_SIMILARITY_BITS=10                             Max SimHash distance (of 64) for a near-match
+"""
+
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Iterable, Optional
+
+try:
+    from utils.config import settings
+    from utils.html_completeness import ATTR_CLASS_RE, TAG_RE, VOID_TAGS, HtmlCompletenessTracker
+    from utils.revision_scope import SectionIndex
+except ImportError:
+    from config import settings
+    from html_completeness import ATTR_CLASS_RE, TAG_RE, VOID_TAGS, HtmlCompletenessTracker
+    from revision_scope import SectionIndex
+
+
+# Bump when the component prompt changes: older entries stop matching
+REGISTRY_VERSION = 2
+
+# Whole-name matches only: AboutHeader / HeaderHero / PageHeader are page sections, not chrome
+COMPONENT_ROLES = {
+    "navbar": re.compile(r"^(main|site|primary)?[-_ ]?(nav(bar)?|top[-_ ]?(bar|nav)|menu[-_ ]?bar|header)$",
+                         re.IGNORECASE),
+    "footer": re.compile(r"^(main|site|primary)?[-_ ]?(footer|bottom[-_ ]?bar)$", re.IGNORECASE),
+}
+
+
+# Content kinds for near-match lookup (exact keys keep the plain name)
+COMPONENT_KINDS = {
+    "hero": re.compile(r"hero|banner|jumbotron|masthead", re.IGNORECASE),
+    "pricing": re.compile(r"pricing|plans?\b|packages?", re.IGNORECASE),
+    "contact": re.compile(r"contact", re.IGNORECASE),
+    "testimonials": re.compile(r"testimonial|review", re.IGNORECASE),
+    "features": re.compile(r"feature|service|benefit", re.IGNORECASE),
+    "team": re.compile(r"team|staff|member", re.IGNORECASE),
+    "faq": re.compile(r"faq|question", re.IGNORECASE),
+    "cta": re.compile(r"cta|call.?to.?action|signup|newsletter", re.IGNORECASE),
+    "gallery": re.compile(r"gallery|portfolio|showcase", re.IGNORECASE),
+}
+
+SHINGLE_SIZE = 3
+CAMEL_RE = re.compile(r"(?<=[a-z0-9])(?=[A-Z])")
+
+
+def component_role(name: str) -> str:
+    """"navbar" / "footer" for shared chrome, else the lowercased name"""
+    for role, pattern in COMPONENT_ROLES.items():
+        if pattern.match(name.strip()):
+            return role
+    return name.lower()
+
+
+def is_shared_chrome(name: str) -> bool:
+    """Navbar / Footer rendered on every page (built from the design system fragment)"""
+    return component_role(name) in COMPONENT_ROLES
+
+
+def component_kind(name: str) -> str:
+    """Role of shared chrome, else the content kind ("hero", "pricing", ...), else the lowercased name"""
+    if is_shared_chrome(name):
+        return component_role(name)
+    for kind, pattern in COMPONENT_KINDS.items():
+        if pattern.search(name):
+            return kind
+    return name.lower()
+
+
+def component_fragment(name: str, reference_html: str) -> str:
+    """The section of the reference a component is built from (the whole reference if not found)"""
+    if is_shared_chrome(name):
+        return reference_html  # navbar/footer: already the design system fragment
+    sections = SectionIndex(reference_html).locate(CAMEL_RE.sub(" ", name))
+    if len(sections) != 1:
+        return reference_html
+    return reference_html[sections[0].start:sections[0].end]
+
+
+def fingerprint(html: str) -> int:
+    """64-bit SimHash over shingles of start tags with their sorted classes (text ignored)"""
+    tokens = []
+    for match in TAG_RE.finditer(html or ""):
+        closing, name, attrs = match.group(1), match.group(2).lower(), match.group(3)
+        if closing:
+            tokens.append(f"/{name}")
+            continue
+        classes = ATTR_CLASS_RE.search(attrs)
+        tokens.append(".".join([name] + sorted(set(classes.group(1).split())) if classes else [name]))
+        if name in VOID_TAGS:
+            tokens.append(f"/{name}")
+    shingles = [" ".join(tokens[i:i + SHINGLE_SIZE]) for i in range(max(1, len(tokens) - SHINGLE_SIZE + 1))]
+    weights = [0] * 64
+    for shingle in shingles:
+        value = int.from_bytes(hashlib.blake2b(shingle.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if value >> bit & 1 else -1
+    return sum(1 << bit for bit in range(64) if weights[bit] > 0)
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+def balanced(code: str) -> bool:
+    """Every element opened in the component is closed again"""
+    return HtmlCompletenessTracker().feed(code).complete
+
+
+def component_key(name: str, reference_html: str, pages: Iterable[str] = ()) -> str:
+    fragment = " ".join((reference_html or "").split())
+    payload = "\0".join([str(REGISTRY_VERSION), component_role(name), fragment, ",".join(sorted(set(pages)))])
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+class ComponentRegistry:
+    """JSON file of {key: {"name", "role", "kind", "simhash", "code", "hits", "used"}}, loaded on first use"""
+
+    def __init__(self, path: Optional[str] = None, size: Optional[int] = None, max_bytes: Optional[int] = None):
+        cfg = settings()
+        self.path = path or cfg.component_registry_path
+        self.size = size or cfg.component_registry_size
+        self.max_bytes = max_bytes or cfg.component_registry_max_kb * 1024
+        self._entries: Optional["OrderedDict[str, dict]"] = None
+        self._dirty = False
+        self._lock = threading.Lock()
+
+    def _load(self) -> "OrderedDict[str, dict]":
+        if self._entries is None:
+            entries = {}
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    entries = json.load(f)
+            except (OSError, ValueError):
+                pass
+            self._entries = OrderedDict(sorted(entries.items(), key=lambda item: item[1].get("used", 0)))
+        return self._entries
+
+    def get(self, key: str) -> Optional[str]:
+        with self._lock:
+            entry = self._load().get(key)
+            if entry is None:
+                return None
+            entry["hits"] = entry.get("hits", 0) + 1
+            entry["used"] = time.time()
+            self._entries.move_to_end(key)
+            self._dirty = True
+            return entry["code"]
+
+    def similar(self, name: str, fragment: str,
+                max_distance: Optional[int] = None) -> Optional[dict]:
+        """Closest stored component of the same kind built from a similar section, or None"""
+        if max_distance is None:
+            max_distance = settings().component_similarity_bits
+        kind = component_kind(name)
+        target = fingerprint(fragment)
+        with self._lock:
+            best, best_distance = None, max_distance + 1
+            for key, entry in self._load().items():
+                if entry.get("kind") != kind or entry.get("simhash") is None:
+                    continue
+                distance = hamming(target, int(entry["simhash"], 16))
+                if distance < best_distance:
+                    best, best_distance = key, distance
+            if best is None:
+                return None
+            entry = self._entries[best]
+            entry["hits"] = entry.get("hits", 0) + 1
+            entry["used"] = time.time()
+            self._entries.move_to_end(best)
+            self._dirty = True
+            return {"name": entry["name"], "code": entry["code"], "distance": best_distance}
+
+    def put(self, key: str, name: str, code: str, fragment: Optional[str] = None):
+        """Store a validated component (unbalanced markup is not reused); written by save()"""
+        if not balanced(code):
+            return
+        with self._lock:
+            entries = self._load()
+            entries[key] = {"name": name, "role": component_role(name), "kind": component_kind(name),
+                            "simhash": f"{fingerprint(fragment):016x}" if fragment else None,
+                            "code": code, "hits": 0, "used": time.time()}
+            entries.move_to_end(key)
+            while len(entries) > 1 and (len(entries) > self.size or self._bytes(entries) > self.max_bytes):
+                entries.popitem(last=False)
+            self._dirty = True
+
+    def save(self):
+        """Write hit stats and new entries to disk (once per job, not per lookup)"""
+        with self._lock:
+            if self._dirty:
+                self._save()
+                self._dirty = False
+
+    @staticmethod
+    def _bytes(entries: "OrderedDict[str, dict]") -> int:
+        return sum(len(key) + len(entry["code"].encode("utf-8")) + 160 for key, entry in entries.items())
+
+    def _save(self):
+        try:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            tmp = f"{self.path}.tmp"
+            with open(tmp, "w", encoding="utf-8") as f:
+                json.dump(self._entries, f)
+            os.replace(tmp, self.path)
+        except OSError as e:
+            print(f"⚠️ Component registry not saved: {e}")
+
+    def __len__(self):
+        with self._lock:
+            return len(self._load())
+
+
+_registry: Optional[ComponentRegistry] = None
+_registry_lock = threading.Lock()
+
+
+def registry() -> Optional[ComponentRegistry]:
+    """Process-wide registry (None when COMPONENT_REGISTRY=false); re-opened when a reload changes its path/limits"""
+    global _registry
+    cfg = settings()
+    if not cfg.component_registry:
+        return None
+    wanted = (cfg.component_registry_path, cfg.component_registry_size, cfg.component_registry_max_kb * 1024)
+    with _registry_lock:
+        if _registry is None or (_registry.path, _registry.size, _registry.max_bytes) != wanted:
+            if _registry is not None:
+                _registry.save()
+            _registry = ComponentRegistry(*wanted)
+        return _registry
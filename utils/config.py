@@ -0,0 +1,283 @@
+"""
+GenLaravel Configuration
+.env is read once per process, before any module reads its ENV defaults:
+utils/__init__.py calls load_env(), and every agent, the backend and the
+CLI entry points import utils first. Real environment variables win over
+.env values (python-dotenv does not override them).
+
+Settings that are retuned in production (provider models, limits, pipeline
+switches) live in one immutable, validated Settings object instead of being
+parsed from os.environ on every call:
+
+    from utils.config import settings
+    cfg = settings()                    # current snapshot (built on first use)
+    cfg.cerebras_max_tokens, cfg.openrouter_provider_order
+
+reload_settings() re-reads .env, validates the result and only then
+applies it to os.environ and swaps the snapshot; invalid values raise
+ConfigError and change nothing. A running generation job binds the
+snapshot it started with (use_settings()), so its agents and LLM calls
+keep it and the next job sees the new one; changed API keys re-create the
+provider clients right away. Triggers: SIGHUP (install_reload_signal())
+or POST /api/config/reload on the backend.
+
+Usage:
+    from utils.config import load_env
+    load_env()   # no-op after the first call
+
+ENV variables (optional):
+- CONFIG_RELOAD_TOKEN=    Required X-Admin-Token for POST /api/config/reload (unset = open)
+"""
+
+import contextvars
+import os
+import signal
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Dict, List, Optional, Tuple
+
+_loaded = False
+_lock = threading.Lock()
+_dotenv_path = ""
+_process_env: set = set()   # keys set by the real environment (never overridden from .env)
+_dotenv_keys: set = set()   # keys currently applied from .env
+
+
+def load_env() -> bool:
+    """Load .env (searched upwards from this package) once; True if this call loaded a file"""
+    global _loaded, _dotenv_path, _process_env, _dotenv_keys
+    with _lock:
+        if _loaded:
+            return False
+        _loaded = True
+        from dotenv import dotenv_values, find_dotenv, load_dotenv
+        _process_env = set(os.environ)
+        _dotenv_path = find_dotenv(usecwd=False)
+        if _dotenv_path:
+            _dotenv_keys = {key for key, value in dotenv_values(_dotenv_path).items()
+                            if value is not None and key not in _process_env}
+        return load_dotenv(_dotenv_path)
+
+
+def _reread_env() -> Tuple[Dict[str, str], set]:
+    """Environment as it would be with the current .env applied: (environ, .env keys)"""
+    from dotenv import dotenv_values
+    values = dotenv_values(_dotenv_path) if _dotenv_path and os.path.exists(_dotenv_path) else {}
+    environ = dict(os.environ)
+    applied = set()
+    for key, value in values.items():
+        if value is None or key in _process_env:
+            continue
+        environ[key] = value
+        applied.add(key)
+    for key in _dotenv_keys - applied:
+        environ.pop(key, None)
+    return environ, applied
+
+
+def _apply_env(environ: Dict[str, str], applied: set):
+    """Make os.environ match a validated _reread_env() result"""
+    global _dotenv_keys
+    for key in _dotenv_keys - applied:
+        os.environ.pop(key, None)
+    for key in applied:
+        os.environ[key] = environ[key]
+    _dotenv_keys = applied
+
+
+# ============================================
+# ⚙️ SETTINGS
+# ============================================
+
+class ConfigError(ValueError):
+    """One or more ENV values are invalid (all problems listed)"""
+
+
+# name: (ENV variable, type, default, (min, max) / allowed str values / None)
+SETTINGS_SPEC = {
+    # Providers (agents/llm_client.py)
+    "cerebras_api_key": ("CEREBRAS_API_KEY", str, "", None),
+    "cerebras_model": ("CEREBRAS_MODEL", str, "", None),
+    "cerebras_max_tokens": ("CEREBRAS_MAX_TOKENS", int, 40000, (1, None)),
+    "cerebras_temperature": ("CEREBRAS_TEMPERATURE", float, 0.7, (0.0, 2.0)),
+    "cerebras_top_p": ("CEREBRAS_TOP_P", float, 0.8, (0.0, 1.0)),
+    "openrouter_api_key": ("OPENROUTER_API_KEY", str, "", None),
+    "openrouter_model": ("OPENROUTER_MODEL", str, "", None),
+    "openrouter_provider_order": ("OPENROUTER_PROVIDER_ORDER", tuple, ("cerebras",), None),
+    "openrouter_allow_fallbacks": ("OPENROUTER_ALLOW_FALLBACKS", bool, False, None),
+    "openrouter_referer": ("OPENROUTER_REFERER", str, "https://github.com/genlaravel", None),
+    "openrouter_title": ("OPENROUTER_TITLE", str, "GenLaravel", None),
+    "openrouter_timeout": ("OPENROUTER_TIMEOUT", int, 120, (1, None)),
+    "mistral_api_key": ("MISTRAL_API_KEY", str, "", None),
+    "mistral_model": ("MISTRAL_MODEL", str, "", None),
+    # Generation engine (agents/generation_engine.py)
+    "ai_validation": ("AI_VALIDATION", bool, True, None),
+    "speculative_build": ("SPECULATIVE_BUILD", bool, False, None),
+    "section_patch": ("SECTION_PATCH", bool, True, None),
+    "section_patch_max_sections": ("SECTION_PATCH_MAX_SECTIONS", int, 3, (1, None)),
+    "revision_scope_confidence": ("REVISION_SCOPE_CONFIDENCE", float, 0.7, (0.0, 1.0)),
+    # Token prices, USD per 1M tokens (agents/llm_usage.py)
+    "cerebras_price_input_per_1m": ("CEREBRAS_PRICE_INPUT_PER_1M", float, 0.0, (0.0, None)),
+    "cerebras_price_output_per_1m": ("CEREBRAS_PRICE_OUTPUT_PER_1M", float, 0.0, (0.0, None)),
+    "openrouter_price_input_per_1m": ("OPENROUTER_PRICE_INPUT_PER_1M", float, 0.0, (0.0, None)),
+    "openrouter_price_output_per_1m": ("OPENROUTER_PRICE_OUTPUT_PER_1M", float, 0.0, (0.0, None)),
+    "mistral_price_input_per_1m": ("MISTRAL_PRICE_INPUT_PER_1M", float, 0.0, (0.0, None)),
+    "mistral_price_output_per_1m": ("MISTRAL_PRICE_OUTPUT_PER_1M", float, 0.0, (0.0, None)),
+    "llm_stub_price_input_per_1m": ("LLM_STUB_PRICE_INPUT_PER_1M", float, 0.0, (0.0, None)),
+    "llm_stub_price_output_per_1m": ("LLM_STUB_PRICE_OUTPUT_PER_1M", float, 0.0, (0.0, None)),
+    # Streaming (agents/llm_stop.py) and progress output (utils/progress.py)
+    "llm_stream_stop": ("LLM_STREAM_STOP", bool, True, None),
+    "progress_sink": ("PROGRESS_SINK", str, "auto", ("auto", "tty", "null")),
+    # Pipeline (utils/pipeline_dag.py, utils/html_completeness.py, agents/g_route_agent_v2.py)
+    "pipeline_workers": ("PIPELINE_WORKERS", int, 8, (1, None)),
+    "pipeline_cache_size": ("PIPELINE_CACHE_SIZE", int, 128, (0, None)),
+    "draft_continuation_rounds": ("DRAFT_CONTINUATION_ROUNDS", int, 2, (0, None)),
+    "draft_continuation_tail": ("DRAFT_CONTINUATION_TAIL", int, 400, (0, None)),
+    "route_agent_use_llm": ("ROUTE_AGENT_USE_LLM", bool, False, None),
+    # Assets (utils/bundle_assets.py)
+    "asset_bundler": ("ASSET_BUNDLER", bool, True, None),
+    # Component registry (utils/component_registry.py)
+    "component_registry": ("COMPONENT_REGISTRY", bool, True, None),
+    "component_registry_path": ("COMPONENT_REGISTRY_PATH", str, "backend/data/component_registry.json", None),
+    "component_registry_size": ("COMPONENT_REGISTRY_SIZE", int, 200, (1, None)),
+    "component_registry_max_kb": ("COMPONENT_REGISTRY_MAX_KB", int, 2048, (1, None)),
+    "component_similarity": ("COMPONENT_SIMILARITY", bool, True, None),
+    "component_similarity_bits": ("COMPONENT_SIMILARITY_BITS", int, 10, (0, 64)),
+}
+
+SECRET_SETTINGS = {"cerebras_api_key", "openrouter_api_key", "mistral_api_key"}
+
+
+def _parse(name: str, raw: Optional[str], errors: List[str]):
+    env, kind, default, bounds = SETTINGS_SPEC[name]
+    if raw is None or raw.strip() == "":
+        return default
+    raw = raw.strip()
+    if kind is str:
+        if bounds and raw.lower() not in bounds:
+            errors.append(f"{env}={raw!r} is not one of {', '.join(bounds)}")
+            return default
+        return raw.lower() if bounds else raw
+    if kind is tuple:
+        return tuple(part.strip() for part in raw.split(",") if part.strip())
+    if kind is bool:
+        if raw.lower() in ("1", "true", "yes", "on"):
+            return True
+        if raw.lower() in ("0", "false", "no", "off"):
+            return False
+        errors.append(f"{env}={raw!r} is not a boolean")
+        return default
+    try:
+        value = kind(raw)
+    except ValueError:
+        errors.append(f"{env}={raw!r} is not {'an integer' if kind is int else 'a number'}")
+        return default
+    low, high = bounds or (None, None)
+    if (low is not None and value < low) or (high is not None and value > high):
+        errors.append(f"{env}={value} is outside {low}..{'' if high is None else high}")
+    return value
+
+
+class Settings:
+    """Immutable snapshot of the tunable configuration (see SETTINGS_SPEC)"""
+
+    __slots__ = tuple(SETTINGS_SPEC) + ("version", "loaded_at")
+
+    def __init__(self, environ: Optional[Dict[str, str]] = None, version: int = 1):
+        environ = os.environ if environ is None else environ
+        errors: List[str] = []
+        for name, (env, _, _, _) in SETTINGS_SPEC.items():
+            object.__setattr__(self, name, _parse(name, environ.get(env), errors))
+        if errors:
+            raise ConfigError("; ".join(errors))
+        object.__setattr__(self, "version", version)
+        object.__setattr__(self, "loaded_at", time.time())
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Settings are immutable - use reload_settings()")
+
+    def as_dict(self, redact: bool = True) -> dict:
+        return {name: ("***" if redact and name in SECRET_SETTINGS and getattr(self, name) else getattr(self, name))
+                for name in SETTINGS_SPEC}
+
+    def changed(self, other: "Settings") -> List[str]:
+        """Names of the settings that differ from `other`"""
+        return [name for name in SETTINGS_SPEC if getattr(self, name) != getattr(other, name)]
+
+
+_settings: Optional[Settings] = None
+_settings_lock = threading.Lock()
+_listeners: List[Callable[[Settings, Settings], None]] = []
+_job_settings = contextvars.ContextVar("genlaravel_job_settings", default=None)
+
+
+def _current_settings() -> Settings:
+    global _settings
+    current = _settings
+    if current is None:
+        load_env()
+        with _settings_lock:
+            if _settings is None:
+                _settings = Settings()
+            current = _settings
+    return current
+
+
+def settings() -> Settings:
+    """The running job's snapshot (use_settings), else the current settings (built on first use)"""
+    return _job_settings.get() or _current_settings()
+
+
+@contextmanager
+def use_settings(snapshot: Settings):
+    """Make settings() return `snapshot` in this context (and threads started with tracing.bind)"""
+    token = _job_settings.set(snapshot)
+    try:
+        yield snapshot
+    finally:
+        _job_settings.reset(token)
+
+
+def on_reload(listener: Callable[[Settings, Settings], None]):
+    """Call listener(old, new) after every successful reload"""
+    _listeners.append(listener)
+
+
+def reload_settings() -> Tuple[Settings, List[str]]:
+    """Re-read .env and swap in new settings; returns (settings, changed names). Raises ConfigError."""
+    global _settings
+    old = _current_settings()
+    with _settings_lock:
+        environ, applied = _reread_env()
+        new = Settings(environ, version=old.version + 1)  # ConfigError: nothing is applied
+        _apply_env(environ, applied)
+        _settings = new
+    changed = new.changed(old)
+    for listener in list(_listeners):
+        try:
+            listener(old, new)
+        except Exception as e:
+            print(f"⚠️ Settings reload listener failed: {e}")
+    return new, changed
+
+
+def install_reload_signal() -> bool:
+    """Reload settings on SIGHUP (main thread, POSIX only); True if installed"""
+    if not hasattr(signal, "SIGHUP") or threading.current_thread() is not threading.main_thread():
+        return False
+
+    def reload():
+        try:
+            new, changed = reload_settings()
+            print(f"🔄 Settings reloaded (v{new.version}): {', '.join(changed) or 'no changes'}")
+        except ConfigError as e:
+            print(f"❌ Settings reload rejected, keeping current settings: {e}")
+
+    def handle(signum, frame):
+        # The signal may interrupt the main thread while it holds _settings_lock:
+        # reload in another thread, which just waits for the lock
+        threading.Thread(target=reload, name="settings-reload", daemon=True).start()
+
+    signal.signal(signal.SIGHUP, handle)
+    return True
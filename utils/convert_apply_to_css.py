@@ -1,130 +1,775 @@
 """
 Convert Tailwind @apply directives to pure CSS
 Because @apply doesn't work with CDN version
+
+Classes are resolved from a utility table (Tailwind v3 spacing, sizing,
+color, typography, layout, border, effect and transition scales) built once
+on first use, plus a few dynamic forms:
+
+- variants          hover: focus: active: ... group-hover:  sm: md: lg: xl: 2xl: dark:
+- arbitrary values  w-[320px]  bg-[#0f172a]  grid-cols-[1fr_2fr]
+- opacity modifier  bg-blue-500/50
+- negative values   -mt-4  -translate-x-1/2
+- important         !font-bold  or  @apply ... !important
+
+convert_apply_in_css() converts every @apply of a stylesheet in one pass;
+variant classes become extra rules (".btn:hover {...}", "@media ... {...}")
+after the rule. Unknown classes are left as TODO comments.
 """
 
 import re
+from functools import lru_cache
+from typing import Optional
+
+# ============================================
+# 📐 SCALES
+# ============================================
+
+SPACING_STEPS = (0.5, 1, 1.5, 2, 2.5, 3, 3.5, 4, 5, 6, 7, 8, 9, 10, 11, 12, 14, 16, 20, 24,
+                 28, 32, 36, 40, 44, 48, 52, 56, 60, 64, 72, 80, 96)
+
+BREAKPOINTS = {"sm": "640px", "md": "768px", "lg": "1024px", "xl": "1280px", "2xl": "1536px"}
+
+PALETTE_STEPS = ("50", "100", "200", "300", "400", "500", "600", "700", "800", "900", "950")
+
+PALETTE = {
+    "slate": "f8fafc f1f5f9 e2e8f0 cbd5e1 94a3b8 64748b 475569 334155 1e293b 0f172a 020617",
+    "gray": "f9fafb f3f4f6 e5e7eb d1d5db 9ca3af 6b7280 4b5563 374151 1f2937 111827 030712",
+    "zinc": "fafafa f4f4f5 e4e4e7 d4d4d8 a1a1aa 71717a 52525b 3f3f46 27272a 18181b 09090b",
+    "neutral": "fafafa f5f5f5 e5e5e5 d4d4d4 a3a3a3 737373 525252 404040 262626 171717 0a0a0a",
+    "stone": "fafaf9 f5f5f4 e7e5e4 d6d3d1 a8a29e 78716c 57534e 44403c 292524 1c1917 0c0a09",
+    "red": "fef2f2 fee2e2 fecaca fca5a5 f87171 ef4444 dc2626 b91c1c 991b1b 7f1d1d 450a0a",
+    "orange": "fff7ed ffedd5 fed7aa fdba74 fb923c f97316 ea580c c2410c 9a3412 7c2d12 431407",
+    "amber": "fffbeb fef3c7 fde68a fcd34d fbbf24 f59e0b d97706 b45309 92400e 78350f 451a03",
+    "yellow": "fefce8 fef9c3 fef08a fde047 facc15 eab308 ca8a04 a16207 854d0e 713f12 422006",
+    "lime": "f7fee7 ecfccb d9f99d bef264 a3e635 84cc16 65a30d 4d7c0f 3f6212 365314 1a2e05",
+    "green": "f0fdf4 dcfce7 bbf7d0 86efac 4ade80 22c55e 16a34a 15803d 166534 14532d 052e16",
+    "emerald": "ecfdf5 d1fae5 a7f3d0 6ee7b7 34d399 10b981 059669 047857 065f46 064e3b 022c22",
+    "teal": "f0fdfa ccfbf1 99f6e4 5eead4 2dd4bf 14b8a6 0d9488 0f766e 115e59 134e4a 042f2e",
+    "cyan": "ecfeff cffafe a5f3fc 67e8f9 22d3ee 06b6d4 0891b2 0e7490 155e75 164e63 083344",
+    "sky": "f0f9ff e0f2fe bae6fd 7dd3fc 38bdf8 0ea5e9 0284c7 0369a1 075985 0c4a6e 082f49",
+    "blue": "eff6ff dbeafe bfdbfe 93c5fd 60a5fa 3b82f6 2563eb 1d4ed8 1e40af 1e3a8a 172554",
+    "indigo": "eef2ff e0e7ff c7d2fe a5b4fc 818cf8 6366f1 4f46e5 4338ca 3730a3 312e81 1e1b4b",
+    "violet": "f5f3ff ede9fe ddd6fe c4b5fd a78bfa 8b5cf6 7c3aed 6d28d9 5b21b6 4c1d95 2e1065",
+    "purple": "faf5ff f3e8ff e9d5ff d8b4fe c084fc a855f7 9333ea 7e22ce 6b21a8 581c87 3b0764",
+    "fuchsia": "fdf4ff fae8ff f5d0fe f0abfc e879f9 d946ef c026d3 a21caf 86198f 701a75 4a044e",
+    "pink": "fdf2f8 fce7f3 fbcfe8 f9a8d4 f472b6 ec4899 db2777 be185d 9d174d 831843 500724",
+    "rose": "fff1f2 ffe4e6 fecdd3 fda4af fb7185 f43f5e e11d48 be123c 9f1239 881337 4c0519",
+}
+
+# prefix -> (property, opacity variable, selector suffix)
+COLOR_UTILITIES = {
+    "bg": ("background-color", "--tw-bg-opacity", ""),
+    "text": ("color", "--tw-text-opacity", ""),
+    "border": ("border-color", "--tw-border-opacity", ""),
+    "border-t": ("border-top-color", "--tw-border-opacity", ""),
+    "border-b": ("border-bottom-color", "--tw-border-opacity", ""),
+    "border-l": ("border-left-color", "--tw-border-opacity", ""),
+    "border-r": ("border-right-color", "--tw-border-opacity", ""),
+    "ring": ("--tw-ring-color", "--tw-ring-opacity", ""),
+    "outline": ("outline-color", "", ""),
+    "decoration": ("text-decoration-color", "", ""),
+    "accent": ("accent-color", "", ""),
+    "caret": ("caret-color", "", ""),
+    "fill": ("fill", "", ""),
+    "stroke": ("stroke", "", ""),
+    "placeholder": ("color", "--tw-placeholder-opacity", "::placeholder"),
+    "divide": ("border-color", "--tw-divide-opacity", " > :not([hidden]) ~ :not([hidden])"),
+}
+
+SPACE_SUFFIX = " > :not([hidden]) ~ :not([hidden])"
+
+TRANSFORM = ("translate(var(--tw-translate-x, 0), var(--tw-translate-y, 0)) rotate(var(--tw-rotate, 0)) "
+             "skewX(var(--tw-skew-x, 0)) skewY(var(--tw-skew-y, 0)) "
+             "scaleX(var(--tw-scale-x, 1)) scaleY(var(--tw-scale-y, 1))")
+
+EASE = "cubic-bezier(0.4, 0, 0.2, 1)"
+
+PSEUDO_VARIANTS = {
+    "hover": ":hover", "focus": ":focus", "active": ":active", "visited": ":visited",
+    "focus-within": ":focus-within", "focus-visible": ":focus-visible", "disabled": ":disabled",
+    "checked": ":checked", "required": ":required", "invalid": ":invalid",
+    "first": ":first-child", "last": ":last-child", "only": ":only-child",
+    "odd": ":nth-child(odd)", "even": ":nth-child(even)", "empty": ":empty",
+    "placeholder": "::placeholder", "before": "::before", "after": "::after",
+    "selection": "::selection", "first-letter": "::first-letter", "first-line": "::first-line",
+}
+
+MEDIA_VARIANTS = {
+    **{name: f"(min-width: {width})" for name, width in BREAKPOINTS.items()},
+    "dark": "(prefers-color-scheme: dark)",
+    "motion-safe": "(prefers-reduced-motion: no-preference)",
+    "motion-reduce": "(prefers-reduced-motion: reduce)",
+    "portrait": "(orientation: portrait)",
+    "landscape": "(orientation: landscape)",
+    "print": "print",
+}
+
+RUNTIME_DIRECTIVES = ("@tailwind", "@layer", "@config", "@screen", "@variants", "theme(", "screen(")
+
+
+def _num(value: float) -> str:
+    return f"{value:.6f}".rstrip("0").rstrip(".")
+
+
+@lru_cache(maxsize=1)
+def spacing_scale() -> dict:
+    scale = {"0": "0px", "px": "1px"}
+    scale.update({_num(step): f"{_num(step * 0.25)}rem" for step in SPACING_STEPS})
+    return scale
+
+
+def _fractions(denominators=(2, 3, 4, 5, 6)) -> dict:
+    return {f"{a}/{b}": f"{_num(a / b * 100)}%" for b in denominators for a in range(1, b)}
+
+
+def _negate(value: str) -> str:
+    return value if value in ("0px", "0", "0deg") else f"-{value}" if not value.startswith("calc") else f"calc({value} * -1)"
+
+
+@lru_cache(maxsize=None)
+def palette() -> dict:
+    """color name -> hex, e.g. "blue-500" -> "#3b82f6" (plus white/black)"""
+    colors = {"white": "#ffffff", "black": "#000000"}
+    for name, values in PALETTE.items():
+        for step, value in zip(PALETTE_STEPS, values.split()):
+            colors[f"{name}-{step}"] = f"#{value}"
+    return colors
+
+
+def _rgb(hex_color: str) -> Optional[str]:
+    value = hex_color.lstrip("#")
+    if len(value) == 3:
+        value = "".join(ch * 2 for ch in value)
+    if not re.fullmatch(r"[0-9a-fA-F]{6}", value):
+        return None
+    return " ".join(str(int(value[i:i + 2], 16)) for i in (0, 2, 4))
+
+
+def color_decls(prefix: str, color: str, alpha: Optional[str] = None) -> list:
+    """Declarations of a color utility (`color` is a hex or a CSS keyword)"""
+    prop, opacity_var, _ = COLOR_UTILITIES[prefix]
+    rgb = _rgb(color) if color.startswith("#") else None
+    if rgb is None:
+        return [f"{prop}: {color}"]
+    if alpha is not None:
+        return [f"{prop}: rgb({rgb} / {alpha})"]
+    if opacity_var:
+        return [f"{opacity_var}: 1", f"{prop}: rgb({rgb} / var({opacity_var}))"]
+    return [f"{prop}: {color}"]
+
+
+def gradient_decls(stop: str, color: str, alpha: Optional[str] = None) -> list:
+    rgb = _rgb(color) if color.startswith("#") else None
+    value = f"rgb({rgb} / {alpha})" if rgb and alpha is not None else color
+    clear = f"rgb({rgb} / 0)" if rgb else "rgb(255 255 255 / 0)"
+    if stop == "from":
+        return [f"--tw-gradient-from: {value}", f"--tw-gradient-to: {clear}",
+                "--tw-gradient-stops: var(--tw-gradient-from), var(--tw-gradient-to)"]
+    if stop == "via":
+        return [f"--tw-gradient-to: {clear}",
+                f"--tw-gradient-stops: var(--tw-gradient-from), {value}, var(--tw-gradient-to)"]
+    return [f"--tw-gradient-to: {value}"]
+
+
+# ============================================
+# 🗂️ UTILITY TABLE
+# ============================================
+
+SPACING_UTILITIES = {
+    "p": ("padding",), "px": ("padding-left", "padding-right"), "py": ("padding-top", "padding-bottom"),
+    "pt": ("padding-top",), "pr": ("padding-right",), "pb": ("padding-bottom",), "pl": ("padding-left",),
+    "m": ("margin",), "mx": ("margin-left", "margin-right"), "my": ("margin-top", "margin-bottom"),
+    "mt": ("margin-top",), "mr": ("margin-right",), "mb": ("margin-bottom",), "ml": ("margin-left",),
+    "gap": ("gap",), "gap-x": ("column-gap",), "gap-y": ("row-gap",),
+    "inset": ("top", "right", "bottom", "left"), "inset-x": ("left", "right"), "inset-y": ("top", "bottom"),
+    "top": ("top",), "right": ("right",), "bottom": ("bottom",), "left": ("left",),
+    "w": ("width",), "h": ("height",), "max-h": ("max-height",), "min-h": ("min-height",),
+    "scroll-m": ("scroll-margin",), "scroll-p": ("scroll-padding",),
+}
+
+NEGATABLE = ("m", "mx", "my", "mt", "mr", "mb", "ml", "inset", "inset-x", "inset-y", "top", "right", "bottom", "left")
+
+FONT_SIZES = {
+    "xs": ("0.75rem", "1rem"), "sm": ("0.875rem", "1.25rem"), "base": ("1rem", "1.5rem"),
+    "lg": ("1.125rem", "1.75rem"), "xl": ("1.25rem", "1.75rem"), "2xl": ("1.5rem", "2rem"),
+    "3xl": ("1.875rem", "2.25rem"), "4xl": ("2.25rem", "2.5rem"), "5xl": ("3rem", "1"),
+    "6xl": ("3.75rem", "1"), "7xl": ("4.5rem", "1"), "8xl": ("6rem", "1"), "9xl": ("8rem", "1"),
+}
+
+FONT_WEIGHTS = {"thin": 100, "extralight": 200, "light": 300, "normal": 400, "medium": 500,
+                "semibold": 600, "bold": 700, "extrabold": 800, "black": 900}
+
+FONT_FAMILIES = {
+    "sans": 'ui-sans-serif, system-ui, sans-serif, "Apple Color Emoji", "Segoe UI Emoji", "Segoe UI Symbol", "Noto Color Emoji"',
+    "serif": 'ui-serif, Georgia, Cambria, "Times New Roman", Times, serif',
+    "mono": 'ui-monospace, SFMono-Regular, Menlo, Monaco, Consolas, "Liberation Mono", "Courier New", monospace',
+}
+
+MAX_WIDTHS = {
+    "0": "0rem", "none": "none", "xs": "20rem", "sm": "24rem", "md": "28rem", "lg": "32rem", "xl": "36rem",
+    "2xl": "42rem", "3xl": "48rem", "4xl": "56rem", "5xl": "64rem", "6xl": "72rem", "7xl": "80rem",
+    "full": "100%", "min": "min-content", "max": "max-content", "fit": "fit-content", "prose": "65ch",
+    **{f"screen-{name}": width for name, width in BREAKPOINTS.items()},
+}
+
+RADII = {"none": "0px", "sm": "0.125rem", "": "0.25rem", "md": "0.375rem", "lg": "0.5rem",
+         "xl": "0.75rem", "2xl": "1rem", "3xl": "1.5rem", "full": "9999px"}
+
+RADIUS_SIDES = {
+    "": ("border-radius",),
+    "t": ("border-top-left-radius", "border-top-right-radius"),
+    "r": ("border-top-right-radius", "border-bottom-right-radius"),
+    "b": ("border-bottom-right-radius", "border-bottom-left-radius"),
+    "l": ("border-top-left-radius", "border-bottom-left-radius"),
+    "tl": ("border-top-left-radius",), "tr": ("border-top-right-radius",),
+    "br": ("border-bottom-right-radius",), "bl": ("border-bottom-left-radius",),
+}
+
+BORDER_SIDES = {
+    "": ("border-width",), "x": ("border-left-width", "border-right-width"),
+    "y": ("border-top-width", "border-bottom-width"), "t": ("border-top-width",),
+    "r": ("border-right-width",), "b": ("border-bottom-width",), "l": ("border-left-width",),
+}
+
+SHADOWS = {
+    "sm": "0 1px 2px 0 rgb(0 0 0 / 0.05)",
+    "": "0 1px 3px 0 rgb(0 0 0 / 0.1), 0 1px 2px -1px rgb(0 0 0 / 0.1)",
+    "md": "0 4px 6px -1px rgb(0 0 0 / 0.1), 0 2px 4px -2px rgb(0 0 0 / 0.1)",
+    "lg": "0 10px 15px -3px rgb(0 0 0 / 0.1), 0 4px 6px -4px rgb(0 0 0 / 0.1)",
+    "xl": "0 20px 25px -5px rgb(0 0 0 / 0.1), 0 8px 10px -6px rgb(0 0 0 / 0.1)",
+    "2xl": "0 25px 50px -12px rgb(0 0 0 / 0.25)",
+    "inner": "inset 0 2px 4px 0 rgb(0 0 0 / 0.05)",
+    "none": "0 0 #0000",
+}
+
+BLURS = {"none": "0", "sm": "4px", "": "8px", "md": "12px", "lg": "16px", "xl": "24px", "2xl": "40px", "3xl": "64px"}
+
+TRANSITIONS = {
+    "": "color, background-color, border-color, text-decoration-color, fill, stroke, opacity, box-shadow, transform, filter, backdrop-filter",
+    "all": "all",
+    "colors": "color, background-color, border-color, text-decoration-color, fill, stroke",
+    "opacity": "opacity", "shadow": "box-shadow", "transform": "transform",
+}
+
+GRADIENT_DIRECTIONS = {"t": "top", "tr": "top right", "r": "right", "br": "bottom right",
+                       "b": "bottom", "bl": "bottom left", "l": "left", "tl": "top left"}
+
+STATIC_UTILITIES = {
+    # Display / position / visibility
+    **{name: [f"display: {name}"] for name in ("block", "inline-block", "inline", "flex", "inline-flex", "grid",
+                                               "inline-grid", "table", "table-row", "table-cell", "contents",
+                                               "flow-root", "list-item")},
+    "hidden": ["display: none"],
+    **{name: [f"position: {name}"] for name in ("static", "fixed", "absolute", "relative", "sticky")},
+    "visible": ["visibility: visible"], "invisible": ["visibility: hidden"],
+    "sr-only": ["position: absolute", "width: 1px", "height: 1px", "padding: 0", "margin: -1px",
+                "overflow: hidden", "clip: rect(0, 0, 0, 0)", "white-space: nowrap", "border-width: 0"],
+    "isolate": ["isolation: isolate"],
+    "box-border": ["box-sizing: border-box"], "box-content": ["box-sizing: content-box"],
+    # Flexbox / grid
+    "flex-1": ["flex: 1 1 0%"], "flex-auto": ["flex: 1 1 auto"], "flex-initial": ["flex: 0 1 auto"],
+    "flex-none": ["flex: none"],
+    "flex-row": ["flex-direction: row"], "flex-row-reverse": ["flex-direction: row-reverse"],
+    "flex-col": ["flex-direction: column"], "flex-col-reverse": ["flex-direction: column-reverse"],
+    "flex-wrap": ["flex-wrap: wrap"], "flex-wrap-reverse": ["flex-wrap: wrap-reverse"],
+    "flex-nowrap": ["flex-wrap: nowrap"],
+    "grow": ["flex-grow: 1"], "grow-0": ["flex-grow: 0"], "flex-grow": ["flex-grow: 1"], "flex-grow-0": ["flex-grow: 0"],
+    "shrink": ["flex-shrink: 1"], "shrink-0": ["flex-shrink: 0"], "flex-shrink": ["flex-shrink: 1"],
+    "flex-shrink-0": ["flex-shrink: 0"],
+    "items-start": ["align-items: flex-start"], "items-end": ["align-items: flex-end"],
+    "items-center": ["align-items: center"], "items-baseline": ["align-items: baseline"],
+    "items-stretch": ["align-items: stretch"],
+    "justify-start": ["justify-content: flex-start"], "justify-end": ["justify-content: flex-end"],
+    "justify-center": ["justify-content: center"], "justify-between": ["justify-content: space-between"],
+    "justify-around": ["justify-content: space-around"], "justify-evenly": ["justify-content: space-evenly"],
+    "justify-stretch": ["justify-content: stretch"],
+    "justify-items-start": ["justify-items: start"], "justify-items-end": ["justify-items: end"],
+    "justify-items-center": ["justify-items: center"], "justify-items-stretch": ["justify-items: stretch"],
+    "content-start": ["align-content: flex-start"], "content-end": ["align-content: flex-end"],
+    "content-center": ["align-content: center"], "content-between": ["align-content: space-between"],
+    "content-around": ["align-content: space-around"], "content-evenly": ["align-content: space-evenly"],
+    "self-auto": ["align-self: auto"], "self-start": ["align-self: flex-start"], "self-end": ["align-self: flex-end"],
+    "self-center": ["align-self: center"], "self-stretch": ["align-self: stretch"], "self-baseline": ["align-self: baseline"],
+    "place-items-center": ["place-items: center"], "place-content-center": ["place-content: center"],
+    "place-self-center": ["place-self: center"],
+    "order-first": ["order: -9999"], "order-last": ["order: 9999"], "order-none": ["order: 0"],
+    "grid-cols-none": ["grid-template-columns: none"], "grid-rows-none": ["grid-template-rows: none"],
+    "col-auto": ["grid-column: auto"], "col-span-full": ["grid-column: 1 / -1"],
+    "row-auto": ["grid-row: auto"], "row-span-full": ["grid-row: 1 / -1"],
+    "grid-flow-row": ["grid-auto-flow: row"], "grid-flow-col": ["grid-auto-flow: column"],
+    "grid-flow-dense": ["grid-auto-flow: dense"],
+    "auto-cols-fr": ["grid-auto-columns: minmax(0, 1fr)"], "auto-rows-fr": ["grid-auto-rows: minmax(0, 1fr)"],
+    # Typography
+    "text-left": ["text-align: left"], "text-center": ["text-align: center"], "text-right": ["text-align: right"],
+    "text-justify": ["text-align: justify"], "text-start": ["text-align: start"], "text-end": ["text-align: end"],
+    "uppercase": ["text-transform: uppercase"], "lowercase": ["text-transform: lowercase"],
+    "capitalize": ["text-transform: capitalize"], "normal-case": ["text-transform: none"],
+    "italic": ["font-style: italic"], "not-italic": ["font-style: normal"],
+    "underline": ["text-decoration-line: underline"], "overline": ["text-decoration-line: overline"],
+    "line-through": ["text-decoration-line: line-through"], "no-underline": ["text-decoration-line: none"],
+    "antialiased": ["-webkit-font-smoothing: antialiased", "-moz-osx-font-smoothing: grayscale"],
+    "truncate": ["overflow: hidden", "text-overflow: ellipsis", "white-space: nowrap"],
+    "text-ellipsis": ["text-overflow: ellipsis"], "text-clip": ["text-overflow: clip"],
+    "break-normal": ["overflow-wrap: normal", "word-break: normal"], "break-words": ["overflow-wrap: break-word"],
+    "break-all": ["word-break: break-all"],
+    **{f"whitespace-{v}": [f"white-space: {v}"] for v in ("normal", "nowrap", "pre", "pre-line", "pre-wrap", "break-spaces")},
+    "list-none": ["list-style-type: none"], "list-disc": ["list-style-type: disc"],
+    "list-decimal": ["list-style-type: decimal"],
+    "list-inside": ["list-style-position: inside"], "list-outside": ["list-style-position: outside"],
+    **{f"align-{v}": [f"vertical-align: {v}"] for v in ("baseline", "top", "middle", "bottom", "text-top", "text-bottom")},
+    # Overflow / objects
+    **{f"overflow-{v}": [f"overflow: {v}"] for v in ("auto", "hidden", "clip", "visible", "scroll")},
+    **{f"overflow-{axis}-{v}": [f"overflow-{axis}: {v}"] for axis in ("x", "y")
+       for v in ("auto", "hidden", "clip", "visible", "scroll")},
+    **{f"object-{v}": [f"object-fit: {v}"] for v in ("contain", "cover", "fill", "none", "scale-down")},
+    **{f"object-{v}": [f"object-position: {v}"] for v in ("center", "top", "bottom", "left", "right")},
+    "aspect-auto": ["aspect-ratio: auto"], "aspect-square": ["aspect-ratio: 1 / 1"],
+    "aspect-video": ["aspect-ratio: 16 / 9"],
+    # Backgrounds
+    "bg-fixed": ["background-attachment: fixed"], "bg-local": ["background-attachment: local"],
+    "bg-scroll": ["background-attachment: scroll"],
+    "bg-cover": ["background-size: cover"], "bg-contain": ["background-size: contain"], "bg-auto": ["background-size: auto"],
+    "bg-center": ["background-position: center"], "bg-top": ["background-position: top"],
+    "bg-bottom": ["background-position: bottom"],
+    "bg-no-repeat": ["background-repeat: no-repeat"], "bg-repeat": ["background-repeat: repeat"],
+    "bg-clip-text": ["-webkit-background-clip: text", "background-clip: text"],
+    "bg-none": ["background-image: none"],
+    # Borders
+    "border-solid": ["border-style: solid"], "border-dashed": ["border-style: dashed"],
+    "border-dotted": ["border-style: dotted"], "border-double": ["border-style: double"],
+    "border-none": ["border-style: none"],
+    "border-collapse": ["border-collapse: collapse"], "border-separate": ["border-collapse: separate"],
+    "outline-none": ["outline: 2px solid transparent", "outline-offset: 2px"],
+    "outline": ["outline-style: solid"], "outline-dashed": ["outline-style: dashed"],
+    # Interactivity
+    **{f"cursor-{v}": [f"cursor: {v}"] for v in ("auto", "default", "pointer", "wait", "text", "move", "help",
+                                                  "not-allowed", "none", "grab", "grabbing", "zoom-in", "zoom-out")},
+    "pointer-events-none": ["pointer-events: none"], "pointer-events-auto": ["pointer-events: auto"],
+    **{f"select-{v}": ["-webkit-user-select: " + v, "user-select: " + v] for v in ("none", "text", "all", "auto")},
+    "resize": ["resize: both"], "resize-none": ["resize: none"], "resize-x": ["resize: horizontal"],
+    "resize-y": ["resize: vertical"],
+    "appearance-none": ["-webkit-appearance: none", "appearance: none"],
+    "scroll-smooth": ["scroll-behavior: smooth"], "scroll-auto": ["scroll-behavior: auto"],
+    # Transforms / transitions
+    "transform": [], "transform-gpu": [], "transform-none": ["transform: none"],
+    **{f"origin-{v}": [f"transform-origin: {v.replace('-', ' ')}"] for v in
+       ("center", "top", "top-right", "right", "bottom-right", "bottom", "bottom-left", "left", "top-left")},
+    "transition-none": ["transition-property: none"],
+    "ease-linear": ["transition-timing-function: linear"],
+    "ease-in": ["transition-timing-function: cubic-bezier(0.4, 0, 1, 1)"],
+    "ease-out": ["transition-timing-function: cubic-bezier(0, 0, 0.2, 1)"],
+    "ease-in-out": [f"transition-timing-function: {EASE}"],
+    "animate-none": ["animation: none"],
+    "filter": [], "filter-none": ["filter: none"], "backdrop-filter": [],
+    "grayscale": ["filter: grayscale(100%)"], "grayscale-0": ["filter: grayscale(0)"],
+    "mix-blend-multiply": ["mix-blend-mode: multiply"], "mix-blend-overlay": ["mix-blend-mode: overlay"],
+    "mix-blend-screen": ["mix-blend-mode: screen"],
+}
+
+
+@lru_cache(maxsize=1)
+def utility_table() -> dict:
+    """
+    class name -> (selector suffix, [declarations]), built once.
+    ~5k entries; lookups are a single dict get.
+    """
+    table = {name: ("", decls) for name, decls in STATIC_UTILITIES.items()}
+    spacing = spacing_scale()
+
+    def add(name, decls, suffix=""):
+        table[name] = (suffix, list(decls))
+
+    # Spacing / sizing / inset
+    extras = {
+        "w": {**_fractions((2, 3, 4, 5, 6, 12)), "auto": "auto", "full": "100%", "screen": "100vw",
+              "min": "min-content", "max": "max-content", "fit": "fit-content"},
+        "h": {**_fractions(), "auto": "auto", "full": "100%", "screen": "100vh",
+              "min": "min-content", "max": "max-content", "fit": "fit-content"},
+        "max-h": {"none": "none", "full": "100%", "screen": "100vh", "fit": "fit-content"},
+        "min-h": {"full": "100%", "screen": "100vh", "fit": "fit-content"},
+    }
+    for prefix, props in SPACING_UTILITIES.items():
+        values = dict(spacing)
+        if prefix in ("m", "mx", "my", "mt", "mr", "mb", "ml"):
+            values["auto"] = "auto"
+        if prefix.startswith(("inset", "top", "right", "bottom", "left")):
+            values.update({"auto": "auto", "full": "100%", **_fractions((2, 3, 4))})
+        if prefix in ("min-h",):
+            values = {"0": "0px"}
+        values.update(extras.get(prefix, {}))
+        for key, value in values.items():
+            add(f"{prefix}-{key}", (f"{prop}: {value}" for prop in props))
+            if prefix in NEGATABLE and value not in ("auto", "0px"):
+                add(f"-{prefix}-{key}", (f"{prop}: {_negate(value)}" for prop in props))
+    for key, value in {"0": "0px", "full": "100%", "min": "min-content", "max": "max-content",
+                       "fit": "fit-content", "screen": "100vw"}.items():
+        add(f"min-w-{key}", [f"min-width: {value}"])
+    for key, value in MAX_WIDTHS.items():
+        add(f"max-w-{key}", [f"max-width: {value}"])
+    for key, value in spacing.items():
+        add(f"size-{key}", [f"width: {value}", f"height: {value}"])
+        add(f"space-x-{key}", ["--tw-space-x-reverse: 0",
+                               f"margin-right: calc({value} * var(--tw-space-x-reverse))",
+                               f"margin-left: calc({value} * calc(1 - var(--tw-space-x-reverse)))"], SPACE_SUFFIX)
+        add(f"space-y-{key}", ["--tw-space-y-reverse: 0",
+                               f"margin-top: calc({value} * calc(1 - var(--tw-space-y-reverse)))",
+                               f"margin-bottom: calc({value} * var(--tw-space-y-reverse))"], SPACE_SUFFIX)
+        add(f"-space-x-{key}", [f"margin-left: {_negate(value)}"], SPACE_SUFFIX)
+        add(f"-space-y-{key}", [f"margin-top: {_negate(value)}"], SPACE_SUFFIX)
+
+    # Translate / scale / rotate (composed through --tw-* variables)
+    for axis in ("x", "y"):
+        for key, value in {**spacing, **_fractions((2, 3, 4)), "full": "100%"}.items():
+            add(f"translate-{axis}-{key}", [f"--tw-translate-{axis}: {value}", f"transform: {TRANSFORM}"])
+            add(f"-translate-{axis}-{key}", [f"--tw-translate-{axis}: {_negate(value)}", f"transform: {TRANSFORM}"])
+    for step in (0, 50, 75, 90, 95, 100, 105, 110, 125, 150):
+        scale = _num(step / 100)
+        add(f"scale-{step}", [f"--tw-scale-x: {scale}", f"--tw-scale-y: {scale}", f"transform: {TRANSFORM}"])
+        for axis in ("x", "y"):
+            add(f"scale-{axis}-{step}", [f"--tw-scale-{axis}: {scale}", f"transform: {TRANSFORM}"])
+    for deg in (0, 1, 2, 3, 6, 12, 45, 90, 180):
+        add(f"rotate-{deg}", [f"--tw-rotate: {deg}deg", f"transform: {TRANSFORM}"])
+        add(f"-rotate-{deg}", [f"--tw-rotate: -{deg}deg", f"transform: {TRANSFORM}"])
+
+    # Typography
+    for key, (size, line_height) in FONT_SIZES.items():
+        add(f"text-{key}", [f"font-size: {size}", f"line-height: {line_height}"])
+    for key, weight in FONT_WEIGHTS.items():
+        add(f"font-{key}", [f"font-weight: {weight}"])
+    for key, family in FONT_FAMILIES.items():
+        add(f"font-{key}", [f"font-family: {family}"])
+    leading = {"none": "1", "tight": "1.25", "snug": "1.375", "normal": "1.5", "relaxed": "1.625", "loose": "2"}
+    leading.update({str(n): f"{_num(n * 0.25)}rem" for n in range(3, 11)})
+    for key, value in leading.items():
+        add(f"leading-{key}", [f"line-height: {value}"])
+    for key, value in {"tighter": "-0.05em", "tight": "-0.025em", "normal": "0em", "wide": "0.025em",
+                       "wider": "0.05em", "widest": "0.1em"}.items():
+        add(f"tracking-{key}", [f"letter-spacing: {value}"])
+    for n in range(1, 7):
+        add(f"line-clamp-{n}", ["overflow: hidden", "display: -webkit-box", "-webkit-box-orient: vertical",
+                                f"-webkit-line-clamp: {n}"])
+
+    # Colors
+    colors = {**palette(), "transparent": "transparent", "current": "currentColor", "inherit": "inherit"}
+    for prefix, (_, _, suffix) in COLOR_UTILITIES.items():
+        for name, value in colors.items():
+            add(f"{prefix}-{name}", color_decls(prefix, value), suffix)
+    for stop in ("from", "via", "to"):
+        for name, value in colors.items():
+            add(f"{stop}-{name}", gradient_decls(stop, value))
+    for key, direction in GRADIENT_DIRECTIONS.items():
+        add(f"bg-gradient-to-{key}", [f"background-image: linear-gradient(to {direction}, var(--tw-gradient-stops))"])
 
+    # Opacity
+    for step in range(0, 101, 5):
+        value = _num(step / 100)
+        add(f"opacity-{step}", [f"opacity: {value}"])
+        for prefix in ("bg", "text", "border", "placeholder", "ring"):
+            _, opacity_var, suffix = COLOR_UTILITIES[prefix]
+            add(f"{prefix}-opacity-{step}", [f"{opacity_var}: {value}"], suffix)
+
+    # Borders / radius / rings / shadows
+    for side, props in BORDER_SIDES.items():
+        for width in ("", "0", "2", "4", "8"):
+            name = "-".join(part for part in ("border", side, width) if part)
+            add(name, (f"{prop}: {width or 1}px" for prop in props))
+    for side, props in RADIUS_SIDES.items():
+        for key, value in RADII.items():
+            name = "-".join(part for part in ("rounded", side, key) if part)
+            add(name, (f"{prop}: {value}" for prop in props))
+    for width in ("", "0", "1", "2", "4", "8"):
+        add("-".join(part for part in ("ring", width) if part),
+            [f"box-shadow: 0 0 0 {width or 3}px var(--tw-ring-color, rgb(59 130 246 / 0.5))"])
+    add("ring-inset", ["--tw-ring-inset: inset"])
+    for key, value in SHADOWS.items():
+        add("-".join(part for part in ("shadow", key) if part), [f"box-shadow: {value}"])
+    for key, value in BLURS.items():
+        add("-".join(part for part in ("blur", key) if part), [f"filter: blur({value})"])
+        add("-".join(part for part in ("backdrop-blur", key) if part),
+            [f"-webkit-backdrop-filter: blur({value})", f"backdrop-filter: blur({value})"])
+
+    # Grid / order / z-index
+    for n in range(1, 13):
+        add(f"grid-cols-{n}", [f"grid-template-columns: repeat({n}, minmax(0, 1fr))"])
+        add(f"col-span-{n}", [f"grid-column: span {n} / span {n}"])
+        add(f"order-{n}", [f"order: {n}"])
+    for n in range(1, 14):
+        add(f"col-start-{n}", [f"grid-column-start: {n}"])
+        add(f"col-end-{n}", [f"grid-column-end: {n}"])
+    for n in range(1, 7):
+        add(f"grid-rows-{n}", [f"grid-template-rows: repeat({n}, minmax(0, 1fr))"])
+        add(f"row-span-{n}", [f"grid-row: span {n} / span {n}"])
+    for z in ("0", "10", "20", "30", "40", "50", "auto"):
+        add(f"z-{z}", [f"z-index: {z}"])
+        if z != "auto" and z != "0":
+            add(f"-z-{z}", [f"z-index: -{z}"])
 
-# Mapping of common Tailwind classes to CSS
-TAILWIND_TO_CSS = {
-    # Padding
-    r'px-(\d+)': lambda m: f'padding-left: {int(m.group(1)) * 0.25}rem; padding-right: {int(m.group(1)) * 0.25}rem;',
-    r'py-(\d+)': lambda m: f'padding-top: {int(m.group(1)) * 0.25}rem; padding-bottom: {int(m.group(1)) * 0.25}rem;',
-    r'p-(\d+)': lambda m: f'padding: {int(m.group(1)) * 0.25}rem;',
-    
-    # Margin
-    r'mx-auto': lambda m: 'margin-left: auto; margin-right: auto;',
-    r'mb-(\d+)': lambda m: f'margin-bottom: {int(m.group(1)) * 0.25}rem;',
-    r'mt-(\d+)': lambda m: f'margin-top: {int(m.group(1)) * 0.25}rem;',
-    
-    # Flex
-    r'flex': lambda m: 'display: flex;',
-    r'flex-1': lambda m: 'flex: 1 1 0%;',
-    r'flex-col': lambda m: 'flex-direction: column;',
-    r'flex-row': lambda m: 'flex-direction: row;',
-    r'flex-row-reverse': lambda m: 'flex-direction: row-reverse;',
-    r'items-center': lambda m: 'align-items: center;',
-    r'justify-between': lambda m: 'justify-content: space-between;',
-    r'space-x-(\d+)': lambda m: f'gap: {int(m.group(1)) * 0.25}rem;',
-    
-    # Width/Height
-    r'w-full': lambda m: 'width: 100%;',
-    r'w-64': lambda m: 'width: 16rem;',
-    r'h-screen': lambda m: 'height: 100vh;',
-    r'max-w-2xl': lambda m: 'max-width: 42rem;',
-    
-    # Border
-    r'rounded-lg': lambda m: 'border-radius: 0.5rem;',
-    r'rounded-full': lambda m: 'border-radius: 9999px;',
-    r'border-t': lambda m: 'border-top-width: 1px;',
-    r'border-gray-300': lambda m: 'border-color: #d1d5db;',
-    
-    # Background
-    r'bg-gray-100': lambda m: 'background-color: #f3f4f6;',
-    r'bg-gray-200': lambda m: 'background-color: #e5e7eb;',
-    r'bg-white': lambda m: 'background-color: #ffffff;',
-    r'bg-opacity-20': lambda m: 'background-color: rgba(255, 255, 255, 0.2);',
-    
-    # Text
-    r'text-lg': lambda m: 'font-size: 1.125rem; line-height: 1.75rem;',
-    r'text-xl': lambda m: 'font-size: 1.25rem; line-height: 1.75rem;',
-    r'text-2xl': lambda m: 'font-size: 1.5rem; line-height: 2rem;',
-    r'text-xs': lambda m: 'font-size: 0.75rem; line-height: 1rem;',
-    r'text-white': lambda m: 'color: #ffffff;',
-    r'text-gray-500': lambda m: 'color: #6b7280;',
-    r'font-bold': lambda m: 'font-weight: 700;',
-    r'font-semibold': lambda m: 'font-weight: 600;',
-    
     # Transitions
-    r'transition-all': lambda m: 'transition-property: all;',
-    r'duration-300': lambda m: 'transition-duration: 300ms;',
-    r'ease-in-out': lambda m: 'transition-timing-function: cubic-bezier(0.4, 0, 0.2, 1);',
-    
-    # Transform
-    r'transform': lambda m: '',  # Already implied
-    r'hover:scale-105': lambda m: '',  # Handle separately
-    r'hover:bg-opacity-90': lambda m: '',  # Handle separately
-    
-    # Overflow
-    r'overflow-y-auto': lambda m: 'overflow-y: auto;',
-    r'overflow-x-auto': lambda m: 'overflow-x: auto;',
-    
-    # Cursor
-    r'cursor-pointer': lambda m: 'cursor: pointer;',
+    for key, props in TRANSITIONS.items():
+        name = "-".join(part for part in ("transition", key) if part)
+        add(name, [f"transition-property: {props}", f"transition-timing-function: {EASE}",
+                   "transition-duration: 150ms"])
+    for ms in (0, 75, 100, 150, 200, 300, 500, 700, 1000):
+        add(f"duration-{ms}", [f"transition-duration: {ms}ms"])
+        add(f"delay-{ms}", [f"transition-delay: {ms}ms"])
+
+    return table
+
+
+# ============================================
+# 🔍 CLASS RESOLUTION
+# ============================================
+
+ARBITRARY_PROPERTIES = {
+    **{prefix: props for prefix, props in SPACING_UTILITIES.items()},
+    "min-w": ("min-width",), "max-w": ("max-width",), "size": ("width", "height"),
+    "leading": ("line-height",), "tracking": ("letter-spacing",), "z": ("z-index",),
+    "opacity": ("opacity",), "duration": ("transition-duration",), "delay": ("transition-delay",),
+    "rounded": ("border-radius",), "shadow": ("box-shadow",), "grid-cols": ("grid-template-columns",),
+    "grid-rows": ("grid-template-rows",), "aspect": ("aspect-ratio",), "content": ("content",),
+    "translate-x": ("--tw-translate-x",), "translate-y": ("--tw-translate-y",), "rotate": ("--tw-rotate",),
+    "blur": ("filter",), "font": ("font-family",), "basis": ("flex-basis",), "flex": ("flex",),
+    "order": ("order",),
 }
 
+COLOR_VALUE_RE = re.compile(r"^(#[0-9a-fA-F]{3,8}|(?:rgb|rgba|hsl|hsla|oklch|color-mix)\(.*\)|var\(--.*\))$")
+
+
+def _split_variants(cls: str) -> list:
+    """hover:md:bg-[url(a:b)] -> ["hover", "md", "bg-[url(a:b)]"]"""
+    parts, depth, start = [], 0, 0
+    for i, ch in enumerate(cls):
+        if ch == "[":
+            depth += 1
+        elif ch == "]":
+            depth -= 1
+        elif ch == ":" and depth == 0:
+            parts.append(cls[start:i])
+            start = i + 1
+    parts.append(cls[start:])
+    return parts
+
+
+def _arbitrary(utility: str) -> Optional[tuple]:
+    match = re.fullmatch(r"(-?)([a-z][a-z0-9-]*?)-\[(.+)\]", utility)
+    if not match:
+        return None
+    negative, prefix, value = match.groups()
+    value = value.replace("_", " ")
+    if negative:
+        value = f"calc({value} * -1)"
+    is_color = bool(COLOR_VALUE_RE.match(value))
+    if prefix == "bg" and value.startswith("url("):
+        return "", [f"background-image: {value}"]
+    if prefix in ("from", "via", "to") and is_color:
+        return "", gradient_decls(prefix, value)
+    if prefix in COLOR_UTILITIES and (is_color or prefix not in ("text", "border")):
+        return COLOR_UTILITIES[prefix][2], color_decls(prefix, value)
+    if prefix == "text":
+        return "", [f"font-size: {value}"]
+    if prefix == "border":
+        return "", [f"border-width: {value}"]
+    if prefix in ("translate-x", "translate-y", "rotate"):
+        return "", [f"{ARBITRARY_PROPERTIES[prefix][0]}: {value}", f"transform: {TRANSFORM}"]
+    if prefix == "blur":
+        return "", [f"filter: blur({value})"]
+    if prefix in ARBITRARY_PROPERTIES:
+        return "", [f"{prop}: {value}" for prop in ARBITRARY_PROPERTIES[prefix]]
+    return None
+
+
+def _with_alpha(utility: str) -> Optional[tuple]:
+    """bg-blue-500/50, text-white/80, from-indigo-600/20"""
+    match = re.fullmatch(r"([a-z-]+?)-([a-z]+(?:-\d+)?|\[[^\]]+\])/(\d+|\[[\d.]+\])", utility)
+    if not match:
+        return None
+    prefix, color, alpha = match.groups()
+    color = color[1:-1] if color.startswith("[") else palette().get(color)
+    if not color:
+        return None
+    alpha = alpha[1:-1] if alpha.startswith("[") else _num(int(alpha) / 100)
+    if prefix in ("from", "via", "to"):
+        return "", gradient_decls(prefix, color, alpha)
+    if prefix in COLOR_UTILITIES:
+        return COLOR_UTILITIES[prefix][2], color_decls(prefix, color, alpha)
+    return None
+
+
+def resolve_class(cls: str) -> Optional[dict]:
+    """
+    Resolve one class to {"media": [...], "selectors": [...], "suffix": str,
+    "decls": [...], "important": bool}; None if unknown.
+    """
+    parts = _split_variants(cls.strip())
+    utility, variants = parts[-1], parts[:-1]
+    important = utility.startswith("!")
+    utility = utility.lstrip("!")
+
+    media, selectors = [], []
+    for variant in variants:
+        if variant in MEDIA_VARIANTS:
+            media.append(MEDIA_VARIANTS[variant])
+        elif variant in PSEUDO_VARIANTS:
+            selectors.append(PSEUDO_VARIANTS[variant])
+        elif variant.startswith("group-") and variant[6:] in PSEUDO_VARIANTS:
+            selectors.append(f".group{PSEUDO_VARIANTS[variant[6:]]} &")
+        elif variant.startswith("peer-") and variant[5:] in PSEUDO_VARIANTS:
+            selectors.append(f".peer{PSEUDO_VARIANTS[variant[5:]]} ~ &")
+        else:
+            return None
+
+    found = utility_table().get(utility) or _arbitrary(utility) or _with_alpha(utility)
+    if found is None:
+        return None
+    suffix, decls = found
+    return {"media": media, "selectors": selectors, "suffix": suffix, "decls": list(decls), "important": important}
+
+
+def _apply_selector(selector: str, variants: list, suffix: str) -> str:
+    for variant in variants:
+        selector = variant.replace("&", selector) if "&" in variant else selector + variant
+    return selector + suffix
+
+
+def _split_selectors(selector: str) -> list:
+    parts, depth, start = [], 0, 0
+    for i, ch in enumerate(selector):
+        if ch in "([":
+            depth += 1
+        elif ch in ")]":
+            depth -= 1
+        elif ch == "," and depth == 0:
+            parts.append(selector[start:i].strip())
+            start = i + 1
+    parts.append(selector[start:].strip())
+    return [part for part in parts if part]
+
+
+def compile_apply(selector: str, classes: list, important: bool = False) -> tuple:
+    """
+    Compile the classes of one @apply for `selector`:
+        (base declarations, {(media, selector): declarations}, unresolved classes)
+    """
+    base, extra, unresolved = [], {}, []
+    for cls in classes:
+        utility = resolve_class(cls)
+        if utility is None:
+            unresolved.append(cls)
+            continue
+        decls = [d + " !important" if important or utility["important"] else d for d in utility["decls"]]
+        if not utility["media"] and not utility["selectors"] and not utility["suffix"]:
+            base.extend(decls)
+            continue
+        target = ", ".join(_apply_selector(s, utility["selectors"], utility["suffix"])
+                           for s in _split_selectors(selector))
+        extra.setdefault((" and ".join(utility["media"]), target), []).extend(decls)
+    return base, extra, unresolved
+
+
+# ============================================
+# 🔄 CONVERSION
+# ============================================
+
+APPLY_RE = re.compile(r"([ \t]*)@apply\s+([^;{}]+?)(?:\s*;|(?=\s*\})|\s*$)")
+RULE_RE = re.compile(r"(?P<lead>(?:\s|/\*.*?\*/)*)(?P<selector>[^{};]+?)\s*\{(?P<body>[^{}]*@apply[^{}]*)\}", re.DOTALL)
+
+
+def _apply_classes(text: str) -> tuple:
+    classes = text.split()
+    important = "!important" in classes
+    return [cls for cls in classes if cls != "!important"], important
+
 
 def convert_apply_line(apply_line):
-    """Convert a single @apply line to pure CSS"""
-    # Extract classes from @apply
-    classes = apply_line.replace('@apply', '').strip().rstrip(';').split()
-    
+    """Convert a single @apply line to pure CSS (variants need a rule, see convert_apply_in_css)"""
+    classes, important = _apply_classes(apply_line.replace('@apply', '').strip().rstrip(';'))
     css_properties = []
-    
     for cls in classes:
-        matched = False
-        for pattern, converter in TAILWIND_TO_CSS.items():
-            match = re.match(pattern + '$', cls)
-            if match:
-                result = converter(match)
-                if result:
-                    css_properties.append(result)
-                matched = True
-                break
-        
-        if not matched:
+        utility = resolve_class(cls)
+        if utility is None or utility["media"] or utility["selectors"] or utility["suffix"]:
             # Keep as comment for manual review
             css_properties.append(f'/* TODO: Convert {cls} */')
-    
+            continue
+        for decl in utility["decls"]:
+            important_flag = " !important" if important or utility["important"] else ""
+            css_properties.append(f"{decl}{important_flag};")
     return '\n            '.join(css_properties)
 
 
+def compile_stylesheet(css_content: str) -> tuple:
+    """
+    Convert all @apply rules of a stylesheet in one pass.
+    Returns (css, unresolved classes).
+    """
+    unresolved_all = []
+
+    def convert_rule(match):
+        lead, selector, body = match.group("lead"), match.group("selector"), match.group("body")
+        # Anything before the last comment/tag on the way (e.g. "<style>") belongs to the lead
+        boundaries = list(re.finditer(r"\*/|<[^<>]*>", selector))
+        cut = boundaries[-1].end() if boundaries else 0
+        lead, selector = lead + selector[:cut], selector[cut:]
+        lead += selector[:len(selector) - len(selector.lstrip())]
+        selector = selector.strip()
+        rule_indent = lead.rsplit("\n", 1)[-1] if "\n" in lead else ""
+        single_line = "\n" not in body.strip()
+        extras = {}
+
+        def convert_apply(apply_match):
+            indent = apply_match.group(1)
+            classes, important = _apply_classes(apply_match.group(2))
+            base, extra, unresolved = compile_apply(selector, classes, important)
+            unresolved_all.extend(unresolved)
+            for key, decls in extra.items():
+                extras.setdefault(key, []).extend(decls)
+            lines = [f"{decl};" for decl in base] + [f"/* TODO: Convert {cls} */" for cls in unresolved]
+            if single_line:
+                return indent + " ".join(lines)
+            return "\n".join(indent + line for line in lines)
+
+        body = APPLY_RE.sub(convert_apply, body)
+        rules = [f"{lead}{selector} {{{body}}}"]
+        inner = rule_indent + "    "
+        for (media, target), decls in extras.items():
+            block = "\n".join(f"{inner}{decl};" if not media else f"{inner}    {decl};" for decl in decls)
+            if media:
+                rules.append(f"\n{rule_indent}@media {media} {{\n{inner}{target} {{\n{block}\n{inner}}}\n{rule_indent}}}")
+            else:
+                rules.append(f"\n{rule_indent}{target} {{\n{block}\n{rule_indent}}}")
+        return "".join(rules)
+
+    css = RULE_RE.sub(convert_rule, css_content)
+    # @apply outside of a rule can't be placed anywhere; convert declarations only
+    if "@apply" in css:
+        css = APPLY_RE.sub(lambda m: m.group(1) + convert_apply_line(m.group(0)), css)
+    return css, list(dict.fromkeys(unresolved_all))
+
+
 def convert_apply_in_css(css_content):
     """Convert all @apply directives in CSS content"""
-    lines = css_content.split('\n')
-    result = []
-    
-    for line in lines:
-        if '@apply' in line:
-            indent = len(line) - len(line.lstrip())
-            converted = convert_apply_line(line)
-            result.append(' ' * indent + converted)
-        else:
-            result.append(line)
-    
-    return '\n'.join(result)
+    return compile_stylesheet(css_content)[0]
+
+
+def compile_tailwind_css(css_content: str) -> Optional[str]:
+    """
+    Pure CSS for a <style type="text/tailwindcss"> block, or None if it needs
+    the CDN's runtime compiler (theme(), @layer, unknown classes, ...).
+    """
+    if any(directive in css_content for directive in RUNTIME_DIRECTIVES):
+        return None
+    css, unresolved = compile_stylesheet(css_content)
+    return None if unresolved else css
 
 
 def main():
     print("🔄 Converting @apply to pure CSS...\n")
     print("This is a helper tool. Manual review recommended.")
     print("\nExample:")
-    print("  Input:  @apply px-6 py-3 rounded-full font-semibold;")
-    print("  Output: padding-left: 1.5rem; padding-right: 1.5rem;")
-    print("          padding-top: 0.75rem; padding-bottom: 0.75rem;")
-    print("          border-radius: 9999px;")
-    print("          font-weight: 600;")
+    example = ".btn {\n    @apply px-6 py-3 rounded-full font-semibold hover:bg-blue-700 md:px-8;\n}"
+    print("  Input:\n" + "\n".join(f"    {line}" for line in example.splitlines()))
+    print("  Output:\n" + "\n".join(f"    {line}" for line in convert_apply_in_css(example).splitlines()))
+    print(f"\n📚 {len(utility_table()):,} utilities in table")
 
 
 if __name__ == "__main__":
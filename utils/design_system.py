@@ -0,0 +1,196 @@
+"""
+GenLaravel Design System
+Shared look & feel extracted ONCE per job from the first draft and persisted
+to output/design_system.json, so later stages don't re-parse drafts:
+
+- draft agent     pages 2..n are assembled from the shared navbar/footer/CSS/JS
+- component agent navbar/footer components get their fragment, other
+                  components a body-only reference (no <head>/<style>/<script>)
+- layout agent    CSS/JS are injected from here instead of copied by the LLM
+- fix utilities   fix_layout_css / fix_layout_js / enforce_consistency
+
+Artifact:
+    {
+      "source_page": "home",
+      "navbar": "<nav>...</nav>",  "footer": "<footer>...</footer>",
+      "css": "...", "js": "...", "tailwind_config": "tailwind.config = {...}",
+      "tokens": {"--primary": "#2563eb"},
+      "head_assets": ["<script src=...>", "<link ...>"],
+      "body_class": "bg-gray-50",
+      "nav_links": [{"href": "#home", "text": "Home"}]
+    }
+"""
+
+import json
+import os
+import re
+from typing import Optional
+
+try:
+    from utils.component_registry import component_role
+    from utils.revision_scope import SectionIndex
+except ImportError:
+    from component_registry import component_role
+    from revision_scope import SectionIndex
+
+DESIGN_SYSTEM_PATH = "output/design_system.json"
+
+CSS_PLACEHOLDER = "/* @design-system:css */"
+JS_PLACEHOLDER = "/* @design-system:js */"
+
+_cache = {}
+
+
+def _first(pattern: str, html: str, group: int = 0) -> str:
+    match = re.search(pattern, html, re.DOTALL | re.IGNORECASE)
+    return match.group(group).strip() if match else ""
+
+
+NAVBAR_TAGS = ("nav", "header")
+FOOTER_TAGS = ("footer",)
+
+
+def landmark_span(html: str, tags: tuple, index: Optional[SectionIndex] = None) -> Optional[tuple]:
+    """(start, end) of the first whole element with one of `tags` - an outer <header> keeps its <nav>"""
+    for section in (index or SectionIndex(html)).sections:
+        if section.tag in tags:
+            return section.start, section.end
+    return None
+
+
+def landmark(html: str, tags: tuple, index: Optional[SectionIndex] = None) -> str:
+    span = landmark_span(html, tags, index)
+    return html[span[0]:span[1]].strip() if span else ""
+
+
+def extract_design_system(html: str, source_page: str = "") -> dict:
+    """Single parse pass over a draft page"""
+    head = _first(r"<head[^>]*>(.*?)</head>", html, 1)
+    index = SectionIndex(html)
+    navbar = landmark(html, NAVBAR_TAGS, index)
+    footer = landmark(html, FOOTER_TAGS, index)
+
+    styles = [s.strip() for s in re.findall(r"<style[^>]*>(.*?)</style>", html, re.DOTALL | re.IGNORECASE) if s.strip()]
+    css = "\n\n".join(dict.fromkeys(styles))
+
+    tailwind_config = ""
+    scripts = []
+    for script in re.findall(r"<script(?![^>]*\bsrc=)[^>]*>(.*?)</script>", html, re.DOTALL | re.IGNORECASE):
+        script = script.strip()
+        if not script:
+            continue
+        if "tailwind.config" in script and not tailwind_config:
+            tailwind_config = script
+        else:
+            scripts.append(script)
+    js = "\n\n".join(dict.fromkeys(scripts))
+
+    head_assets = re.findall(r"<script[^>]*\bsrc=[^>]*>\s*</script>|<link[^>]*>", head, re.IGNORECASE)
+    tokens = dict(re.findall(r"(--[\w-]+)\s*:\s*([^;{}]+);", css))
+    nav_links = [
+        {"href": href, "text": re.sub(r"<[^>]+>", "", text).strip()}
+        for href, text in re.findall(r"<a[^>]*href=[\"']([^\"']+)[\"'][^>]*>(.*?)</a>", navbar, re.DOTALL | re.IGNORECASE)
+    ]
+
+    return {
+        "source_page": source_page,
+        "navbar": navbar,
+        "footer": footer,
+        "css": css,
+        "js": js,
+        "tailwind_config": tailwind_config,
+        "tokens": {name: value.strip() for name, value in tokens.items()},
+        "head_assets": head_assets,
+        "body_class": _first(r"<body[^>]*\bclass=[\"']([^\"']*)[\"']", html, 1),
+        "nav_links": nav_links,
+    }
+
+
+def save_design_system(design: dict, path: str = DESIGN_SYSTEM_PATH) -> dict:
+    os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(design, f, indent=2, ensure_ascii=False)
+    _cache[path] = (os.path.getmtime(path), design)
+    return design
+
+
+def build_design_system(html: str, source_page: str = "", path: str = DESIGN_SYSTEM_PATH) -> dict:
+    """Extract from the first draft and persist for the rest of the job"""
+    design = save_design_system(extract_design_system(html, source_page), path)
+    print(f"🎨 Design system saved: {path} (css {len(design['css'])} chars, js {len(design['js'])} chars, "
+          f"{len(design['tokens'])} tokens)")
+    return design
+
+
+def load_design_system(path: str = DESIGN_SYSTEM_PATH) -> Optional[dict]:
+    """Design system of the current job, None if no draft has produced one"""
+    try:
+        mtime = os.path.getmtime(path)
+    except OSError:
+        return None
+    cached = _cache.get(path)
+    if cached and cached[0] == mtime:
+        return cached[1]
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            design = json.load(f)
+    except (OSError, json.JSONDecodeError):
+        return None
+    _cache[path] = (mtime, design)
+    return design
+
+
+# ============================================
+# 🧩 CONSUMERS
+# ============================================
+
+def prompt_summary(design: dict) -> str:
+    """Compact description of the design system for LLM prompts"""
+    lines = []
+    if design.get("tokens"):
+        lines.append("CSS variables: " + ", ".join(f"{k}: {v}" for k, v in design["tokens"].items()))
+    if design.get("tailwind_config"):
+        lines.append(f"Tailwind config:\n{design['tailwind_config']}")
+    if design.get("body_class"):
+        lines.append(f"Body classes: {design['body_class']}")
+    if design.get("nav_links"):
+        lines.append("Navigation: " + ", ".join(f"{l['text']} ({l['href']})" for l in design["nav_links"]))
+    return "\n".join(lines)
+
+
+def strip_shared_assets(html: str) -> str:
+    """Body markup only - <head>, <style> and <script> live in the design system"""
+    body = _first(r"<body[^>]*>(.*)</body>", html, 1) or html
+    body = re.sub(r"<style[^>]*>.*?</style>", "", body, flags=re.DOTALL | re.IGNORECASE)
+    body = re.sub(r"<script[^>]*>.*?</script>", "", body, flags=re.DOTALL | re.IGNORECASE)
+    return re.sub(r"\n\s*\n+", "\n", body).strip()
+
+
+def component_reference(design: Optional[dict], component: str, body_html: str) -> str:
+    """Smallest HTML reference that still contains the component (shared chrome: the design fragment)"""
+    role = component_role(component)
+    if design and role in ("navbar", "footer") and design.get(role):
+        return design[role]
+    return body_html
+
+
+def inject_layout_assets(layout: str, design: dict) -> str:
+    """Put the shared CSS/JS (and Tailwind config) into a layout Blade file"""
+    style = f"<style>\n{design.get('css', '')}\n    </style>"
+    if CSS_PLACEHOLDER in layout:
+        layout = re.sub(r"<style[^>]*>\s*" + re.escape(CSS_PLACEHOLDER) + r"\s*</style>", lambda _: style, layout)
+    elif design.get("css") and "<style" not in layout:
+        layout = layout.replace("</head>", f"    {style}\n</head>", 1)
+
+    head_scripts = ""
+    if design.get("tailwind_config") and "tailwind.config" not in layout:
+        head_scripts = f"    <script>\n{design['tailwind_config']}\n    </script>\n"
+    if head_scripts:
+        layout = layout.replace("</head>", f"{head_scripts}</head>", 1)
+
+    script = f"<script>\n{design.get('js', '')}\n    </script>"
+    if JS_PLACEHOLDER in layout:
+        layout = re.sub(r"<script[^>]*>\s*" + re.escape(JS_PLACEHOLDER) + r"\s*</script>", lambda _: script, layout)
+    elif design.get("js") and not re.search(r"<script(?![^>]*\bsrc=)[^>]*>", layout):
+        layout = layout.replace("</body>", f"    {script}\n</body>", 1)
+    return layout
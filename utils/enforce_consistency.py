@@ -6,17 +6,16 @@ Extracts from first page and applies to others
 import os
 import re
 
+try:
+    from utils.design_system import FOOTER_TAGS, NAVBAR_TAGS, landmark, landmark_span, load_design_system
+except ImportError:
+    from design_system import FOOTER_TAGS, NAVBAR_TAGS, landmark, landmark_span, load_design_system
+
 
 def extract_navbar_footer(html_content):
-    """Extract navbar and footer from HTML"""
-    # Extract navbar (nav or header tag)
-    nav_match = re.search(r'(<(?:nav|header)[^>]*>.*?</(?:nav|header)>)', html_content, re.DOTALL | re.IGNORECASE)
-    navbar = nav_match.group(1) if nav_match else None
-    
-    # Extract footer
-    footer_match = re.search(r'(<footer[^>]*>.*?</footer>)', html_content, re.DOTALL | re.IGNORECASE)
-    footer = footer_match.group(1) if footer_match else None
-    
+    """Extract navbar and footer from HTML (whole elements, nested tags included)"""
+    navbar = landmark(html_content, NAVBAR_TAGS) or None
+    footer = landmark(html_content, FOOTER_TAGS) or None
     return navbar, footer
 
 
@@ -43,25 +42,10 @@ def replace_navbar_footer(html_content, navbar_template, footer_template):
     """Replace navbar and footer in HTML with templates"""
     result = html_content
     
-    # Replace navbar
-    if navbar_template:
-        result = re.sub(
-            r'<(?:nav|header)[^>]*>.*?</(?:nav|header)>',
-            navbar_template,
-            result,
-            flags=re.DOTALL | re.IGNORECASE,
-            count=1
-        )
-    
-    # Replace footer
-    if footer_template:
-        result = re.sub(
-            r'<footer[^>]*>.*?</footer>',
-            footer_template,
-            result,
-            flags=re.DOTALL | re.IGNORECASE,
-            count=1
-        )
+    for template, tags in ((navbar_template, NAVBAR_TAGS), (footer_template, FOOTER_TAGS)):
+        span = landmark_span(result, tags) if template else None
+        if span:
+            result = result[:span[0]] + template + result[span[1]:]
     
     return result
 
@@ -154,19 +138,26 @@ def enforce_consistency():
         print("ℹ️ Only one page, no consistency enforcement needed")
         return
     
-    # Extract templates from first page
-    first_file = os.path.join(draft_dir, draft_files[0])
-    with open(first_file, 'r', encoding='utf-8') as f:
-        first_content = f.read()
-    
-    navbar_template, footer_template = extract_navbar_footer(first_content)
-    css_template, js_template = extract_css_js(first_content)
+    # 🎨 Templates from the job's design system, else extract from first page
+    design = load_design_system()
+    if design:
+        source = f"{design.get('source_page')}.html"
+        navbar_template, footer_template = design.get("navbar") or None, design.get("footer") or None
+        css_template, js_template = design.get("css") or None, design.get("js") or None
+    else:
+        source = draft_files[0]
+        first_file = os.path.join(draft_dir, draft_files[0])
+        with open(first_file, 'r', encoding='utf-8') as f:
+            first_content = f.read()
+        
+        navbar_template, footer_template = extract_navbar_footer(first_content)
+        css_template, js_template = extract_css_js(first_content)
     
     if not any([navbar_template, footer_template, css_template, js_template]):
         print("⚠️ No templates found in first page")
         return
     
-    print(f"✅ Extracted templates from {draft_files[0]}")
+    print(f"✅ Extracted templates from {source}")
     if navbar_template:
         print(f"   • Navbar: {len(navbar_template)} chars")
     if footer_template:
@@ -178,7 +169,9 @@ def enforce_consistency():
     
     # Apply to other pages
     fixed_count = 0
-    for draft_file in draft_files[1:]:
+    for draft_file in draft_files:
+        if draft_file == source:
+            continue
         page_name = draft_file.replace('.html', '')
         draft_path = os.path.join(draft_dir, draft_file)
         
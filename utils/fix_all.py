@@ -14,6 +14,7 @@ from fix_layout_js import extract_javascript_from_drafts, update_layout_js
 from fix_existing_views import fix_app_layout, fix_component_routes, fix_route_views
 from fix_single_page import fix_component_routes_single_page
 from fix_component_styling import fix_hero_section, fix_all_components
+from bundle_assets import bundle_assets, bundler_enabled
 
 
 def main():
@@ -68,6 +69,12 @@ def main():
     fix_hero_section()
     fix_all_components()
     
+    if bundler_enabled():
+        print("\n" + "=" * 60)
+        print("7. Bundling CSS/JS assets...")
+        print("=" * 60)
+        bundle_assets()
+    
     print("\n" + "=" * 60)
     print("✅ ALL FIXES COMPLETED!")
     print("=" * 60)
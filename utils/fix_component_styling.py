@@ -6,6 +6,11 @@ Ensures background images and custom styles work properly
 import os
 import re
 
+try:
+    from utils.class_usage import ClassIndex
+except ImportError:
+    from class_usage import ClassIndex
+
 
 def fix_hero_section():
     """Fix HeroSection to use .hero class instead of inline styles or bg-[url(...)]"""
@@ -96,27 +101,8 @@ def fix_hero_section():
 
 
 def extract_css_classes_from_layout():
-    """Extract available CSS classes from layout"""
-    layout_path = "my-laravel/resources/views/layouts/app.blade.php"
-    
-    if not os.path.exists(layout_path):
-        return set()
-    
-    with open(layout_path, "r", encoding="utf-8") as f:
-        content = f.read()
-    
-    # Extract CSS class names from <style> block
-    style_match = re.search(r'<style>(.*?)</style>', content, re.DOTALL)
-    if not style_match:
-        return set()
-    
-    css_content = style_match.group(1)
-    
-    # Find all class definitions
-    class_pattern = r'\.([a-zA-Z0-9_-]+)\s*\{'
-    classes = set(re.findall(class_pattern, css_content))
-    
-    return classes
+    """Extract available CSS classes (layout/view <style> blocks and bundled assets)"""
+    return ClassIndex.from_project("my-laravel").defined_classes()
 
 
 def fix_all_components():
@@ -5,9 +5,22 @@ Fix layout CSS by copying custom styles from draft HTML
 import os
 import re
 
+try:
+    from utils.design_system import load_design_system
+    from utils.convert_apply_to_css import compile_stylesheet
+except ImportError:
+    from design_system import load_design_system
+    from convert_apply_to_css import compile_stylesheet
+
 
 def extract_custom_css_from_draft():
     """Extract and merge custom CSS from ALL draft HTML files"""
+    # 🎨 Already extracted once for this job
+    design = load_design_system()
+    if design and design.get("css"):
+        print(f"✅ Using design system CSS (from {design.get('source_page') or 'draft'})")
+        return design["css"]
+    
     draft_dir = "output/drafts"
     
     if not os.path.exists(draft_dir):
@@ -62,6 +75,11 @@ def update_layout_css(custom_css):
     with open(layout_path, "r", encoding="utf-8") as f:
         content = f.read()
     
+    # @apply only works with the Tailwind compiler, not the CDN
+    if "@apply" in custom_css:
+        custom_css, unresolved = compile_stylesheet(custom_css)
+        print(f"✅ Converted @apply to pure CSS ({len(unresolved)} unresolved classes)")
+    
     # Replace existing <style> with custom CSS
     new_style = f"""    <style>
 {custom_css}
@@ -5,9 +5,36 @@ Fix layout JavaScript by copying scripts from ALL draft HTML files
 import os
 import re
 
+try:
+    from utils.design_system import load_design_system
+except ImportError:
+    from design_system import load_design_system
+
+
+def guard_javascript(js_clean, label):
+    """Wrap a script with an existence check on the first element it looks up"""
+    element_ids = re.findall(r"getElementById\(['\"]([^'\"]+)['\"]\)", js_clean)
+    
+    if element_ids:
+        # Wrap with existence check for safety
+        guard_id = element_ids[0]
+        return f"""// ===== {label} JavaScript =====
+        if (document.getElementById('{guard_id}')) {{
+            {js_clean.replace(chr(10), chr(10) + '            ')}
+        }}"""
+    
+    # No element IDs, add as-is (probably utility functions)
+    return f"// ===== {label} JavaScript =====\n        {js_clean}"
+
 
 def extract_javascript_from_drafts():
     """Extract and merge JavaScript from ALL draft HTML files with safety checks"""
+    # 🎨 Pages share the design system's JavaScript - use it once instead of per page
+    design = load_design_system()
+    if design and design.get("js"):
+        print(f"✅ Using design system JavaScript (from {design.get('source_page') or 'draft'})")
+        return guard_javascript(design["js"], "Shared")
+    
     draft_dir = "output/drafts"
     
     if not os.path.exists(draft_dir):
@@ -40,22 +67,8 @@ def extract_javascript_from_drafts():
             if not js_clean:
                 continue
             
-            # Extract first element ID as guard
-            element_ids = re.findall(r"getElementById\(['\"]([^'\"]+)['\"]\)", js_clean)
-            
-            if element_ids:
-                # Wrap with existence check for safety
-                guard_id = element_ids[0]
-                wrapped_js = f"""// ===== {page_name} JavaScript =====
-        if (document.getElementById('{guard_id}')) {{
-            {js_clean.replace(chr(10), chr(10) + '            ')}
-        }}"""
-                all_js_blocks.append(wrapped_js)
-                print(f"✅ Found JavaScript in {draft_file} (guarded by #{guard_id})")
-            else:
-                # No element IDs, add as-is (probably utility functions)
-                all_js_blocks.append(f"// ===== {page_name} JavaScript =====\n        {js_clean}")
-                print(f"✅ Found JavaScript in {draft_file}")
+            all_js_blocks.append(guard_javascript(js_clean, page_name))
+            print(f"✅ Found JavaScript in {draft_file}")
     
     if all_js_blocks:
         # Merge all JS blocks
@@ -83,13 +96,14 @@ def update_layout_js(custom_js):
     </script>"""
     
     # Pattern to match existing <script> block (not CDN scripts)
-    # Find last <script> before </body>
-    script_pattern = r'<script>(?!.*src=).*?</script>\s*</body>'
+    # Find last <script> before </body> - never spanning another <script>
+    # (e.g. the Tailwind config in <head>), which would swallow the body
+    script_pattern = r'<script>((?:(?!<script).)*?)</script>(\s*</body>)'
     
     if re.search(script_pattern, content, re.DOTALL):
         # Replace existing script block
         content = re.sub(
-            r'<script>(?!.*src=)(.*?)</script>(\s*</body>)',
+            script_pattern,
             lambda m: f'{new_script}\n{m.group(2)}',
             content,
             flags=re.DOTALL
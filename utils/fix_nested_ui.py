@@ -17,7 +17,11 @@ def fix_nested_ui(laravel_path: str = "my-laravel"):
     
     # Step 2: Remove duplicate JavaScript from layout
     print("\n2️⃣ Removing duplicate JavaScript from layout...")
-    remove_duplicate_js_from_layout(laravel_path)
+    from bundle_assets import bundler_enabled
+    if bundler_enabled():
+        print("   • Skipped: duplicates are removed by the asset bundler")
+    else:
+        remove_duplicate_js_from_layout(laravel_path)
     
     # Step 3: Remove JavaScript from components (keep only in layout)
     print("\n3️⃣ Moving JavaScript from components to layout...")
@@ -0,0 +1,232 @@
+"""
+GenLaravel Generation State
+Compact, typed state handed from the draft phase to every later agent,
+instead of each agent re-reading output/draft.html and output/drafts/*.
+
+- DraftRef        one draft on disk; body loaded lazily (mmap) and cached
+                  until the file changes or release() is called
+- PageState       one page (interned name, route, description)
+- GenerationState pages + drafts + generated components for one job
+
+Ownership: GenerationState.from_draft_result() takes over the draft
+bodies returned by the draft agent (they are already written to disk), so
+only one copy of each draft lives in memory, and only while it is needed.
+The orchestrator owns the state; agents read it through current_state().
+
+current_state() is a context variable like the tracing/progress helpers:
+attach_state() / use_state() scope it to one job (and to threads started
+with utils.tracing.bind). Without an attached state agents fall back to
+reading the output/ files as before.
+"""
+
+import contextvars
+import mmap
+import os
+import sys
+from contextlib import contextmanager
+from typing import Dict, List, Optional
+
+DRAFTS_DIR = "output/drafts"
+MAIN_DRAFT_PATH = "output/draft.html"
+
+# Loads from disk (for benchmarks / debugging)
+draft_loads = 0
+
+
+def _intern(name: str) -> str:
+    return sys.intern(name) if isinstance(name, str) else name
+
+
+def _read_mapped(path: str, limit: int = 0) -> str:
+    """Read a file (or its first `limit` bytes) through mmap"""
+    global draft_loads
+    draft_loads += 1
+    with open(path, "rb") as f:
+        if os.fstat(f.fileno()).st_size == 0:
+            return ""
+        with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mm:
+            data = mm[:limit] if limit else mm[:]
+    return data.decode("utf-8", errors="ignore")
+
+
+class DraftRef:
+    """A draft HTML file, loaded on first access"""
+
+    __slots__ = ("name", "path", "_text", "_mtime")
+
+    def __init__(self, name: str, path: str, text: Optional[str] = None):
+        self.name = _intern(name)
+        self.path = path
+        self._text = text
+        self._mtime = self._stat() if text is not None else None
+
+    def _stat(self):
+        try:
+            return os.stat(self.path).st_mtime_ns
+        except OSError:
+            return None
+
+    @property
+    def exists(self) -> bool:
+        return self._text is not None or os.path.exists(self.path)
+
+    @property
+    def text(self) -> str:
+        """Full draft body (reloaded if the file was rewritten)"""
+        mtime = self._stat()
+        if self._text is None or (mtime is not None and mtime != self._mtime):
+            self._text = _read_mapped(self.path) if mtime is not None else (self._text or "")
+            self._mtime = mtime
+        return self._text
+
+    def head(self, size: int) -> str:
+        """First `size` bytes without caching the whole body"""
+        if self._text is not None:
+            return self._text[:size]
+        return _read_mapped(self.path, size) if os.path.exists(self.path) else ""
+
+    def release(self):
+        """Drop the cached body (it is reloaded from disk on next access)"""
+        self._text = None
+        self._mtime = None
+
+    @property
+    def loaded(self) -> bool:
+        return self._text is not None
+
+    def __repr__(self):
+        return f"DraftRef({self.name!r}, loaded={self.loaded})"
+
+
+class PageState:
+    """One page of the generated app"""
+
+    __slots__ = ("name", "route", "description")
+
+    def __init__(self, name: str, route: str = "", description: str = ""):
+        self.name = _intern(name)
+        self.route = route or f"/{name}"
+        self.description = description
+
+    def as_dict(self) -> dict:
+        return {"name": self.name, "route": self.route, "description": self.description}
+
+
+class GenerationState:
+    """Everything later agents need from earlier ones, for one job"""
+
+    __slots__ = ("mode", "prompt", "pages", "drafts", "main_draft", "components", "registry_candidates")
+
+    def __init__(self, mode: str = "multi", prompt: str = ""):
+        self.mode = mode
+        self.prompt = prompt
+        self.pages: List[PageState] = []
+        self.drafts: Dict[str, DraftRef] = {}
+        self.main_draft = DraftRef("draft", MAIN_DRAFT_PATH)
+        self.components: Dict[str, str] = {}
+        # Components generated this job, registered once validated and built: {name: (key, fragment)}
+        self.registry_candidates: Dict[str, tuple] = {}
+
+    # ========== BUILD ==========
+
+    @classmethod
+    def from_draft_result(cls, result: dict, mode: str = "multi", prompt: str = "") -> "GenerationState":
+        """
+        Take ownership of a draft agent result: the draft bodies move into
+        DraftRefs (no re-read of what the agent just wrote) and are removed
+        from `result`, so release_drafts() actually frees them.
+        """
+        state = cls(mode, prompt)
+        for page in result.get("pages", []):
+            state.pages.append(PageState(page["name"], description=page.get("description", "")))
+
+        for name, html in (result.pop("drafts", None) or {}).items():
+            state.drafts[_intern(name)] = DraftRef(name, os.path.join(DRAFTS_DIR, f"{name}.html"), html)
+
+        state.main_draft = DraftRef("draft", MAIN_DRAFT_PATH, result.pop("draft", None))
+        return state
+
+    def add_components(self, components: Dict[str, str], replace: bool = False):
+        """Merge generated components (first one wins unless `replace`)"""
+        for name, code in components.items():
+            name = _intern(name)
+            if replace or name not in self.components:
+                self.components[name] = code
+
+    def set_component(self, name: str, code: str):
+        self.components[_intern(name)] = code
+
+    # ========== READ ==========
+
+    def draft(self, page: Optional[str] = None) -> str:
+        """Draft HTML of `page` (falls back to the main draft)"""
+        ref = self.drafts.get(page) if page else None
+        return (ref or self.main_draft).text
+
+    def first_draft(self) -> str:
+        """First page draft (or the main draft for single-page jobs)"""
+        for ref in self.drafts.values():
+            return ref.text
+        return self.main_draft.text
+
+    def page_names(self) -> List[str]:
+        return [page.name for page in self.pages]
+
+    def component_names(self) -> List[str]:
+        return list(self.components)
+
+    # ========== LIFECYCLE ==========
+
+    def release_drafts(self):
+        """Drop cached draft bodies (after the last agent that needs them)"""
+        self.main_draft.release()
+        for ref in self.drafts.values():
+            ref.release()
+
+    def memory_bytes(self) -> int:
+        """Approximate bytes held by cached drafts and components"""
+        refs = [self.main_draft, *self.drafts.values()]
+        drafts = sum(len(ref._text) for ref in refs if ref._text is not None)
+        return drafts + sum(len(code) for code in self.components.values())
+
+    def stats(self) -> dict:
+        return {
+            "pages": len(self.pages),
+            "drafts": len(self.drafts),
+            "drafts_loaded": sum(ref.loaded for ref in self.drafts.values()) + self.main_draft.loaded,
+            "components": len(self.components),
+            "memory_bytes": self.memory_bytes(),
+        }
+
+
+# ============================================
+# 🧵 CURRENT STATE (per job / context)
+# ============================================
+
+_current_state = contextvars.ContextVar("genlaravel_generation_state", default=None)
+
+
+def current_state() -> Optional[GenerationState]:
+    return _current_state.get()
+
+
+def attach_state(state: GenerationState) -> contextvars.Token:
+    """Make `state` visible to agents in the current context (pair with detach_state)"""
+    return _current_state.set(state)
+
+
+def detach_state(token: contextvars.Token):
+    state = _current_state.get()
+    _current_state.reset(token)
+    if state is not None:
+        state.release_drafts()
+
+
+@contextmanager
+def use_state(state: GenerationState):
+    """Scoped attach_state/detach_state"""
+    token = attach_state(state)
+    try:
+        yield state
+    finally:
+        detach_state(token)
@@ -0,0 +1,321 @@
+"""
+HTML Completeness Tracker
+Incremental tag-stack parser for LLM-generated HTML documents. Text is fed
+chunk by chunk (a streamed response, then each continuation) and is never
+re-parsed; at any point the tracker knows:
+
+- complete    </html> was reached (outside comments/scripts/partial tags)
+- open tags   the element path at the cut, e.g. html > body > main > section#pricing
+- cut inside  where the text stops: a partial tag, a comment, or <script>/<style>
+
+Used by the draft agents to continue truncated drafts: the continuation
+prompt carries only a short tail plus the open-tag path (not the last
+1000+ chars of output), the reply is stitched without repeating the
+overlap, and a draft still incomplete after the last round is closed
+cleanly instead of being passed on half-open.
+
+Usage:
+    tracker = HtmlCompletenessTracker()
+    for chunk in chunks:
+        tracker.feed(chunk)
+    if not tracker.complete:
+        prompt = continuation_prompt(tracker, "home")
+
+ENV variables (optional):
+- DRAFT_CONTINUATION_ROUNDS=2   Continuation requests per truncated draft
+- DRAFT_CONTINUATION_TAIL=400   Chars of the cut-off output sent as context
+"""
+
+import re
+from typing import Callable, List, Optional
+
+try:
+    from utils.config import settings
+except ImportError:
+    from config import settings
+
+
+VOID_TAGS = {"area", "base", "br", "col", "embed", "hr", "img", "input", "link", "meta",
+             "param", "source", "track", "wbr"}
+# Content is text up to the matching end tag
+RAW_TEXT_TAGS = {"script", "style", "textarea", "title"}
+# A start tag implicitly ends an open sibling of these tags (<li>one<li>two)
+IMPLIED_END = {"p": {"p"}, "li": {"li"}, "option": {"option"}, "tr": {"tr"},
+               "td": {"td", "th"}, "th": {"td", "th"}, "dt": {"dt", "dd"}, "dd": {"dt", "dd"}}
+
+TAG_RE = re.compile(r"""<(/?)([a-zA-Z][\w:.-]*)((?:[^>"']|"[^"]*"|'[^']*')*?)(/?)>""")
+ATTR_ID_RE = re.compile(r"""\bid\s*=\s*["']([^"']+)["']""")
+ATTR_CLASS_RE = re.compile(r"""\bclass\s*=\s*["']([^"']*)["']""")
+
+# Shortest echoed prefix of a continuation treated as overlap (shorter
+# matches are usually legitimate repeats such as "</div>")
+MIN_STITCH_OVERLAP = 24
+
+
+class HtmlCompletenessTracker:
+    """Open-tag stack of a growing HTML document"""
+
+    def __init__(self):
+        self._parts: List[str] = []
+        self._pending = ""          # unparsed tail: a partial tag / end tag / comment opener
+        self._raw: Optional[str] = None
+        self._in_comment = False
+        self.stack: List[tuple] = []  # (tag, label)
+        self.saw_html = False
+        self.html_closed = False
+        self.length = 0
+
+    # ========== FEEDING ==========
+
+    def feed(self, chunk: str) -> "HtmlCompletenessTracker":
+        if not chunk:
+            return self
+        self._parts.append(chunk)
+        self.length += len(chunk)
+        data = self._pending + chunk
+        self._pending = ""
+        i = 0
+        n = len(data)
+
+        while i < n:
+            if self._in_comment:
+                end = data.find("-->", i)
+                if end < 0:
+                    self._pending = data[max(i, n - 2):]
+                    return self
+                self._in_comment = False
+                i = end + 3
+                continue
+
+            if self._raw:
+                found = re.compile(f"</{self._raw}", re.IGNORECASE).search(data, i)
+                end = found.start() if found else -1
+                if end < 0:
+                    # Keep enough to recognise an end tag split across chunks
+                    self._pending = data[max(i, n - len(self._raw) - 2):]
+                    return self
+                close = data.find(">", end)
+                if close < 0:
+                    self._pending = data[end:]
+                    return self
+                self._close(self._raw)
+                self._raw = None
+                i = close + 1
+                continue
+
+            lt = data.find("<", i)
+            if lt < 0:
+                return self
+            rest = data[lt:lt + 4]
+            if rest.startswith("<!--"):
+                self._in_comment = True
+                i = lt + 4
+                continue
+            if "<!--".startswith(rest) and lt + len(rest) == n:
+                self._pending = data[lt:]
+                return self
+            if rest[1:2] in ("!", "?"):
+                # <!DOCTYPE ...> / <?xml ...?>
+                close = data.find(">", lt)
+                if close < 0:
+                    self._pending = data[lt:]
+                    return self
+                i = close + 1
+                continue
+
+            match = TAG_RE.match(data, lt)
+            if match is None:
+                if (rest[1:2].isalpha() or rest[1:2] == "/" or lt + 1 == n) and data.find(">", lt) < 0:
+                    # Tag cut off mid-way: wait for more text
+                    self._pending = data[lt:]
+                    return self
+                i = lt + 1  # a literal "<"
+                continue
+
+            closing, name, attrs, self_closing = match.groups()
+            name = name.lower()
+            if closing:
+                self._close(name)
+            elif name not in VOID_TAGS and not self_closing:
+                if self.stack and self.stack[-1][0] in IMPLIED_END.get(name, ()):
+                    self.stack.pop()
+                self.stack.append((name, _label(name, attrs)))
+                if name == "html":
+                    self.saw_html = True
+                if name in RAW_TEXT_TAGS:
+                    self._raw = name
+            i = match.end()
+        return self
+
+    def _close(self, name: str):
+        # Unclosed children (<p>, <li>, ...) close implicitly; stray end tags are ignored
+        for depth in range(len(self.stack) - 1, -1, -1):
+            if self.stack[depth][0] == name:
+                del self.stack[depth:]
+                break
+        if name == "html":
+            self.html_closed = True
+
+    # ========== STATE ==========
+
+    @property
+    def text(self) -> str:
+        if len(self._parts) > 1:
+            self._parts = ["".join(self._parts)]
+        return self._parts[0] if self._parts else ""
+
+    @property
+    def cut_inside(self) -> Optional[str]:
+        """'comment', 'script'/'style'/..., 'tag' or None (cut in text content)"""
+        if self._in_comment:
+            return "comment"
+        if self._raw:
+            return self._raw
+        if self._pending:
+            return "tag"
+        return None
+
+    @property
+    def complete(self) -> bool:
+        if self.cut_inside or not self.length:
+            return False
+        if self.saw_html:
+            return self.html_closed
+        return not self.stack
+
+    def open_path(self) -> str:
+        return " > ".join(label for _, label in self.stack)
+
+    def tail(self, chars: Optional[int] = None) -> str:
+        """Last `chars` (DRAFT_CONTINUATION_TAIL) of the text, starting at a line boundary when possible"""
+        chars = settings().draft_continuation_tail if chars is None else chars
+        text = self.text
+        if len(text) <= chars:
+            return text
+        tail = text[-chars:]
+        newline = tail.find("\n")
+        return tail[newline + 1:] if 0 <= newline < len(tail) // 2 else tail
+
+    def closing_tags(self) -> str:
+        return "".join(f"</{tag}>" for tag, _ in reversed(self.stack))
+
+    def repaired(self) -> str:
+        """The text with a partial trailing tag dropped and every open element closed"""
+        text = self.text
+        if self._pending and not (self._raw or self._in_comment):
+            text = text[:len(text) - len(self._pending)]
+        elif self._in_comment:
+            text += " -->"
+        return text.rstrip() + "\n" + self.closing_tags()
+
+
+def _label(name: str, attrs: str) -> str:
+    label = name
+    id_match = ATTR_ID_RE.search(attrs)
+    if id_match:
+        label += f"#{id_match.group(1)}"
+    class_match = ATTR_CLASS_RE.search(attrs)
+    if class_match and class_match.group(1).split():
+        label += "." + ".".join(class_match.group(1).split()[:2])
+    return label
+
+
+# ============================================
+# ✂️ EXTRACTION & STITCHING
+# ============================================
+
+def extract_html(response: str) -> str:
+    """HTML from an LLM reply: a ```html block (closed or cut off), an <html> element, or the raw text"""
+    response = re.sub(r"<think>.*?</think>", "", response, flags=re.DOTALL | re.IGNORECASE)
+    fenced = re.search(r"```(?:html)?[ \t]*\n?(.*?)(?:```|$)", response, re.DOTALL | re.IGNORECASE)
+    if fenced:
+        # Leading spaces may continue a cut-off line of text
+        return fenced.group(1).lstrip("\r\n").rstrip()
+    tag_match = re.search(r"<html.*?>.*?</html>", response, re.DOTALL | re.IGNORECASE)
+    return (tag_match.group(0) if tag_match else response).strip()
+
+
+def stitch(existing: str, continuation: str, max_overlap: Optional[int] = None) -> str:
+    """
+    The part of `continuation` to append to `existing`: echoed overlap with
+    the end of `existing` is dropped. Returns "" for a reply that restarts
+    the document instead of continuing it.
+    """
+    max_overlap = settings().draft_continuation_tail if max_overlap is None else max_overlap
+    stripped = continuation.lstrip()
+    if re.match(r"<!doctype|<html[\s>]", stripped, re.IGNORECASE):
+        return ""
+    for size in range(min(len(continuation), len(existing), max_overlap), MIN_STITCH_OVERLAP - 1, -1):
+        if existing.endswith(continuation[:size]):
+            return continuation[size:]
+    # Echo of the last (partial) line with different leading whitespace
+    last_line = existing[existing.rfind("\n") + 1:].strip()
+    if len(last_line) >= MIN_STITCH_OVERLAP and stripped.startswith(last_line):
+        return stripped[len(last_line):]
+    return continuation
+
+
+CONTINUATION_SYSTEM_PROMPT = "You are an HTML completion expert. Continue cut-off HTML exactly where it stops."
+
+
+def _where(tracker: HtmlCompletenessTracker) -> str:
+    return {
+        None: "in text content",
+        "tag": "in the middle of a tag",
+        "comment": "inside an HTML comment",
+    }.get(tracker.cut_inside, f"inside a <{tracker.cut_inside}> block")
+
+
+def continuation_prompt(tracker: HtmlCompletenessTracker, page_name: str = "") -> str:
+    page = f' for page "{page_name}"' if page_name else ""
+    return f"""
+The HTML document{page} was cut off {_where(tracker)}.
+
+Open elements at the cut (outermost first):
+{tracker.open_path() or "(none)"}
+
+Last characters of the output:
+```html
+{tracker.tail()}
+```
+
+Continue EXACTLY from the last character above. Do NOT repeat any of it and do NOT
+restart the document. Finish the current content naturally, close the open elements
+({tracker.closing_tags() or "none"}) and end with </html>.
+Return ONLY the continuation in a ```html block.
+"""
+
+
+def complete_html(html: str, generate: Callable[[str], str], page_name: str = "",
+                  rounds: Optional[int] = None, log: Callable[[str], None] = print) -> str:
+    """
+    Continue a possibly truncated document with `generate(prompt) -> reply`
+    until it is complete (at most `rounds` requests, DRAFT_CONTINUATION_ROUNDS
+    by default), then close whatever is still open.
+    """
+    rounds = settings().draft_continuation_rounds if rounds is None else rounds
+    label = f" for {page_name}" if page_name else ""
+    tracker = HtmlCompletenessTracker().feed(html)
+    if tracker.complete:
+        log(f"  ✅ HTML structure complete{label}")
+        return html
+
+    for attempt in range(1, rounds + 1):
+        log(f"  ⚠️ HTML{label} cut off {_where(tracker)} "
+            f"({len(tracker.stack)} open: {tracker.open_path()[-80:]})")
+        log(f"  🔄 Requesting continuation {attempt}/{rounds}{label}...")
+        try:
+            piece = stitch(tracker.text, extract_html(generate(continuation_prompt(tracker, page_name))))
+        except Exception as e:
+            log(f"  ⚠️ Continuation failed{label}: {str(e)[:100]}")
+            break
+        if not piece.strip():
+            log(f"  ⚠️ Could not use the continuation{label}")
+            break
+        tracker.feed(piece)
+        if tracker.complete:
+            log(f"  ✅ HTML structure now complete{label} (total length: {tracker.length} chars)")
+            return tracker.text
+
+    log(f"  🩹 Closing {len(tracker.stack)} open element(s){label}")
+    return tracker.repaired()
@@ -0,0 +1,304 @@
+"""
+GenLaravel Pipeline DAG
+Declarative stages with explicit inputs/outputs, run with as much
+parallelism as their dependencies allow.
+
+Usage:
+    dag = Pipeline()
+    dag.add(Stage("plan", plan_fn, inputs=["draft"], outputs="plan"))
+    dag.add(Stage("routes", routes_fn))                       # no inputs: starts at once
+    dag.add(Stage("layout:home", layout_fn, inputs=["plan"], retries=1, cache=True))
+    result = dag.run({"draft": html})
+    result.outputs["plan"], result.timings["routes"]
+
+A stage function receives its inputs as keyword arguments (names with ":"
+or "-" are passed as a single dict argument `inputs` instead) and returns
+its output. Stages run in worker threads bound to the caller's context
+(utils.tracing.bind), so spans, progress sinks and the generation state
+follow them; each stage runs inside a span of kind "stage".
+
+- retries   extra attempts after an exception
+- cache     reuse the output for identical inputs (in-process, only for
+            stages without side effects)
+- optional  a failure yields output None instead of failing the run
+- group     stages sharing a group produce one group_start/group_complete
+            event pair (e.g. one UI "agent" for all per-page stages)
+- expand    fn(output) -> stages added to the graph once this stage is done,
+            for work only known from its output (one stage per planned
+            component); added stages may join groups that are still open
+
+ENV variables (optional):
+- PIPELINE_WORKERS=8        Max stages running at once (1 = sequential)
+- PIPELINE_CACHE_SIZE=128   Cached stage outputs kept per process
+"""
+
+import hashlib
+import json
+import threading
+import time
+from collections import OrderedDict
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Dict, Iterable, List, Optional
+
+try:
+    from utils.config import settings
+    from utils.tracing import bind, span
+except ImportError:
+    from config import settings
+    from tracing import bind, span
+
+
+class PipelineError(Exception):
+    """A required stage failed (after retries) or the graph is invalid"""
+
+    def __init__(self, message: str, stage: str = "", cause: Optional[BaseException] = None):
+        super().__init__(message)
+        self.stage = stage
+        self.cause = cause
+
+
+class Stage:
+    """One unit of work in the pipeline"""
+
+    def __init__(self, name: str, fn: Callable, inputs: Iterable[str] = (), outputs: Optional[str] = None,
+                 retries: int = 0, cache: bool = False, optional: bool = False, group: Optional[str] = None,
+                 expand: Optional[Callable[[object], Iterable["Stage"]]] = None):
+        self.name = name
+        self.fn = fn
+        self.inputs = list(inputs)
+        self.outputs = outputs or name
+        self.retries = retries
+        self.cache = cache
+        self.optional = optional
+        self.group = group
+        self.expand = expand
+
+    def call(self, values: dict):
+        if all(name.isidentifier() for name in values):
+            return self.fn(**values)
+        return self.fn(values)
+
+    def __repr__(self):
+        return f"Stage({self.name!r}, inputs={self.inputs}, outputs={self.outputs!r})"
+
+
+class PipelineResult:
+    """Outputs, per-stage durations and failures of one run"""
+
+    def __init__(self):
+        self.outputs: Dict[str, object] = {}
+        self.timings: Dict[str, float] = {}
+        self.attempts: Dict[str, int] = {}
+        self.cached: List[str] = []
+        self.errors: Dict[str, str] = {}
+        self.wall_s = 0.0
+
+    def summary(self) -> str:
+        busy = sum(self.timings.values())
+        return (f"{len(self.timings)} stages in {self.wall_s:.2f}s "
+                f"({busy:.2f}s of stage time, {len(self.cached)} cached)")
+
+
+# ============================================
+# 💾 STAGE CACHE
+# ============================================
+
+_cache: "OrderedDict[str, object]" = OrderedDict()
+_cache_lock = threading.Lock()
+
+
+def _cache_key(stage: Stage, values: dict) -> Optional[str]:
+    try:
+        payload = json.dumps(values, sort_keys=True, default=str)
+    except (TypeError, ValueError):
+        return None
+    return hashlib.sha256(f"{stage.name}\0{payload}".encode("utf-8")).hexdigest()
+
+
+def _cache_get(key: str):
+    with _cache_lock:
+        if key in _cache:
+            _cache.move_to_end(key)
+            return True, _cache[key]
+    return False, None
+
+
+def _cache_put(key: str, value):
+    with _cache_lock:
+        _cache[key] = value
+        _cache.move_to_end(key)
+        while len(_cache) > settings().pipeline_cache_size:
+            _cache.popitem(last=False)
+
+
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
+
+
+# ============================================
+# 🕸️ PIPELINE
+# ============================================
+
+class Pipeline:
+    """A DAG of stages; run() executes ready stages concurrently"""
+
+    def __init__(self, name: str = "pipeline"):
+        self.name = name
+        self.stages: "OrderedDict[str, Stage]" = OrderedDict()
+
+    def add(self, stage: Stage) -> Stage:
+        if stage.name in self.stages:
+            raise PipelineError(f"duplicate stage {stage.name!r}", stage.name)
+        self.stages[stage.name] = stage
+        return stage
+
+    def validate(self, initial: Iterable[str] = (), stages: Optional[Iterable[Stage]] = None):
+        """Check every input is produced exactly once and there are no cycles"""
+        stages = list(self.stages.values() if stages is None else stages)
+        producers = {name: None for name in initial}
+        for stage in stages:
+            if stage.outputs in producers:
+                raise PipelineError(f"output {stage.outputs!r} produced twice", stage.name)
+            producers[stage.outputs] = stage.name
+        for stage in stages:
+            missing = [name for name in stage.inputs if name not in producers]
+            if missing:
+                raise PipelineError(f"stage {stage.name!r} needs unknown input(s): {', '.join(missing)}", stage.name)
+
+        # Kahn's algorithm: everything must become ready eventually
+        available = set(initial)
+        pending = list(stages)
+        while pending:
+            ready = [s for s in pending if all(name in available for name in s.inputs)]
+            if not ready:
+                raise PipelineError(f"cycle between stages: {', '.join(s.name for s in pending)}")
+            for stage in ready:
+                available.add(stage.outputs)
+                pending.remove(stage)
+
+    def run(self, initial: Optional[dict] = None, workers: Optional[int] = None,
+            on_event: Optional[Callable[[dict], None]] = None,
+            cancel: Optional[threading.Event] = None) -> PipelineResult:
+        """
+        Execute all stages. `initial` seeds the available values; `on_event`
+        receives stage_start / stage_complete / stage_failed and
+        group_start / group_complete dicts (from worker threads). Once
+        `cancel` is set no new stage starts and the run raises PipelineError.
+        """
+        initial = dict(initial or {})
+        self.validate(initial)
+        workers = max(1, workers or settings().pipeline_workers)
+        result = PipelineResult()
+        graph = dict(self.stages)  # plus stages added by expansions during this run
+        values = dict(initial)
+        lock = threading.Lock()
+        emit = on_event or (lambda event: None)
+
+        group_left = {}
+        for stage in graph.values():
+            if stage.group:
+                group_left[stage.group] = group_left.get(stage.group, 0) + 1
+        group_started: Dict[str, float] = {}
+
+        def run_stage(stage: Stage, inputs: dict):
+            with lock:
+                if stage.group and stage.group not in group_started:
+                    group_started[stage.group] = time.perf_counter()
+                    emit({"type": "group_start", "group": stage.group})
+            emit({"type": "stage_start", "stage": stage.name, "group": stage.group})
+
+            key = _cache_key(stage, inputs) if stage.cache else None
+            if key:
+                hit, value = _cache_get(key)
+                if hit:
+                    return value, 0.0, 0, True
+
+            started = time.perf_counter()
+            attempt = 0
+            while True:
+                attempt += 1
+                try:
+                    with span(stage.name, kind="stage", attempt=attempt):
+                        value = stage.call(inputs)
+                    break
+                except Exception:
+                    if attempt > stage.retries:
+                        raise
+                    print(f"   🔁 Stage {stage.name} failed (attempt {attempt}), retrying...")
+            if key:
+                _cache_put(key, value)
+            return value, time.perf_counter() - started, attempt, False
+
+        pending = list(graph.values())
+        running = {}
+        failure = None
+        started = time.perf_counter()
+
+        with ThreadPoolExecutor(max_workers=workers, thread_name_prefix=self.name) as pool:
+            while pending or running:
+                if failure is None and cancel is not None and cancel.is_set():
+                    failure = PipelineError("pipeline cancelled")
+                if failure is None:
+                    for stage in [s for s in pending if all(name in values for name in s.inputs)]:
+                        pending.remove(stage)
+                        inputs = {name: values[name] for name in stage.inputs}
+                        running[pool.submit(bind(run_stage), stage, inputs)] = stage
+                if not running:
+                    break
+
+                done, _ = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    stage = running.pop(future)
+                    try:
+                        value, duration, attempts, cached = future.result()
+                    except Exception as e:
+                        result.errors[stage.name] = f"{type(e).__name__}: {e}"
+                        emit({"type": "stage_failed", "stage": stage.name, "group": stage.group, "error": str(e)})
+                        if not stage.optional:
+                            failure = failure or PipelineError(f"stage {stage.name!r} failed: {e}", stage.name, e)
+                            continue
+                        value, duration, attempts, cached = None, 0.0, stage.retries + 1, False
+                    values[stage.outputs] = value
+                    result.outputs[stage.outputs] = value
+                    result.timings[stage.name] = duration
+                    result.attempts[stage.name] = attempts
+                    if cached:
+                        result.cached.append(stage.name)
+                    emit({"type": "stage_complete", "stage": stage.name, "group": stage.group,
+                          "duration": duration, "cached": cached})
+                    if stage.expand is not None and failure is None:
+                        try:
+                            added = self._expand(stage, value, graph, values, pending, running)
+                        except Exception as e:
+                            failure = e if isinstance(e, PipelineError) else \
+                                PipelineError(f"stage {stage.name!r} expansion failed: {e}", stage.name, e)
+                            added = []
+                        for new in added:
+                            pending.append(new)
+                            if new.group:
+                                with lock:
+                                    group_left[new.group] = group_left.get(new.group, 0) + 1
+                    if stage.group:
+                        with lock:
+                            group_left[stage.group] -= 1
+                            if group_left[stage.group] == 0:
+                                emit({"type": "group_complete", "group": stage.group,
+                                      "duration": time.perf_counter() - group_started[stage.group]})
+
+        result.wall_s = time.perf_counter() - started
+        if failure is not None:
+            raise failure
+        return result
+
+    def _expand(self, stage: Stage, value, graph: dict, values: dict, pending: List[Stage],
+                running: dict) -> List[Stage]:
+        """Stages from stage.expand(value), validated against everything produced or still to come"""
+        added = list(stage.expand(value) or ())
+        for new in added:
+            if new.name in graph:
+                raise PipelineError(f"duplicate stage {new.name!r}", new.name)
+            graph[new.name] = new
+        known = set(values) | {s.outputs for s in pending} | {s.outputs for s in running.values()}
+        self.validate(known, added)
+        return added
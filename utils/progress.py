@@ -0,0 +1,238 @@
+"""
+GenLaravel Progress Sinks
+Structured progress events from the LLM client and agents, rendered by a
+pluggable sink instead of per-character console writes.
+
+Events (dicts with a "type"):
+- llm_start  {agent}                         LLM call begins
+- llm_chunk  {text}                          streamed text (only if sink.stream)
+- llm_end    {agent, provider, chars, text, error}
+- message    {text}                          free-form status line
+
+Sinks:
+- TTYSink        one rate-limited status line per call (CLI entry points)
+- WebSocketSink  rate-limited "agent_progress" messages (backend jobs)
+- NullSink       drops everything (benchmarks, servers without a TTY)
+
+The process default is chosen from ENV; use_sink() / attach_sink()
+override it for the current context (and for threads started with
+utils.tracing.bind).
+
+ENV variables (optional):
+- PROGRESS_SINK=auto   auto (tty if stdout is a terminal) | tty | null
+"""
+
+import asyncio
+import contextvars
+import shutil
+import sys
+import threading
+import time
+from contextlib import contextmanager
+from typing import Optional
+
+try:
+    from utils.config import settings
+except ImportError:
+    from config import settings
+
+
+class ProgressSink:
+    """Base sink: receives events, renders nothing"""
+
+    # Whether llm_chunk events should be produced at all
+    stream = False
+
+    def emit(self, event: dict):
+        pass
+
+    def close(self):
+        pass
+
+
+class NullSink(ProgressSink):
+    """Drops all events"""
+
+
+class TTYSink(ProgressSink):
+    """Single status line per LLM call, redrawn at most every `interval` seconds"""
+
+    stream = True
+
+    def __init__(self, interval: float = 0.1, out=None, width: Optional[int] = None):
+        self.interval = interval
+        self.out = out or sys.stdout
+        self.width = width or max(20, shutil.get_terminal_size((100, 20)).columns - 1)
+        self._lock = threading.Lock()
+        self._agent = ""
+        self._tail = ""
+        self._chars = 0
+        self._last_render = 0.0
+        self._line_len = 0
+
+    def _render(self, line: str, newline: bool = False):
+        line = line[:self.width]
+        pad = max(self._line_len - len(line), 0)
+        self.out.write("\r" + line + " " * pad + ("\n" if newline else ""))
+        self.out.flush()
+        self._line_len = 0 if newline else len(line)
+        self._last_render = time.monotonic()
+
+    def _status(self) -> str:
+        prefix = f"✍️  {self._agent} [{self._chars:,} chars] "
+        room = max(self.width - len(prefix), 0)
+        return prefix + self._tail[-room:] if room else prefix
+
+    def emit(self, event: dict):
+        kind = event.get("type")
+        with self._lock:
+            if kind == "llm_start":
+                self._agent = event.get("agent") or "llm"
+                self._tail = ""
+                self._chars = 0
+            elif kind == "llm_chunk":
+                text = event["text"]
+                self._chars += len(text)
+                self._tail = (self._tail + text.replace("\n", " ").replace("\r", " "))[-self.width:]
+                if time.monotonic() - self._last_render >= self.interval:
+                    self._render(self._status())
+            elif kind == "llm_end":
+                if event.get("error"):
+                    if self._line_len:
+                        self._render("")
+                    return
+                self._agent = event.get("agent") or self._agent
+                self._chars = event.get("chars", self._chars)
+                self._render(f"✅ {self._agent} ({event.get('provider', '')}, {self._chars:,} chars)", newline=True)
+            elif kind == "message":
+                if self._line_len:
+                    self._render("")
+                self.out.write(event["text"] + "\n")
+
+
+class WebSocketSink(ProgressSink):
+    """
+    Forwards progress to a WebSocket as "agent_progress" messages, at most
+    one per `interval` seconds (plus one per finished call).
+
+    `send` is an async callable taking the message dict; events may come
+    from worker threads, so sends are scheduled on `loop`.
+    """
+
+    stream = True
+
+    def __init__(self, send, loop: asyncio.AbstractEventLoop, interval: float = 1.0):
+        self.send = send
+        self.loop = loop
+        self.interval = interval
+        self._lock = threading.Lock()
+        self._agent = ""
+        self._chars = 0
+        self._last_sent = 0.0
+
+    def _schedule(self, message: dict):
+        self._last_sent = time.monotonic()
+        try:
+            self.loop.call_soon_threadsafe(asyncio.ensure_future, self.send(message))
+        except RuntimeError:
+            # Loop closed (connection gone) - progress is best effort
+            pass
+
+    def emit(self, event: dict):
+        kind = event.get("type")
+        with self._lock:
+            if kind == "llm_start":
+                self._agent = event.get("agent") or "llm"
+                self._chars = 0
+            elif kind == "llm_chunk":
+                self._chars += len(event["text"])
+                if time.monotonic() - self._last_sent >= self.interval:
+                    self._schedule({"type": "agent_progress", "agent": self._agent, "chars": self._chars, "done": False})
+            elif kind == "llm_end" and not event.get("error"):
+                self._schedule({
+                    "type": "agent_progress",
+                    "agent": event.get("agent") or self._agent,
+                    "provider": event.get("provider", ""),
+                    "chars": event.get("chars", self._chars),
+                    "done": True,
+                })
+            elif kind == "message":
+                self._schedule({"type": "output", "message": event["text"]})
+
+
+def _default_sink() -> ProgressSink:
+    mode = settings().progress_sink
+    if mode == "tty" or (mode == "auto" and sys.stdout.isatty()):
+        return TTYSink()
+    return NullSink()
+
+
+_default: Optional[ProgressSink] = None  # chosen on first use (PROGRESS_SINK)
+_current_sink = contextvars.ContextVar("genlaravel_progress_sink", default=None)
+
+
+def get_sink() -> ProgressSink:
+    global _default
+    sink = _current_sink.get()
+    if sink is not None:
+        return sink
+    if _default is None:
+        _default = _default_sink()
+    return _default
+
+
+def set_sink(sink: ProgressSink):
+    """Replace the process-wide default sink"""
+    global _default
+    _default = sink
+
+
+def attach_sink(sink: ProgressSink) -> contextvars.Token:
+    """Route progress of the current context (e.g. one backend job) to `sink` (pair with detach_sink)"""
+    return _current_sink.set(sink)
+
+
+def detach_sink(token: contextvars.Token):
+    sink = _current_sink.get()
+    _current_sink.reset(token)
+    if sink is not None:
+        sink.close()
+
+
+@contextmanager
+def use_sink(sink: ProgressSink):
+    """Scoped attach_sink/detach_sink"""
+    token = attach_sink(sink)
+    try:
+        yield sink
+    finally:
+        detach_sink(token)
+
+
+# ============================================
+# 📣 EVENT HELPERS
+# ============================================
+
+def llm_start(agent: str):
+    get_sink().emit({"type": "llm_start", "agent": agent})
+
+
+def llm_chunk(text: str):
+    sink = get_sink()
+    if sink.stream:
+        sink.emit({"type": "llm_chunk", "text": text})
+
+
+def llm_end(agent: str, provider: str, text: Optional[str] = None, error: str = ""):
+    get_sink().emit({
+        "type": "llm_end",
+        "agent": agent,
+        "provider": provider,
+        "chars": len(text or ""),
+        "text": text,
+        "error": error,
+    })
+
+
+def message(text: str):
+    get_sink().emit({"type": "message", "text": text})
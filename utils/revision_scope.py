@@ -0,0 +1,432 @@
+"""
+Revision Scope Analyzer
+Decides locally which draft pages a revision request touches, so the
+multi-page revise flow only asks the LLM when the request is ambiguous.
+
+Each draft is parsed once into an inverted index (term → pages) of its
+visible text, element types, ids and classes. The request is then matched
+against, in order of precedence:
+
+1. explicit page names     "perbaiki halaman pricing", "on the about page"
+2. shared components       navbar / footer / header / menu → all pages
+3. global style terms      "ubah warna", "change the font" → all pages
+4. content evidence        quoted phrases, words and element types found on
+                           only some pages ("button Get Started terlalu besar")
+
+Usage:
+    index = RevisionIndex({"home": home_html, "pricing": pricing_html})
+    result = index.analyze('di page pricing icon terlalu besar')
+    result.scope, result.pages, result.confidence, result.reason
+    if result.confidence < settings().revision_scope_confidence: ...ask the LLM
+
+Within a page, SectionIndex maps the same request to the smallest landmark
+subtrees (section, header, form, table, element with an id, ...) holding
+the evidence, with exact character offsets so an edited fragment can be
+spliced back:
+
+    sections = SectionIndex(pricing_html).locate("icon terlalu besar", ignore={"pricing"})
+    html = splice(pricing_html, sections[0], edited_fragment)
+
+The confidence threshold is REVISION_SCOPE_CONFIDENCE (utils/config.py).
+"""
+
+import math
+import re
+from html.parser import HTMLParser
+from typing import Dict, Iterable, List, Optional, Set
+
+try:
+    from utils.html_completeness import VOID_TAGS
+except ImportError:
+    from html_completeness import VOID_TAGS
+
+WORD_RE = re.compile(r"[a-z0-9]+(?:['-][a-z0-9]+)*")
+QUOTED_RE = re.compile(r"[\"“'‘]([^\"”'’]{2,80})[\"”'’]")
+
+# Components rendered on every page
+SHARED_TERMS = {"navbar", "nav", "navigation", "navigasi", "header", "footer", "menu", "sidebar",
+                "topbar", "logo", "kaki", "layout", "tata-letak"}
+
+# Styling that applies site-wide unless a page is named
+GLOBAL_STYLE_TERMS = {
+    "color", "colors", "colour", "colours", "warna", "font", "fonts", "typography", "tipografi",
+    "huruf", "spacing", "jarak", "theme", "tema", "palette", "palet", "dark", "gelap", "light",
+    "terang", "background", "latar", "style", "styling", "gaya", "design", "desain", "rounded",
+    "shadow", "bayangan", "primary", "accent", "responsive", "responsif", "mobile", "animation",
+    "animasi", "semua", "seluruh", "all", "every", "global", "website", "situs", "site",
+    # colour names
+    "blue", "biru", "red", "merah", "green", "hijau", "yellow", "kuning", "purple", "ungu",
+    "orange", "oranye", "jingga", "pink", "black", "hitam", "white", "putih", "gray", "grey",
+    "abu", "brown", "coklat", "cokelat", "navy", "teal", "gold", "emas",
+}
+
+# Words that point at an element type → tags that satisfy them
+ELEMENT_TERMS = {
+    "button": {"button"}, "buttons": {"button"}, "tombol": {"button"}, "btn": {"button"},
+    "cta": {"button", "a"}, "link": {"a"}, "links": {"a"}, "tautan": {"a"},
+    "form": {"form"}, "formulir": {"form"}, "input": {"input", "textarea"},
+    "table": {"table"}, "tabel": {"table"},
+    "image": {"img", "picture"}, "images": {"img", "picture"}, "gambar": {"img", "picture"},
+    "foto": {"img", "picture"}, "photo": {"img", "picture"},
+    "icon": {"svg", "i"}, "icons": {"svg", "i"}, "ikon": {"svg", "i"},
+    "video": {"video", "iframe"}, "list": {"ul", "ol"}, "daftar": {"ul", "ol"},
+    "heading": {"h1", "h2", "h3"}, "title": {"h1", "h2"}, "judul": {"h1", "h2", "h3"},
+    "card": {"article"}, "cards": {"article"}, "kartu": {"article"},
+}
+
+# Common page names users type in Indonesian (drafts use English names)
+PAGE_ALIASES = {
+    "beranda": "home", "homepage": "home", "landing": "home", "utama": "home",
+    "tentang": "about", "kontak": "contact", "hubungi": "contact", "harga": "pricing",
+    "produk": "products", "layanan": "services", "masuk": "login", "daftar": "register",
+    "keranjang": "cart", "artikel": "blog", "galeri": "gallery",
+}
+
+STOPWORDS = {
+    # English
+    "a", "an", "the", "and", "or", "on", "in", "at", "of", "to", "for", "with", "from", "by", "is",
+    "are", "be", "it", "its", "this", "that", "these", "those", "make", "change", "fix", "update",
+    "add", "remove", "delete", "replace", "use", "too", "more", "less", "very", "bigger", "smaller",
+    "larger", "big", "small", "please", "should", "can", "could", "would", "want", "need", "i",
+    "me", "my", "we", "our", "you", "your", "page", "pages", "section", "part", "some", "also",
+    "just", "only", "there", "here", "like", "look", "looks", "new", "better", "not", "no", "so",
+    # Indonesian
+    "di", "ke", "dari", "yang", "dan", "atau", "ini", "itu", "ada", "pada", "untuk", "dengan",
+    "terlalu", "lebih", "kurang", "sangat", "tolong", "mohon", "buat", "buatkan", "jadi", "jadikan",
+    "agar", "supaya", "bisa", "saja", "juga", "nya", "halaman", "bagian", "ubah", "ganti", "perbaiki",
+    "tambah", "tambahkan", "hapus", "besar", "kecil", "kurangi", "perbesar", "perkecil", "aku",
+    "saya", "kami", "mau", "ingin", "tidak", "jangan", "sudah", "belum", "biar", "dong", "ya",
+}
+
+SKIP_TEXT_TAGS = {"script", "style", "noscript", "template"}
+
+
+class _DraftParser(HTMLParser):
+    """Visible text, tags, ids and classes of one draft"""
+
+    def __init__(self):
+        super().__init__(convert_charrefs=True)
+        self.text: List[str] = []
+        self.tags: Set[str] = set()
+        self.names: Set[str] = set()  # id / class tokens
+        self._skip = 0
+
+    def handle_starttag(self, tag, attrs):
+        self.tags.add(tag)
+        if tag in SKIP_TEXT_TAGS:
+            self._skip += 1
+        for key, value in attrs:
+            if key == "id" and value:
+                self.names.update(WORD_RE.findall(value.lower()))
+            elif key == "class" and value:
+                # Semantic class names only (hero-section, pricing-card), not utilities
+                self.names.update(w for c in value.lower().split() if not re.search(r"[:\[\d]", c)
+                                  for w in WORD_RE.findall(c))
+            elif key in ("alt", "placeholder", "aria-label", "title") and value:
+                self.text.append(value)
+
+    def handle_endtag(self, tag):
+        if tag in SKIP_TEXT_TAGS and self._skip:
+            self._skip -= 1
+
+    def handle_data(self, data):
+        if not self._skip and data.strip():
+            self.text.append(data)
+
+
+def singular(word: str) -> str:
+    return word[:-1] if len(word) > 3 and word.endswith("s") else word
+
+
+class RevisionScope:
+    """Analysis result: scope is "specific" or "global" """
+
+    def __init__(self, scope: str, pages: List[str], confidence: float, reason: str):
+        self.scope = scope
+        self.pages = pages
+        self.confidence = confidence
+        self.reason = reason
+
+    def __repr__(self):
+        return f"RevisionScope({self.scope!r}, {self.pages}, confidence={self.confidence:.2f})"
+
+
+class RevisionIndex:
+    """Inverted index of a set of draft pages"""
+
+    def __init__(self, drafts: Dict[str, str]):
+        self.pages = list(drafts)
+        self.text: Dict[str, str] = {}
+        self.terms: Dict[str, Set[str]] = {}
+        self.tags: Dict[str, Set[str]] = {}
+        for page, html in drafts.items():
+            parser = _DraftParser()
+            parser.feed(html or "")
+            parser.close()
+            self.text[page] = " ".join(" ".join(parser.text).split())
+            for tag in parser.tags:
+                self.tags.setdefault(tag, set()).add(page)
+            for word in set(WORD_RE.findall(self.text[page].lower())) | parser.names:
+                self.terms.setdefault(word, set()).add(page)
+                self.terms.setdefault(singular(word), set()).add(page)
+
+    def preview(self, page: str, chars: int = 500) -> str:
+        return self.text.get(page, "")[:chars]
+
+    def lookup(self, word: str) -> Set[str]:
+        pages = set(self.terms.get(word, ())) | self.terms.get(singular(word), set())
+        for tag in ELEMENT_TERMS.get(word, ()):
+            pages |= self.tags.get(tag, set())
+        return pages
+
+    # ========== MATCHING ==========
+
+    def _page_mentions(self, feedback: str, words: List[str]) -> List[str]:
+        normalized = " ".join(words)
+        wordset = set(words) | {singular(w) for w in words}
+        mentioned = []
+        for page in self.pages:
+            name = page.lower()
+            spaced = re.sub(r"[-_]+", " ", name)
+            if (name in wordset or singular(name) in wordset
+                    or (" " in spaced and f" {spaced} " in f" {normalized} ")):
+                mentioned.append(page)
+        for word in words:
+            alias = PAGE_ALIASES.get(word)
+            # "daftar" is also "list"; only a page alias right after halaman/page
+            if alias in self.pages and alias not in mentioned and (
+                    word != "daftar" or re.search(r"(halaman|page)\s+daftar", feedback.lower())):
+                mentioned.append(alias)
+        return mentioned
+
+    def analyze(self, feedback: str) -> RevisionScope:
+        words = WORD_RE.findall(feedback.lower())
+        everything = list(self.pages)
+
+        if len(self.pages) <= 1:
+            return RevisionScope("global", everything, 1.0, "only one page")
+
+        mentioned = self._page_mentions(feedback, words)
+        if mentioned:
+            return RevisionScope("specific", mentioned, 0.9, f"page named in request: {', '.join(mentioned)}")
+
+        shared = sorted(SHARED_TERMS.intersection(words))
+        if shared:
+            return RevisionScope("global", everything, 0.9, f"shared component: {', '.join(shared)}")
+
+        # Quoted phrases are the strongest content evidence
+        phrases = [p.strip().lower() for p in QUOTED_RE.findall(feedback) if p.strip()]
+        phrase_pages: Set[str] = set()
+        for phrase in phrases:
+            phrase_pages |= {page for page in self.pages if phrase in self.text[page].lower()}
+        if phrase_pages and len(phrase_pages) < len(self.pages):
+            pages = [page for page in self.pages if page in phrase_pages]
+            return RevisionScope("specific", pages, 0.85, f"quoted text found on: {', '.join(pages)}")
+
+        style = sorted(GLOBAL_STYLE_TERMS.intersection(words))
+        content = [w for w in dict.fromkeys(words)
+                   if w not in STOPWORDS and w not in GLOBAL_STYLE_TERMS and len(w) > 1]
+
+        # idf-weighted evidence from words found on only some of the pages
+        scores: Dict[str, float] = {}
+        matched, evidence = 0, []
+        for word in content:
+            pages = self.lookup(word)
+            if not pages:
+                continue
+            matched += 1
+            if len(pages) < len(self.pages):
+                evidence.append(word)
+                weight = math.log(len(self.pages) / len(pages))
+                for page in pages:
+                    scores[page] = scores.get(page, 0.0) + weight
+        coverage = matched / len(content) if content else 0.0
+
+        if scores:
+            best = max(scores.values())
+            pages = [page for page in self.pages if scores.get(page, 0.0) >= best / 2]
+            return RevisionScope("specific", pages, 0.6 + 0.3 * coverage,
+                                 f"{', '.join(evidence[:5])} found on: {', '.join(pages)}")
+
+        if style:
+            return RevisionScope("global", everything, 0.85 if coverage >= 0.5 or not content else 0.6,
+                                 f"global styling: {', '.join(style)}")
+        if matched:
+            # Everything mentioned appears on every page
+            return RevisionScope("global", everything, 0.5 + 0.3 * coverage,
+                                 "requested elements appear on every page")
+        return RevisionScope("global", everything, 0.2, "no page, component or content match")
+
+
+def analyze_revision(drafts: Dict[str, str], feedback: str) -> RevisionScope:
+    return RevisionIndex(drafts).analyze(feedback)
+
+
+# ============================================
+# ✂️ SECTION INDEX
+# ============================================
+
+SECTION_TAGS = {"header", "nav", "main", "section", "footer", "aside", "article", "form", "table", "figure"}
+
+
+class Section:
+    """One landmark subtree of a page: html[start:end] is its exact source"""
+
+    def __init__(self, tag: str, label: str, start: int, parent: Optional["Section"]):
+        self.tag = tag
+        self.label = label
+        self.start = start
+        self.end = -1
+        self.parent = parent
+        self.words: Set[str] = set()
+        self.tags: Set[str] = set()
+        self.text: List[str] = []
+
+    @property
+    def path(self) -> str:
+        labels, node = [], self
+        while node is not None:
+            labels.append(node.label)
+            node = node.parent
+        return " > ".join(reversed(labels))
+
+    def contains(self, other: "Section") -> bool:
+        return self.start <= other.start and other.end <= self.end and self is not other
+
+    def __repr__(self):
+        return f"Section({self.path!r}, {self.start}:{self.end})"
+
+
+class _SectionParser(_DraftParser):
+    """Offsets and contents of every landmark element"""
+
+    def __init__(self, html: str):
+        super().__init__()
+        self.html = html
+        self._line_starts = [0] + [m.end() for m in re.finditer("\n", html)]
+        self._open: List[tuple] = []  # (tag, Section or None)
+        self.sections: List[Section] = []
+
+    def _offset(self) -> int:
+        line, col = self.getpos()
+        return self._line_starts[line - 1] + col
+
+    def _enclosing(self) -> Optional[Section]:
+        for _, section in reversed(self._open):
+            if section is not None:
+                return section
+        return None
+
+    def handle_starttag(self, tag, attrs):
+        names_before, text_before = set(self.names), len(self.text)
+        super().handle_starttag(tag, attrs)
+        new_words = (self.names - names_before) | {
+            w for chunk in self.text[text_before:] for w in WORD_RE.findall(chunk.lower())}
+        for _, section in self._open:
+            if section is not None:
+                section.tags.add(tag)
+                section.words |= new_words
+        if tag in VOID_TAGS:
+            return
+        attrs = dict(attrs)
+        section = None
+        if tag in SECTION_TAGS or attrs.get("id"):
+            label = tag + (f"#{attrs['id']}" if attrs.get("id") else "")
+            section = Section(tag, label, self._offset(), self._enclosing())
+            section.words |= new_words
+        self._open.append((tag, section))
+
+    def handle_startendtag(self, tag, attrs):
+        self.handle_starttag(tag, attrs)
+        if tag not in VOID_TAGS:
+            self._open.pop()
+
+    def handle_endtag(self, tag):
+        super().handle_endtag(tag)
+        # Unclosed children close implicitly; stray end tags are ignored
+        for depth in range(len(self._open) - 1, -1, -1):
+            if self._open[depth][0] != tag:
+                continue
+            section = self._open[depth][1]
+            if section is not None:
+                start = self._offset()
+                section.end = self.html.find(">", start) + 1
+                self.sections.append(section)
+            # Implicitly closed sections have no reliable end: drop them
+            del self._open[depth:]
+            break
+
+    def handle_data(self, data):
+        super().handle_data(data)
+        if self._skip or not data.strip():
+            return
+        words = set(WORD_RE.findall(data.lower()))
+        for _, section in self._open:
+            if section is not None:
+                section.words |= words
+                section.text.append(data)
+
+
+class SectionIndex:
+    """Landmark subtrees of one page, for section-level revisions"""
+
+    def __init__(self, html: str):
+        self.html = html
+        parser = _SectionParser(html)
+        parser.feed(html or "")
+        parser.close()
+        self.sections = sorted(parser.sections, key=lambda s: s.start)
+
+    def _matches(self, section: Section, word: str) -> bool:
+        if word in section.words or singular(word) in section.words:
+            return True
+        return bool(ELEMENT_TERMS.get(word, set()) & (section.tags | {section.tag}))
+
+    def locate(self, feedback: str, ignore: Iterable[str] = ()) -> List[Section]:
+        """Smallest disjoint sections holding the strongest evidence for `feedback` ([] if none)"""
+        if not self.sections:
+            return []
+        ignore = {w.lower() for w in ignore}
+        words = [w for w in dict.fromkeys(WORD_RE.findall(feedback.lower()))
+                 if w not in STOPWORDS and w not in GLOBAL_STYLE_TERMS and w not in ignore and len(w) > 1]
+        phrases = [p.strip().lower() for p in QUOTED_RE.findall(feedback) if p.strip()]
+
+        total = len(self.sections)
+        scores = {id(section): 0.0 for section in self.sections}
+        for word in words:
+            hits = [section for section in self.sections if self._matches(section, word)]
+            for section in hits:
+                scores[id(section)] += math.log(1 + total / len(hits))
+        for phrase in phrases:
+            for section in self.sections:
+                if phrase in " ".join(" ".join(section.text).split()).lower():
+                    scores[id(section)] += 2 * math.log(1 + total)
+
+        best = max(scores.values())
+        if best <= 0:
+            return []
+        candidates = [section for section in self.sections if scores[id(section)] >= best - 1e-9]
+        return [section for section in candidates if not any(section.contains(other) for other in candidates)]
+
+
+def splice(html: str, section: Section, fragment: str) -> str:
+    return html[:section.start] + fragment + html[section.end:]
+
+
+def matching_source(fragment: str, sources: Dict[str, str], threshold: float = 0.6) -> Optional[str]:
+    """Name of the source (e.g. a generated component) sharing most of `fragment`'s visible words"""
+    parser = _DraftParser()
+    parser.feed(fragment)
+    parser.close()
+    words = set(WORD_RE.findall(" ".join(parser.text).lower()))
+    if not words:
+        return None
+    best, best_score = None, threshold
+    for name, code in sources.items():
+        source = _DraftParser()
+        source.feed(code or "")
+        source.close()
+        score = len(words & set(WORD_RE.findall(" ".join(source.text).lower()))) / len(words)
+        if score >= best_score:
+            best, best_score = name, score
+    return best
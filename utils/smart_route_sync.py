@@ -7,6 +7,11 @@ Never removes valid routes, only fixes broken ones
 import os
 import re
 
+try:
+    from utils.generation_state import current_state
+except ImportError:
+    from generation_state import current_state
+
 
 def get_all_routes():
     """Get all routes from web.php with their paths"""
@@ -46,9 +51,14 @@ def extract_nav_links_from_draft():
         return []
     
     first_draft = os.path.join(draft_dir, draft_files[0])
+    page_name = draft_files[0][:-len('.html')]
     
-    with open(first_draft, 'r', encoding='utf-8') as f:
-        content = f.read()
+    state = current_state()
+    if state is not None and page_name in state.drafts:
+        content = state.draft(page_name)
+    else:
+        with open(first_draft, 'r', encoding='utf-8') as f:
+            content = f.read()
     
     # Extract nav links
     nav_links = []
@@ -6,6 +6,11 @@ Ensures components use classes that actually exist in CSS
 import os
 import re
 
+try:
+    from utils.class_usage import ClassIndex
+except ImportError:
+    from class_usage import ClassIndex
+
 
 def extract_css_classes_from_layout():
     """Extract all CSS class definitions from layout"""
@@ -45,52 +50,20 @@ def extract_css_classes_from_layout():
     return class_definitions
 
 
-def find_undefined_classes_in_components():
-    """Find classes used in components that don't exist in CSS"""
-    components_dir = "my-laravel/resources/views/components"
-    
-    if not os.path.exists(components_dir):
-        return {}
-    
-    css_classes = extract_css_classes_from_layout()
-    defined_classes = set(css_classes.keys())
-    
-    # Extract simple class names (without pseudo-selectors)
-    simple_classes = {c.split(':')[0] for c in defined_classes}
-    
-    undefined_usage = {}
-    
-    for filename in os.listdir(components_dir):
-        if filename.endswith('.blade.php'):
-            filepath = os.path.join(components_dir, filename)
-            
-            with open(filepath, 'r', encoding='utf-8') as f:
-                content = f.read()
-            
-            # Find all class attributes
-            class_attrs = re.findall(r'class=["\']([^"\']+)["\']', content)
-            
-            for class_attr in class_attrs:
-                classes = class_attr.split()
-                
-                for cls in classes:
-                    # Skip Tailwind utility classes
-                    if cls.startswith(('text-', 'bg-', 'p-', 'm-', 'flex', 'grid', 'hidden', 'block', 'inline', 'w-', 'h-', 'rounded', 'shadow', 'border', 'hover:', 'focus:', 'md:', 'lg:', 'xl:', 'sm:')):
-                        continue
-                    
-                    # Check if this custom class exists in CSS
-                    if cls not in simple_classes:
-                        if filename not in undefined_usage:
-                            undefined_usage[filename] = []
-                        undefined_usage[filename].append(cls)
-    
-    return undefined_usage
+def find_undefined_classes_in_components(laravel_path: str = "my-laravel", index: ClassIndex = None):
+    """Find classes used in components that aren't Tailwind utilities and don't exist in CSS"""
+    index = index or ClassIndex.from_project(laravel_path)
+    return {
+        filename.split("/", 1)[1]: classes
+        for filename, classes in index.undefined_by_file("components/").items()
+    }
 
 
-def suggest_fixes():
+def suggest_fixes(laravel_path: str = "my-laravel", index: ClassIndex = None):
     """Suggest fixes for undefined classes"""
-    undefined = find_undefined_classes_in_components()
-    css_classes = extract_css_classes_from_layout()
+    index = index or ClassIndex.from_project(laravel_path)
+    undefined = find_undefined_classes_in_components(laravel_path, index)
+    css_classes = index.defined
     
     if not undefined:
         print("✅ All custom classes are defined in CSS!")
@@ -123,6 +96,17 @@ def suggest_fixes():
     print("   3. Run 'python utils/fix_component_styling.py' to auto-fix")
 
 
+def sync_all_css(laravel_path: str = "my-laravel"):
+    """Report undefined and dead classes across all views (one index pass)"""
+    index = ClassIndex.from_project(laravel_path)
+    suggest_fixes(laravel_path, index)
+    dead = index.dead()
+    if dead:
+        print(f"🗑️  {len(dead)} CSS classes are never used: {', '.join(sorted(dead)[:10])}"
+              f"{' ...' if len(dead) > 10 else ''}")
+    return {"undefined": index.undefined(), "dead": dead}
+
+
 def main():
     print("🔍 Syncing CSS classes...\n")
     
@@ -138,7 +122,7 @@ def main():
     
     print("\n" + "=" * 60 + "\n")
     
-    suggest_fixes()
+    sync_all_css()
 
 
 if __name__ == "__main__":
@@ -0,0 +1,276 @@
+"""
+GenLaravel Tracing
+Lightweight per-generation tracing: nested spans (job → stage → agent →
+LLM attempt / fixer / file write) propagated with contextvars and exported
+as a flame-style JSON timeline per job.
+
+Usage:
+    trace = start_trace("multi", prompt=prompt)
+    with span("prompt-expander", kind="stage") as s:
+        prompt_expander(prompt)          # @traced agents nest under the stage
+    print(s.duration)                    # real seconds, also when not tracing
+    finish_trace(trace)                  # writes backend/data/traces/<id>.json
+
+Threads don't inherit contextvars: start them with bind(fn) so spans in the
+worker nest under the caller's span.
+
+ENV variables (optional):
+- TRACE_DIR=backend/data/traces   Where traces are written
+- TRACE_KEEP=50                   Number of trace files kept
+"""
+
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from datetime import datetime
+from pathlib import Path
+from typing import Optional
+
+TRACE_DIR = Path(os.environ.get("TRACE_DIR", Path(__file__).parent.parent / "backend" / "data" / "traces"))
+TRACE_KEEP = int(os.environ.get("TRACE_KEEP", "50"))
+
+_current_trace = contextvars.ContextVar("genlaravel_trace", default=None)
+_current_span = contextvars.ContextVar("genlaravel_span", default=None)
+
+
+def _new_id() -> str:
+    return uuid.uuid4().hex[:16]
+
+
+class Span:
+    """One timed operation; detached spans (no active trace) still measure time"""
+
+    def __init__(self, name: str, kind: str, parent_id: Optional[str] = None, attrs: Optional[dict] = None):
+        self.span_id = _new_id()
+        self.parent_id = parent_id
+        self.name = name
+        self.kind = kind
+        self.attrs = attrs or {}
+        self.status = "ok"
+        self.error = ""
+        self.start = time.perf_counter()
+        self.end = None
+        self._token = None
+
+    @property
+    def duration(self) -> float:
+        """Seconds elapsed (so far, if still open)"""
+        return (self.end if self.end is not None else time.perf_counter()) - self.start
+
+    def close(self, error: Optional[BaseException] = None):
+        if self.end is None:
+            self.end = time.perf_counter()
+        if error is not None:
+            self.status = "error"
+            self.error = str(error)[:200]
+
+
+class Trace:
+    """All spans of one generation job"""
+
+    def __init__(self, name: str, attrs: Optional[dict] = None):
+        self.trace_id = _new_id()
+        self.name = name
+        self.started_at = datetime.now().isoformat()
+        self.root = Span(name, "job", attrs=attrs)
+        self.spans = [self.root]
+        self._lock = threading.Lock()
+
+    def add(self, span: Span):
+        with self._lock:
+            self.spans.append(span)
+
+    def to_dict(self) -> dict:
+        """Timeline with offsets (seconds from job start) and nesting depth"""
+        with self._lock:
+            spans = list(self.spans)
+        origin = self.root.start
+        depth = {self.root.span_id: 0}
+        rows = []
+        for s in sorted(spans, key=lambda item: item.start):
+            depth[s.span_id] = depth.get(s.parent_id, -1) + 1 if s.parent_id else 0
+            rows.append({
+                "id": s.span_id,
+                "parent_id": s.parent_id,
+                "name": s.name,
+                "kind": s.kind,
+                "depth": depth[s.span_id],
+                "start_s": round(s.start - origin, 4),
+                "duration_s": round(s.duration, 4),
+                "status": s.status,
+                "error": s.error,
+                "attrs": s.attrs,
+            })
+        return {
+            "trace_id": self.trace_id,
+            "name": self.name,
+            "started_at": self.started_at,
+            "duration_s": round(self.root.duration, 4),
+            "status": self.root.status,
+            "attrs": self.root.attrs,
+            "spans": rows,
+        }
+
+
+def current_trace() -> Optional[Trace]:
+    return _current_trace.get()
+
+
+def start_trace(name: str, **attrs) -> Trace:
+    """Begin a job trace in the current context"""
+    trace = Trace(name, attrs)
+    _current_trace.set(trace)
+    _current_span.set(trace.root)
+    return trace
+
+
+def finish_trace(trace: Trace, error: Optional[BaseException] = None, export: bool = True) -> dict:
+    """Close the job span, detach it from the context and (optionally) write it"""
+    if trace.root.end is not None:
+        return trace.to_dict()
+    with trace._lock:
+        unfinished = [s for s in trace.spans if s.end is None and s is not trace.root]
+    for s in unfinished:
+        s.close(error or RuntimeError("span not finished"))
+    trace.root.close(error)
+    if _current_trace.get() is trace:
+        _current_trace.set(None)
+        _current_span.set(None)
+    timeline = trace.to_dict()
+    if export:
+        try:
+            export_trace(timeline)
+        except Exception as e:
+            print(f"⚠️ Failed to export trace: {e}")
+    return timeline
+
+
+def begin_span(name: str, kind: str = "stage", **attrs) -> Span:
+    """Open a child of the current span and make it current (pair with end_span)"""
+    trace = _current_trace.get()
+    parent = _current_span.get()
+    s = Span(name, kind, parent.span_id if parent else None, attrs)
+    if trace is not None:
+        s._token = _current_span.set(s)
+        trace.add(s)
+    return s
+
+
+def end_span(s: Span, error: Optional[BaseException] = None) -> float:
+    """Close a span opened with begin_span; returns its duration in seconds"""
+    s.close(error)
+    token = s._token
+    if token is not None:
+        s._token = None
+        try:
+            _current_span.reset(token)
+        except ValueError:
+            # Closed from another context (e.g. a worker thread)
+            pass
+    return s.duration
+
+
+@contextmanager
+def span(name: str, kind: str = "agent", **attrs):
+    """Time a block as a child of the current span"""
+    s = begin_span(name, kind, **attrs)
+    try:
+        yield s
+    except BaseException as e:
+        end_span(s, e)
+        raise
+    finally:
+        end_span(s)
+
+
+def record_span(name: str, kind: str, duration_s: float, error: str = "", **attrs):
+    """Add an already-finished span (e.g. an LLM attempt timed elsewhere)"""
+    trace = _current_trace.get()
+    if trace is None:
+        return
+    parent = _current_span.get()
+    s = Span(name, kind, parent.span_id if parent else None, attrs)
+    s.start = time.perf_counter() - duration_s
+    s.end = s.start + duration_s
+    if error:
+        s.status = "error"
+        s.error = error[:200]
+    trace.add(s)
+
+
+def traced(name: Optional[str] = None, kind: str = "agent"):
+    """Decorator: run the function inside a span named after it"""
+    def decorator(func):
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with span(span_name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+def bind(func):
+    """Carry the current trace context into another thread"""
+    context = contextvars.copy_context()
+
+    @functools.wraps(func)
+    def wrapper(*args, **kwargs):
+        return context.run(func, *args, **kwargs)
+    return wrapper
+
+
+# ============================================
+# 📁 EXPORT
+# ============================================
+
+def export_trace(timeline: dict) -> Path:
+    """Write a trace timeline and prune old ones"""
+    TRACE_DIR.mkdir(parents=True, exist_ok=True)
+    path = TRACE_DIR / f"{timeline['trace_id']}.json"
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(timeline, f, indent=2, ensure_ascii=False)
+
+    traces = sorted(TRACE_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime)
+    for old in traces[:-TRACE_KEEP] if TRACE_KEEP > 0 else []:
+        old.unlink(missing_ok=True)
+    return path
+
+
+def list_traces() -> list:
+    """Summaries of exported traces, newest first"""
+    if not TRACE_DIR.exists():
+        return []
+    summaries = []
+    for path in sorted(TRACE_DIR.glob("*.json"), key=lambda p: p.stat().st_mtime, reverse=True):
+        try:
+            with open(path, "r", encoding="utf-8") as f:
+                timeline = json.load(f)
+        except (OSError, json.JSONDecodeError):
+            continue
+        summaries.append({
+            "trace_id": timeline["trace_id"],
+            "name": timeline["name"],
+            "started_at": timeline["started_at"],
+            "duration_s": timeline["duration_s"],
+            "status": timeline["status"],
+            "spans": len(timeline["spans"]),
+        })
+    return summaries
+
+
+def load_trace(trace_id: str) -> Optional[dict]:
+    """Full timeline of one exported trace"""
+    if not trace_id.isalnum():
+        return None
+    path = TRACE_DIR / f"{trace_id}.json"
+    if not path.exists():
+        return None
+    with open(path, "r", encoding="utf-8") as f:
+        return json.load(f)
@@ -35,6 +35,12 @@ def clean_laravel_generated_files():
                 os.remove(file_path)
                 print(f"🗑️ Removed: {file}")
 
+    # Clean bundled assets
+    assets_path = os.path.join(laravel_root, "public/assets")
+    if os.path.exists(assets_path):
+        shutil.rmtree(assets_path)
+        print("🗑️ Cleaned: public/assets/")
+
     # Reset routes to default
     reset_routes()
 
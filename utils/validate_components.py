@@ -6,14 +6,28 @@ Detects common styling issues and provides fixes
 import os
 import re
 
+try:
+    from utils.class_usage import ClassIndex
+except ImportError:
+    from class_usage import ClassIndex
 
-def validate_component(filepath, available_css_classes):
+
+def validate_component(filepath, available_css_classes, undefined_classes=None):
     """Validate a single component and return issues"""
     with open(filepath, 'r', encoding='utf-8') as f:
         content = f.read()
     
     issues = []
     
+    # 0. Classes that are neither Tailwind utilities nor defined in CSS
+    if undefined_classes:
+        issues.append({
+            'type': 'undefined_class',
+            'severity': 'warning',
+            'message': f'Undefined classes: {", ".join(undefined_classes)}',
+            'fix': 'Define them in the layout CSS or use Tailwind utilities'
+        })
+    
     # 1. Check for inline background-image styles
     if 'style="background-image:' in content or "style='background-image:" in content:
         if 'hero' in available_css_classes:
@@ -84,19 +98,10 @@ def validate_all_components():
         print("❌ Components directory not found")
         return
     
-    # Get available CSS classes from layout
-    layout_path = "my-laravel/resources/views/layouts/app.blade.php"
-    available_classes = set()
-    
-    if os.path.exists(layout_path):
-        with open(layout_path, 'r', encoding='utf-8') as f:
-            layout_content = f.read()
-        
-        style_match = re.search(r'<style>(.*?)</style>', layout_content, re.DOTALL)
-        if style_match:
-            css_content = style_match.group(1)
-            class_pattern = r'\.([a-zA-Z0-9_-]+)\s*\{'
-            available_classes = set(re.findall(class_pattern, css_content))
+    # Get available CSS classes (layout, views, bundled assets) in one index pass
+    index = ClassIndex.from_project("my-laravel")
+    available_classes = index.defined_classes()
+    undefined_by_file = index.undefined_by_file("components/")
     
     print(f"🔍 Validating components...")
     print(f"   📋 Available CSS classes: {len(available_classes)}\n")
@@ -107,7 +112,7 @@ def validate_all_components():
     for filename in sorted(os.listdir(components_dir)):
         if filename.endswith('.blade.php'):
             filepath = os.path.join(components_dir, filename)
-            issues = validate_component(filepath, available_classes)
+            issues = validate_component(filepath, available_classes, undefined_by_file.get(f"components/{filename}"))
             
             if issues:
                 components_with_issues += 1
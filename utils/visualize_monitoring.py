@@ -5,12 +5,16 @@ Generates charts and graphs from monitoring data
 """
 
 import json
+import sys
 import matplotlib.pyplot as plt
 import matplotlib.patches as mpatches
 from pathlib import Path
 from datetime import datetime
 import numpy as np
 
+sys.path.insert(0, str(Path(__file__).parent.parent))
+from backend.latency_sketch import summarize_series
+
 # Paths
 DATA_FILE = Path(__file__).parent.parent / "genlaravel_monitoring_2025-12-16 (3).json"
 OUTPUT_DIR = Path(__file__).parent.parent / "frontend/docs/charts"
@@ -142,6 +146,41 @@ def plot_vendor_comparison(data):
     plt.close()
     print("✅ Created: vendor_comparison.png")
 
+def plot_latency_percentiles(data, window='all'):
+    """Grouped bars of p50/p90/p99 latency, TTFT and tokens/sec per provider and per agent"""
+    sketches = data.get('latency_sketches', {})
+    groups = [(group, sketches.get(group, {})) for group in ('provider', 'agent')]
+    groups = [(group, series) for group, series in groups if series]
+    if not groups:
+        print("⚠️ Skipped: latency_percentiles.png (no latency sketches recorded yet)")
+        return
+    
+    metrics = [('latency_ms', 'Latency (s)', 1000), ('ttft_ms', 'Time to First Token (s)', 1000),
+               ('tokens_per_sec', 'Throughput (tokens/s)', 1)]
+    percentiles = [('p50', COLORS['success']), ('p90', COLORS['warning']), ('p99', COLORS['danger'])]
+    
+    fig, axes = plt.subplots(len(groups), len(metrics), figsize=(16, 4.5 * len(groups)), squeeze=False)
+    for row, (group, series_by_name) in enumerate(groups):
+        names = sorted(series_by_name)
+        summaries = {name: summarize_series(series_by_name[name], windows=(window,))[window] for name in names}
+        x = np.arange(len(names))
+        width = 0.25
+        
+        for col, (metric, label, scale) in enumerate(metrics):
+            ax = axes[row][col]
+            for i, (pct, color) in enumerate(percentiles):
+                values = [(summaries[name][metric][pct] or 0) / scale for name in names]
+                ax.bar(x + (i - 1) * width, values, width, label=pct, color=color)
+            ax.set_title(f'{label} by {group} ({window})', fontweight='bold', fontsize=10)
+            ax.set_xticks(x)
+            ax.set_xticklabels(names, rotation=30, ha='right', fontsize=8)
+            ax.legend(fontsize=8)
+    
+    plt.tight_layout()
+    plt.savefig(OUTPUT_DIR / 'latency_percentiles.png', dpi=120, bbox_inches='tight')
+    plt.close()
+    print("✅ Created: latency_percentiles.png")
+
 def plot_task_progress(data):
     """Horizontal bar chart for task progress"""
     tasks = data['task_monitoring']
@@ -383,6 +422,7 @@ def main():
     plot_issue_severity(data)
     plot_issue_status(data)
     plot_vendor_comparison(data)
+    plot_latency_percentiles(data)
     plot_task_progress(data)
     plot_generation_stats(data)
     plot_vendor_quality_scores(data)